@@ -0,0 +1,108 @@
+"""Ruta rápida de autenticación para los usuarios con sesión.
+
+Cada petición con sesión leía la fila de la sesión y después la del
+``Usuario``; los dashboards consultaban además la banda del
+representante. Con ``SESSION_ENGINE = 'cached_db'`` la sesión se lee del
+cache, y ``BackendCacheado`` completa la ruta: guarda en el cache el
+perfil del usuario (la fila de ``Usuario`` con sus roles y el id de su
+banda), de modo que ``role_required`` y los dashboards autorizan sin
+consultar la base.
+
+El perfil se invalida desde las señales (``apps/bandas/signals.py``) al
+guardar o borrar el usuario y cuando una banda cambia de representante.
+Para que esas invalidaciones (y el logout) lleguen a todos los procesos
+el cache debe ser compartido: settings solo activa este backend y las
+sesiones cacheadas con ``CACHE_URL`` (ver ``apps/bandas/checks.py``).
+Como la sesión, el perfil incluye el hash de la contraseña (Django lo
+usa para verificar la sesión): el cache no debe ser accesible desde
+afuera.
+"""
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+# Segundos que se cachea el perfil; acota cualquier desfase que deje una
+# invalidación concurrente con una lectura.
+CACHE_TIMEOUT = 60 * 15
+
+# Prefijo de las claves de cache de los perfiles.
+PREFIJO = 'perfil'
+
+
+def clave_perfil(usuario_id):
+    """Retorna la clave de cache del perfil de un usuario."""
+    return f'{PREFIJO}:{usuario_id}'
+
+
+def invalidar_perfiles(*usuario_ids):
+    """Descarta los perfiles cacheados al confirmarse la transacción.
+
+    Args:
+        *usuario_ids: IDs de los usuarios modificados; se ignoran los
+            ``None``.
+    """
+    claves = [clave_perfil(pk) for pk in usuario_ids if pk is not None]
+    if claves:
+        transaction.on_commit(lambda: cache.delete_many(claves))
+
+
+def banda_id(usuario):
+    """Retorna el id de la banda que representa un usuario.
+
+    Los usuarios cargados por ``BackendCacheado`` ya traen el dato; para
+    los demás (por ejemplo, recién autenticados) se consulta.
+
+    Args:
+        usuario: Instancia de ``Usuario``.
+
+    Returns:
+        ID de la banda, o ``None`` si el usuario no representa ninguna.
+    """
+    if not hasattr(usuario, 'id_banda'):
+        from apps.bandas.models import Banda
+
+        usuario.id_banda = (
+            Banda.objects.filter(representante=usuario)
+            .values_list('id', flat=True).first()
+        )
+    return usuario.id_banda
+
+
+class BackendCacheado(ModelBackend):
+    """Backend de modelo que cachea el usuario de cada sesión.
+
+    La autenticación con contraseña y los permisos son los de
+    ``ModelBackend``; solo cambia la carga del usuario en cada petición.
+    """
+
+    def _consulta(self, user_id):
+        """Retorna la consulta del usuario con el id de su banda."""
+        from django.contrib.auth import get_user_model
+
+        return get_user_model()._default_manager.annotate(
+            id_banda=F('banda__id'),
+        ).filter(pk=user_id)
+
+    def get_user(self, user_id):
+        """Retorna el usuario desde el cache, o lo carga y lo cachea."""
+        clave = clave_perfil(user_id)
+        usuario = cache.get(clave)
+        if usuario is None:
+            usuario = self._consulta(user_id).first()
+            if usuario is None:
+                return None
+            cache.set(clave, usuario, CACHE_TIMEOUT)
+        return usuario if self.user_can_authenticate(usuario) else None
+
+    async def aget_user(self, user_id):
+        """Versión asíncrona de ``get_user``."""
+        clave = clave_perfil(user_id)
+        usuario = await cache.aget(clave)
+        if usuario is None:
+            usuario = await self._consulta(user_id).afirst()
+            if usuario is None:
+                return None
+            await cache.aset(clave, usuario, CACHE_TIMEOUT)
+        return usuario if self.user_can_authenticate(usuario) else None
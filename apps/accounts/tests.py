@@ -1,3 +1,124 @@
 """Tests para la aplicación accounts."""
 
-from django.test import TestCase  # noqa: F401
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.bandas.checks import sesiones_sin_cache_compartido
+
+from .models import Usuario
+
+# Configuración de sesiones que settings usa con un cache compartido.
+SESIONES_CACHEADAS = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+    'AUTHENTICATION_BACKENDS': [
+        'apps.accounts.autenticacion.BackendCacheado',
+        'django.contrib.auth.backends.ModelBackend',
+    ],
+}
+
+# Y la que usa con un cache por proceso.
+SESIONES_EN_BASE = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+    'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+}
+
+
+def proceso(ubicacion):
+    """Simula un proceso del servidor con el cache en ``ubicacion``.
+
+    Cada ``LocMemCache`` con otra ubicación es un cache aparte, como el
+    de otro proceso; con la misma ubicación, dos procesos comparten el
+    cache como con Redis.
+    """
+    return override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': ubicacion,
+    }})
+
+
+class SesionesEntreProcesosTests(TestCase):
+    """Verifica que logout y cambio de contraseña lleguen a todo proceso.
+
+    El cliente conserva la cookie de sesión vieja y la vuelve a enviar a
+    otro proceso después de cerrar la sesión o cambiar la contraseña.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea un representante."""
+        cls.usuario = Usuario.objects.create_user(
+            username='viajero', password='clave-segura',
+            is_representative=True,
+        )
+
+    def setUp(self):
+        """Vacía los caches de los procesos simulados."""
+        for ubicacion in ('proceso-a', 'proceso-b', 'compartido'):
+            with proceso(ubicacion):
+                caches['default'].clear()
+
+    def iniciar_en(self, ubicacion):
+        """Inicia sesión y visita el dashboard desde un proceso.
+
+        Returns:
+            Valor de la cookie de sesión.
+        """
+        with proceso(ubicacion):
+            self.client.login(username='viajero', password='clave-segura')
+            respuesta = self.client.get(reverse('representative_dashboard'))
+            self.assertEqual(respuesta.status_code, 200)
+        return self.client.cookies['sessionid'].value
+
+    def autenticado_en(self, ubicacion, sesion):
+        """Indica si un proceso acepta la cookie de sesión dada."""
+        self.client.cookies['sessionid'] = sesion
+        with proceso(ubicacion):
+            respuesta = self.client.get(reverse('representative_dashboard'))
+        return respuesta.status_code == 200
+
+    def verificar_logout(self, a, b):
+        """Cierra la sesión en ``b`` y la reutiliza en ``a``."""
+        sesion = self.iniciar_en(a)
+        with proceso(b):
+            self.client.get(reverse('logout'))
+        self.assertFalse(self.autenticado_en(a, sesion))
+
+    def verificar_cambio_de_contrasena(self, a, b):
+        """Cambia la contraseña en ``b`` y reutiliza la sesión en ``a``."""
+        sesion = self.iniciar_en(a)
+        self.assertTrue(self.autenticado_en(a, sesion))
+        with proceso(b), self.captureOnCommitCallbacks(execute=True):
+            usuario = Usuario.objects.get(pk=self.usuario.pk)
+            usuario.set_password('otra-clave-segura')
+            usuario.save()
+        self.assertFalse(self.autenticado_en(a, sesion))
+
+    @override_settings(**SESIONES_EN_BASE)
+    def test_logout_con_caches_por_proceso(self):
+        """Sin cache compartido la sesión vive en la base."""
+        self.verificar_logout('proceso-a', 'proceso-b')
+
+    @override_settings(**SESIONES_EN_BASE)
+    def test_contrasena_con_caches_por_proceso(self):
+        """Sin cache compartido el usuario se lee de la base."""
+        self.verificar_cambio_de_contrasena('proceso-a', 'proceso-b')
+
+    @override_settings(**SESIONES_CACHEADAS)
+    def test_logout_con_cache_compartido(self):
+        """El logout borra la sesión del cache que leen los demás."""
+        self.verificar_logout('compartido', 'compartido')
+
+    @override_settings(**SESIONES_CACHEADAS)
+    def test_contrasena_con_cache_compartido(self):
+        """Guardar el usuario descarta su perfil cacheado para todos."""
+        self.verificar_cambio_de_contrasena('compartido', 'compartido')
+
+    def test_sesiones_cacheadas_exigen_cache_compartido(self):
+        """Las sesiones o usuarios cacheados en un cache local se rechazan."""
+        with proceso('proceso-a'):
+            with override_settings(**SESIONES_CACHEADAS):
+                errores = sesiones_sin_cache_compartido(None)
+                self.assertEqual([e.id for e in errores], ['bandas.E001'])
+            with override_settings(**SESIONES_EN_BASE):
+                self.assertEqual(sesiones_sin_cache_compartido(None), [])
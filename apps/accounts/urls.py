@@ -4,11 +4,17 @@ Define las rutas para la página de aterrizaje, inicio de sesión
 y cierre de sesión.
 """
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Bajo ASGI la landing se atiende con su versión asíncrona.
+landing_page = (
+    views.landing_page_async if settings.VISTAS_ASYNC else views.landing_page
+)
+
 urlpatterns = [
-    path('', views.landing_page, name='landing_page'),
+    path('', landing_page, name='landing_page'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
 ]
\ No newline at end of file
@@ -6,16 +6,76 @@ y cierre de sesión de los usuarios.
 
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 
-from apps.bandas.models import Banda, Evento
+from apps.bandas.asincronia import en_bucle, resolver_usuario
+from apps.bandas.eventos import proximos as proximos_eventos
+from apps.bandas.ranking import atop_bandas as atop_bandas_ranking
+from apps.bandas.ranking import top_bandas as top_bandas_ranking
+from apps.bandas.tarjetas import aprecargar as aprecargar_tarjetas
+from apps.bandas.tarjetas import precargar as precargar_tarjetas
+from apps.bandas.versiones import versiones
+
+# Sellos de versión de los fragmentos cacheados de la landing.
+SELLOS_LANDING = ('banda', 'ranking', 'imagenes', 'evento')
+
+
+def _cargar_top_bandas():
+    """Lee el top de bandas del ranking y precarga sus tarjetas."""
+    bandas = top_bandas_ranking()
+    precargar_tarjetas(bandas)
+    return bandas
+
+
+def _contexto_landing():
+    """Arma el contexto de la landing con los datos sin consultar.
+
+    Returns:
+        Diccionario con el top de bandas y los eventos como objetos
+        perezosos: solo se consultan si su fragmento no está en el cache.
+    """
+    return {
+        # Top 10 bandas por descargas (solo con demos disponibles),
+        # leído del ranking materializado.
+        'top_bandas': SimpleLazyObject(_cargar_top_bandas),
+        # Próximos 5 eventos (con su organizador, que muestra la
+        # plantilla), leídos por el índice de fecha.
+        'eventos_proximos': proximos_eventos()[:5],
+        # Los próximos eventos cambian también al pasar el día.
+        'hoy': timezone.localdate().isoformat(),
+        'versiones': versiones(*SELLOS_LANDING),
+    }
+
+
+def _claves_fragmentos(context):
+    """Retorna las claves de cache de los fragmentos de la landing.
+
+    Deben coincidir con las etiquetas ``{% cache %}`` de
+    ``accounts/landing_page.html``.
+    """
+    sellos = context['versiones']
+    return {
+        'top_bandas': make_template_fragment_key('landing_top_bandas', [
+            sellos['banda'], sellos['ranking'], sellos['imagenes'],
+        ]),
+        'eventos_proximos': make_template_fragment_key(
+            'landing_eventos', [sellos['evento'], context['hoy']],
+        ),
+    }
 
 
 def landing_page(request):
     """Renderiza la página de aterrizaje principal del sitio.
 
-    Muestra el top 10 de bandas más descargadas y los últimos
-    eventos musicales locales.
+    Muestra el top 10 de bandas más descargadas y los próximos
+    eventos musicales locales. Ambas secciones se cachean como
+    fragmentos cuya clave incluye sellos de versión que las señales
+    incrementan al cambiar bandas, ranking, imágenes o eventos; con el
+    cache caliente, un visitante anónimo no genera consultas.
 
     Args:
         request: Objeto HttpRequest de Django.
@@ -23,21 +83,37 @@ def landing_page(request):
     Returns:
         HttpResponse con el template de la landing page.
     """
-    # Top 10 bandas por descargas (solo con demos disponibles)
-    top_bandas = Banda.objects.filter(
-        demos__isnull=False,
-        estado='aprobado'
-    ).order_by('-descargas')[:10]
-
-    # Últimos 5 eventos
-    eventos_recientes = Evento.objects.all()[:5]
-
-    context = {
-        'top_bandas': top_bandas,
-        'eventos_recientes': eventos_recientes,
-    }
+    return render(request, 'accounts/landing_page.html', _contexto_landing())
+
+
+async def landing_page_async(request):
+    """Versión asíncrona de ``landing_page`` para despliegues ASGI.
+
+    Consulta el cache de los dos fragmentos de una vez; solo los datos
+    de los fragmentos ausentes se cargan, con el ORM asíncrono, antes de
+    renderizar en el event loop.
 
-    return render(request, 'accounts/landing_page.html', context)
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        La misma respuesta que ``landing_page``.
+    """
+    await resolver_usuario(request)
+    context = _contexto_landing()
+    claves = _claves_fragmentos(context)
+    cacheados = await cache.aget_many(claves.values())
+    if claves['top_bandas'] not in cacheados:
+        bandas = await atop_bandas_ranking()
+        await aprecargar_tarjetas(bandas)
+        context['top_bandas'] = bandas
+    if claves['eventos_proximos'] not in cacheados:
+        context['eventos_proximos'] = [
+            evento async for evento in context['eventos_proximos']
+        ]
+    return await en_bucle(
+        render, request, 'accounts/landing_page.html', context,
+    )
 
 
 def login_view(request):
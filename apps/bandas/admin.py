@@ -1,10 +1,23 @@
 """Configuración del panel de administración para la aplicación bandas."""
 
 from django.contrib import admin
+from django.utils.html import format_html
+
+from .templatetags.imagenes import redimensionar
 
 from .models import Banda, EstiloMusical, Flyer, ImagenBanda, Integrante, Evento
 
 
+def miniatura(archivo):
+    """Retorna una miniatura de 64x64 para las listas del admin."""
+    if not archivo:
+        return '-'
+    return format_html(
+        '<img src="{}" width="64" height="64" alt="" loading="lazy">',
+        redimensionar(archivo, '64x64'),
+    )
+
+
 class IntegranteInline(admin.TabularInline):
     """Inline para gestionar integrantes desde la vista de Banda."""
 
@@ -30,11 +43,19 @@ class FlyerInline(admin.TabularInline):
 class BandaAdmin(admin.ModelAdmin):
     """Configuración del admin para el modelo Banda."""
 
-    list_display = ('nombre', 'representante', 'estado', 'fecha_creacion')
+    list_display = (
+        'imagen_miniatura', 'nombre', 'representante', 'estado',
+        'fecha_creacion',
+    )
     list_filter = ('estado', 'estilos_musicales', 'fecha_creacion')
     search_fields = ('nombre', 'representante__username')
     inlines = [IntegranteInline, ImagenBandaInline, FlyerInline]
 
+    @admin.display(description='Imagen')
+    def imagen_miniatura(self, obj):
+        """Muestra la imagen representativa en miniatura."""
+        return miniatura(obj.imagen_principal)
+
 
 @admin.register(EstiloMusical)
 class EstiloMusicalAdmin(admin.ModelAdmin):
@@ -57,9 +78,14 @@ class IntegranteAdmin(admin.ModelAdmin):
 class ImagenBandaAdmin(admin.ModelAdmin):
     """Configuración del admin para el modelo ImagenBanda."""
 
-    list_display = ('banda', 'fecha_subida')
+    list_display = ('imagen_miniatura', 'banda', 'fecha_subida')
     list_filter = ('banda',)
 
+    @admin.display(description='Imagen')
+    def imagen_miniatura(self, obj):
+        """Muestra la imagen en miniatura."""
+        return miniatura(obj.imagen)
+
 
 @admin.register(Evento)
 class EventoAdmin(admin.ModelAdmin):
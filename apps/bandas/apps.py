@@ -13,3 +13,7 @@ class BandasConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.bandas"
+
+    def ready(self):
+        """Registra las señales y verificaciones de la aplicación."""
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,69 @@
+"""Utilidades para las vistas asíncronas servidas por ASGI.
+
+Con ``VISTAS_ASYNC`` activado (por defecto bajo ``config/asgi.py``) las
+vistas públicas más visitadas se atienden con versiones ``async`` que
+consultan la base con el ORM asíncrono y precargan en bloque lo que la
+plantilla necesita.
+
+Las plantillas usan la API síncrona del cache (``{% cache %}`` y
+``{% tarjeta_banda %}``). Con un cache en memoria del proceso esas
+llamadas no bloquean y la plantilla se renderiza en el event loop sin
+pasar por el hilo del ORM; con un cache compartido (Redis, Memcached)
+cada lectura es una ida y vuelta por la red, así que ``en_bucle``
+renderiza en el hilo de la petición con ``sync_to_async``.
+
+Si al renderizar en el event loop algo no estaba precargado (por
+ejemplo, el cache expulsó una entrada entre la precarga y el render),
+Django lanza ``SynchronousOnlyOperation`` antes de consultar;
+``en_bucle`` lo detecta y repite esa llamada en el hilo del ORM.
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import SynchronousOnlyOperation
+
+from .checks import cache_por_proceso
+
+logger = logging.getLogger(__name__)
+
+
+async def resolver_usuario(request):
+    """Resuelve ``request.user`` con la API asíncrona de sesiones y auth.
+
+    Las plantillas leen ``user``; si quedara el objeto perezoso del
+    middleware, la sesión se cargaría con el ORM síncrono al renderizar.
+    Las peticiones sin cookie de sesión no consultan la base.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+    """
+    request.user = await request.auser()
+
+
+async def en_bucle(funcion, *args, **kwargs):
+    """Ejecuta una función sin efectos secundarios en el event loop.
+
+    Pensado para renderizar plantillas y armar respuestas con datos ya
+    precargados. Si la función necesita la base, se repite en el hilo
+    del ORM. Con un cache compartido se ejecuta directamente en ese
+    hilo, para no bloquear el event loop con las lecturas del cache.
+
+    Args:
+        funcion: Función síncrona a ejecutar.
+        *args: Argumentos posicionales de ``funcion``.
+        **kwargs: Argumentos con nombre de ``funcion``.
+
+    Returns:
+        El resultado de ``funcion``.
+    """
+    if not cache_por_proceso():
+        return await sync_to_async(funcion)(*args, **kwargs)
+    try:
+        return funcion(*args, **kwargs)
+    except SynchronousOnlyOperation:
+        logger.info(
+            '%s consultó la base en el event loop; se repite en un hilo',
+            getattr(funcion, '__name__', funcion),
+        )
+        return await sync_to_async(funcion)(*args, **kwargs)
@@ -0,0 +1,466 @@
+"""Autocompletado de nombres de bandas con un índice de trigramas en memoria.
+
+Cada proceso mantiene un ``IndiceTrigramas`` con los nombres de las
+bandas aprobadas, por lo que responder una consulta no toca la base de
+datos. La búsqueda tolera errores de tipeo: cada nombre se descompone en
+trigramas (``"  g"``, ``" gu"``, ``"gus"``...) y se puntúa por la fracción
+de trigramas de la consulta que comparte; la última palabra se trata como
+prefijo, porque el usuario todavía la está escribiendo.
+
+El índice se construye al iniciar el proceso (ver ``config/wsgi.py``) y
+las señales lo actualizan de forma incremental cuando cambia una banda.
+Los demás procesos se enteran por el cache compartido (ver
+``apps/bandas/checks.py``): cada cambio incrementa de forma atómica un
+contador de versión y deja el ID de la banda en la clave de esa versión.
+Cada ``AUTOCOMPLETADO_REFRESCO`` segundos los procesos comparan el
+contador con su versión y aplican solo las bandas cambiadas; si falta
+alguna clave (expiró, o el contador se recreó) o son demasiados cambios,
+reconstruyen el índice completo. Cada ``AUTOCOMPLETADO_MAX_EDAD`` se
+reconstruye igual, para actualizar las descargas usadas para desempatar.
+
+Salvo la primera construcción, las actualizaciones corren en un hilo
+aparte, una a la vez por proceso: mientras tanto las consultas siguen
+respondiendo con el índice anterior.
+"""
+
+import logging
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+
+logger = logging.getLogger(__name__)
+
+# Clave de cache con la versión vigente del índice.
+CLAVE_VERSION = 'autocompletado:version'
+
+# Prefijo de las claves con el ID de la banda cambiada en cada versión.
+PREFIJO_CAMBIO = 'autocompletado:cambio'
+
+# Cambios pendientes a partir de los cuales conviene reconstruir.
+CAMBIOS_MAXIMOS = 200
+
+# Fracción mínima de trigramas compartidos para considerar un resultado.
+UMBRAL_SIMILITUD = 0.3
+
+# Resultados devueltos por defecto y como máximo.
+RESULTADOS = 8
+RESULTADOS_MAXIMOS = 20
+
+NO_ALFANUMERICO_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    """Pasa un texto a minúsculas sin acentos ni signos.
+
+    Args:
+        texto: Texto a normalizar.
+
+    Returns:
+        Palabras separadas por un espacio, por ejemplo ``'trio azul'``
+        para ``'Trío Azul!'``.
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return NO_ALFANUMERICO_RE.sub(' ', sin_acentos).strip()
+
+
+def trigramas(texto, prefijo=False):
+    """Descompone un texto normalizado en trigramas.
+
+    Como en ``pg_trgm``, cada palabra se rellena con dos espacios al
+    principio y uno al final.
+
+    Args:
+        texto: Texto ya normalizado.
+        prefijo: Si es verdadero, la última palabra no se cierra (no
+            genera el trigrama con el espacio final) para que coincida
+            con palabras más largas que empiezan igual.
+
+    Returns:
+        Conjunto de trigramas.
+    """
+    palabras = texto.split()
+    resultado = set()
+    for posicion, palabra in enumerate(palabras):
+        abierta = prefijo and posicion == len(palabras) - 1
+        relleno = '  ' + palabra + ('' if abierta else ' ')
+        resultado.update(
+            relleno[i:i + 3] for i in range(len(relleno) - 2)
+        )
+    return resultado
+
+
+def _tamano(objeto, vistos=None):
+    """Estima recursivamente los bytes que ocupa una estructura."""
+    vistos = vistos if vistos is not None else set()
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+    total = sys.getsizeof(objeto)
+    if isinstance(objeto, dict):
+        total += sum(
+            _tamano(k, vistos) + _tamano(v, vistos) for k, v in objeto.items()
+        )
+    elif isinstance(objeto, (list, tuple, set, frozenset)):
+        total += sum(_tamano(v, vistos) for v in objeto)
+    return total
+
+
+class IndiceTrigramas:
+    """Índice invertido de trigramas sobre nombres de bandas.
+
+    Attributes:
+        version: Versión del cache con la que se sincronizó el índice.
+        construido: Momento (``time.monotonic``) de la última
+            reconstrucción, o ``None`` si nunca se construyó.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # id -> (nombre, nombre normalizado, descargas)
+        self._entradas = {}
+        # trigrama -> tupla de ids de bandas que lo contienen. Las tuplas
+        # ocupan varias veces menos que los sets y los cambios son raros.
+        self._por_trigrama = {}
+        self.version = None
+        self.construido = None
+        self._chequeado = 0.0
+        # Tomado mientras se reconstruye, para no cargar la tabla dos veces.
+        self._reconstruccion = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+
+    def _agregar(self, banda_id, nombre, descargas):
+        """Agrega o reemplaza una banda (con el lock tomado)."""
+        self._quitar(banda_id)
+        normalizado = normalizar(nombre)
+        self._entradas[banda_id] = (nombre, normalizado, descargas)
+        for trigrama in trigramas(normalizado):
+            self._por_trigrama[trigrama] = (
+                self._por_trigrama.get(trigrama, ()) + (banda_id,)
+            )
+
+    def _quitar(self, banda_id):
+        """Quita una banda si está en el índice (con el lock tomado)."""
+        entrada = self._entradas.pop(banda_id, None)
+        if entrada is None:
+            return
+        for trigrama in trigramas(entrada[1]):
+            ids = tuple(
+                i for i in self._por_trigrama.get(trigrama, ()) if i != banda_id
+            )
+            if ids:
+                self._por_trigrama[trigrama] = ids
+            else:
+                self._por_trigrama.pop(trigrama, None)
+
+    def actualizar(self, banda):
+        """Refleja en el índice los cambios de una banda.
+
+        Las bandas no aprobadas se quitan del índice.
+
+        Args:
+            banda: Instancia de Banda.
+        """
+        with self._lock:
+            if banda.estado == 'aprobado':
+                self._agregar(banda.pk, banda.nombre, banda.descargas)
+            else:
+                self._quitar(banda.pk)
+
+    def quitar(self, banda_id):
+        """Quita una banda del índice.
+
+        Args:
+            banda_id: ID de la banda.
+        """
+        with self._lock:
+            self._quitar(banda_id)
+
+    def reconstruir(self, version=None):
+        """Vuelve a cargar todas las bandas aprobadas desde la base.
+
+        Args:
+            version: Versión del cache a registrar como sincronizada.
+        """
+        from .models import Banda
+
+        filas = Banda.objects.filter(estado='aprobado').values_list(
+            'id', 'nombre', 'descargas',
+        )
+        entradas = {}
+        por_trigrama = defaultdict(list)
+        for banda_id, nombre, descargas in filas.iterator(chunk_size=2000):
+            normalizado = normalizar(nombre)
+            entradas[banda_id] = (nombre, normalizado, descargas)
+            for trigrama in trigramas(normalizado):
+                por_trigrama[trigrama].append(banda_id)
+        por_trigrama = {t: tuple(ids) for t, ids in por_trigrama.items()}
+        with self._lock:
+            self._entradas = entradas
+            self._por_trigrama = por_trigrama
+            self.version = version
+            self.construido = self._chequeado = time.monotonic()
+        logger.info(
+            'Índice de autocompletado: %d bandas, %d trigramas, %.1f KiB',
+            len(self._entradas), len(self._por_trigrama),
+            self.memoria() / 1024,
+        )
+
+    def sincronizar(self, esperar=False):
+        """Actualiza el índice si está desactualizado.
+
+        Se construye si nunca se construyó y se reconstruye si superó
+        ``AUTOCOMPLETADO_MAX_EDAD``. Si otro proceso cambió la versión
+        del cache se aplican solo las bandas cambiadas, o se reconstruye
+        si no se pueden recuperar. La versión se consulta como mucho una
+        vez cada ``AUTOCOMPLETADO_REFRESCO`` segundos.
+
+        La primera construcción se hace en el hilo que llama (las demás
+        peticiones la esperan). Las actualizaciones siguientes corren en
+        un hilo aparte y las consultas usan el índice anterior hasta que
+        terminan; si ya hay una en curso no se inicia otra.
+
+        Args:
+            esperar: Si es verdadero, reconstruye en el hilo que llama
+                aunque el índice ya exista.
+        """
+        ahora = time.monotonic()
+        if self.construido is not None:
+            with self._lock:
+                if ahora - self._chequeado < settings.AUTOCOMPLETADO_REFRESCO:
+                    return
+                self._chequeado = ahora
+            version = cache.get(CLAVE_VERSION)
+            vencido = ahora - self.construido > settings.AUTOCOMPLETADO_MAX_EDAD
+            if version == self.version and not vencido:
+                return
+            if not esperar:
+                self._actualizar_en_hilo(version, completo=vencido)
+                return
+        else:
+            version = cache.get(CLAVE_VERSION)
+        with self._reconstruccion:
+            # Otra petición pudo construirlo mientras se esperaba el lock.
+            if esperar or self.construido is None:
+                self.reconstruir(version)
+
+    def _actualizar_en_hilo(self, version, completo=False):
+        """Actualiza en un hilo aparte si no hay otra actualización.
+
+        Args:
+            version: Versión del cache a alcanzar.
+            completo: Si es verdadero, reconstruye aunque se puedan
+                aplicar los cambios uno por uno.
+        """
+        if not self._reconstruccion.acquire(blocking=False):
+            return
+
+        def reconstruir():
+            try:
+                if completo or not self._aplicar_cambios(version):
+                    self.reconstruir(version)
+            except DatabaseError:
+                logger.exception('Error al reconstruir el autocompletado')
+            finally:
+                self._reconstruccion.release()
+                connection.close()
+
+        threading.Thread(
+            target=reconstruir, name='reconstruir-autocompletado',
+            daemon=True,
+        ).start()
+
+    def _aplicar_cambios(self, version):
+        """Aplica las bandas cambiadas desde la versión del índice.
+
+        Se llama con ``_reconstruccion`` tomado. Lee de la base solo las
+        bandas publicadas entre ``self.version`` y ``version``.
+
+        Args:
+            version: Versión del cache a alcanzar.
+
+        Returns:
+            ``True`` si se aplicaron los cambios, ``False`` si hace falta
+            reconstruir (faltan claves o son demasiados cambios).
+        """
+        from .models import Banda
+
+        desde = self.version
+        if not isinstance(desde, int) or not isinstance(version, int):
+            return False
+        if not 0 < version - desde <= CAMBIOS_MAXIMOS:
+            return False
+        claves = [clave_cambio(n) for n in range(desde + 1, version + 1)]
+        cambios = cache.get_many(claves)
+        if len(cambios) != len(claves):
+            return False
+        banda_ids = set(cambios.values())
+        filas = {
+            banda_id: (nombre, descargas)
+            for banda_id, nombre, descargas in Banda.objects.filter(
+                id__in=banda_ids, estado='aprobado',
+            ).values_list('id', 'nombre', 'descargas')
+        }
+        with self._lock:
+            for banda_id in banda_ids:
+                if banda_id in filas:
+                    self._agregar(banda_id, *filas[banda_id])
+                else:
+                    self._quitar(banda_id)
+            self.version = version
+        return True
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def buscar(self, consulta, limite=RESULTADOS):
+        """Busca los nombres más parecidos a una consulta.
+
+        Args:
+            consulta: Texto ingresado (puede estar incompleto o con
+                errores de tipeo).
+            limite: Cantidad máxima de resultados.
+
+        Returns:
+            Lista de tuplas ``(id, nombre, similitud)`` ordenada por
+            similitud y, a igual similitud, por descargas.
+        """
+        normalizada = normalizar(consulta)
+        buscados = trigramas(normalizada, prefijo=True)
+        if not buscados:
+            return []
+        coincidencias = Counter()
+        with self._lock:
+            for trigrama in buscados:
+                ids = self._por_trigrama.get(trigrama)
+                if ids:
+                    coincidencias.update(ids)
+            candidatos = []
+            for banda_id, comunes in coincidencias.items():
+                similitud = comunes / len(buscados)
+                if similitud < UMBRAL_SIMILITUD:
+                    continue
+                nombre, normalizado, descargas = self._entradas[banda_id]
+                if normalizado.startswith(normalizada):
+                    # Prefijo exacto: por delante de las coincidencias parciales.
+                    similitud += 1
+                candidatos.append((similitud, descargas, nombre, banda_id))
+        candidatos.sort(key=lambda c: (-c[0], -c[1], c[2]))
+        return [
+            (banda_id, nombre, round(min(similitud, 1.0), 3))
+            for similitud, _, nombre, banda_id in candidatos[:limite]
+        ]
+
+    def memoria(self):
+        """Estima los bytes que ocupa el índice en este proceso."""
+        with self._lock:
+            return _tamano(self._entradas) + _tamano(self._por_trigrama)
+
+    def estadisticas(self):
+        """Retorna un resumen del índice para monitoreo.
+
+        Returns:
+            Diccionario con ``bandas``, ``trigramas`` y ``bytes``.
+        """
+        return {
+            'bandas': len(self._entradas),
+            'trigramas': len(self._por_trigrama),
+            'bytes': self.memoria(),
+        }
+
+
+# Índice del proceso actual.
+indice = IndiceTrigramas()
+
+
+def autocompletar(consulta, limite=RESULTADOS):
+    """Sincroniza el índice del proceso si hace falta y lo consulta.
+
+    Args:
+        consulta: Texto ingresado por el usuario.
+        limite: Cantidad máxima de resultados.
+
+    Returns:
+        Lista de tuplas ``(id, nombre, similitud)``.
+    """
+    indice.sincronizar()
+    return indice.buscar(consulta, limite)
+
+
+def clave_cambio(version):
+    """Retorna la clave de cache con la banda cambiada en ``version``."""
+    return f'{PREFIJO_CAMBIO}:{version}'
+
+
+def _incrementar_version():
+    """Incrementa de forma atómica la versión compartida del índice.
+
+    Si la versión no existe (expulsión, reinicio del cache) se crea a
+    partir del reloj, como los sellos de ``versiones``, para no repetir
+    una versión que algún proceso ya tenga.
+
+    Returns:
+        Tupla ``(anterior, nueva)``; ``anterior`` es ``None`` si la
+        versión se acaba de crear.
+    """
+    try:
+        nueva = cache.incr(CLAVE_VERSION)
+    except ValueError:
+        nueva = int(time.time() * 1000)
+        if cache.add(CLAVE_VERSION, nueva, None):
+            return None, nueva
+        nueva = cache.incr(CLAVE_VERSION)
+    return nueva - 1, nueva
+
+
+def publicar_cambio(banda=None, banda_id=None):
+    """Aplica un cambio al índice local y avisa a los demás procesos.
+
+    Args:
+        banda: Banda creada o modificada.
+        banda_id: ID de una banda eliminada (si no se pasa ``banda``).
+    """
+    if banda is not None:
+        indice.actualizar(banda)
+        banda_id = banda.pk
+    else:
+        indice.quitar(banda_id)
+    anterior, version = _incrementar_version()
+    # Un proceso que lea la versión antes de esta clave no la encuentra
+    # y reconstruye: más lento, pero sin perder el cambio.
+    cache.set(
+        clave_cambio(version), banda_id, settings.AUTOCOMPLETADO_MAX_EDAD,
+    )
+    with indice._lock:
+        if indice.construido is not None and anterior == indice.version:
+            # El índice local ya incluye este cambio y todos los
+            # anteriores: no hace falta aplicarlos de nuevo.
+            indice.version = version
+
+
+def precargar():
+    """Construye el índice al iniciar el proceso.
+
+    Los errores de base de datos (por ejemplo, migraciones pendientes)
+    se registran y el índice se construye en la primera consulta.
+    """
+    try:
+        indice.sincronizar(esperar=True)
+    except DatabaseError:
+        logger.warning(
+            'No se pudo precargar el índice de autocompletado', exc_info=True,
+        )
@@ -0,0 +1,229 @@
+"""Búsqueda de texto completo de bandas.
+
+Cada banda tiene un ``DocumentoBusqueda`` con su nombre y el resto del
+texto buscable (biografía, estilos, lugar de ensayo y localidad del
+representante). Las señales lo actualizan cuando cambia cualquiera de
+esos datos, de modo que el índice se mantiene al día sin reconstruirlo.
+
+El índice depende del motor de base de datos:
+
+* PostgreSQL: columna ``vector`` (``tsvector`` generada, configuración
+  ``spanish_unaccent``: ``spanish`` con ``unaccent``) con índice GIN; el
+  ranking usa ``ts_rank_cd``.
+* SQLite: tabla virtual FTS5 ``bandas_documentobusqueda_fts`` con
+  contenido externo, sincronizada por triggers y sin distinguir acentos
+  (``remove_diacritics``); el ranking usa ``bm25``.
+* Otros motores: búsqueda por ``icontains`` sobre el documento.
+
+En todos los casos el nombre pesa más que el resto del texto y solo se
+devuelven bandas aprobadas.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .listados import bandas_listado
+from .models import Banda, DocumentoBusqueda
+
+# Tabla FTS5 usada en SQLite (creada por la migración 0012).
+TABLA_FTS = 'bandas_documentobusqueda_fts'
+
+# Configuración de texto de PostgreSQL (creada por la migración 0012).
+CONFIGURACION_PG = 'spanish_unaccent'
+
+# Resultados por página y cantidad máxima de páginas navegables.
+RESULTADOS_POR_PAGINA = 20
+PAGINAS_MAXIMAS = 50
+
+# Términos de búsqueda: secuencias de letras y dígitos.
+TERMINO_RE = re.compile(r'\w+')
+
+
+def terminos(consulta):
+    """Separa una consulta en términos normalizados.
+
+    Args:
+        consulta: Texto ingresado por el usuario.
+
+    Returns:
+        Lista de términos en minúsculas (como máximo 10).
+    """
+    return TERMINO_RE.findall((consulta or '').lower())[:10]
+
+
+def texto_documento(banda):
+    """Arma el texto buscable de una banda (sin el nombre).
+
+    Args:
+        banda: Instancia de Banda.
+
+    Returns:
+        Cadena con biografía, estilos, lugar de ensayo y localidad.
+    """
+    partes = [
+        banda.biografia or '',
+        ' '.join(e.nombre for e in banda.estilos_musicales.all()),
+        banda.lugar_ensayo or '',
+    ]
+    if banda.representante_id and banda.representante.localidad:
+        partes.append(banda.representante.localidad)
+    return '\n'.join(p for p in partes if p)
+
+
+def actualizar_documento(banda):
+    """Crea o actualiza el documento de búsqueda de una banda.
+
+    Args:
+        banda: Instancia de Banda.
+    """
+    DocumentoBusqueda.objects.update_or_create(
+        banda_id=banda.pk,
+        defaults={'nombre': banda.nombre, 'texto': texto_documento(banda)},
+    )
+
+
+def actualizar_documentos(banda_ids):
+    """Actualiza los documentos de varias bandas.
+
+    Args:
+        banda_ids: Iterable de IDs de bandas.
+    """
+    bandas = (
+        Banda.objects.filter(id__in=list(banda_ids))
+        .select_related('representante')
+        .prefetch_related('estilos_musicales')
+    )
+    for banda in bandas:
+        actualizar_documento(banda)
+
+
+def reindexar(tamano_lote=500):
+    """Reconstruye los documentos de todas las bandas.
+
+    Args:
+        tamano_lote: Bandas procesadas por lote.
+
+    Returns:
+        Cantidad de documentos escritos.
+    """
+    total = 0
+    bandas = (
+        Banda.objects.select_related('representante')
+        .prefetch_related('estilos_musicales').order_by('id')
+    )
+    for banda in bandas.iterator(chunk_size=tamano_lote):
+        actualizar_documento(banda)
+        total += 1
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')"
+            )
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Consultas por motor
+# ---------------------------------------------------------------------------
+
+def _consulta_postgresql(lista, limite, desplazamiento):
+    """Busca con ``tsvector`` en PostgreSQL.
+
+    Returns:
+        Tupla ``(ids, total)``.
+    """
+    consulta = ' & '.join(f'{t}:*' for t in lista)
+    desde = (
+        'FROM bandas_documentobusqueda d '
+        'JOIN bandas_banda b ON b.id = d.banda_id, '
+        f"to_tsquery('{CONFIGURACION_PG}', %s) q "
+        "WHERE d.vector @@ q AND b.estado = 'aprobado'"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) {desde}', [consulta])
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT d.banda_id {desde} '
+            'ORDER BY ts_rank_cd(d.vector, q) DESC, b.descargas DESC, b.id '
+            'LIMIT %s OFFSET %s',
+            [consulta, limite, desplazamiento],
+        )
+        ids = [fila[0] for fila in cursor.fetchall()]
+    return ids, total
+
+
+def _consulta_sqlite(lista, limite, desplazamiento):
+    """Busca con FTS5 en SQLite.
+
+    Returns:
+        Tupla ``(ids, total)``.
+    """
+    consulta = ' '.join(f'"{t}"*' for t in lista)
+    desde = (
+        f'FROM {TABLA_FTS} f JOIN bandas_banda b ON b.id = f.rowid '
+        f"WHERE {TABLA_FTS} MATCH %s AND b.estado = 'aprobado'"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) {desde}', [consulta])
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT f.rowid {desde} '
+            f'ORDER BY bm25({TABLA_FTS}, 10.0, 1.0), b.descargas DESC, b.id '
+            'LIMIT %s OFFSET %s',
+            [consulta, limite, desplazamiento],
+        )
+        ids = [fila[0] for fila in cursor.fetchall()]
+    return ids, total
+
+
+def _consulta_generica(lista, limite, desplazamiento):
+    """Busca con ``icontains`` sobre los documentos (otros motores).
+
+    Returns:
+        Tupla ``(ids, total)``.
+    """
+    documentos = DocumentoBusqueda.objects.filter(banda__estado='aprobado')
+    for termino in lista:
+        documentos = documentos.filter(
+            Q(nombre__icontains=termino) | Q(texto__icontains=termino),
+        )
+    total = documentos.count()
+    ids = list(
+        documentos.order_by('-banda__descargas', 'banda_id')
+        .values_list('banda_id', flat=True)[desplazamiento:desplazamiento + limite]
+    )
+    return ids, total
+
+
+def buscar(consulta, pagina=1, por_pagina=RESULTADOS_POR_PAGINA):
+    """Busca bandas aprobadas por nombre, biografía, estilos o ubicación.
+
+    Cada término se busca como prefijo y todos deben aparecer.
+
+    Args:
+        consulta: Texto ingresado por el usuario.
+        pagina: Número de página (desde 1, como máximo
+            ``PAGINAS_MAXIMAS``).
+        por_pagina: Resultados por página.
+
+    Returns:
+        Tupla ``(bandas, total)`` con la lista de bandas de la página en
+        orden de relevancia y la cantidad total de coincidencias.
+    """
+    lista = terminos(consulta)
+    if not lista:
+        return [], 0
+    pagina = min(max(pagina, 1), PAGINAS_MAXIMAS)
+    desplazamiento = (pagina - 1) * por_pagina
+
+    if connection.vendor == 'postgresql':
+        ids, total = _consulta_postgresql(lista, por_pagina, desplazamiento)
+    elif connection.vendor == 'sqlite':
+        ids, total = _consulta_sqlite(lista, por_pagina, desplazamiento)
+    else:
+        ids, total = _consulta_generica(lista, por_pagina, desplazamiento)
+
+    por_id = bandas_listado().in_bulk(ids)
+    return [por_id[i] for i in ids if i in por_id], total
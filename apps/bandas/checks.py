@@ -0,0 +1,92 @@
+"""Verificaciones del sistema sobre el cache compartido.
+
+Las sesiones cacheadas, los perfiles de ``BackendCacheado``, los sellos
+de versión (``apps.bandas.versiones``), la versión del autocompletado,
+el retraso de las réplicas y las resoluciones del almacenamiento por
+contenido se invalidan en el cache.
+Con un cache por proceso (``LocMemCache``) esas invalidaciones solo
+llegan al proceso que las hizo y los demás siguen sirviendo datos
+viejos, por lo que:
+
+* Las sesiones y el backend cacheados no se pueden activar sin un cache
+  compartido (error ``bandas.E001``).
+* Un despliegue con ``DEBUG=False`` necesita un cache compartido
+  (``check --deploy``, error ``bandas.E002``); ``config/wsgi.py`` y
+  ``config/asgi.py`` se niegan a arrancar sin él.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.core.exceptions import ImproperlyConfigured
+
+# Backends cuyo contenido no ven los demás procesos.
+BACKENDS_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Motores de sesión que leen del cache.
+SESIONES_CACHEADAS = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+# Backend de autenticación que cachea los usuarios.
+BACKEND_CACHEADO = 'apps.accounts.autenticacion.BackendCacheado'
+
+# Sugerencia común a los errores.
+SUGERENCIA = (
+    'Configure CACHE_URL con un Redis o Memcached compartido por todos '
+    'los procesos.'
+)
+
+
+def cache_por_proceso():
+    """Indica si el cache por defecto es local a cada proceso."""
+    return settings.CACHES['default']['BACKEND'] in BACKENDS_POR_PROCESO
+
+
+@register(Tags.caches)
+def sesiones_sin_cache_compartido(app_configs, **kwargs):
+    """Rechaza las sesiones o usuarios cacheados en un cache por proceso."""
+    if not cache_por_proceso():
+        return []
+    cacheados = []
+    if settings.SESSION_ENGINE in SESIONES_CACHEADAS:
+        cacheados.append(f'SESSION_ENGINE={settings.SESSION_ENGINE}')
+    if BACKEND_CACHEADO in settings.AUTHENTICATION_BACKENDS:
+        cacheados.append(BACKEND_CACHEADO)
+    if not cacheados:
+        return []
+    return [Error(
+        f'{", ".join(cacheados)} requiere un cache compartido: con uno '
+        'por proceso, un logout o un cambio de contraseña no invalida '
+        'la sesión en los demás procesos.',
+        hint=SUGERENCIA,
+        id='bandas.E001',
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def cache_compartido(app_configs, **kwargs):
+    """Exige un cache compartido en producción."""
+    if not cache_por_proceso():
+        return []
+    return [Error(
+        'El cache por defecto es local a cada proceso.',
+        hint=SUGERENCIA,
+        id='bandas.E002',
+    )]
+
+
+def exigir_cache_compartido():
+    """Impide atender peticiones en producción sin un cache compartido.
+
+    Raises:
+        ImproperlyConfigured: Si ``DEBUG`` es falso y el cache es local
+            a cada proceso.
+    """
+    if not settings.DEBUG and cache_por_proceso():
+        raise ImproperlyConfigured(
+            'Con DEBUG=False el cache debe ser compartido. ' + SUGERENCIA
+        )
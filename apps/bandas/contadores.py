@@ -0,0 +1,405 @@
+"""Contadores con escritura diferida (write-behind) para la aplicación bandas.
+
+Evita que cada descarga de un demo actualice la fila de la banda en la
+base de datos. Los incrementos se acumulan en un buffer rápido y se
+vuelcan en lotes cada ``DESCARGAS_FLUSH_INTERVALO`` segundos, de modo
+que una banda muy descargada no se convierte en un punto de contención
+de bloqueos en PostgreSQL.
+
+Hay dos backends, elegidos con ``DESCARGAS_BUFFER``:
+
+* ``'local'``: un buffer en memoria por proceso. Cada worker vuelca sus
+  contadores periódicamente desde un hilo en segundo plano y al
+  terminar de forma ordenada (``atexit``).
+* ``'cache'``: los incrementos se guardan en el cache compartido de
+  Django (Redis, Memcached), de modo que cualquier proceso, incluido
+  el comando ``flush_descargas``, puede volcarlos.
+
+Cada descarga genera además un ``EventoDescarga``; los eventos también
+se acumulan por proceso y se insertan con ``bulk_create``.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Prefijo de las claves de cache usadas por el backend compartido.
+PREFIJO_CACHE = 'descargas:pendientes'
+
+# Cantidad de bandas consultadas por lote al volcar el cache compartido.
+TAMANO_LOTE = 500
+
+
+def intervalo_flush():
+    """Retorna el intervalo máximo entre volcados, en segundos.
+
+    Un valor de ``0`` desactiva el buffer y escribe cada incremento de
+    inmediato (útil en tests y desarrollo).
+    """
+    return getattr(settings, 'DESCARGAS_FLUSH_INTERVALO', 10)
+
+
+def aplicar_descargas(deltas):
+    """Suma en la base de datos los incrementos acumulados.
+
+    Agrupa las bandas por cantidad a sumar para emitir un ``UPDATE`` por
+    grupo en lugar de uno por banda. Los IDs se ordenan para que todos
+    los procesos bloqueen las filas en el mismo orden. También se
+    incrementa ``Banda.version`` (la tarjeta muestra las descargas) y,
+    en la misma transacción, se reubican esas bandas en el ranking.
+
+    Args:
+        deltas: Diccionario ``{banda_id: cantidad}``.
+    """
+    from .models import Banda
+    from .ranking import actualizar as actualizar_ranking
+
+    por_cantidad = defaultdict(list)
+    for banda_id, cantidad in deltas.items():
+        if cantidad:
+            por_cantidad[cantidad].append(banda_id)
+
+    with transaction.atomic():
+        for cantidad, ids in sorted(por_cantidad.items()):
+            Banda.objects.filter(id__in=sorted(ids)).update(
+                descargas=F('descargas') + cantidad,
+                version=F('version') + 1,
+            )
+        actualizar_ranking(deltas)
+
+
+def aplicar_eventos(deltas):
+    """Inserta en lote los eventos de descarga acumulados.
+
+    Los eventos de bandas borradas desde la descarga se descartan.
+
+    Args:
+        deltas: Diccionario ``{(banda_id, demo, fecha, cliente): cantidad}``.
+            Las descargas repetidas del mismo cliente en el mismo segundo
+            se acumulan en una sola clave.
+    """
+    from .models import Banda, EventoDescarga
+
+    existentes = set(
+        Banda.objects.filter(pk__in={clave[0] for clave in deltas})
+        .values_list('id', flat=True)
+    )
+    EventoDescarga.objects.bulk_create(
+        [
+            EventoDescarga(
+                banda_id=banda_id, demo=demo, fecha=fecha, cliente=cliente,
+            )
+            for (banda_id, demo, fecha, cliente), cantidad in deltas.items()
+            if banda_id in existentes
+            for _ in range(cantidad)
+        ],
+        batch_size=1000,
+    )
+
+
+class BufferContador:
+    """Buffer de incrementos en memoria con volcado periódico.
+
+    Los incrementos se acumulan en un ``Counter`` protegido por un lock.
+    Un hilo daemon, iniciado con el primer incremento, vuelca el buffer
+    cada ``intervalo_flush()`` segundos; además se vuelca al salir del
+    proceso. Si el volcado falla, los incrementos vuelven al buffer para
+    el siguiente intento, salvo que falle por integridad: reintentar el
+    mismo lote fallaría igual y bloquearía todos los volcados siguientes.
+
+    Attributes:
+        aplicar: Función que recibe ``{clave: cantidad}`` y persiste
+            los incrementos.
+    """
+
+    def __init__(self, aplicar):
+        """Inicializa el buffer.
+
+        Args:
+            aplicar: Función que persiste un diccionario de incrementos.
+        """
+        self.aplicar = aplicar
+        self._pendientes = Counter()
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._pid = None
+        self._detener = threading.Event()
+
+    def incrementar(self, clave, cantidad=1):
+        """Suma ``cantidad`` al contador de ``clave``.
+
+        Args:
+            clave: Identificador del contador (por ejemplo, un ID).
+            cantidad: Valor a sumar.
+        """
+        with self._lock:
+            self._pendientes[clave] += cantidad
+        if intervalo_flush() <= 0:
+            self.flush()
+        else:
+            self._asegurar_hilo()
+
+    def pendientes(self):
+        """Retorna una copia de los incrementos aún no volcados."""
+        with self._lock:
+            return dict(self._pendientes)
+
+    def flush(self):
+        """Vuelca los incrementos acumulados.
+
+        Returns:
+            Cantidad total de incrementos volcados.
+        """
+        with self._lock:
+            deltas, self._pendientes = self._pendientes, Counter()
+        if not deltas:
+            return 0
+        try:
+            self.aplicar(dict(deltas))
+        except IntegrityError:
+            logger.exception('Se descartan %s incrementos', len(deltas))
+            return 0
+        except Exception:
+            with self._lock:
+                self._pendientes.update(deltas)
+            raise
+        return sum(deltas.values())
+
+    def detener(self):
+        """Detiene el hilo de volcado y vuelca lo pendiente."""
+        self._detener.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('No se pudieron volcar los contadores al salir')
+
+    def _asegurar_hilo(self):
+        """Inicia el hilo de volcado si no está corriendo en este proceso.
+
+        Tras un ``fork`` (por ejemplo, gunicorn con ``--preload``) el hilo
+        del proceso padre no existe en el hijo, por lo que se comprueba
+        el PID.
+        """
+        if self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._hilo.is_alive():
+                return
+            if self._pid is None:
+                atexit.register(self.detener)
+            self._pid = os.getpid()
+            self._detener = threading.Event()
+            self._hilo = threading.Thread(
+                target=self._ciclo, name='flush-contadores', daemon=True,
+            )
+            self._hilo.start()
+
+    def _ciclo(self):
+        """Bucle del hilo de volcado."""
+        while not self._detener.wait(intervalo_flush()):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Error al volcar contadores')
+            finally:
+                connection.close()
+
+
+class BufferContadorCache:
+    """Buffer de incrementos almacenado en el cache compartido de Django.
+
+    Cada clave tiene un contador atómico en el cache. El volcado lee los
+    valores pendientes, los descuenta con ``decr`` (para no perder los
+    incrementos concurrentes) y los persiste. Un lock en el cache evita
+    que dos procesos vuelquen a la vez.
+
+    Attributes:
+        aplicar: Función que recibe ``{clave: cantidad}`` y persiste
+            los incrementos.
+        claves: Función que retorna un iterable con todas las claves
+            que podrían tener incrementos pendientes.
+    """
+
+    def __init__(self, aplicar, claves):
+        """Inicializa el buffer.
+
+        Args:
+            aplicar: Función que persiste un diccionario de incrementos.
+            claves: Función que enumera las claves candidatas.
+        """
+        self.aplicar = aplicar
+        self.claves = claves
+        self._local = BufferContador(self._volcar_local)
+
+    @staticmethod
+    def clave_cache(clave):
+        """Retorna la clave de cache asociada a ``clave``."""
+        return f'{PREFIJO_CACHE}:{clave}'
+
+    def incrementar(self, clave, cantidad=1):
+        """Suma ``cantidad`` al contador compartido de ``clave``.
+
+        Args:
+            clave: Identificador del contador.
+            cantidad: Valor a sumar.
+        """
+        clave_cache = self.clave_cache(clave)
+        try:
+            cache.incr(clave_cache, cantidad)
+        except ValueError:
+            if not cache.add(clave_cache, cantidad, timeout=None):
+                cache.incr(clave_cache, cantidad)
+        # El buffer local solo se usa para programar el volcado periódico.
+        self._local.incrementar(None, 0)
+
+    def pendientes(self):
+        """Retorna los incrementos pendientes en el cache compartido."""
+        pendientes = {}
+        for lote in self._lotes():
+            valores = cache.get_many([self.clave_cache(c) for c in lote])
+            for clave in lote:
+                valor = valores.get(self.clave_cache(clave))
+                if valor:
+                    pendientes[clave] = valor
+        return pendientes
+
+    def flush(self):
+        """Vuelca los incrementos del cache compartido.
+
+        Returns:
+            Cantidad total de incrementos volcados, o ``0`` si otro
+            proceso está volcando en este momento.
+        """
+        lock = f'{PREFIJO_CACHE}:lock'
+        if not cache.add(lock, os.getpid(), timeout=max(intervalo_flush(), 60)):
+            return 0
+        try:
+            total = 0
+            for lote in self._lotes():
+                total += self._flush_lote(lote)
+            return total
+        finally:
+            cache.delete(lock)
+
+    def detener(self):
+        """Vuelca lo pendiente al terminar el proceso."""
+        self._local.detener()
+
+    def _volcar_local(self, deltas):
+        """Callback del buffer local: vuelca el cache compartido."""
+        self.flush()
+
+    def _lotes(self):
+        """Divide las claves candidatas en lotes de ``TAMANO_LOTE``."""
+        lote = []
+        for clave in self.claves():
+            lote.append(clave)
+            if len(lote) == TAMANO_LOTE:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+    def _flush_lote(self, lote):
+        """Vuelca un lote de claves.
+
+        Args:
+            lote: Lista de claves a revisar.
+
+        Returns:
+            Cantidad total de incrementos volcados en el lote.
+        """
+        valores = cache.get_many([self.clave_cache(c) for c in lote])
+        deltas = {}
+        for clave in lote:
+            valor = valores.get(self.clave_cache(clave))
+            if valor:
+                cache.decr(self.clave_cache(clave), valor)
+                deltas[clave] = valor
+        if not deltas:
+            return 0
+        try:
+            self.aplicar(deltas)
+        except IntegrityError:
+            logger.exception('Se descartan %s incrementos', len(deltas))
+            return 0
+        except Exception:
+            for clave, valor in deltas.items():
+                cache.incr(self.clave_cache(clave), valor)
+            raise
+        return sum(deltas.values())
+
+
+def _bandas_con_demo():
+    """Enumera los IDs de bandas que pueden recibir descargas."""
+    from .models import Banda
+
+    return (
+        Banda.objects.exclude(demos='').exclude(demos__isnull=True)
+        .values_list('id', flat=True).iterator()
+    )
+
+
+_contador = None
+_eventos = None
+_contador_lock = threading.Lock()
+
+
+def contador_descargas():
+    """Retorna el buffer de descargas configurado para este proceso.
+
+    Returns:
+        Instancia de ``BufferContador`` o ``BufferContadorCache`` según
+        el ajuste ``DESCARGAS_BUFFER``.
+    """
+    global _contador
+    if _contador is None:
+        with _contador_lock:
+            if _contador is None:
+                backend = getattr(settings, 'DESCARGAS_BUFFER', 'local')
+                if backend == 'cache':
+                    _contador = BufferContadorCache(
+                        aplicar_descargas, _bandas_con_demo,
+                    )
+                else:
+                    _contador = BufferContador(aplicar_descargas)
+    return _contador
+
+
+def buffer_eventos():
+    """Retorna el buffer de eventos de descarga de este proceso."""
+    global _eventos
+    if _eventos is None:
+        with _contador_lock:
+            if _eventos is None:
+                _eventos = BufferContador(aplicar_eventos)
+    return _eventos
+
+
+def registrar_descarga(request, banda):
+    """Registra una descarga del demo de una banda.
+
+    Suma la descarga al contador de la banda y acumula el evento
+    correspondiente para las estadísticas por período.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        banda: Instancia de Banda descargada.
+    """
+    from .estadisticas import hash_cliente
+
+    contador_descargas().incrementar(banda.id)
+    fecha = timezone.now().replace(microsecond=0)
+    buffer_eventos().incrementar(
+        (banda.id, banda.demos.name, fecha, hash_cliente(request)),
+    )
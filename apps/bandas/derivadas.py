@@ -0,0 +1,379 @@
+"""Derivadas responsive de las imágenes subidas.
+
+Cada imagen de banda, galería, flyer o integrante se reescala al subirla
+a un conjunto de anchos (``IMAGENES_ANCHOS``) en WebP y JPEG. Las
+derivadas se registran en ``DerivadaImagen`` y las plantillas las usan
+con ``srcset``/``sizes`` (ver ``templatetags/imagenes.py``), de modo que
+una tarjeta de 300 px descarga decenas de kilobytes en lugar del
+original de varios megabytes.
+
+Reescalar con LANCZOS y codificar cada ancho en dos formatos lleva
+cientos de milisegundos, así que no se hace en la petición que sube la
+imagen: al confirmarse la transacción se encola en un hilo de fondo
+(``IMAGENES_DERIVADAS = 'hilo'``) o se deja para el comando
+``generar_derivadas`` (``'comando'``). Mientras tanto las plantillas
+muestran el original.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models.fields.files import FieldFile
+from PIL import Image, ImageOps
+
+from . import versiones
+from .models import DerivadaImagen
+
+logger = logging.getLogger(__name__)
+
+# Directorio (dentro de MEDIA_ROOT) donde se guardan las derivadas.
+DIRECTORIO_DERIVADAS = 'derivadas'
+
+# Formatos de salida: extensión y opciones de Pillow.
+FORMATOS = {
+    'webp': ('webp', {'method': 4}),
+    'jpeg': ('jpg', {'optimize': True, 'progressive': True}),
+}
+
+# Segundos que se cachea la lista de derivadas de cada original.
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Sello de versión que cambia al generarse derivadas (ver ``versiones``).
+SELLO_IMAGENES = 'imagenes'
+
+
+def anchos():
+    """Retorna los anchos configurados, ordenados de menor a mayor."""
+    return sorted(getattr(settings, 'IMAGENES_ANCHOS', (320, 640, 1280)))
+
+
+def formatos():
+    """Retorna los formatos de salida configurados."""
+    return getattr(settings, 'IMAGENES_FORMATOS', ('webp', 'jpeg'))
+
+
+def clave_cache(nombre):
+    """Retorna la clave de cache de las derivadas de un original."""
+    return 'derivadas:' + hashlib.md5(nombre.encode()).hexdigest()
+
+
+def ruta_derivada(nombre, ancho, formato):
+    """Calcula el nombre de almacenamiento de una derivada.
+
+    Args:
+        nombre: Nombre del archivo original en el almacenamiento.
+        ancho: Ancho de la derivada en píxeles.
+        formato: ``'webp'`` o ``'jpeg'``.
+
+    Returns:
+        Ruta relativa con formato
+        ``derivadas/<directorio original>/<nombre>-<ancho>w.<ext>``.
+    """
+    base, _ = os.path.splitext(nombre)
+    return f'{DIRECTORIO_DERIVADAS}/{base}-{ancho}w.{FORMATOS[formato][0]}'
+
+
+def _abrir(archivo):
+    """Abre una imagen respetando la orientación EXIF.
+
+    Returns:
+        Imagen de Pillow en modo ``RGB`` o ``RGBA``.
+    """
+    with archivo.open('rb') as contenido:
+        imagen = Image.open(contenido)
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen.load()
+    if imagen.mode not in ('RGB', 'RGBA'):
+        imagen = imagen.convert(
+            'RGBA' if 'transparency' in imagen.info or 'A' in imagen.mode
+            else 'RGB',
+        )
+    return imagen
+
+
+def _codificar(imagen, formato):
+    """Codifica una imagen en memoria en el formato indicado.
+
+    Args:
+        imagen: Imagen de Pillow ya reescalada.
+        formato: ``'webp'`` o ``'jpeg'``.
+
+    Returns:
+        Bytes de la imagen codificada.
+    """
+    if formato == 'jpeg' and imagen.mode == 'RGBA':
+        fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+        fondo.paste(imagen, mask=imagen.getchannel('A'))
+        imagen = fondo
+    salida = io.BytesIO()
+    imagen.save(
+        salida, formato.upper(),
+        quality=getattr(settings, 'IMAGENES_CALIDAD', 80),
+        **FORMATOS[formato][1],
+    )
+    return salida.getvalue()
+
+
+def generar_derivadas(archivo):
+    """Genera (o regenera) todas las derivadas de una imagen.
+
+    Solo se generan anchos menores al del original; si el original es
+    más chico que todos los anchos, se genera una única derivada de su
+    mismo tamaño para tener al menos la versión optimizada.
+
+    Args:
+        archivo: ``FieldFile`` de la imagen original.
+
+    Returns:
+        Lista de ``DerivadaImagen`` creadas, vacía si el archivo no es
+        una imagen legible.
+    """
+    try:
+        original = _abrir(archivo)
+    except (OSError, Image.DecompressionBombError):
+        return []
+
+    storage = archivo.storage
+    ancho_original, alto_original = original.size
+    objetivos = [a for a in anchos() if a < ancho_original] or [ancho_original]
+
+    eliminar_derivadas(archivo.name, storage)
+    derivadas = []
+    for ancho in objetivos:
+        alto = max(1, round(alto_original * ancho / ancho_original))
+        reescalada = (
+            original if ancho == ancho_original
+            else original.resize((ancho, alto), Image.Resampling.LANCZOS)
+        )
+        for formato in formatos():
+            datos = _codificar(reescalada, formato)
+            nombre = ruta_derivada(archivo.name, ancho, formato)
+            if storage.exists(nombre):
+                storage.delete(nombre)
+            nombre = storage.save(nombre, ContentFile(datos))
+            derivadas.append(DerivadaImagen(
+                original=archivo.name, archivo=nombre, formato=formato,
+                ancho=ancho, alto=alto, tamano=len(datos),
+            ))
+
+    DerivadaImagen.objects.bulk_create(derivadas)
+    cache.delete(clave_cache(archivo.name))
+    # Los fragmentos cacheados que muestran el original pasan a usar
+    # las derivadas.
+    transaction.on_commit(lambda: versiones.incrementar(SELLO_IMAGENES))
+    return derivadas
+
+
+def eliminar_derivadas(nombre, storage=None):
+    """Borra las derivadas de un original y sus archivos.
+
+    Args:
+        nombre: Nombre del archivo original en el almacenamiento.
+        storage: Almacenamiento de las derivadas. Por defecto, el de
+            ``MEDIA_ROOT``.
+    """
+    storage = storage or default_storage
+    existentes = DerivadaImagen.objects.filter(original=nombre)
+    for archivo in existentes.values_list('archivo', flat=True):
+        storage.delete(archivo)
+    existentes.delete()
+    cache.delete(clave_cache(nombre))
+
+
+def derivadas_de(nombre):
+    """Retorna las derivadas de un original, agrupadas por formato.
+
+    El resultado se cachea para que mostrar una imagen no requiera una
+    consulta por tarjeta.
+
+    Args:
+        nombre: Nombre del archivo original en el almacenamiento.
+
+    Returns:
+        Diccionario ``{formato: [(ancho, nombre_archivo), ...]}`` con los
+        anchos de menor a mayor; vacío si no hay derivadas.
+    """
+    if not nombre:
+        return {}
+    clave = clave_cache(nombre)
+    agrupadas = cache.get(clave)
+    if agrupadas is None:
+        agrupadas = {}
+        filas = (
+            DerivadaImagen.objects.filter(original=nombre)
+            .order_by('formato', 'ancho')
+            .values_list('formato', 'ancho', 'archivo')
+        )
+        for formato, ancho, archivo in filas:
+            agrupadas.setdefault(formato, []).append((ancho, archivo))
+        cache.set(clave, agrupadas, CACHE_TIMEOUT)
+    return agrupadas
+
+
+def precargar_derivadas(nombres):
+    """Carga en el cache las derivadas de varios originales a la vez.
+
+    Los originales que no están en el cache se resuelven con una única
+    consulta, en lugar de una por imagen al renderizar.
+
+    Args:
+        nombres: Iterable de nombres de originales.
+
+    Returns:
+        Diccionario ``{nombre: {formato: [(ancho, archivo), ...]}}``.
+    """
+    claves = {clave_cache(nombre): nombre for nombre in nombres if nombre}
+    if not claves:
+        return {}
+    encontradas = cache.get_many(claves)
+    resultado = {claves[clave]: valor for clave, valor in encontradas.items()}
+    faltantes = [n for clave, n in claves.items() if clave not in encontradas]
+    if faltantes:
+        nuevas = _agrupar_filas(faltantes, _filas_derivadas(faltantes))
+        cache.set_many(
+            {clave_cache(n): agrupadas for n, agrupadas in nuevas.items()},
+            CACHE_TIMEOUT,
+        )
+        resultado.update(nuevas)
+    return resultado
+
+
+async def aprecargar_derivadas(nombres):
+    """Versión asíncrona de ``precargar_derivadas`` (ORM asíncrono)."""
+    claves = {clave_cache(nombre): nombre for nombre in nombres if nombre}
+    if not claves:
+        return {}
+    encontradas = await cache.aget_many(claves)
+    resultado = {claves[clave]: valor for clave, valor in encontradas.items()}
+    faltantes = [n for clave, n in claves.items() if clave not in encontradas]
+    if faltantes:
+        filas = [fila async for fila in _filas_derivadas(faltantes)]
+        nuevas = _agrupar_filas(faltantes, filas)
+        await cache.aset_many(
+            {clave_cache(n): agrupadas for n, agrupadas in nuevas.items()},
+            CACHE_TIMEOUT,
+        )
+        resultado.update(nuevas)
+    return resultado
+
+
+def _filas_derivadas(nombres):
+    """Retorna ``(original, formato, ancho, archivo)`` de varios originales."""
+    return (
+        DerivadaImagen.objects.filter(original__in=nombres)
+        .order_by('original', 'formato', 'ancho')
+        .values_list('original', 'formato', 'ancho', 'archivo')
+    )
+
+
+def _agrupar_filas(nombres, filas):
+    """Agrupa las filas de ``_filas_derivadas`` por original y formato."""
+    agrupadas = {nombre: {} for nombre in nombres}
+    for original, formato, ancho, archivo in filas:
+        agrupadas[original].setdefault(formato, []).append((ancho, archivo))
+    return agrupadas
+
+
+def _nombres_archivos(nombres, derivadas):
+    """Retorna los originales junto con los archivos de sus derivadas."""
+    return nombres + [
+        archivo
+        for agrupadas in derivadas.values()
+        for lista in agrupadas.values()
+        for _, archivo in lista
+    ]
+
+
+def precargar_imagenes(archivos):
+    """Prepara el cache para renderizar varias imágenes sin N+1.
+
+    Resuelve en bloque las derivadas de cada imagen y, si el
+    almacenamiento lo soporta, la ruta física de originales y derivadas.
+    Así una página muestra cualquier cantidad de imágenes con un número
+    fijo de consultas.
+
+    Args:
+        archivos: Iterable de ``FieldFile`` (los vacíos se ignoran).
+    """
+    nombres = [archivo.name for archivo in archivos if archivo]
+    if not nombres:
+        return
+    derivadas = precargar_derivadas(nombres)
+    precargar = getattr(default_storage, 'precargar', None)
+    if precargar is not None:
+        precargar(_nombres_archivos(nombres, derivadas))
+
+
+async def aprecargar_imagenes(archivos):
+    """Versión asíncrona de ``precargar_imagenes`` (ORM asíncrono)."""
+    nombres = [archivo.name for archivo in archivos if archivo]
+    if not nombres:
+        return
+    derivadas = await aprecargar_derivadas(nombres)
+    aprecargar = getattr(default_storage, 'aprecargar', None)
+    if aprecargar is not None:
+        await aprecargar(_nombres_archivos(nombres, derivadas))
+
+
+# Hilo de fondo que genera las derivadas; se crea con la primera subida.
+_ejecutor = None
+_ejecutor_lock = threading.Lock()
+
+
+def ejecutor():
+    """Retorna el ejecutor de las derivadas del proceso.
+
+    Tiene un único hilo: las imágenes se procesan de a una para no
+    competir por CPU con las peticiones.
+    """
+    global _ejecutor
+    with _ejecutor_lock:
+        if _ejecutor is None:
+            _ejecutor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='derivadas',
+            )
+        return _ejecutor
+
+
+def _generar_en_fondo(archivo, al_generar):
+    """Genera las derivadas desde el hilo de fondo."""
+    try:
+        if generar_derivadas(archivo) and al_generar is not None:
+            al_generar()
+    except Exception:
+        logger.exception('Error al generar las derivadas de %s', archivo.name)
+    finally:
+        connection.close()
+
+
+def programar_derivadas(archivo, al_generar=None):
+    """Encola la generación de derivadas al confirmar la transacción.
+
+    No hace nada si el original ya tiene derivadas registradas o si se
+    generan con el comando ``generar_derivadas``.
+
+    Args:
+        archivo: ``FieldFile`` de la imagen original.
+        al_generar: Función sin argumentos que se llama si se generaron
+            derivadas (por ejemplo, para invalidar caches).
+    """
+    if not archivo or not archivo.name:
+        return
+    if getattr(settings, 'IMAGENES_DERIVADAS', 'hilo') == 'comando':
+        return
+    if DerivadaImagen.objects.filter(original=archivo.name).exists():
+        return
+    # Copia desligada de la instancia, que la petición puede seguir usando.
+    copia = FieldFile(None, archivo.field, archivo.name)
+    transaction.on_commit(
+        lambda: ejecutor().submit(_generar_en_fondo, copia, al_generar),
+    )
@@ -0,0 +1,366 @@
+"""Estadísticas de descargas de la aplicación bandas.
+
+Agrega los eventos crudos de ``EventoDescarga`` en las tablas resumen
+``DescargaDiaria`` y ``DescargaSemanal`` de forma incremental, y expone
+las consultas de ranking y series temporales que leen esos resúmenes en
+lugar de recorrer los eventos.
+
+A partir de esos resúmenes y de ``VisitaHoraria`` se precalcula además
+una fila ``EstadisticaBanda`` por banda, la que muestra el dashboard del
+representante.
+"""
+
+import hashlib
+import ipaddress
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    Banda,
+    DescargaDiaria,
+    DescargaSemanal,
+    EstadisticaBanda,
+    EventoDescarga,
+    MarcaAgregacion,
+    VisitaHoraria,
+)
+
+# Nombre de la marca de agua usada por la agregación de descargas.
+MARCA_DESCARGAS = 'descargas'
+
+# Cantidad máxima de eventos procesados por lote al agregar.
+TAMANO_LOTE = 50000
+
+# Días y semanas que cubren las series del dashboard.
+DIAS_PANEL = 30
+SEMANAS_PANEL = 8
+
+# Campos de ``EstadisticaBanda`` que se reescriben en cada cálculo.
+CAMPOS_RESUMEN = [
+    'descargas_hoy', 'descargas_semana', 'descargas_7_dias',
+    'descargas_30_dias', 'visitas_detalle_7_dias', 'visitas_detalle_30_dias',
+    'visitas_galeria_7_dias', 'visitas_galeria_30_dias', 'serie',
+    'actualizado',
+]
+
+
+def hash_cliente(request):
+    """Calcula un identificador grueso y anonimizado del cliente.
+
+    Combina la red del cliente (/24 en IPv4, /48 en IPv6), el agente de
+    usuario y el día, con ``SECRET_KEY`` como sal. El resultado permite
+    estimar oyentes únicos por día sin guardar la IP.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        Cadena hexadecimal de 16 caracteres.
+    """
+    ip = request.META.get('REMOTE_ADDR', '')
+    try:
+        direccion = ipaddress.ip_address(ip)
+        prefijo = 24 if direccion.version == 4 else 48
+        red = str(ipaddress.ip_network(f'{ip}/{prefijo}', strict=False))
+    except ValueError:
+        red = ''
+    material = '|'.join([
+        settings.SECRET_KEY,
+        red,
+        request.headers.get('User-Agent', ''),
+        timezone.localdate().isoformat(),
+    ])
+    return hashlib.sha256(material.encode()).hexdigest()[:16]
+
+
+def inicio_semana(fecha):
+    """Retorna el lunes de la semana de ``fecha``."""
+    return fecha - timedelta(days=fecha.weekday())
+
+
+def upsert_sumando(modelo, claves, campo, filas):
+    """Inserta filas sumando el valor si la clave ya existe.
+
+    Usa ``INSERT ... ON CONFLICT DO UPDATE``, disponible en PostgreSQL y
+    en SQLite 3.24 o superior, para acumular en una sola sentencia por
+    lote sin leer las filas existentes.
+
+    Args:
+        modelo: Modelo destino con una restricción única sobre ``claves``.
+        claves: Nombres de los campos que forman la clave única.
+        campo: Nombre del campo numérico a acumular.
+        filas: Iterable de tuplas ``(*valores_clave, valor)``.
+    """
+    filas = list(filas)
+    if not filas:
+        return
+    opts = modelo._meta
+    columnas_clave = [opts.get_field(c).column for c in claves]
+    columna = opts.get_field(campo).column
+    q = connection.ops.quote_name
+    tabla = q(opts.db_table)
+    columnas = ', '.join(q(c) for c in columnas_clave + [columna])
+    marcadores = ', '.join(['%s'] * (len(claves) + 1))
+    sql = (
+        f'INSERT INTO {tabla} ({columnas}) VALUES ({marcadores}) '
+        f'ON CONFLICT ({", ".join(q(c) for c in columnas_clave)}) '
+        f'DO UPDATE SET {q(columna)} = {tabla}.{q(columna)} '
+        f'+ excluded.{q(columna)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, filas)
+
+
+def agregar_descargas(margen=None):
+    """Agrega los eventos de descarga nuevos en las tablas resumen.
+
+    Procesa los eventos con ID mayor a la marca de agua, hasta el último
+    evento con más de ``margen`` de antigüedad. El margen cubre los
+    eventos que todavía están en el buffer de algún worker, de modo que
+    no quede ningún ID menor a la marca sin confirmar.
+
+    Args:
+        margen: ``timedelta`` de seguridad. Por defecto, el doble de
+            ``DESCARGAS_FLUSH_INTERVALO`` más un minuto.
+
+    Returns:
+        Cantidad de eventos agregados.
+    """
+    if margen is None:
+        margen = timedelta(
+            seconds=2 * getattr(settings, 'DESCARGAS_FLUSH_INTERVALO', 10)
+            + 60,
+        )
+    limite = EventoDescarga.objects.filter(
+        fecha__lt=timezone.now() - margen,
+    ).aggregate(maximo=Max('id'))['maximo']
+    if limite is None:
+        return 0
+
+    total = 0
+    while True:
+        with transaction.atomic():
+            marca, _ = (
+                MarcaAgregacion.objects.select_for_update()
+                .get_or_create(nombre=MARCA_DESCARGAS)
+            )
+            desde = marca.ultimo_id
+            if desde >= limite:
+                break
+            hasta = min(desde + TAMANO_LOTE, limite)
+
+            por_dia = (
+                EventoDescarga.objects
+                .filter(id__gt=desde, id__lte=hasta)
+                .annotate(dia=TruncDate('fecha'))
+                .values_list('banda_id', 'dia')
+                .annotate(cantidad=Count('id'))
+                .order_by()
+            )
+            diarias = Counter()
+            semanales = Counter()
+            for banda_id, dia, cantidad in por_dia:
+                diarias[(banda_id, dia)] += cantidad
+                semanales[(banda_id, inicio_semana(dia))] += cantidad
+
+            upsert_sumando(
+                DescargaDiaria, ['banda', 'fecha'], 'descargas',
+                (clave + (n,) for clave, n in sorted(diarias.items())),
+            )
+            upsert_sumando(
+                DescargaSemanal, ['banda', 'semana'], 'descargas',
+                (clave + (n,) for clave, n in sorted(semanales.items())),
+            )
+            marca.ultimo_id = hasta
+            marca.save(update_fields=['ultimo_id', 'actualizado'])
+            total += sum(diarias.values())
+    return total
+
+
+def compactar_eventos(dias_retencion, tamano_lote=10000):
+    """Elimina los eventos crudos ya agregados y más viejos que la retención.
+
+    Solo se borran eventos con ID menor o igual a la marca de agua, por
+    lo que nunca se pierde un evento que no esté reflejado en los
+    resúmenes. El borrado se hace por lotes para no bloquear la tabla.
+
+    Args:
+        dias_retencion: Días de eventos crudos a conservar.
+        tamano_lote: Cantidad máxima de filas borradas por sentencia.
+
+    Returns:
+        Cantidad de eventos eliminados.
+    """
+    marca = MarcaAgregacion.objects.filter(nombre=MARCA_DESCARGAS).first()
+    if marca is None:
+        return 0
+    corte = timezone.now() - timedelta(days=dias_retencion)
+    candidatos = EventoDescarga.objects.filter(
+        id__lte=marca.ultimo_id, fecha__lt=corte,
+    )
+    eliminados = 0
+    while True:
+        ids = list(candidatos.values_list('id', flat=True)[:tamano_lote])
+        if not ids:
+            return eliminados
+        eliminados += EventoDescarga.objects.filter(id__in=ids).delete()[0]
+
+
+def top_bandas_periodo(dias=7, limite=10):
+    """Retorna las bandas aprobadas más descargadas en los últimos días.
+
+    Lee solo las filas de ``DescargaDiaria`` del período, no los eventos.
+
+    Args:
+        dias: Cantidad de días hacia atrás, incluido hoy.
+        limite: Cantidad máxima de bandas.
+
+    Returns:
+        QuerySet de ``Banda`` anotado con ``descargas_periodo``.
+    """
+    desde = timezone.localdate() - timedelta(days=dias - 1)
+    return (
+        Banda.objects
+        .filter(estado='aprobado', descargas_diarias__fecha__gte=desde)
+        .annotate(descargas_periodo=Sum('descargas_diarias__descargas'))
+        .order_by('-descargas_periodo', 'nombre')[:limite]
+    )
+
+
+def serie_diaria(banda_id, dias=30):
+    """Retorna las descargas por día de una banda, incluidos los días en cero.
+
+    Args:
+        banda_id: ID de la banda.
+        dias: Cantidad de días hacia atrás, incluido hoy.
+
+    Returns:
+        Lista de tuplas ``(fecha, descargas)`` en orden cronológico.
+    """
+    hoy = timezone.localdate()
+    desde = hoy - timedelta(days=dias - 1)
+    totales = dict(
+        DescargaDiaria.objects
+        .filter(banda_id=banda_id, fecha__gte=desde)
+        .values_list('fecha', 'descargas')
+    )
+    return [
+        (desde + timedelta(days=i), totales.get(desde + timedelta(days=i), 0))
+        for i in range(dias)
+    ]
+
+
+def _por_banda(filas, desde, largo, paso=1):
+    """Distribuye filas ``(banda_id, fecha, valor)`` en series por banda.
+
+    Args:
+        filas: Iterable de tuplas ``(banda_id, fecha, valor)``.
+        desde: Fecha de la primera posición de la serie.
+        largo: Cantidad de posiciones de la serie.
+        paso: Días que cubre cada posición.
+
+    Returns:
+        Diccionario ``{banda_id: [valor, ...]}`` con ``largo`` valores.
+    """
+    series = {}
+    for banda_id, fecha, valor in filas:
+        posicion = (fecha - desde).days // paso
+        if 0 <= posicion < largo:
+            serie = series.setdefault(banda_id, [0] * largo)
+            serie[posicion] += valor
+    return series
+
+
+def actualizar_resumenes():
+    """Recalcula el ``EstadisticaBanda`` de las bandas con actividad.
+
+    Lee solo las filas de los últimos ``DIAS_PANEL`` días (o
+    ``SEMANAS_PANEL`` semanas) de los resúmenes de descargas y de
+    visitas. Se recalculan las bandas con actividad en ese período y las
+    que ya tenían un resumen con valores, para que vuelvan a cero cuando
+    la actividad sale de la ventana. Las filas se escriben en lotes con
+    ``bulk_create(update_conflicts=True)``.
+
+    Returns:
+        Cantidad de bandas recalculadas.
+    """
+    ahora = timezone.now()
+    hoy = timezone.localdate(ahora)
+    desde = hoy - timedelta(days=DIAS_PANEL - 1)
+    primera_semana = inicio_semana(hoy) - timedelta(weeks=SEMANAS_PANEL - 1)
+
+    descargas = _por_banda(
+        DescargaDiaria.objects.filter(fecha__gte=desde)
+        .values_list('banda_id', 'fecha', 'descargas'),
+        desde, DIAS_PANEL,
+    )
+    semanas = _por_banda(
+        DescargaSemanal.objects.filter(semana__gte=primera_semana)
+        .values_list('banda_id', 'semana', 'descargas'),
+        primera_semana, SEMANAS_PANEL, paso=7,
+    )
+    comienzo = timezone.make_aware(datetime.combine(desde, time.min))
+    por_dia = (
+        VisitaHoraria.objects.filter(hora__gte=comienzo)
+        .annotate(dia=TruncDate('hora'))
+        .values_list('pagina', 'banda_id', 'dia')
+        .annotate(total=Sum('visitas'))
+        .order_by()
+    )
+    filas = {pagina: [] for pagina, _ in VisitaHoraria.PAGINAS}
+    for pagina, banda_id, dia, total in por_dia:
+        filas[pagina].append((banda_id, dia, total))
+    visitas = {
+        pagina: _por_banda(filas_pagina, desde, DIAS_PANEL)
+        for pagina, filas_pagina in filas.items()
+    }
+
+    con_valores = (
+        Q(descargas_30_dias__gt=0) | Q(descargas_semana__gt=0)
+        | Q(visitas_detalle_30_dias__gt=0) | Q(visitas_galeria_30_dias__gt=0)
+    )
+    banda_ids = (
+        set(descargas) | set(semanas) | set(visitas['detalle'])
+        | set(visitas['galeria'])
+        | set(
+            EstadisticaBanda.objects.filter(con_valores)
+            .values_list('banda_id', flat=True)
+        )
+    )
+
+    vacia = [0] * DIAS_PANEL
+    resumenes = []
+    for banda_id in sorted(banda_ids):
+        diarias = descargas.get(banda_id, vacia)
+        detalle = visitas['detalle'].get(banda_id, vacia)
+        galeria = visitas['galeria'].get(banda_id, vacia)
+        semanales = semanas.get(banda_id, [0] * SEMANAS_PANEL)
+        resumenes.append(EstadisticaBanda(
+            banda_id=banda_id,
+            descargas_hoy=diarias[-1],
+            descargas_semana=semanales[-1],
+            descargas_7_dias=sum(diarias[-7:]),
+            descargas_30_dias=sum(diarias),
+            visitas_detalle_7_dias=sum(detalle[-7:]),
+            visitas_detalle_30_dias=sum(detalle),
+            visitas_galeria_7_dias=sum(galeria[-7:]),
+            visitas_galeria_30_dias=sum(galeria),
+            serie={
+                'desde': desde.isoformat(),
+                'descargas': diarias,
+                'visitas': [a + b for a, b in zip(detalle, galeria)],
+                'semanas': semanales,
+            },
+            actualizado=ahora,
+        ))
+    EstadisticaBanda.objects.bulk_create(
+        resumenes, batch_size=500, update_conflicts=True,
+        unique_fields=['banda'], update_fields=CAMPOS_RESUMEN,
+    )
+    return len(resumenes)
@@ -0,0 +1,126 @@
+"""Almacenamiento de los archivos estáticos para producción.
+
+``collectstatic`` copia los estáticos a ``STATIC_ROOT`` y este
+almacenamiento (basado en el de WhiteNoise) los procesa:
+
+* Optimiza sin pérdida los PNG (entre ellos los de ``images/``): se
+  reescriben solo si quedan más chicos y con los mismos píxeles.
+* Agrega el hash del contenido al nombre (``base_styles.3f2a9c1e.css``)
+  y reescribe las referencias ``url(...)`` de las hojas de estilo.
+* Escribe al lado de cada archivo comprimible sus variantes ``.gz`` y
+  ``.br`` (esta última si está instalado ``brotli``).
+
+``WhiteNoiseMiddleware`` sirve los archivos con hash con
+``Cache-Control: max-age=315360000, public, immutable`` y elige la
+variante comprimida según ``Accept-Encoding``, sin comprimir nada por
+petición. Al volver a una página el navegador no pide ningún estático:
+cuando un archivo cambia, cambia su nombre.
+"""
+
+import io
+import logging
+import os
+
+from PIL import Image
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+# Modos de imagen que se optimizan (8 bits por canal).
+MODOS_OPTIMIZABLES = ('1', 'L', 'LA', 'P', 'RGB', 'RGBA')
+
+
+def optimizar_png(ruta):
+    """Recomprime un PNG sin pérdida si así ocupa menos.
+
+    Descarta los metadatos de texto, quita el canal alfa si es opaco en
+    toda la imagen y recomprime con la máxima compresión de Pillow. El
+    archivo se reemplaza solo si la nueva versión es más chica y tiene
+    exactamente los mismos píxeles. Los PNG animados o de 16 bits no se
+    tocan.
+
+    Args:
+        ruta: Ruta absoluta del PNG.
+
+    Returns:
+        Bytes ahorrados (0 si el archivo no cambió).
+    """
+    with Image.open(ruta) as imagen:
+        if imagen.mode not in MODOS_OPTIMIZABLES or getattr(
+            imagen, 'is_animated', False,
+        ):
+            return 0
+        imagen.load()
+        pixeles = imagen.convert('RGBA').tobytes()
+        nueva = imagen
+        if imagen.mode == 'RGBA' and imagen.getextrema()[3] == (255, 255):
+            nueva = imagen.convert('RGB')
+        opciones = {'optimize': True}
+        if 'icc_profile' in imagen.info:
+            opciones['icc_profile'] = imagen.info['icc_profile']
+        salida = io.BytesIO()
+        nueva.save(salida, format='PNG', **opciones)
+
+    ahorro = os.path.getsize(ruta) - salida.tell()
+    if ahorro <= 0:
+        return 0
+    salida.seek(0)
+    with Image.open(salida) as resultado:
+        if resultado.convert('RGBA').tobytes() != pixeles:
+            return 0
+
+    temporal = f'{ruta}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(salida.getvalue())
+    os.replace(temporal, ruta)
+    return ahorro
+
+
+class AlmacenamientoEstaticos(CompressedManifestStaticFilesStorage):
+    """Estáticos con hash en el nombre, precomprimidos y PNG optimizados.
+
+    Si un estático no figura en el manifiesto (archivo faltante o
+    ``collectstatic`` sin ejecutar, como en desarrollo y en los tests)
+    se usa su nombre sin hash en lugar de fallar al renderizar.
+    """
+
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        """Optimiza los PNG y luego aplica hash y compresión.
+
+        El hash se calcula leyendo cada archivo desde su origen
+        (``paths``), por lo que los PNG pasan a leerse desde su copia en
+        ``STATIC_ROOT``: la optimizada en esta ejecución o en una
+        anterior (``collectstatic`` no vuelve a copiar los archivos sin
+        cambios en su origen).
+        """
+        if not dry_run:
+            paths = dict(paths)
+            for nombre in paths:
+                if nombre.lower().endswith('.png'):
+                    self._optimizar(nombre)
+                    paths[nombre] = (self, nombre)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _optimizar(self, nombre):
+        """Optimiza un PNG ya copiado a ``STATIC_ROOT``."""
+        try:
+            ahorro = optimizar_png(self.path(nombre))
+        except (OSError, SyntaxError, ValueError):
+            logger.warning('No se pudo optimizar %s', nombre, exc_info=True)
+            return
+        if ahorro:
+            logger.info('PNG optimizado: %s (-%d bytes)', nombre, ahorro)
+
+    def stored_name(self, name):
+        """Retorna el nombre con hash, o el original si no lo hay."""
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # WhiteNoise también consulta nombres ausentes (los de los
+            # source maps de admin) al indexar STATIC_ROOT.
+            logger.debug('Estático ausente del manifiesto: %s', name)
+            # Se recuerda para no volver a buscar el archivo.
+            self.hashed_files[self.hash_key(self.clean_name(name))] = name
+            return name
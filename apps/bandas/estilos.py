@@ -0,0 +1,109 @@
+"""Resumen desnormalizado de los estilos de cada banda.
+
+``Banda.estilos_ids`` y ``Banda.estilos_nombres`` copian el contenido de
+``Banda.estilos_musicales`` en la propia fila de la banda, de modo que los
+listados muestran los estilos sin el JOIN con la tabla intermedia ni una
+consulta por banda. El filtro por estilo, en cambio, usa la tabla
+intermedia: un ``LIKE '%|id|%'`` sobre ``estilos_ids`` no puede usar
+ningún índice y recorre todas las bandas. Las señales llaman a ``sincronizar`` cada vez
+que cambia la relación o el nombre de un estilo; el comando
+``reparar_estilos`` corrige las diferencias que pudieran quedar (por
+ejemplo, tras un ``bulk_create`` de la tabla intermedia, que no emite
+señales).
+"""
+
+from collections import defaultdict
+
+from django.db.models import F, Q
+
+from .models import Banda
+
+# Separador de ``estilos_ids`` y ``estilos_nombres``.
+SEPARADOR = '|'
+
+
+def resumen(estilos):
+    """Arma los valores desnormalizados de una lista de estilos.
+
+    Args:
+        estilos: Iterable de pares ``(id, nombre)``.
+
+    Returns:
+        Tupla ``(estilos_ids, estilos_nombres)``, por ejemplo
+        ``('|3|1|', 'Punk|Rock')``.
+    """
+    estilos = sorted(estilos, key=lambda e: (e[1].lower(), e[0]))
+    if not estilos:
+        return '', ''
+    ids = SEPARADOR + SEPARADOR.join(str(i) for i, _ in estilos) + SEPARADOR
+    nombres = SEPARADOR.join(
+        nombre.replace(SEPARADOR, '/') for _, nombre in estilos
+    )
+    return ids, nombres
+
+
+def filtro_estilo(estilo_id):
+    """Retorna el filtro de bandas que tienen un estilo.
+
+    Se resuelve como ``id IN (SELECT banda_id ... WHERE estilo = id)``
+    sobre la tabla intermedia, que el índice ``(estilomusical_id,
+    banda_id)`` de la migración 0019 cubre por completo.
+
+    Args:
+        estilo_id: ID de ``EstiloMusical``.
+
+    Returns:
+        Objeto ``Q`` sobre ``Banda.id``.
+    """
+    relaciones = Banda.estilos_musicales.through.objects.filter(
+        estilomusical_id=estilo_id,
+    )
+    return Q(id__in=relaciones.values('banda_id'))
+
+
+def calcular(banda_ids=None):
+    """Calcula el resumen de estilos a partir de la tabla intermedia.
+
+    Args:
+        banda_ids: IDs de las bandas, o ``None`` para todas.
+
+    Returns:
+        Diccionario ``{banda_id: (estilos_ids, estilos_nombres)}``; las
+        bandas sin estilos no aparecen.
+    """
+    relaciones = Banda.estilos_musicales.through.objects.all()
+    if banda_ids is not None:
+        relaciones = relaciones.filter(banda_id__in=banda_ids)
+    por_banda = defaultdict(list)
+    for banda_id, estilo_id, nombre in relaciones.values_list(
+        'banda_id', 'estilomusical_id', 'estilomusical__nombre',
+    ):
+        por_banda[banda_id].append((estilo_id, nombre))
+    return {banda_id: resumen(lista) for banda_id, lista in por_banda.items()}
+
+
+def sincronizar(banda_ids):
+    """Actualiza el resumen de estilos de varias bandas.
+
+    Escribe con ``update`` para no disparar las señales de ``Banda`` e
+    incrementa ``Banda.version`` en la misma sentencia, ya que la
+    tarjeta cacheada de la banda muestra sus estilos.
+
+    Args:
+        banda_ids: Iterable de IDs de bandas.
+
+    Returns:
+        Diccionario ``{banda_id: (estilos_ids, estilos_nombres)}`` con
+        los valores escritos.
+    """
+    banda_ids = list(banda_ids)
+    calculados = calcular(banda_ids)
+    escritos = {}
+    for banda_id in banda_ids:
+        ids, nombres = calculados.get(banda_id, ('', ''))
+        Banda.objects.filter(pk=banda_id).update(
+            estilos_ids=ids, estilos_nombres=nombres,
+            version=F('version') + 1,
+        )
+        escritos[banda_id] = (ids, nombres)
+    return escritos
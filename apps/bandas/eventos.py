@@ -0,0 +1,188 @@
+"""Consultas de eventos por fecha y feed iCalendar.
+
+Los eventos se consultan siempre por rango de ``fecha`` en orden
+ascendente, de modo que el índice sobre ``Evento.fecha`` resuelve el
+filtro y el orden sin recorrer la tabla: los próximos eventos (desde el
+comienzo del día de hoy, para que los del día sigan visibles mientras
+ocurren) y los de un mes calendario.
+
+El feed ``.ics`` se genera en streaming, línea por línea, y su ETag
+se calcula con una consulta agregada sobre los próximos eventos (la
+última modificación y la cantidad) más el día actual: los calendarios
+que lo consultan cada pocos minutos reciben un 304 hasta que se crea,
+modifica o borra un evento o pasa el día, sin importar qué proceso
+atienda la petición.
+"""
+
+import datetime
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Evento
+
+# Sello de versión de los fragmentos de eventos (ver ``versiones``).
+SELLO = 'evento'
+
+# Cantidad máxima de eventos de la página de próximos eventos.
+PROXIMOS_MAXIMOS = 50
+
+# Largo máximo de una línea de iCalendar, en octetos (RFC 5545 §3.1).
+LARGO_LINEA_ICAL = 75
+
+# Identificador del producto que genera el feed.
+PRODID = '-//Sonar//Eventos//ES'
+
+
+def inicio_de_hoy():
+    """Retorna el comienzo del día actual en la zona horaria local."""
+    return timezone.make_aware(
+        datetime.datetime.combine(timezone.localdate(), datetime.time.min),
+    )
+
+
+def proximos(desde=None):
+    """Retorna los eventos a partir de una fecha, del más cercano al más lejano.
+
+    Args:
+        desde: Fecha y hora mínima. Por defecto, el comienzo del día
+            actual.
+
+    Returns:
+        QuerySet de ``Evento`` con su organizador, ordenado por fecha.
+    """
+    desde = desde or inicio_de_hoy()
+    return (
+        Evento.objects.filter(fecha__gte=desde)
+        .select_related('organizador').order_by('fecha', 'id')
+    )
+
+
+def rango_mes(anio, mes):
+    """Retorna el comienzo de un mes y del siguiente en la zona local.
+
+    Args:
+        anio: Año del mes.
+        mes: Número de mes (1 a 12).
+
+    Returns:
+        Tupla ``(desde, hasta)`` de fechas con zona horaria.
+
+    Raises:
+        ValueError: Si el mes o el año no son válidos.
+    """
+    desde = datetime.date(anio, mes, 1)
+    hasta = datetime.date(anio + mes // 12, mes % 12 + 1, 1)
+    return tuple(
+        timezone.make_aware(datetime.datetime.combine(dia, datetime.time.min))
+        for dia in (desde, hasta)
+    )
+
+
+def del_mes(anio, mes):
+    """Retorna los eventos de un mes calendario, en orden de fecha.
+
+    Args:
+        anio: Año del mes.
+        mes: Número de mes (1 a 12).
+
+    Returns:
+        QuerySet de ``Evento`` con su organizador.
+
+    Raises:
+        ValueError: Si el mes o el año no son válidos.
+    """
+    desde, hasta = rango_mes(anio, mes)
+    return (
+        Evento.objects.filter(fecha__gte=desde, fecha__lt=hasta)
+        .select_related('organizador').order_by('fecha', 'id')
+    )
+
+
+def mes_vecino(anio, mes, desplazamiento):
+    """Retorna el ``(anio, mes)`` desplazado en la cantidad de meses dada."""
+    indice = anio * 12 + (mes - 1) + desplazamiento
+    return indice // 12, indice % 12 + 1
+
+
+# ---------------------------------------------------------------------------
+# iCalendar
+# ---------------------------------------------------------------------------
+
+def etag_ical():
+    """Retorna el ETag vigente del feed de próximos eventos.
+
+    Se deriva de los datos de la base y no de un sello en el cache, para
+    que ningún proceso responda 304 con un feed que ya cambió. Crear o
+    modificar un evento cambia la última modificación; borrarlo, la
+    cantidad.
+    """
+    resumen = proximos().select_related(None).order_by().aggregate(
+        ultimo=Max('actualizado'), cantidad=Count('id'),
+    )
+    ultimo = resumen['ultimo'].isoformat() if resumen['ultimo'] else ''
+    base = (
+        f'{ultimo}:{resumen["cantidad"]}:{timezone.localdate().isoformat()}'
+    )
+    return hashlib.sha1(base.encode()).hexdigest()[:16]
+
+
+def _escapar(texto):
+    """Escapa un valor de texto de iCalendar (RFC 5545 §3.3.11)."""
+    return (
+        texto.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+
+def _plegar(linea):
+    """Divide una línea en renglones de hasta 75 octetos con CRLF.
+
+    Los renglones de continuación empiezan con un espacio. No se corta
+    en medio de un carácter UTF-8.
+    """
+    partes = []
+    actual, largo = '', 0
+    for caracter in linea:
+        tamano = len(caracter.encode())
+        if largo + tamano > LARGO_LINEA_ICAL:
+            partes.append(actual)
+            actual, largo = ' ', 1
+        actual += caracter
+        largo += tamano
+    partes.append(actual)
+    return '\r\n'.join(partes) + '\r\n'
+
+
+def _fecha_utc(fecha):
+    """Formatea una fecha y hora como ``AAAAMMDDTHHMMSSZ``."""
+    return fecha.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def lineas_ical(eventos, dominio, tamano_lote=500):
+    """Genera un calendario iCalendar con los eventos dados.
+
+    Args:
+        eventos: QuerySet de ``Evento``; se recorre por lotes.
+        dominio: Dominio usado en los ``UID`` de los eventos.
+        tamano_lote: Filas leídas de la base por lote.
+
+    Yields:
+        Líneas del calendario ya plegadas y terminadas en CRLF.
+    """
+    yield _plegar('BEGIN:VCALENDAR')
+    yield _plegar('VERSION:2.0')
+    yield _plegar(f'PRODID:{PRODID}')
+    yield _plegar('CALSCALE:GREGORIAN')
+    yield _plegar('X-WR-CALNAME:Sonar - Próximos eventos')
+    for evento in eventos.iterator(chunk_size=tamano_lote):
+        yield _plegar('BEGIN:VEVENT')
+        yield _plegar(f'UID:evento-{evento.pk}@{dominio}')
+        yield _plegar(f'DTSTAMP:{_fecha_utc(evento.fecha_creacion)}')
+        yield _plegar(f'DTSTART:{_fecha_utc(evento.fecha)}')
+        yield _plegar(f'SUMMARY:{_escapar(evento.titulo)}')
+        yield _plegar(f'LOCATION:{_escapar(evento.ubicacion)}')
+        yield _plegar(f'DESCRIPTION:{_escapar(evento.descripcion)}')
+        yield _plegar('END:VEVENT')
+    yield _plegar('END:VCALENDAR')
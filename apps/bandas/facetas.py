@@ -0,0 +1,113 @@
+"""Exploración de bandas por estilos con conteos de facetas precalculados.
+
+La página de exploración combina filtros por estilo (una banda debe tener
+todos los seleccionados) y muestra, para cada estilo, cuántas bandas
+quedarían al agregarlo: "Rock (42) · Punk (17)". Calcular esos conteos
+requiere un ``GROUP BY`` sobre la tabla intermedia de
+``Banda.estilos_musicales``, por lo que se guardan en el cache por
+combinación de estilos.
+
+Las entradas del cache incluyen una versión que las señales renuevan
+cuando cambian los estilos de una banda (``m2m_changed``), el estado de
+una banda, o se crea, renombra o elimina una banda o un estilo. Así los
+conteos nunca quedan desactualizados y no hace falta recorrer claves para
+invalidarlas: las viejas simplemente expiran. Como el sello, los conteos
+viven en el cache compartido, por lo que un cambio en un proceso los
+renueva en todos.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from . import versiones
+from .estilos import filtro_estilo
+from .listados import ID_MAXIMO, bandas_listado, entero_positivo
+from .models import Banda, EstiloMusical
+
+# Sello de versión de los conteos (ver ``versiones``).
+SELLO = 'facetas'
+
+# Segundos que se conservan los conteos de una combinación.
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Estado de las bandas que se exploran.
+ESTADO_PUBLICO = 'aprobado'
+
+# Cantidad máxima de estilos combinables (acota las claves de cache).
+ESTILOS_MAXIMOS = 5
+
+
+def parsear_estilos(valores):
+    """Interpreta los estilos seleccionados de la URL.
+
+    Args:
+        valores: Lista de cadenas de ``?estilo=`` (puede repetirse).
+
+    Returns:
+        Tupla ordenada y sin repetidos de IDs de estilos, con como
+        máximo ``ESTILOS_MAXIMOS`` elementos. Los valores que no son IDs
+        válidos se descartan.
+    """
+    ids = {entero_positivo(v, ID_MAXIMO) for v in valores} - {None}
+    return tuple(sorted(ids))[:ESTILOS_MAXIMOS]
+
+
+def invalidar():
+    """Descarta todos los conteos cacheados incrementando su sello."""
+    versiones.incrementar(SELLO)
+
+
+def bandas_con_estilos(estilos):
+    """Retorna las bandas públicas que tienen todos los estilos dados.
+
+    Args:
+        estilos: Tupla de IDs de estilos.
+
+    Returns:
+        QuerySet de ``bandas_listado`` filtrado.
+    """
+    bandas = bandas_listado(ESTADO_PUBLICO)
+    for estilo in estilos:
+        bandas = bandas.filter(filtro_estilo(estilo))
+    return bandas
+
+
+def _calcular_conteos(estilos):
+    """Cuenta las bandas de la selección que tiene cada estilo.
+
+    Returns:
+        Tupla ``(total, facetas)`` con la cantidad de bandas de la
+        selección y la lista de ``(id, nombre, cantidad)`` de los
+        estilos con al menos una banda, por cantidad descendente.
+    """
+    seleccion = Banda.objects.filter(estado=ESTADO_PUBLICO)
+    for estilo in estilos:
+        seleccion = seleccion.filter(filtro_estilo(estilo))
+    total = seleccion.count()
+    filas = (
+        EstiloMusical.objects
+        .filter(banda__in=seleccion.values('id'))
+        .annotate(cantidad=Count('banda'))
+        .values_list('id', 'nombre', 'cantidad')
+        .order_by('-cantidad', 'nombre')
+    )
+    return total, list(filas)
+
+
+def conteos(estilos):
+    """Retorna los conteos de facetas de una combinación de estilos.
+
+    Args:
+        estilos: Tupla ordenada de IDs de estilos seleccionados.
+
+    Returns:
+        Tupla ``(total, facetas)``: cantidad de bandas que tienen todos
+        los estilos seleccionados y lista de ``(id, nombre, cantidad)``
+        con cuántas de ellas tiene cada estilo.
+    """
+    clave = f"facetas:{versiones.version(SELLO)}:{','.join(map(str, estilos))}"
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = _calcular_conteos(estilos)
+        cache.set(clave, resultado, CACHE_TIMEOUT)
+    return resultado
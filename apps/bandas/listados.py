@@ -0,0 +1,158 @@
+"""Listado paginado de bandas por cursor (keyset).
+
+En lugar de ``OFFSET``, cada página continúa desde el último nombre de la
+anterior (``WHERE nombre > cursor ORDER BY nombre LIMIT n``). Con el
+índice único de ``nombre`` el costo de una página no depende de cuántas
+bandas haya ni de qué tan lejos se esté del principio, y las páginas no
+se desplazan si se agregan bandas mientras alguien navega.
+"""
+
+import base64
+import binascii
+import json
+
+from .estilos import filtro_estilo
+from .models import Banda
+
+# Bandas por página, por defecto y máximo aceptado en ``?limite=``.
+TAMANO_PAGINA = 24
+TAMANO_PAGINA_MAXIMO = 100
+
+# Mayor ID que admite una columna ``integer`` en todas las bases.
+ID_MAXIMO = 2 ** 31 - 1
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no se pudo decodificar."""
+
+
+def entero_positivo(valor, maximo=None):
+    """Interpreta un parámetro de la URL como entero positivo.
+
+    ``str.isdigit`` acepta caracteres como ``'²'`` que ``int`` rechaza,
+    por lo que se convierte directamente y se descarta lo inválido.
+
+    Args:
+        valor: Texto recibido, o ``None``.
+        maximo: Mayor valor aceptado, o ``None`` para no limitar.
+
+    Returns:
+        El entero, o ``None`` si no es un entero entre 1 y ``maximo``.
+    """
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        return None
+    if numero < 1 or (maximo is not None and numero > maximo):
+        return None
+    return numero
+
+
+def codificar_cursor(banda):
+    """Codifica la posición de una banda como cursor opaco para la URL.
+
+    Args:
+        banda: Última banda de la página actual.
+
+    Returns:
+        Cadena base64 apta para URLs.
+    """
+    datos = json.dumps([banda.nombre], ensure_ascii=False)
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Decodifica un cursor generado por ``codificar_cursor``.
+
+    Args:
+        cursor: Cadena recibida en ``?cursor=``.
+
+    Returns:
+        Nombre de la última banda de la página anterior.
+
+    Raises:
+        CursorInvalido: Si el cursor está mal formado.
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        (nombre,) = json.loads(
+            base64.urlsafe_b64decode(cursor + relleno).decode(),
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise CursorInvalido(cursor)
+    if not isinstance(nombre, str):
+        raise CursorInvalido(cursor)
+    return nombre
+
+
+def bandas_listado(estado=None, estilo=None):
+    """Retorna el queryset base del listado con sus filtros.
+
+    Carga solo las columnas que muestra la tarjeta de cada banda. Los
+    estilos se leen del resumen desnormalizado (``Banda.estilos``), por lo
+    que el listado y el filtro por estilo usan una sola tabla y una sola
+    consulta.
+
+    Args:
+        estado: Estado de moderación a filtrar, o ``None``.
+        estilo: ID de ``EstiloMusical`` a filtrar, o ``None``.
+
+    Returns:
+        QuerySet de ``Banda`` ordenado por nombre.
+    """
+    bandas = Banda.objects.only(
+        'id', 'nombre', 'estado', 'imagen_principal', 'demos', 'descargas',
+        'estilos_ids', 'estilos_nombres', 'version',
+    )
+    if estado:
+        bandas = bandas.filter(estado=estado)
+    if estilo:
+        bandas = bandas.filter(filtro_estilo(estilo))
+    return bandas.order_by('nombre')
+
+
+def pagina_bandas(bandas, cursor=None, limite=TAMANO_PAGINA):
+    """Obtiene una página del listado a partir de un cursor.
+
+    Args:
+        bandas: QuerySet de ``bandas_listado``.
+        cursor: Cursor de la página anterior, o ``None`` para la primera.
+        limite: Cantidad de bandas por página.
+
+    Returns:
+        Tupla ``(bandas, siguiente)`` con la lista de la página y el
+        cursor de la siguiente, o ``None`` si es la última.
+
+    Raises:
+        CursorInvalido: Si el cursor está mal formado.
+    """
+    pagina = list(_desde_cursor(bandas, cursor)[:limite + 1])
+    return _cortar_pagina(pagina, limite)
+
+
+async def apagina_bandas(bandas, cursor=None, limite=TAMANO_PAGINA):
+    """Versión asíncrona de ``pagina_bandas`` (ORM asíncrono).
+
+    Raises:
+        CursorInvalido: Si el cursor está mal formado.
+    """
+    consulta = _desde_cursor(bandas, cursor)[:limite + 1]
+    pagina = [banda async for banda in consulta]
+    return _cortar_pagina(pagina, limite)
+
+
+def _desde_cursor(bandas, cursor):
+    """Filtra las bandas posteriores al cursor, si hay uno."""
+    if cursor:
+        # ``nombre`` es único, por lo que alcanza para ubicar la posición.
+        bandas = bandas.filter(nombre__gt=decodificar_cursor(cursor))
+    return bandas
+
+
+def _cortar_pagina(pagina, limite):
+    """Separa la fila extra de ``pagina`` y calcula el cursor siguiente."""
+    siguiente = None
+    if len(pagina) > limite:
+        pagina = pagina[:limite]
+        siguiente = codificar_cursor(pagina[-1])
+    return pagina, siguiente
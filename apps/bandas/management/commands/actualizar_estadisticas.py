@@ -0,0 +1,23 @@
+"""Comando para recalcular las estadísticas del dashboard de cada banda."""
+
+from django.core.management.base import BaseCommand
+
+from apps.bandas.estadisticas import actualizar_resumenes, agregar_descargas
+
+
+class Command(BaseCommand):
+    """Agrega las descargas pendientes y recalcula ``EstadisticaBanda``.
+
+    Pensado para ejecutarse periódicamente (por ejemplo, cada 15
+    minutos desde cron); el dashboard muestra el último cálculo.
+    """
+
+    help = 'Recalcula las estadísticas precalculadas de cada banda.'
+
+    def handle(self, *args, **options):
+        """Agrega, recalcula e informa cuántas bandas se actualizaron."""
+        eventos = agregar_descargas()
+        bandas = actualizar_resumenes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Eventos agregados: {eventos}. Bandas actualizadas: {bandas}'
+        ))
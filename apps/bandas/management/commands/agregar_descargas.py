@@ -0,0 +1,23 @@
+"""Comando para agregar los eventos de descarga en los resúmenes."""
+
+from django.core.management.base import BaseCommand
+
+from apps.bandas.estadisticas import agregar_descargas
+
+
+class Command(BaseCommand):
+    """Agrega los eventos de descarga nuevos en totales diarios y semanales.
+
+    Es incremental: cada ejecución procesa solo los eventos posteriores a
+    la última marca de agua. Pensado para ejecutarse periódicamente
+    (por ejemplo, cada 5 minutos desde cron).
+    """
+
+    help = 'Agrega los eventos de descarga nuevos en las tablas resumen.'
+
+    def handle(self, *args, **options):
+        """Ejecuta la agregación e informa cuántos eventos se procesaron."""
+        total = agregar_descargas()
+        self.stdout.write(self.style.SUCCESS(
+            f'Eventos agregados: {total}'
+        ))
@@ -0,0 +1,30 @@
+"""Comando para eliminar eventos de descarga ya agregados."""
+
+from django.core.management.base import BaseCommand
+
+from apps.bandas.estadisticas import agregar_descargas, compactar_eventos
+
+
+class Command(BaseCommand):
+    """Aplica la política de retención sobre los eventos crudos de descarga.
+
+    Primero agrega los eventos pendientes y luego elimina los que ya
+    están reflejados en los resúmenes y superan la retención indicada.
+    """
+
+    help = 'Elimina los eventos de descarga agregados más viejos que --dias.'
+
+    def add_arguments(self, parser):
+        """Define los argumentos del comando."""
+        parser.add_argument(
+            '--dias', type=int, default=90,
+            help='Días de eventos crudos a conservar (por defecto 90).',
+        )
+
+    def handle(self, *args, **options):
+        """Agrega, compacta e informa cuántos eventos se eliminaron."""
+        agregar_descargas()
+        eliminados = compactar_eventos(options['dias'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Eventos eliminados: {eliminados}'
+        ))
@@ -0,0 +1,129 @@
+"""Comando para comparar el despliegue WSGI (síncrono) con el ASGI."""
+
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bandas.ranking import bandas_elegibles
+
+
+class Command(BaseCommand):
+    """Mide latencia y rendimiento de dos despliegues lado a lado.
+
+    Lanza la misma carga (``--peticiones`` por ruta, con
+    ``--concurrencia`` clientes simultáneos) contra cada URL base e
+    imprime peticiones por segundo y percentiles de latencia. Por
+    ejemplo, con la misma base de datos y cache::
+
+        gunicorn config.wsgi -w 4 --threads 8 -b 127.0.0.1:8000
+        gunicorn config.asgi -w 4 -k uvicorn.workers.UvicornWorker \\
+            -b 127.0.0.1:8001
+        python manage.py comparar_despliegues \\
+            --sync http://127.0.0.1:8000 --async http://127.0.0.1:8001
+
+    Las descargas de demos se piden desde el byte 1 (``Range``) para
+    medir la transferencia casi completa sin sumar descargas.
+    """
+
+    help = 'Compara el despliegue síncrono (WSGI) con el asíncrono (ASGI).'
+
+    def add_arguments(self, parser):
+        """Agrega las URLs base y los parámetros de la carga."""
+        parser.add_argument(
+            '--sync', dest='sincrono', default='http://127.0.0.1:8000',
+            help='URL base del despliegue WSGI.',
+        )
+        parser.add_argument(
+            '--async', dest='asincrono', default='http://127.0.0.1:8001',
+            help='URL base del despliegue ASGI.',
+        )
+        parser.add_argument(
+            '--peticiones', type=int, default=200,
+            help='Peticiones por ruta y despliegue (por defecto 200).',
+        )
+        parser.add_argument(
+            '--concurrencia', type=int, default=20,
+            help='Clientes simultáneos (por defecto 20).',
+        )
+        parser.add_argument(
+            '--ruta', action='append', dest='rutas',
+            help='Ruta a medir; se puede repetir. Por defecto, landing, '
+                 'listado, detalle y descarga del demo de una banda.',
+        )
+
+    def handle(self, *args, **options):
+        """Ejecuta la carga contra ambos despliegues e imprime la tabla."""
+        rutas = options['rutas'] or self._rutas_por_defecto()
+        despliegues = (
+            ('WSGI', options['sincrono'].rstrip('/')),
+            ('ASGI', options['asincrono'].rstrip('/')),
+        )
+        self.stdout.write(
+            f'{"ruta":<28} {"despliegue":<10} {"pet/s":>8} '
+            f'{"p50 ms":>8} {"p95 ms":>8} {"errores":>8}'
+        )
+        for ruta in rutas:
+            for nombre, base in despliegues:
+                resultado = self._medir(
+                    base + ruta, options['peticiones'], options['concurrencia'],
+                )
+                self.stdout.write(
+                    f'{ruta:<28} {nombre:<10} {resultado["por_segundo"]:>8.1f} '
+                    f'{resultado["p50"]:>8.1f} {resultado["p95"]:>8.1f} '
+                    f'{resultado["errores"]:>8}'
+                )
+
+    @staticmethod
+    def _rutas_por_defecto():
+        """Retorna las rutas de las vistas con versión asíncrona."""
+        banda_id = (
+            bandas_elegibles().order_by('-descargas')
+            .values_list('id', flat=True).first()
+        )
+        if banda_id is None:
+            raise CommandError(
+                'No hay bandas aprobadas con demo; indique las rutas con --ruta.'
+            )
+        return [
+            '/', '/bandas/', f'/bandas/{banda_id}/',
+            f'/bandas/{banda_id}/descargar/',
+        ]
+
+    @staticmethod
+    def _pedir(url):
+        """Hace una petición y retorna ``(segundos, ok)``."""
+        peticion = urllib.request.Request(url)
+        if url.endswith('/descargar/'):
+            peticion.add_header('Range', 'bytes=1-')
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(peticion, timeout=30) as respuesta:
+                while respuesta.read(64 * 1024):
+                    pass
+                ok = respuesta.status < 400
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return time.perf_counter() - inicio, ok
+
+    def _medir(self, url, peticiones, concurrencia):
+        """Lanza la carga contra una URL y resume los tiempos."""
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+            resultados = list(ejecutor.map(self._pedir, [url] * peticiones))
+        total = time.perf_counter() - inicio
+        tiempos = sorted(segundos * 1000 for segundos, ok in resultados if ok)
+        if len(tiempos) >= 2:
+            cuantiles = statistics.quantiles(tiempos, n=20)
+            p50, p95 = statistics.median(tiempos), cuantiles[18]
+        else:
+            p50 = p95 = tiempos[0] if tiempos else 0.0
+        return {
+            'por_segundo': len(tiempos) / total if total else 0.0,
+            'p50': p50,
+            'p95': p95,
+            'errores': sum(1 for _, ok in resultados if not ok),
+        }
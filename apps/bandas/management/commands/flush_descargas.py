@@ -0,0 +1,32 @@
+"""Comando para volcar de inmediato los contadores de descargas."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.bandas.contadores import buffer_eventos, contador_descargas
+
+
+class Command(BaseCommand):
+    """Fuerza el volcado de las descargas acumuladas en el buffer.
+
+    Con ``DESCARGAS_BUFFER='cache'`` vuelca los contadores compartidos de
+    todos los workers. Con el backend ``'local'`` solo puede volcar el
+    buffer del proceso actual; los workers vuelcan el suyo cada
+    ``DESCARGAS_FLUSH_INTERVALO`` segundos y al terminar.
+    """
+
+    help = 'Vuelca a la base de datos las descargas pendientes del buffer.'
+
+    def handle(self, *args, **options):
+        """Ejecuta el volcado e informa cuántas descargas se escribieron."""
+        backend = getattr(settings, 'DESCARGAS_BUFFER', 'local')
+        if backend != 'cache':
+            self.stdout.write(self.style.WARNING(
+                "DESCARGAS_BUFFER='local': solo se vuelca el buffer de "
+                "este proceso."
+            ))
+        total = contador_descargas().flush()
+        eventos = buffer_eventos().flush()
+        self.stdout.write(self.style.SUCCESS(
+            f'Descargas volcadas: {total} (eventos: {eventos})'
+        ))
@@ -0,0 +1,53 @@
+"""Comando para generar las derivadas responsive de las imágenes existentes."""
+
+from django.core.management.base import BaseCommand
+
+from apps.bandas.derivadas import generar_derivadas
+from apps.bandas.models import Banda, DerivadaImagen
+from apps.bandas.versiones import incrementar_bandas
+from apps.bandas.signals import CAMPOS_IMAGEN
+
+
+class Command(BaseCommand):
+    """Genera las derivadas de las imágenes que todavía no las tienen.
+
+    Con ``IMAGENES_DERIVADAS = 'hilo'`` las imágenes nuevas obtienen sus
+    derivadas al subirse y este comando sirve para las anteriores o tras
+    cambiar ``IMAGENES_ANCHOS`` (con ``--forzar``). Con ``'comando'``
+    debe programarse periódicamente para procesar las subidas nuevas.
+    """
+
+    help = 'Genera las derivadas WebP/JPEG de las imágenes subidas.'
+
+    def add_arguments(self, parser):
+        """Define los argumentos del comando."""
+        parser.add_argument(
+            '--forzar', action='store_true',
+            help='Regenera también las imágenes que ya tienen derivadas.',
+        )
+
+    def handle(self, *args, **options):
+        """Recorre los campos de imagen y genera las derivadas faltantes."""
+        existentes = set()
+        if not options['forzar']:
+            existentes = set(
+                DerivadaImagen.objects.values_list('original', flat=True)
+                .distinct()
+            )
+
+        generadas = 0
+        for modelo, campos in CAMPOS_IMAGEN.items():
+            for instancia in modelo.objects.only('pk', *campos).iterator():
+                for campo in campos:
+                    archivo = getattr(instancia, campo)
+                    if not archivo or archivo.name in existentes:
+                        continue
+                    if generar_derivadas(archivo):
+                        existentes.add(archivo.name)
+                        generadas += 1
+                        if modelo is Banda:
+                            # La tarjeta cacheada pasa a usar las derivadas.
+                            incrementar_bandas(instancia.pk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imágenes procesadas: {generadas}'
+        ))
@@ -0,0 +1,48 @@
+"""Comando para inspeccionar el índice de autocompletado."""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.bandas.autocompletado import indice
+
+
+class Command(BaseCommand):
+    """Construye el índice de autocompletado e informa su tamaño.
+
+    El índice vive en la memoria de cada proceso; el tamaño reportado es
+    el que ocupa en cada worker de la aplicación.
+    """
+
+    help = 'Informa la memoria y el tiempo de respuesta del índice de autocompletado.'
+
+    def add_arguments(self, parser):
+        """Agrega la consulta de prueba opcional."""
+        parser.add_argument(
+            'consulta', nargs='?',
+            help='Consulta de prueba para medir el tiempo de respuesta.',
+        )
+
+    def handle(self, *args, **options):
+        """Construye el índice, muestra sus estadísticas y prueba una consulta."""
+        inicio = time.perf_counter()
+        indice.reconstruir()
+        construccion = time.perf_counter() - inicio
+
+        datos = indice.estadisticas()
+        self.stdout.write(
+            f"Bandas: {datos['bandas']}  Trigramas: {datos['trigramas']}  "
+            f"Memoria por worker: {datos['bytes'] / 1024:.1f} KiB  "
+            f"Construcción: {construccion * 1000:.1f} ms"
+        )
+
+        consulta = options['consulta']
+        if consulta:
+            repeticiones = 1000
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                resultados = indice.buscar(consulta)
+            promedio = (time.perf_counter() - inicio) / repeticiones
+            self.stdout.write(f'Consulta: {promedio * 1e6:.0f} µs')
+            for banda_id, nombre, similitud in resultados:
+                self.stdout.write(f'  {similitud:.3f}  {nombre} (#{banda_id})')
@@ -0,0 +1,29 @@
+"""Comando para eliminar las subidas reanudables abandonadas."""
+
+from django.core.management.base import BaseCommand
+
+from apps.bandas.subidas import limpiar_sesiones
+
+
+class Command(BaseCommand):
+    """Elimina las sesiones de subida inactivas y sus archivos parciales.
+
+    Pensado para ejecutarse periódicamente (por ejemplo, una vez por día
+    desde cron).
+    """
+
+    help = 'Elimina las subidas reanudables sin actividad en las últimas --horas.'
+
+    def add_arguments(self, parser):
+        """Define los argumentos del comando."""
+        parser.add_argument(
+            '--horas', type=int, default=24,
+            help='Horas sin actividad para considerar abandonada una subida.',
+        )
+
+    def handle(self, *args, **options):
+        """Ejecuta la limpieza e informa cuántas sesiones se eliminaron."""
+        eliminadas = limpiar_sesiones(options['horas'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Sesiones eliminadas: {eliminadas}'
+        ))
@@ -0,0 +1,55 @@
+"""Comando para medir el costo de registrar una visita."""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from apps.bandas.visitas import PAGINA_DETALLE, BufferVisitas, evento_visita
+
+# User-Agent de un navegador y de un bot, para los dos casos medidos.
+AGENTES = {
+    'navegador': (
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+        '(KHTML, like Gecko) Chrome/126.0 Safari/537.36'
+    ),
+    'bot': 'Mozilla/5.0 (compatible; Googlebot/2.1; '
+           '+http://www.google.com/bot.html)',
+}
+
+
+class Command(BaseCommand):
+    """Mide los microsegundos que agrega registrar una visita.
+
+    Repite el mismo trabajo que ``registrar_visita`` (filtro de bots,
+    muestreo y agregado al buffer circular) sobre un buffer propio que
+    nunca escribe en la base, con la configuración vigente.
+    """
+
+    help = 'Mide el costo por petición del registro de visitas.'
+
+    def add_arguments(self, parser):
+        """Define los argumentos del comando."""
+        parser.add_argument(
+            '--iteraciones', type=int, default=200000,
+            help='Visitas registradas por caso (por defecto 200000).',
+        )
+
+    def handle(self, *args, **options):
+        """Registra las visitas e imprime el costo promedio por visita."""
+        iteraciones = options['iteraciones']
+        buffer = BufferVisitas(lambda eventos: None, iteraciones)
+        for nombre, agente in AGENTES.items():
+            request = RequestFactory().get(
+                '/bandas/1/', HTTP_USER_AGENT=agente,
+            )
+            inicio = time.perf_counter()
+            for _ in range(iteraciones):
+                evento = evento_visita(request, 1, PAGINA_DETALLE)
+                if evento is not None:
+                    buffer.agregar(evento)
+            segundos = time.perf_counter() - inicio
+            self.stdout.write(
+                f'{nombre:<10} {segundos / iteraciones * 1e6:8.2f} µs/visita'
+            )
+        buffer.detener()
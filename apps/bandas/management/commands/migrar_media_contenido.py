@@ -0,0 +1,72 @@
+"""Comando para migrar los archivos subidos al almacenamiento por contenido."""
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import FileField
+
+from apps.bandas.models import DerivadaImagen
+from apps.bandas.storage import AlmacenamientoContenido
+
+
+class Command(BaseCommand):
+    """Convierte en blobs los archivos guardados antes de la deduplicación.
+
+    Recorre todos los ``FileField`` del proyecto (y las derivadas de
+    imágenes) y registra cada archivo con su mismo nombre, de modo que
+    no hay que modificar ninguna fila. Los archivos repetidos quedan en
+    un único blob. Se puede ejecutar varias veces: los archivos ya
+    migrados se saltean.
+    """
+
+    help = 'Migra los archivos de MEDIA_ROOT al almacenamiento por contenido.'
+
+    def add_arguments(self, parser):
+        """Define los argumentos del comando."""
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Solo informa cuántos archivos se migrarían.',
+        )
+
+    def handle(self, *args, **options):
+        """Recorre los nombres referenciados e importa cada archivo."""
+        if not isinstance(default_storage, AlmacenamientoContenido):
+            raise CommandError(
+                'El almacenamiento por defecto no es AlmacenamientoContenido.'
+            )
+
+        migrados = 0
+        pendientes = 0
+        for nombre in self._nombres():
+            if options['dry_run']:
+                pendientes += int(default_storage.exists(nombre))
+            elif default_storage.importar(nombre):
+                migrados += 1
+
+        if options['dry_run']:
+            self.stdout.write(f'Archivos referenciados en disco: {pendientes}')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Archivos migrados: {migrados}'
+            ))
+
+    def _nombres(self):
+        """Enumera los nombres de archivo referenciados en la base de datos."""
+        vistos = set()
+        for modelo in apps.get_models():
+            campos = [
+                campo.attname for campo in modelo._meta.concrete_fields
+                if isinstance(campo, FileField)
+            ]
+            if not campos:
+                continue
+            for fila in modelo._base_manager.values_list(*campos).iterator():
+                for nombre in fila:
+                    if nombre and nombre not in vistos:
+                        vistos.add(nombre)
+                        yield nombre
+        for nombre in DerivadaImagen.objects.values_list(
+                'archivo', flat=True).iterator():
+            if nombre not in vistos:
+                vistos.add(nombre)
+                yield nombre
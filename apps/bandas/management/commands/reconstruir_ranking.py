@@ -0,0 +1,29 @@
+"""Comando para reconstruir el ranking materializado de descargas."""
+
+from django.core.management.base import BaseCommand
+
+from apps.bandas.models import PuestoRanking
+from apps.bandas.ranking import reconstruir
+
+
+class Command(BaseCommand):
+    """Recalcula el ranking de la landing desde la tabla de bandas.
+
+    El ranking se mantiene de forma incremental; este comando es la red
+    de seguridad para cambios que no pasan por los contadores ni por las
+    señales (por ejemplo, ``update`` masivos). Conviene ejecutarlo
+    periódicamente, por ejemplo cada hora::
+
+        0 * * * * python manage.py reconstruir_ranking
+    """
+
+    help = 'Reconstruye el ranking de bandas más descargadas de la landing.'
+
+    def handle(self, *args, **options):
+        """Reconstruye el ranking e informa si había diferencias."""
+        cambio = reconstruir()
+        puestos = PuestoRanking.objects.count()
+        estado = 'actualizado' if cambio else 'sin cambios'
+        self.stdout.write(self.style.SUCCESS(
+            f'Ranking {estado}: {puestos} puestos'
+        ))
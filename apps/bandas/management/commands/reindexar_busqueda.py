@@ -0,0 +1,23 @@
+"""Comando para reconstruir el índice de búsqueda de bandas."""
+
+from django.core.management.base import BaseCommand
+
+from apps.bandas.busqueda import reindexar
+
+
+class Command(BaseCommand):
+    """Reconstruye los documentos de búsqueda de todas las bandas.
+
+    Las señales mantienen el índice al día; este comando sirve para la
+    carga inicial, tras importaciones masivas (``bulk_create`` y
+    ``update`` no emiten señales) o para reparar el índice.
+    """
+
+    help = 'Reconstruye el índice de búsqueda de texto completo de bandas.'
+
+    def handle(self, *args, **options):
+        """Ejecuta la reindexación e informa cuántas bandas se indexaron."""
+        total = reindexar()
+        self.stdout.write(self.style.SUCCESS(
+            f'Bandas indexadas: {total}'
+        ))
@@ -0,0 +1,45 @@
+"""Comando para reparar el resumen desnormalizado de estilos de las bandas."""
+
+from django.core.management.base import BaseCommand
+
+from apps.bandas.estilos import calcular, sincronizar
+from apps.bandas.models import Banda
+
+
+class Command(BaseCommand):
+    """Compara ``estilos_ids``/``estilos_nombres`` con la relación real.
+
+    Las señales mantienen el resumen al día; este comando corrige las
+    bandas cuyo resumen difiere de ``estilos_musicales`` (por ejemplo,
+    tras cargas masivas que no emiten ``m2m_changed``).
+    """
+
+    help = 'Corrige el resumen de estilos de las bandas que no coincide con la relación.'
+
+    def add_arguments(self, parser):
+        """Define los argumentos del comando."""
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Solo informa cuántas bandas están desincronizadas.',
+        )
+
+    def handle(self, *args, **options):
+        """Detecta las diferencias y, salvo en ``--dry-run``, las corrige."""
+        esperados = calcular()
+        desincronizadas = [
+            banda_id
+            for banda_id, ids, nombres in Banda.objects.values_list(
+                'id', 'estilos_ids', 'estilos_nombres',
+            ).iterator()
+            if esperados.get(banda_id, ('', '')) != (ids, nombres)
+        ]
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'Bandas desincronizadas: {len(desincronizadas)}'
+            )
+            return
+        sincronizar(desincronizadas)
+        self.stdout.write(self.style.SUCCESS(
+            f'Bandas reparadas: {len(desincronizadas)}'
+        ))
@@ -0,0 +1,60 @@
+"""Comando para medir el retraso de las réplicas de la base de datos."""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.bandas.replicas import medir_retraso
+
+
+class Command(BaseCommand):
+    """Mide el retraso de replicación y lo publica para el router.
+
+    Las réplicas con más de ``REPLICAS_RETRASO_MAXIMO`` segundos de
+    retraso dejan de recibir lecturas hasta la siguiente medición, que
+    vence a los ``REPLICAS_RETRASO_VIGENCIA`` segundos. Espera el latido
+    hasta ``REPLICAS_RETRASO_MAXIMO`` segundos, por lo que conviene que
+    ese máximo sea menor que la frecuencia de ejecución, por ejemplo
+    cada minuto::
+
+        * * * * * python manage.py retraso_replicas
+    """
+
+    help = 'Mide el retraso de las réplicas de lectura.'
+
+    def add_arguments(self, parser):
+        """Agrega las opciones de intervalo y salida JSON."""
+        parser.add_argument(
+            '--intervalo', type=float, default=0.5,
+            help='Segundos entre lecturas del latido (por defecto 0.5).',
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Imprime el resultado como JSON (para monitoreo).',
+        )
+
+    def handle(self, *args, **options):
+        """Mide e informa el retraso de cada réplica."""
+        if not settings.REPLICAS:
+            self.stdout.write('No hay réplicas configuradas (DATABASE_REPLICAS).')
+            return
+        retrasos = medir_retraso(options['intervalo'])
+        if options['json']:
+            self.stdout.write(json.dumps(retrasos))
+            return
+        maximo = settings.REPLICAS_RETRASO_MAXIMO
+        for alias, retraso in retrasos.items():
+            nombre = settings.DATABASES[alias]['NAME']
+            if retraso is None:
+                self.stdout.write(self.style.ERROR(
+                    f'{alias} ({nombre}): sin datos, excluida'
+                ))
+            elif retraso > maximo:
+                self.stdout.write(self.style.WARNING(
+                    f'{alias} ({nombre}): {retraso:.1f} s, excluida'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{alias} ({nombre}): {retraso:.1f} s'
+                ))
@@ -87,7 +87,7 @@ class Migration(migrations.Migration):
                 ),
                 (
                     "estilos_musicales",
-                    models.ManyToManyField(to="apps.bandas.estilomusical"),
+                    models.ManyToManyField(to="bandas.estilomusical"),
                 ),
             ],
         ),
@@ -128,7 +128,7 @@ class Migration(migrations.Migration):
                     models.ForeignKey(
                         on_delete=django.db.models.deletion.CASCADE,
                         related_name="integrantes",
-                        to="apps.bandas.banda",
+                        to="bandas.banda",
                     ),
                 ),
             ],
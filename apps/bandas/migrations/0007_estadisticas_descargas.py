@@ -0,0 +1,59 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0006_banda_descargas_evento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaAgregacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('ultimo_id', models.BigIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventoDescarga',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('demo', models.CharField(max_length=255)),
+                ('fecha', models.DateTimeField(db_index=True)),
+                ('cliente', models.CharField(max_length=16)),
+                ('banda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_descarga', to='bandas.banda')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DescargaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('descargas', models.PositiveIntegerField(default=0)),
+                ('banda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descargas_diarias', to='bandas.banda')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha', 'banda'], name='bandas_desc_fecha_fa32e6_idx')],
+                'unique_together': {('banda', 'fecha')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DescargaSemanal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana', models.DateField()),
+                ('descargas', models.PositiveIntegerField(default=0)),
+                ('banda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descargas_semanales', to='bandas.banda')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['semana', 'banda'], name='bandas_desc_semana_ff785c_idx')],
+                'unique_together': {('banda', 'semana')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:33
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0007_estadisticas_descargas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SesionSubida',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('destino', models.CharField(choices=[('demo', 'Demo'), ('imagen', 'Imagen de galería')], max_length=10)),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('recibido', models.PositiveBigIntegerField(default=0)),
+                ('completada', models.BooleanField(default=False)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('actualizada', models.DateTimeField(auto_now=True, db_index=True)),
+                ('banda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sesiones_subida', to='bandas.banda')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sesiones_subida', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0008_sesionsubida'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DerivadaImagen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original', models.CharField(db_index=True, max_length=255)),
+                ('archivo', models.CharField(max_length=255)),
+                ('formato', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=10)),
+                ('ancho', models.PositiveIntegerField()),
+                ('alto', models.PositiveIntegerField()),
+                ('tamano', models.PositiveIntegerField()),
+            ],
+            options={
+                'unique_together': {('original', 'formato', 'ancho')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0010_almacenamiento_contenido'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='banda',
+            index=models.Index(fields=['estado', 'nombre'], name='bandas_band_estado_872d2f_idx'),
+        ),
+    ]
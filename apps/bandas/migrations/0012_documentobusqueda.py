@@ -0,0 +1,136 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Índice de texto completo según el motor: columna tsvector generada con
+# índice GIN en PostgreSQL y tabla virtual FTS5 con triggers en SQLite.
+# En PostgreSQL la configuración spanish_unaccent quita los acentos antes
+# de aplicar el stemmer, como remove_diacritics en FTS5.
+SQL_POSTGRESQL = [
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    'CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish)',
+    """
+    ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem
+    """,
+    """
+    ALTER TABLE bandas_documentobusqueda ADD COLUMN vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish_unaccent'::regconfig, coalesce(nombre, '')), 'A')
+        || setweight(to_tsvector('spanish_unaccent'::regconfig, coalesce(texto, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX bandas_documentobusqueda_vector_idx
+    ON bandas_documentobusqueda USING gin (vector)
+    """,
+]
+
+SQL_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE bandas_documentobusqueda_fts USING fts5(
+        nombre, texto,
+        content='bandas_documentobusqueda', content_rowid='banda_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER bandas_documentobusqueda_ai
+    AFTER INSERT ON bandas_documentobusqueda BEGIN
+        INSERT INTO bandas_documentobusqueda_fts(rowid, nombre, texto)
+        VALUES (new.banda_id, new.nombre, new.texto);
+    END
+    """,
+    """
+    CREATE TRIGGER bandas_documentobusqueda_ad
+    AFTER DELETE ON bandas_documentobusqueda BEGIN
+        INSERT INTO bandas_documentobusqueda_fts(
+            bandas_documentobusqueda_fts, rowid, nombre, texto
+        ) VALUES ('delete', old.banda_id, old.nombre, old.texto);
+    END
+    """,
+    """
+    CREATE TRIGGER bandas_documentobusqueda_au
+    AFTER UPDATE ON bandas_documentobusqueda BEGIN
+        INSERT INTO bandas_documentobusqueda_fts(
+            bandas_documentobusqueda_fts, rowid, nombre, texto
+        ) VALUES ('delete', old.banda_id, old.nombre, old.texto);
+        INSERT INTO bandas_documentobusqueda_fts(rowid, nombre, texto)
+        VALUES (new.banda_id, new.nombre, new.texto);
+    END
+    """,
+]
+
+SQL_POSTGRESQL_REVERSO = [
+    'ALTER TABLE bandas_documentobusqueda DROP COLUMN IF EXISTS vector',
+    'DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent',
+]
+
+SQL_SQLITE_REVERSO = [
+    'DROP TRIGGER IF EXISTS bandas_documentobusqueda_ai',
+    'DROP TRIGGER IF EXISTS bandas_documentobusqueda_ad',
+    'DROP TRIGGER IF EXISTS bandas_documentobusqueda_au',
+    'DROP TABLE IF EXISTS bandas_documentobusqueda_fts',
+]
+
+
+def crear_indice(apps, schema_editor):
+    """Crea el índice de texto completo e indexa las bandas existentes."""
+    vendor = schema_editor.connection.vendor
+    sentencias = {
+        'postgresql': SQL_POSTGRESQL,
+        'sqlite': SQL_SQLITE,
+    }.get(vendor, [])
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+    Banda = apps.get_model('bandas', 'Banda')
+    DocumentoBusqueda = apps.get_model('bandas', 'DocumentoBusqueda')
+    bandas = Banda.objects.select_related('representante').prefetch_related(
+        'estilos_musicales',
+    )
+    documentos = []
+    for banda in bandas.iterator(chunk_size=500):
+        partes = [
+            banda.biografia or '',
+            ' '.join(e.nombre for e in banda.estilos_musicales.all()),
+            banda.lugar_ensayo or '',
+        ]
+        if banda.representante_id and banda.representante.localidad:
+            partes.append(banda.representante.localidad)
+        documentos.append(DocumentoBusqueda(
+            banda_id=banda.pk, nombre=banda.nombre,
+            texto='\n'.join(p for p in partes if p),
+        ))
+    DocumentoBusqueda.objects.bulk_create(documentos, batch_size=500)
+
+
+def eliminar_indice(apps, schema_editor):
+    """Elimina el índice de texto completo."""
+    sentencias = {
+        'postgresql': SQL_POSTGRESQL_REVERSO,
+        'sqlite': SQL_SQLITE_REVERSO,
+    }.get(schema_editor.connection.vendor, [])
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0011_indice_listado_bandas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusqueda',
+            fields=[
+                ('banda', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='documento_busqueda', serialize=False, to='bandas.banda')),
+                ('nombre', models.CharField(max_length=100)),
+                ('texto', models.TextField(blank=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
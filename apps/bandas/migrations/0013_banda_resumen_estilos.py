@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:49
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def completar_resumen(apps, schema_editor):
+    """Calcula el resumen de estilos de las bandas existentes."""
+    Banda = apps.get_model('bandas', 'Banda')
+    por_banda = defaultdict(list)
+    for banda_id, estilo_id, nombre in Banda.estilos_musicales.through.objects.values_list(
+        'banda_id', 'estilomusical_id', 'estilomusical__nombre',
+    ):
+        por_banda[banda_id].append((estilo_id, nombre))
+    for banda_id, estilos in por_banda.items():
+        estilos.sort(key=lambda e: (e[1].lower(), e[0]))
+        Banda.objects.filter(pk=banda_id).update(
+            estilos_ids='|' + '|'.join(str(i) for i, _ in estilos) + '|',
+            estilos_nombres='|'.join(n.replace('|', '/') for _, n in estilos),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0012_documentobusqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banda',
+            name='estilos_ids',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='banda',
+            name='estilos_nombres',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(completar_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def completar_ranking(apps, schema_editor):
+    """Calcula el ranking inicial a partir de las bandas existentes."""
+    Banda = apps.get_model('bandas', 'Banda')
+    PuestoRanking = apps.get_model('bandas', 'PuestoRanking')
+    filas = (
+        Banda.objects.filter(estado='aprobado')
+        .exclude(demos='').exclude(demos__isnull=True)
+        .order_by('-descargas', 'id')
+        .values_list('id', 'descargas')[:getattr(settings, 'RANKING_TAMANO', 10)]
+    )
+    PuestoRanking.objects.bulk_create([
+        PuestoRanking(posicion=posicion, banda_id=banda_id, descargas=descargas)
+        for posicion, (banda_id, descargas) in enumerate(filas, start=1)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0013_banda_resumen_estilos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PuestoRanking',
+            fields=[
+                ('posicion', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('descargas', models.PositiveIntegerField()),
+                ('banda', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='puesto_ranking', to='bandas.banda')),
+            ],
+            options={
+                'ordering': ['posicion'],
+            },
+        ),
+        migrations.RunPython(completar_ranking, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0014_puestoranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banda',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0016_evento_fecha_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaBanda',
+            fields=[
+                ('banda', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadistica', serialize=False, to='bandas.banda')),
+                ('descargas_hoy', models.PositiveIntegerField(default=0)),
+                ('descargas_semana', models.PositiveIntegerField(default=0)),
+                ('descargas_7_dias', models.PositiveIntegerField(default=0)),
+                ('descargas_30_dias', models.PositiveIntegerField(default=0)),
+                ('visitas_detalle_7_dias', models.PositiveIntegerField(default=0)),
+                ('visitas_detalle_30_dias', models.PositiveIntegerField(default=0)),
+                ('visitas_galeria_7_dias', models.PositiveIntegerField(default=0)),
+                ('visitas_galeria_30_dias', models.PositiveIntegerField(default=0)),
+                ('serie', models.JSONField(default=dict)),
+                ('actualizado', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VisitaHoraria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pagina', models.CharField(choices=[('detalle', 'Detalle'), ('galeria', 'Galería')], max_length=10)),
+                ('hora', models.DateTimeField()),
+                ('visitas', models.PositiveIntegerField(default=0)),
+                ('banda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visitas_horarias', to='bandas.banda')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hora', 'banda'], name='bandas_visi_hora_a9582d_idx')],
+                'unique_together': {('banda', 'pagina', 'hora')},
+            },
+        ),
+    ]
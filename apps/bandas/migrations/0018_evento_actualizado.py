@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0017_estadisticas_panel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 23:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bandas', '0018_evento_actualizado'),
+    ]
+
+    operations = [
+        # La tabla intermedia es automática y no admite ``Meta.indexes``:
+        # el índice cubre ``WHERE estilomusical_id = %s`` devolviendo
+        # ``banda_id`` sin leer la tabla.
+        migrations.RunSQL(
+            'CREATE INDEX bandas_estilo_banda_idx ON '
+            'bandas_banda_estilos_musicales (estilomusical_id, banda_id)',
+            'DROP INDEX bandas_estilo_banda_idx',
+        ),
+    ]
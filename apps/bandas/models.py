@@ -6,6 +6,8 @@ auxiliares para generar las rutas de almacenamiento de archivos.
 """
 
 import os
+import uuid
+from collections import namedtuple
 
 from django.core.exceptions import ValidationError
 from django.db import models
@@ -13,6 +15,9 @@ from django.utils.text import slugify
 
 from apps.accounts.models import Usuario
 
+# Estilo leído del resumen desnormalizado de una banda (ver Banda.estilos).
+EstiloResumen = namedtuple('EstiloResumen', ['id', 'nombre'])
+
 
 # ---------------------------------------------------------------------------
 # Funciones de ruta de almacenamiento
@@ -50,14 +55,15 @@ def banda_imagen_directory_path(instance, filename):
     """Genera la ruta de almacenamiento para imágenes de la banda.
 
     Args:
-        instance: Instancia de un modelo con FK a Banda.
+        instance: Instancia de Banda o de un modelo con FK a Banda.
         filename: Nombre original del archivo subido.
 
     Returns:
         Ruta relativa con formato ``<slug>/imagenes_de_la_banda/<filename>``.
     """
+    banda = instance if isinstance(instance, Banda) else instance.banda
     return os.path.join(
-        slugify(instance.banda.nombre), 'imagenes_de_la_banda', filename,
+        slugify(banda.nombre), 'imagenes_de_la_banda', filename,
     )
 
 
@@ -127,6 +133,13 @@ class Banda(models.Model):
         lugar_ensayo: Dirección o nombre del lugar de ensayo.
         fecha_creacion: Fecha de registro de la banda (auto-generada).
         estado: Estado de moderación ('pendiente', 'aprobado', 'rechazado').
+        estilos_ids: IDs de los estilos en formato ``|1|5|``, ordenados
+            por nombre del estilo. Copia de ``estilos_musicales``
+            sincronizada por señales; permite mostrarlos sin el JOIN.
+        estilos_nombres: Nombres de los estilos en formato ``Punk|Rock``,
+            en el mismo orden que ``estilos_ids``.
+        version: Contador que aumenta con cada cambio de la banda o de
+            sus imágenes; forma parte de la clave de cache de su tarjeta.
     """
 
     ESTADOS = [
@@ -157,6 +170,18 @@ class Banda(models.Model):
         max_length=20, choices=ESTADOS, default='pendiente',
     )
     descargas = models.PositiveIntegerField(default=0)
+    # Sin largo máximo: una banda puede tener cualquier cantidad de estilos.
+    estilos_ids = models.TextField(blank=True, default='', editable=False)
+    estilos_nombres = models.TextField(blank=True, default='', editable=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        """Meta opciones para Banda."""
+
+        indexes = [
+            # Listado paginado por cursor filtrado por estado.
+            models.Index(fields=['estado', 'nombre']),
+        ]
 
     def clean(self):
         """Valida que el representante tenga el rol correspondiente.
@@ -175,6 +200,37 @@ class Banda(models.Model):
         """Retorna el nombre de la banda."""
         return self.nombre
 
+    def save(self, *args, **kwargs):
+        """Guarda la banda sin pisar ``version``.
+
+        ``version`` solo se modifica con ``F('version') + 1``; si una
+        instancia cargada antes escribiera su valor, podría repetir una
+        versión ya usada por otra tarjeta cacheada.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            diferidos = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                campo.attname for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.attname != 'version'
+                and campo.attname not in diferidos
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def estilos(self):
+        """Retorna los estilos de la banda sin consultar la base de datos.
+
+        Returns:
+            Lista de ``EstiloResumen(id, nombre)`` ordenada por nombre.
+        """
+        if not self.estilos_ids:
+            return []
+        ids = self.estilos_ids.strip('|').split('|')
+        nombres = self.estilos_nombres.split('|')
+        return [
+            EstiloResumen(int(i), nombre) for i, nombre in zip(ids, nombres)
+        ]
+
 
 class Integrante(models.Model):
     """Modelo que representa un integrante de una banda.
@@ -270,6 +326,8 @@ class Evento(models.Model):
         ubicacion: Lugar donde se realiza el evento.
         organizador: Usuario que creó el evento (opcional).
         fecha_creacion: Fecha de creación del evento (auto-generada).
+        actualizado: Fecha de la última modificación; forma parte del
+            ETag del feed iCalendar.
     """
 
     titulo = models.CharField(max_length=200)
@@ -281,12 +339,413 @@ class Evento(models.Model):
         related_name='eventos_organizados',
     )
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         """Meta opciones para Evento."""
 
         ordering = ['-fecha']
+        indexes = [
+            # Próximos eventos y eventos de un mes (rango y orden por fecha).
+            models.Index(fields=['fecha']),
+        ]
 
     def __str__(self):
         """Retorna el título del evento."""
         return self.titulo
+
+
+# ---------------------------------------------------------------------------
+# Búsqueda
+# ---------------------------------------------------------------------------
+
+class DocumentoBusqueda(models.Model):
+    """Texto indexado para la búsqueda de una banda.
+
+    Reúne en una fila todo lo que se puede buscar de la banda. El índice
+    de texto completo depende del motor (ver ``apps.bandas.busqueda``):
+    en PostgreSQL una columna ``tsvector`` generada con índice GIN y en
+    SQLite una tabla virtual FTS5 sincronizada por triggers.
+
+    Attributes:
+        banda: Banda a la que corresponde el documento.
+        nombre: Nombre de la banda (peso mayor en el ranking).
+        texto: Biografía, estilos, lugar de ensayo y localidad del
+            representante.
+        actualizado: Fecha de la última actualización del documento.
+    """
+
+    banda = models.OneToOneField(
+        Banda, on_delete=models.CASCADE, primary_key=True,
+        related_name='documento_busqueda',
+    )
+    nombre = models.CharField(max_length=100)
+    texto = models.TextField(blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Retorna el nombre de la banda indexada."""
+        return self.nombre
+
+
+# ---------------------------------------------------------------------------
+# Almacenamiento por contenido
+# ---------------------------------------------------------------------------
+
+class Blob(models.Model):
+    """Contenido único de un archivo, identificado por su hash SHA-256.
+
+    Los archivos con los mismos bytes comparten un único blob en disco
+    (ver ``apps.bandas.storage``). El blob se borra cuando deja de tener
+    referencias.
+
+    Attributes:
+        hash: SHA-256 hexadecimal del contenido.
+        ruta: Ruta física del blob relativa a MEDIA_ROOT.
+        tamano: Tamaño en bytes.
+        referencias: Cantidad de nombres lógicos que apuntan al blob.
+        creado: Fecha de creación del blob.
+    """
+
+    hash = models.CharField(max_length=64, primary_key=True)
+    ruta = models.CharField(max_length=255)
+    tamano = models.PositiveBigIntegerField()
+    referencias = models.PositiveIntegerField(default=0)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """Retorna el hash abreviado y la cantidad de referencias."""
+        return f'{self.hash[:12]} ({self.referencias} refs)'
+
+
+class ArchivoLogico(models.Model):
+    """Nombre de archivo visible para los modelos, asociado a un blob.
+
+    Es el nombre que guardan los ``FileField`` (por ejemplo
+    ``<slug>/imagenes_de_la_banda/foto.jpg``); el contenido está en el
+    blob.
+
+    Attributes:
+        nombre: Nombre lógico único dentro del almacenamiento.
+        blob: Blob con el contenido del archivo.
+        creado: Fecha de creación del nombre.
+    """
+
+    nombre = models.CharField(max_length=255, unique=True)
+    blob = models.ForeignKey(
+        Blob, on_delete=models.PROTECT, related_name='archivos',
+    )
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """Retorna el nombre lógico."""
+        return self.nombre
+
+
+# ---------------------------------------------------------------------------
+# Derivadas de imágenes
+# ---------------------------------------------------------------------------
+
+class DerivadaImagen(models.Model):
+    """Versión reescalada y recodificada de una imagen subida.
+
+    Se identifica por el nombre del archivo original en el
+    almacenamiento, de modo que sirve para cualquier ``ImageField`` del
+    sitio (ver ``apps.bandas.derivadas``).
+
+    Attributes:
+        original: Nombre del archivo original en el almacenamiento.
+        archivo: Nombre del archivo de la derivada.
+        formato: Formato de la derivada (``'webp'`` o ``'jpeg'``).
+        ancho: Ancho en píxeles.
+        alto: Alto en píxeles.
+        tamano: Tamaño del archivo en bytes.
+    """
+
+    FORMATOS = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    original = models.CharField(max_length=255, db_index=True)
+    archivo = models.CharField(max_length=255)
+    formato = models.CharField(max_length=10, choices=FORMATOS)
+    ancho = models.PositiveIntegerField()
+    alto = models.PositiveIntegerField()
+    tamano = models.PositiveIntegerField()
+
+    class Meta:
+        """Meta opciones para DerivadaImagen."""
+
+        unique_together = ('original', 'formato', 'ancho')
+
+    def __str__(self):
+        """Retorna el original con el ancho y el formato."""
+        return f'{self.original} ({self.ancho}w {self.formato})'
+
+
+# ---------------------------------------------------------------------------
+# Estadísticas de descargas y visitas
+# ---------------------------------------------------------------------------
+
+class EventoDescarga(models.Model):
+    """Registro compacto de una descarga individual de un demo.
+
+    Los eventos se insertan en lotes (ver ``apps.bandas.contadores``) y
+    se agregan periódicamente en ``DescargaDiaria`` y ``DescargaSemanal``.
+    Una vez agregados pueden eliminarse con ``compactar_descargas``.
+
+    Attributes:
+        banda: Banda cuyo demo se descargó.
+        demo: Nombre del archivo de demo descargado.
+        fecha: Fecha y hora de la descarga.
+        cliente: Hash truncado y anonimizado del cliente (red y agente
+            de usuario), útil para estimar oyentes únicos.
+    """
+
+    banda = models.ForeignKey(
+        Banda, on_delete=models.CASCADE, related_name='eventos_descarga',
+    )
+    demo = models.CharField(max_length=255)
+    fecha = models.DateTimeField(db_index=True)
+    cliente = models.CharField(max_length=16)
+
+    def __str__(self):
+        """Retorna una descripción con la banda y la fecha."""
+        return f'Descarga de {self.banda_id} - {self.fecha:%Y-%m-%d %H:%M}'
+
+
+class DescargaDiaria(models.Model):
+    """Total de descargas de una banda en un día.
+
+    Attributes:
+        banda: Banda a la que corresponde el total.
+        fecha: Día agregado.
+        descargas: Cantidad de descargas en el día.
+    """
+
+    banda = models.ForeignKey(
+        Banda, on_delete=models.CASCADE, related_name='descargas_diarias',
+    )
+    fecha = models.DateField()
+    descargas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Meta opciones para DescargaDiaria."""
+
+        unique_together = ('banda', 'fecha')
+        indexes = [models.Index(fields=['fecha', 'banda'])]
+
+    def __str__(self):
+        """Retorna una descripción con la banda, el día y el total."""
+        return f'{self.banda_id} - {self.fecha}: {self.descargas}'
+
+
+class DescargaSemanal(models.Model):
+    """Total de descargas de una banda en una semana.
+
+    Attributes:
+        banda: Banda a la que corresponde el total.
+        semana: Lunes de la semana agregada.
+        descargas: Cantidad de descargas en la semana.
+    """
+
+    banda = models.ForeignKey(
+        Banda, on_delete=models.CASCADE, related_name='descargas_semanales',
+    )
+    semana = models.DateField()
+    descargas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Meta opciones para DescargaSemanal."""
+
+        unique_together = ('banda', 'semana')
+        indexes = [models.Index(fields=['semana', 'banda'])]
+
+    def __str__(self):
+        """Retorna una descripción con la banda, la semana y el total."""
+        return f'{self.banda_id} - semana {self.semana}: {self.descargas}'
+
+
+class VisitaHoraria(models.Model):
+    """Total de visitas a una página de una banda en una hora.
+
+    Las visitas se acumulan en memoria y se vuelcan sumando con
+    ``upsert_sumando`` (ver ``apps.bandas.visitas``).
+
+    Attributes:
+        banda: Banda visitada.
+        pagina: Página visitada (detalle o galería).
+        hora: Comienzo de la hora agregada, en UTC.
+        visitas: Cantidad de visitas en la hora.
+    """
+
+    PAGINAS = [
+        ('detalle', 'Detalle'),
+        ('galeria', 'Galería'),
+    ]
+
+    banda = models.ForeignKey(
+        Banda, on_delete=models.CASCADE, related_name='visitas_horarias',
+    )
+    pagina = models.CharField(max_length=10, choices=PAGINAS)
+    hora = models.DateTimeField()
+    visitas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Meta opciones para VisitaHoraria."""
+
+        unique_together = ('banda', 'pagina', 'hora')
+        indexes = [models.Index(fields=['hora', 'banda'])]
+
+    def __str__(self):
+        """Retorna una descripción con la banda, la página y la hora."""
+        return (
+            f'{self.banda_id} - {self.pagina} {self.hora:%Y-%m-%d %H}h: '
+            f'{self.visitas}'
+        )
+
+
+class EstadisticaBanda(models.Model):
+    """Resumen precalculado de las estadísticas de una banda.
+
+    Lo recalcula periódicamente ``actualizar_estadisticas`` a partir de
+    ``DescargaDiaria``, ``DescargaSemanal`` y ``VisitaHoraria``, de modo
+    que el dashboard del representante lo lee en una sola fila sin
+    importar cuánta historia tenga la banda.
+
+    Attributes:
+        banda: Banda resumida.
+        descargas_hoy: Descargas del día actual.
+        descargas_semana: Descargas de la semana actual (desde el lunes).
+        descargas_7_dias: Descargas de los últimos 7 días.
+        descargas_30_dias: Descargas de los últimos 30 días.
+        visitas_detalle_7_dias: Visitas a la página de detalle en 7 días.
+        visitas_detalle_30_dias: Visitas a la página de detalle en 30 días.
+        visitas_galeria_7_dias: Visitas a la galería en 7 días.
+        visitas_galeria_30_dias: Visitas a la galería en 30 días.
+        serie: Series para gráficos: ``desde`` (primer día), ``descargas``
+            y ``visitas`` por día, y ``semanas`` con las descargas de las
+            últimas semanas.
+        actualizado: Fecha y hora del cálculo.
+    """
+
+    banda = models.OneToOneField(
+        Banda, on_delete=models.CASCADE, primary_key=True,
+        related_name='estadistica',
+    )
+    descargas_hoy = models.PositiveIntegerField(default=0)
+    descargas_semana = models.PositiveIntegerField(default=0)
+    descargas_7_dias = models.PositiveIntegerField(default=0)
+    descargas_30_dias = models.PositiveIntegerField(default=0)
+    visitas_detalle_7_dias = models.PositiveIntegerField(default=0)
+    visitas_detalle_30_dias = models.PositiveIntegerField(default=0)
+    visitas_galeria_7_dias = models.PositiveIntegerField(default=0)
+    visitas_galeria_30_dias = models.PositiveIntegerField(default=0)
+    serie = models.JSONField(default=dict)
+    actualizado = models.DateTimeField()
+
+    def __str__(self):
+        """Retorna una descripción con la banda."""
+        return f'Estadísticas de {self.banda_id}'
+
+
+class MarcaAgregacion(models.Model):
+    """Marca de agua de un proceso de agregación incremental.
+
+    Guarda el último ID de evento ya agregado para que cada ejecución
+    procese solo los eventos nuevos.
+
+    Attributes:
+        nombre: Identificador del proceso de agregación.
+        ultimo_id: ID del último evento agregado.
+        actualizado: Fecha de la última ejecución.
+    """
+
+    nombre = models.CharField(max_length=50, unique=True)
+    ultimo_id = models.BigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Retorna el nombre del proceso y su marca de agua."""
+        return f'{self.nombre}: {self.ultimo_id}'
+
+
+class PuestoRanking(models.Model):
+    """Puesto del ranking materializado de bandas más descargadas.
+
+    Contiene solo las ``RANKING_TAMANO`` primeras bandas aprobadas con
+    demo, ya ordenadas; se mantiene de forma incremental (ver
+    ``apps.bandas.ranking``) para que la landing no ordene la tabla de
+    bandas en cada visita.
+
+    Attributes:
+        posicion: Puesto en el ranking, desde 1.
+        banda: Banda que ocupa el puesto.
+        descargas: Descargas de la banda al actualizarse el puesto.
+    """
+
+    posicion = models.PositiveSmallIntegerField(primary_key=True)
+    banda = models.OneToOneField(
+        Banda, on_delete=models.CASCADE, related_name='puesto_ranking',
+    )
+    descargas = models.PositiveIntegerField()
+
+    class Meta:
+        """Meta opciones para PuestoRanking."""
+
+        ordering = ['posicion']
+
+    def __str__(self):
+        """Retorna el puesto y la banda."""
+        return f'{self.posicion}. {self.banda_id} ({self.descargas})'
+
+
+# ---------------------------------------------------------------------------
+# Subidas reanudables
+# ---------------------------------------------------------------------------
+
+class SesionSubida(models.Model):
+    """Sesión de subida reanudable de un archivo grande por bloques.
+
+    Los bloques se escriben directamente en su posición dentro de un
+    archivo parcial en ``SUBIDAS_DIR``; al finalizar, ese archivo se
+    mueve al almacenamiento sin volver a leerse.
+
+    Attributes:
+        id: Identificador público (UUID) de la sesión.
+        usuario: Usuario que inició la subida.
+        banda: Banda a la que se asociará el archivo.
+        destino: ``'demo'`` para ``Banda.demos`` o ``'imagen'`` para
+            una nueva ``ImagenBanda``.
+        nombre_archivo: Nombre original del archivo.
+        tamano: Tamaño total declarado en bytes.
+        recibido: Cantidad de bytes contiguos recibidos desde el inicio.
+        completada: Indica si la subida ya se finalizó.
+        creada: Fecha de creación de la sesión.
+        actualizada: Fecha del último bloque recibido.
+    """
+
+    DESTINOS = [
+        ('demo', 'Demo'),
+        ('imagen', 'Imagen de galería'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(
+        Usuario, on_delete=models.CASCADE, related_name='sesiones_subida',
+    )
+    banda = models.ForeignKey(
+        Banda, on_delete=models.CASCADE, related_name='sesiones_subida',
+    )
+    destino = models.CharField(max_length=10, choices=DESTINOS)
+    nombre_archivo = models.CharField(max_length=255)
+    tamano = models.PositiveBigIntegerField()
+    recibido = models.PositiveBigIntegerField(default=0)
+    completada = models.BooleanField(default=False)
+    creada = models.DateTimeField(auto_now_add=True)
+    actualizada = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        """Retorna el nombre del archivo y el progreso de la subida."""
+        return f'{self.nombre_archivo} ({self.recibido}/{self.tamano})'
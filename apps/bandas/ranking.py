@@ -0,0 +1,159 @@
+"""Ranking materializado de las bandas más descargadas.
+
+La tabla ``PuestoRanking`` guarda las ``RANKING_TAMANO`` primeras bandas
+aprobadas con demo, ya ordenadas por descargas. La landing la lee con
+una consulta de N filas en lugar de ordenar ``Banda`` en cada visita.
+
+El ranking se mantiene de forma incremental:
+
+* Al volcar los contadores (``aplicar_descargas``) se reubican solo las
+  bandas que recibieron descargas.
+* Al guardar una banda (aprobación, demo, edición de descargas) se
+  reubica esa banda.
+
+Si una banda sale del ranking (deja de estar aprobada, pierde el demo,
+baja sus descargas o se elimina) no se sabe cuál la reemplaza sin
+consultar ``Banda``, así que se reconstruye completo. El comando
+``reconstruir_ranking`` hace lo mismo y conviene programarlo
+periódicamente como red de seguridad.
+
+Invariante: si el ranking tiene menos de ``RANKING_TAMANO`` puestos,
+contiene a todas las bandas elegibles.
+"""
+
+from django.conf import settings
+from django.db import transaction
+
+from . import versiones
+from .models import Banda, MarcaAgregacion, PuestoRanking
+
+# Marca usada como lock para serializar las actualizaciones del ranking.
+MARCA_RANKING = 'ranking'
+
+# Sello de versión que cambia con el ranking (ver ``versiones``).
+SELLO = 'ranking'
+
+
+def tamano():
+    """Retorna la cantidad de puestos del ranking."""
+    return getattr(settings, 'RANKING_TAMANO', 10)
+
+
+def bandas_elegibles():
+    """Retorna las bandas que pueden figurar en el ranking."""
+    return (
+        Banda.objects.filter(estado='aprobado')
+        .exclude(demos='').exclude(demos__isnull=True)
+    )
+
+
+def _bloquear():
+    """Toma el lock del ranking dentro de la transacción en curso."""
+    MarcaAgregacion.objects.select_for_update().get_or_create(
+        nombre=MARCA_RANKING,
+    )
+
+
+def _escribir(puestos, actuales):
+    """Reemplaza el contenido del ranking si cambió.
+
+    Args:
+        puestos: Lista ordenada de ``(banda_id, descargas)``.
+        actuales: Lista ordenada de ``(banda_id, descargas)`` vigente.
+
+    Returns:
+        ``True`` si el ranking cambió.
+    """
+    if puestos == actuales:
+        return False
+    PuestoRanking.objects.all().delete()
+    PuestoRanking.objects.bulk_create([
+        PuestoRanking(posicion=posicion, banda_id=banda_id, descargas=descargas)
+        for posicion, (banda_id, descargas) in enumerate(puestos, start=1)
+    ])
+    transaction.on_commit(lambda: versiones.incrementar(SELLO))
+    return True
+
+
+def _ordenar(descargas_por_banda):
+    """Ordena ``{banda_id: descargas}`` como el ranking y lo recorta."""
+    return sorted(
+        descargas_por_banda.items(), key=lambda par: (-par[1], par[0]),
+    )[:tamano()]
+
+
+def reconstruir():
+    """Recalcula el ranking completo desde la tabla de bandas.
+
+    Returns:
+        ``True`` si el ranking cambió.
+    """
+    with transaction.atomic():
+        _bloquear()
+        actuales = list(PuestoRanking.objects.values_list('banda_id', 'descargas'))
+        puestos = _ordenar(dict(
+            bandas_elegibles().order_by('-descargas', 'id')
+            .values_list('id', 'descargas')[:tamano()]
+        ))
+        return _escribir(puestos, actuales)
+
+
+def actualizar(banda_ids):
+    """Reubica en el ranking las bandas cuyas descargas o estado cambiaron.
+
+    Solo lee los puestos actuales y las bandas indicadas. Si alguna
+    banda del ranking dejó de ser elegible o bajó sus descargas, se
+    reconstruye completo.
+
+    Args:
+        banda_ids: Iterable de IDs de bandas modificadas.
+
+    Returns:
+        ``True`` si el ranking cambió.
+    """
+    banda_ids = set(banda_ids)
+    if not banda_ids:
+        return False
+    with transaction.atomic():
+        _bloquear()
+        actuales = list(PuestoRanking.objects.values_list('banda_id', 'descargas'))
+        descargas = dict(actuales)
+        elegibles = dict(
+            bandas_elegibles().filter(id__in=banda_ids)
+            .values_list('id', 'descargas')
+        )
+        salientes = any(
+            banda_id not in elegibles or elegibles[banda_id] < descargas[banda_id]
+            for banda_id in banda_ids if banda_id in descargas
+        )
+        if salientes and len(actuales) >= tamano():
+            # Una banda salió del ranking o bajó sus descargas: puede
+            # haber otra fuera del ranking que deba reemplazarla.
+            return reconstruir()
+        for banda_id in banda_ids - elegibles.keys():
+            descargas.pop(banda_id, None)
+        descargas.update(elegibles)
+        return _escribir(_ordenar(descargas), actuales)
+
+
+def top_bandas():
+    """Retorna las bandas del ranking, en orden.
+
+    Returns:
+        Lista de ``Banda`` con los campos de su tarjeta.
+    """
+    return [puesto.banda for puesto in _puestos()]
+
+
+async def atop_bandas():
+    """Versión asíncrona de ``top_bandas`` (ORM asíncrono)."""
+    return [puesto.banda async for puesto in _puestos()]
+
+
+def _puestos():
+    """Retorna los puestos con los campos de la tarjeta de cada banda."""
+    return PuestoRanking.objects.select_related('banda').only(
+        'posicion', 'banda__id', 'banda__nombre', 'banda__demos',
+        'banda__imagen_principal', 'banda__descargas', 'banda__estilos_ids',
+        'banda__estilos_nombres', 'banda__version',
+    )
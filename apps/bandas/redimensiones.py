@@ -0,0 +1,308 @@
+"""Redimensionado de imágenes bajo demanda con cache LRU en disco.
+
+Sirve variantes de cualquier imagen subida en ``/media/r/<ancho>x<alto>/<ruta>``
+para los formatos que no cubren las derivadas precalculadas (miniaturas
+del admin, tarjetas para redes sociales). Solo se aceptan los tamaños de
+``REDIMENSION_TAMANOS``, de modo que el endpoint no puede usarse para
+llenar el disco con variantes arbitrarias.
+
+La primera petición de una variante la genera con Pillow y la guarda en
+``REDIMENSION_CACHE_DIR``. Las peticiones concurrentes por la misma
+variante esperan a que termine la primera (lock por variante dentro del
+proceso y ``flock`` entre procesos), así que cada variante se genera una
+sola vez. Cuando el cache supera ``REDIMENSION_CACHE_MAX`` bytes se
+eliminan las variantes usadas hace más tiempo. Para no recorrer todo el
+directorio en cada variante nueva, ese recorrido se hace como mucho una
+vez cada ``INTERVALO_DESALOJO`` segundos entre todos los procesos, o
+antes si este proceso ya escribió el margen que deja cada desalojo.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Extensiones de los originales que se pueden redimensionar.
+EXTENSIONES_IMAGEN = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Fracción del tamaño máximo a la que se reduce el cache al desalojar.
+FRACCION_OBJETIVO = 0.9
+
+# Segundos mínimos entre dos recorridos del cache para desalojar.
+INTERVALO_DESALOJO = 60
+
+# Archivo cuyo lock serializa los desalojos y cuya fecha de modificación
+# indica cuándo fue el último.
+ARCHIVO_DESALOJO = '.desalojo.lock'
+
+_locks = {}
+_locks_guardia = threading.Lock()
+
+# Bytes de variantes escritos por este proceso desde su último desalojo.
+_escritos = 0
+
+
+def tamanos_permitidos():
+    """Retorna el conjunto de tamaños ``(ancho, alto)`` admitidos."""
+    return {
+        tuple(int(v) for v in tamano.split('x'))
+        for tamano in getattr(settings, 'REDIMENSION_TAMANOS', ())
+    }
+
+
+def parsear_tamano(texto):
+    """Interpreta un tamaño ``<ancho>x<alto>`` de la URL.
+
+    Args:
+        texto: Cadena con el tamaño, por ejemplo ``'300x300'``.
+
+    Returns:
+        Tupla ``(ancho, alto)``, o ``None`` si el tamaño no está en la
+        lista de permitidos.
+    """
+    try:
+        ancho, alto = (int(v) for v in texto.split('x'))
+    except ValueError:
+        return None
+    if (ancho, alto) not in tamanos_permitidos():
+        return None
+    return ancho, alto
+
+
+def directorio_cache():
+    """Retorna (y crea si hace falta) el directorio del cache de variantes."""
+    directorio = settings.REDIMENSION_CACHE_DIR
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def nombre_variante(ruta_original, ancho, alto):
+    """Calcula el nombre de la variante dentro del cache.
+
+    Incluye el tamaño y la fecha de modificación del original, por lo que
+    reemplazar el archivo invalida sus variantes sin borrarlas (el LRU
+    las elimina con el tiempo).
+
+    Args:
+        ruta_original: Ruta absoluta del original.
+        ancho: Ancho de la variante.
+        alto: Alto de la variante.
+
+    Returns:
+        Nombre relativo ``<xx>/<hash>-<ancho>x<alto>.<ext>``.
+    """
+    estado = os.stat(ruta_original)
+    clave = f'{ruta_original}|{estado.st_size}|{estado.st_mtime_ns}'
+    resumen = hashlib.sha1(clave.encode()).hexdigest()
+    extension = (
+        'png' if os.path.splitext(ruta_original)[1].lower() == '.png'
+        else 'jpg'
+    )
+    return f'{resumen[:2]}/{resumen}-{ancho}x{alto}.{extension}'
+
+
+@contextmanager
+def _lock_variante(nombre):
+    """Bloquea la generación de una variante en este y otros procesos.
+
+    Args:
+        nombre: Nombre de la variante dentro del cache.
+    """
+    with _locks_guardia:
+        lock = _locks.setdefault(nombre, threading.Lock())
+    ruta_lock = os.path.join(directorio_cache(), nombre + '.lock')
+    with lock:
+        os.makedirs(os.path.dirname(ruta_lock), exist_ok=True)
+        with open(ruta_lock, 'w') as archivo:
+            fcntl.flock(archivo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(archivo, fcntl.LOCK_UN)
+                try:
+                    os.remove(ruta_lock)
+                except FileNotFoundError:
+                    pass
+        with _locks_guardia:
+            _locks.pop(nombre, None)
+
+
+def _redimensionar(ruta_original, ruta_destino, ancho, alto):
+    """Genera la variante recortada al tamaño exacto y la guarda.
+
+    El archivo se escribe primero en un temporal del mismo directorio y
+    luego se renombra, para que nunca se sirva una variante a medias.
+
+    Args:
+        ruta_original: Ruta absoluta del original.
+        ruta_destino: Ruta absoluta de la variante.
+        ancho: Ancho de la variante.
+        alto: Alto de la variante.
+    """
+    with Image.open(ruta_original) as imagen:
+        # Con JPEG, decodificar directamente a una escala reducida.
+        lado = 2 * max(ancho, alto)
+        imagen.draft('RGB', (lado, lado))
+        imagen = ImageOps.exif_transpose(imagen)
+        variante = ImageOps.fit(
+            imagen, (ancho, alto), Image.Resampling.LANCZOS,
+        )
+    png = ruta_destino.endswith('.png')
+    if png:
+        if variante.mode not in ('RGB', 'RGBA'):
+            variante = variante.convert('RGBA')
+    elif variante.mode != 'RGB':
+        variante = variante.convert('RGB')
+
+    directorio = os.path.dirname(ruta_destino)
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as salida:
+            if png:
+                variante.save(salida, 'PNG', optimize=True)
+            else:
+                variante.save(
+                    salida, 'JPEG', quality=getattr(
+                        settings, 'IMAGENES_CALIDAD', 80,
+                    ), optimize=True, progressive=True,
+                )
+        os.replace(temporal, ruta_destino)
+    except BaseException:
+        os.remove(temporal)
+        raise
+
+
+def obtener_variante(ruta_original, ancho, alto):
+    """Retorna la variante de una imagen, generándola si no está en cache.
+
+    Args:
+        ruta_original: Ruta absoluta del original.
+        ancho: Ancho de la variante.
+        alto: Alto de la variante.
+
+    Returns:
+        Nombre de la variante relativo a ``directorio_cache()``.
+
+    Raises:
+        OSError: Si el original no se puede leer como imagen.
+    """
+    nombre = nombre_variante(ruta_original, ancho, alto)
+    ruta = os.path.join(directorio_cache(), nombre)
+    if _tocar(ruta):
+        return nombre
+
+    with _lock_variante(nombre):
+        # Otra petición pudo generarla mientras se esperaba el lock.
+        if _tocar(ruta):
+            return nombre
+        _redimensionar(ruta_original, ruta, ancho, alto)
+    desalojar_si_corresponde(os.path.getsize(ruta))
+    return nombre
+
+
+def _tocar(ruta):
+    """Marca una variante como usada recientemente.
+
+    La fecha de acceso se actualiza explícitamente (con ``noatime`` las
+    lecturas no la modifican) y la de modificación se conserva, porque
+    de ella dependen el ETag y ``Last-Modified`` de la respuesta.
+
+    Returns:
+        ``True`` si la variante existe.
+    """
+    try:
+        estado = os.stat(ruta)
+        os.utime(ruta, ns=(time.time_ns(), estado.st_mtime_ns))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def desalojar_si_corresponde(escritos):
+    """Desaloja si pasó el intervalo o se escribió mucho desde el último.
+
+    Args:
+        escritos: Bytes de la variante que se acaba de generar.
+
+    Returns:
+        Cantidad de variantes eliminadas.
+    """
+    global _escritos
+    maximo = settings.REDIMENSION_CACHE_MAX
+    with _locks_guardia:
+        _escritos += escritos
+        pendientes = _escritos
+    try:
+        ultimo = os.stat(
+            os.path.join(directorio_cache(), ARCHIVO_DESALOJO),
+        ).st_mtime
+    except FileNotFoundError:
+        ultimo = 0
+    if (pendientes < maximo * (1 - FRACCION_OBJETIVO)
+            and time.time() - ultimo < INTERVALO_DESALOJO):
+        return 0
+    with _locks_guardia:
+        _escritos = 0
+    return desalojar(maximo)
+
+
+def desalojar(maximo=None):
+    """Elimina las variantes menos usadas si el cache supera el máximo.
+
+    Solo un proceso desaloja a la vez; si otro ya lo está haciendo, la
+    llamada no hace nada.
+
+    Args:
+        maximo: Tamaño máximo del cache en bytes. Por defecto,
+            ``REDIMENSION_CACHE_MAX``.
+
+    Returns:
+        Cantidad de variantes eliminadas.
+    """
+    maximo = maximo if maximo is not None else settings.REDIMENSION_CACHE_MAX
+    directorio = directorio_cache()
+    ruta_lock = os.path.join(directorio, ARCHIVO_DESALOJO)
+    with open(ruta_lock, 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0
+        os.utime(ruta_lock)
+
+        variantes = []
+        total = 0
+        for subdirectorio in os.scandir(directorio):
+            if not subdirectorio.is_dir():
+                continue
+            for entrada in os.scandir(subdirectorio.path):
+                if entrada.name.endswith(('.lock', '.tmp')):
+                    continue
+                estado = entrada.stat()
+                variantes.append((estado.st_atime, estado.st_size, entrada.path))
+                total += estado.st_size
+        if total <= maximo:
+            return 0
+
+        eliminadas = 0
+        objetivo = maximo * FRACCION_OBJETIVO
+        for _, tamano, ruta in sorted(variantes):
+            if total <= objetivo:
+                break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                continue
+            total -= tamano
+            eliminadas += 1
+        logger.info('Cache de redimensiones: %d variantes eliminadas', eliminadas)
+        return eliminadas
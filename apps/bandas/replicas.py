@@ -0,0 +1,303 @@
+"""Lecturas públicas desde réplicas de la base de datos.
+
+Con ``DATABASE_REPLICAS`` configurado, ``settings.REPLICAS`` contiene
+los alias de las réplicas de solo lectura. ``MiddlewareReplicas`` marca
+como "públicas" las peticiones GET/HEAD anónimas (sin cookie de sesión)
+a las vistas de ``apps.bandas`` y ``apps.accounts``, y
+``RouterReplicas`` envía sus lecturas a una réplica elegida al azar.
+Todo lo demás (escrituras, usuarios con sesión, admin) usa ``default``.
+
+Lectura de lo propio escrito: cuando una petición escribe en la base,
+la respuesta agrega una cookie que durante ``REPLICAS_VENTANA`` segundos
+mantiene las peticiones de ese cliente en la base principal, hasta que
+las réplicas alcanzan el cambio. Dentro de una misma petición, después
+de la primera escritura (o dentro de una transacción) también se lee de
+la principal.
+
+El retraso de cada réplica se mide con ``medir_retraso`` (comando
+``retraso_replicas``, que corre en su propio proceso) y se guarda en el
+cache compartido, donde lo leen todos los procesos web; por eso el
+cache debe ser compartido (ver ``apps/bandas/checks.py``). Las réplicas
+con más de ``REPLICAS_RETRASO_MAXIMO`` segundos de retraso dejan de
+usarse hasta la siguiente medición.
+"""
+
+import contextvars
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Módulos de las vistas públicas que pueden leer de una réplica.
+MODULOS_PUBLICOS = ('apps.bandas.', 'apps.accounts.')
+
+# Métodos HTTP de solo lectura.
+METODOS_SEGUROS = ('GET', 'HEAD')
+
+# Cookie que fija un cliente a la base principal después de escribir.
+COOKIE_PRINCIPAL = 'sonar_principal'
+
+# Clave de cache con el último retraso medido de cada réplica.
+CLAVE_RETRASO = 'replicas:retraso'
+
+# Marca de ``MarcaAgregacion`` usada como latido para medir el retraso.
+MARCA_LATIDO = 'latido-replicas'
+
+
+class _Estado:
+    """Estado de enrutamiento de la petición en curso.
+
+    Attributes:
+        replica: Alias de la réplica asignada, o ``None`` si la petición
+            debe usar la base principal.
+        escribio: Si la petición ya escribió en la base.
+    """
+
+    __slots__ = ('replica', 'escribio')
+
+    def __init__(self, replica=None):
+        self.replica = replica
+        self.escribio = False
+
+
+_estado = contextvars.ContextVar('estado_replicas', default=None)
+
+
+def replicas_disponibles():
+    """Retorna los alias de las réplicas con retraso aceptable.
+
+    Si todavía no hay mediciones se consideran todas disponibles; una
+    réplica que no respondió a la última medición queda excluida.
+    """
+    if not settings.REPLICAS:
+        return []
+    retrasos = cache.get(CLAVE_RETRASO)
+    if retrasos is None:
+        return list(settings.REPLICAS)
+    maximo = settings.REPLICAS_RETRASO_MAXIMO
+    return [
+        alias for alias in settings.REPLICAS
+        if retrasos.get(alias) is not None and retrasos[alias] <= maximo
+    ]
+
+
+class RouterReplicas:
+    """Router que envía las lecturas públicas a las réplicas."""
+
+    def db_for_read(self, model, **hints):
+        """Retorna la réplica de la petición si puede leer de ella."""
+        estado = _estado.get()
+        if estado is None or estado.replica is None or estado.escribio:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Lo leído dentro de una transacción debe ser consistente
+            # con lo que ella escribe.
+            return None
+        return estado.replica
+
+    def db_for_write(self, model, **hints):
+        """Escribe siempre en la principal y lo registra en la petición."""
+        estado = _estado.get()
+        if estado is not None:
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Permite relaciones entre objetos de la principal y sus réplicas."""
+        bases = {DEFAULT_DB_ALIAS, *settings.REPLICAS}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+
+class MiddlewareReplicas:
+    """Decide si cada petición puede leer de una réplica.
+
+    Debe ir antes de los middleware que consultan la base (sesiones,
+    autenticación) para que estos también usen el estado de la petición.
+    Admite peticiones síncronas y asíncronas: bajo ASGI no obliga a
+    pasar las vistas asíncronas por un hilo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        estado = _Estado()
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self._fijar_principal(request, response, estado)
+
+    async def __acall__(self, request):
+        """Versión asíncrona de ``__call__``.
+
+        El ORM asíncrono copia el contexto al hilo donde consulta, por lo
+        que el router ve (y actualiza) el mismo estado de la petición.
+        """
+        estado = _Estado()
+        token = _estado.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self._fijar_principal(request, response, estado)
+
+    @staticmethod
+    def _fijar_principal(request, response, estado):
+        """Agrega la cookie de lectura de lo propio escrito si corresponde."""
+        if estado.escribio or request.method not in METODOS_SEGUROS:
+            response.set_cookie(
+                COOKIE_PRINCIPAL, '1', max_age=settings.REPLICAS_VENTANA,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Asigna una réplica si la petición es una lectura pública."""
+        estado = _estado.get()
+        if estado is None or not self._es_publica(request, view_func):
+            return None
+        disponibles = replicas_disponibles()
+        if disponibles:
+            estado.replica = random.choice(disponibles)
+        return None
+
+    @staticmethod
+    def _es_publica(request, view_func):
+        """Indica si es una lectura anónima de una vista pública."""
+        return (
+            request.method in METODOS_SEGUROS
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and COOKIE_PRINCIPAL not in request.COOKIES
+            and view_func.__module__.startswith(MODULOS_PUBLICOS)
+        )
+
+
+# ---------------------------------------------------------------------------
+# Retraso de las réplicas
+# ---------------------------------------------------------------------------
+
+def _retraso_servidor(alias):
+    """Retorna el retraso que informa el servidor de la réplica, o ``None``.
+
+    Solo PostgreSQL lo informa: ``pg_last_xact_replay_timestamp()`` es
+    nulo si la base no es una réplica en recuperación (por ejemplo, una
+    copia local).
+    """
+    if connections[alias].vendor != 'postgresql':
+        return None
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            'SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())'
+        )
+        fila = cursor.fetchone()
+    return None if fila is None or fila[0] is None else max(float(fila[0]), 0.0)
+
+
+def _latido_llego(alias, escrito):
+    """Indica si la réplica ya tiene el latido escrito en la principal."""
+    from .models import MarcaAgregacion
+
+    leido = (
+        MarcaAgregacion.objects.using(alias).filter(nombre=MARCA_LATIDO)
+        .values_list('actualizado', flat=True).first()
+    )
+    return leido is not None and leido >= escrito
+
+
+def _esperar_latido(aliases, intervalo):
+    """Escribe un latido y mide cuánto tarda en llegar a cada réplica.
+
+    Returns:
+        Diccionario ``{alias: segundos}``; ``None`` si la réplica no
+        respondió.
+    """
+    from .models import MarcaAgregacion
+
+    latido, _ = MarcaAgregacion.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+        nombre=MARCA_LATIDO,
+    )
+    latido.save(using=DEFAULT_DB_ALIAS, update_fields=['actualizado'])
+    inicio = time.monotonic()
+    retrasos = {}
+    pendientes = list(aliases)
+    while True:
+        transcurrido = time.monotonic() - inicio
+        for alias in list(pendientes):
+            try:
+                llego = _latido_llego(alias, latido.actualizado)
+            except DatabaseError:
+                logger.warning(
+                    'No se pudo medir la réplica %s', alias, exc_info=True,
+                )
+                retrasos[alias] = None
+                pendientes.remove(alias)
+                continue
+            if llego or transcurrido > settings.REPLICAS_RETRASO_MAXIMO:
+                retrasos[alias] = transcurrido
+                pendientes.remove(alias)
+        if not pendientes:
+            return retrasos
+        time.sleep(intervalo)
+
+
+def medir_retraso(intervalo=0.5):
+    """Mide el retraso de replicación de cada réplica.
+
+    En PostgreSQL se usa el retraso que informa el servidor. Para las
+    demás réplicas se escribe un latido en la base principal y se lo
+    busca en ellas cada ``intervalo`` segundos: el retraso es el tiempo
+    que tardó en llegar, medido desde la escritura (con un error de a lo
+    sumo un intervalo). Las réplicas a las que no llega dentro de
+    ``REPLICAS_RETRASO_MAXIMO`` segundos quedan con el tiempo esperado,
+    mayor que el máximo, y se excluyen.
+
+    El resultado se guarda en el cache compartido para que el router de
+    cada proceso deje de usar las réplicas demasiado atrasadas.
+
+    Args:
+        intervalo: Segundos entre lecturas del latido.
+
+    Returns:
+        Diccionario ``{alias: segundos}``; ``None`` si la réplica no
+        respondió.
+    """
+    if not settings.REPLICAS:
+        return {}
+    retrasos = {}
+    sin_servidor = []
+    for alias in settings.REPLICAS:
+        try:
+            retrasos[alias] = _retraso_servidor(alias)
+        except DatabaseError:
+            logger.warning(
+                'No se pudo medir la réplica %s', alias, exc_info=True,
+            )
+            retrasos[alias] = None
+            continue
+        if retrasos[alias] is None:
+            sin_servidor.append(alias)
+    if sin_servidor:
+        retrasos.update(_esperar_latido(sin_servidor, intervalo))
+
+    for alias, retraso in retrasos.items():
+        if retraso is None or retraso > settings.REPLICAS_RETRASO_MAXIMO:
+            logger.warning('Réplica %s atrasada o sin datos: %s s', alias, retraso)
+    cache.set(CLAVE_RETRASO, retrasos, settings.REPLICAS_RETRASO_VIGENCIA)
+    return retrasos
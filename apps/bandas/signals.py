@@ -0,0 +1,596 @@
+"""Señales de la aplicación bandas.
+
+Mantienen el documento de búsqueda de cada banda al día con sus datos,
+estilos y la localidad de su representante, el resumen desnormalizado
+de estilos de cada banda, el índice de autocompletado con los nombres de
+las bandas aprobadas, los conteos de facetas por estilo, el ranking de
+descargas de la landing, los sellos de versión de los fragmentos
+cacheados y los perfiles de usuario cacheados por la autenticación.
+
+También sincronizan las derivadas responsive con las imágenes: se
+encolan al guardar una imagen nueva y se eliminan junto con ella. Al
+borrar una instancia, o al reemplazar uno de sus archivos, también se
+liberan los archivos que dejó de usar; con el almacenamiento por
+contenido esto solo descuenta una referencia, y el blob se borra cuando
+ningún otro nombre lo usa.
+
+Los receptores de ``post_save`` comparan la instancia con los valores
+con los que se cargó y solo actúan si el guardado modificó los campos
+que usan: guardar una banda sin cambios no reindexa, ni invalida caches,
+ni obliga a los demás procesos a actualizar el autocompletado.
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import FileField
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from apps.accounts.autenticacion import invalidar_perfiles
+from apps.accounts.models import Usuario
+
+from . import versiones
+from .autocompletado import publicar_cambio
+from .busqueda import actualizar_documento, actualizar_documentos
+from .derivadas import eliminar_derivadas, programar_derivadas
+from .estilos import sincronizar as sincronizar_estilos
+from .eventos import SELLO as SELLO_EVENTO
+from .facetas import ESTADO_PUBLICO
+from .facetas import invalidar as invalidar_facetas
+from .models import (
+    Banda,
+    EstiloMusical,
+    Evento,
+    Flyer,
+    ImagenBanda,
+    Integrante,
+    PuestoRanking,
+)
+from .ranking import actualizar as actualizar_ranking
+from .ranking import reconstruir as reconstruir_ranking
+
+# Campos de imagen con derivadas, por modelo.
+CAMPOS_IMAGEN = {
+    Banda: ('imagen_principal', 'imagen'),
+    ImagenBanda: ('imagen',),
+    Flyer: ('imagen',),
+    Integrante: ('imagen',),
+}
+
+# Campos de la banda que forman su documento de búsqueda.
+CAMPOS_BUSQUEDA = ('nombre', 'biografia', 'lugar_ensayo', 'representante_id')
+
+# Campos de la banda que usa el índice de autocompletado.
+CAMPOS_AUTOCOMPLETADO = ('nombre', 'estado', 'descargas')
+
+# Campos de la banda que deciden su lugar en el ranking.
+CAMPOS_RANKING = ('estado', 'demos', 'descargas')
+
+
+def _archivos(instance):
+    """Retorna los ``FieldFile`` de imagen de una instancia."""
+    return [
+        getattr(instance, campo) for campo in CAMPOS_IMAGEN[type(instance)]
+    ]
+
+
+def _valor(instance, campo):
+    """Retorna el valor cargado de un campo; el nombre, para archivos."""
+    valor = instance.__dict__[campo.attname]
+    if isinstance(campo, FileField):
+        return getattr(valor, 'name', valor) or ''
+    return valor
+
+
+def _valores(instance):
+    """Retorna ``{attname: valor}`` de los campos no diferidos."""
+    return {
+        campo.attname: _valor(instance, campo)
+        for campo in instance._meta.concrete_fields
+        if campo.attname in instance.__dict__
+    }
+
+
+def _cambiados(instance, created, update_fields, campos=None):
+    """Retorna los campos que modificó un guardado.
+
+    Se comparan con los valores de ``recordar_valores``; un campo
+    diferido al cargar la instancia y asignado después cuenta como
+    modificado.
+
+    Args:
+        instance: Instancia recién guardada.
+        created: Si el guardado creó la instancia (todo cambió).
+        update_fields: Campos guardados, o ``None`` si fueron todos.
+        campos: ``attname`` de los campos a revisar. Por defecto, todos.
+
+    Returns:
+        Conjunto de ``attname`` modificados.
+    """
+    iniciales = instance._valores_iniciales
+    cambiados = set()
+    for campo in instance._meta.concrete_fields:
+        if campos is not None and campo.attname not in campos:
+            continue
+        if campo.attname not in instance.__dict__:
+            continue
+        if update_fields is not None and not (
+            campo.name in update_fields or campo.attname in update_fields
+        ):
+            continue
+        if (created or campo.attname not in iniciales
+                or iniciales[campo.attname] != _valor(instance, campo)):
+            cambiados.add(campo.attname)
+    return cambiados
+
+
+@receiver(post_init, sender=Banda)
+@receiver(post_init, sender=ImagenBanda)
+@receiver(post_init, sender=Flyer)
+@receiver(post_init, sender=Integrante)
+def recordar_valores(sender, instance, **kwargs):
+    """Guarda los valores con los que se cargó la instancia.
+
+    Los receptores de ``post_save`` los comparan (``_cambiados``) para
+    no recalcular nada si el guardado no tocó los campos que usan. Los
+    campos diferidos (``only``/``defer``) no se leen, para no disparar
+    una consulta por instancia.
+    """
+    instance._valores_iniciales = _valores(instance)
+
+
+@receiver(pre_save, sender=Banda)
+@receiver(pre_save, sender=ImagenBanda)
+@receiver(pre_save, sender=Flyer)
+@receiver(pre_save, sender=Integrante)
+def recordar_archivos_guardados(sender, instance, raw=False,
+                                update_fields=None, **kwargs):
+    """Lee de la base los archivos que el guardado puede reemplazar.
+
+    Solo hace falta para los campos de archivo que estaban diferidos al
+    cargar la instancia y se asignaron después: sin su nombre anterior,
+    ``liberar_archivos_reemplazados`` no podría liberarlo.
+    """
+    if raw or instance._state.adding:
+        return
+    iniciales = instance._valores_iniciales
+    desconocidos = [
+        campo.attname for campo in instance._meta.concrete_fields
+        if isinstance(campo, FileField)
+        and campo.attname in instance.__dict__
+        and campo.attname not in iniciales
+        and (update_fields is None or campo.name in update_fields)
+    ]
+    if desconocidos:
+        iniciales.update(
+            sender._default_manager.filter(pk=instance.pk)
+            .values(*desconocidos).first() or {}
+        )
+
+
+@receiver(post_save, sender=Banda)
+@receiver(post_save, sender=ImagenBanda)
+@receiver(post_save, sender=Flyer)
+@receiver(post_save, sender=Integrante)
+def generar_derivadas_al_guardar(sender, instance, created=False, raw=False,
+                                 update_fields=None, **kwargs):
+    """Encola las derivadas de las imágenes nuevas de la instancia.
+
+    Para las bandas, al terminar se incrementa ``Banda.version`` para
+    que su tarjeta cacheada pase a usar las derivadas.
+    """
+    if raw:
+        return
+    campos = _cambiados(
+        instance, created, update_fields, CAMPOS_IMAGEN[sender],
+    )
+    if not campos:
+        return
+    al_generar = None
+    if isinstance(instance, Banda):
+        al_generar = partial(versiones.incrementar_bandas, instance.pk)
+    for campo in campos:
+        programar_derivadas(getattr(instance, campo), al_generar)
+
+
+@receiver(post_delete, sender=Banda)
+@receiver(post_delete, sender=ImagenBanda)
+@receiver(post_delete, sender=Flyer)
+@receiver(post_delete, sender=Integrante)
+def eliminar_archivos_al_borrar(sender, instance, **kwargs):
+    """Elimina los archivos y derivadas de la instancia borrada."""
+    for archivo in _archivos(instance):
+        if archivo and archivo.name:
+            eliminar_derivadas(archivo.name, archivo.storage)
+    for campo in instance._meta.concrete_fields:
+        if not isinstance(campo, FileField):
+            continue
+        archivo = getattr(instance, campo.attname)
+        if archivo and archivo.name:
+            transaction.on_commit(
+                lambda archivo=archivo: archivo.storage.delete(archivo.name),
+            )
+
+
+def _liberar(nombre, storage, derivadas):
+    """Libera un archivo reemplazado y, si es una imagen, sus derivadas."""
+    if derivadas:
+        eliminar_derivadas(nombre, storage)
+    storage.delete(nombre)
+
+
+@receiver(post_save, sender=Banda)
+@receiver(post_save, sender=ImagenBanda)
+@receiver(post_save, sender=Flyer)
+@receiver(post_save, sender=Integrante)
+def liberar_archivos_reemplazados(sender, instance, created=False, raw=False,
+                                  update_fields=None, **kwargs):
+    """Libera los archivos reemplazados al confirmarse el guardado.
+
+    Sin esto, cambiar el demo o una imagen dejaría el ``ArchivoLogico``
+    anterior con su referencia al blob, y sus derivadas WebP y JPEG,
+    para siempre.
+    """
+    if raw or created:
+        return
+    campos = [
+        campo.attname for campo in instance._meta.concrete_fields
+        if isinstance(campo, FileField)
+    ]
+    for attname in _cambiados(instance, created, update_fields, campos):
+        anterior = instance._valores_iniciales.get(attname)
+        if not anterior:
+            continue
+        transaction.on_commit(partial(
+            _liberar, anterior, instance._meta.get_field(attname).storage,
+            attname in CAMPOS_IMAGEN[sender],
+        ))
+
+
+# ---------------------------------------------------------------------------
+# Relación banda-estilo
+# ---------------------------------------------------------------------------
+
+def _bandas_del_estilo(estilo):
+    """Retorna los IDs de las bandas que tienen un estilo."""
+    return list(estilo.banda_set.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Banda.estilos_musicales.through)
+def recordar_bandas_antes_de_limpiar(sender, instance, action, reverse,
+                                     **kwargs):
+    """Guarda las bandas de un estilo antes de ``estilo.banda_set.clear()``.
+
+    Después del clear ya no se sabe qué bandas tenían el estilo, y los
+    receptores de ``post_clear`` las necesitan.
+    """
+    if action == 'pre_clear' and reverse:
+        instance._bandas_afectadas = _bandas_del_estilo(instance)
+
+
+@receiver(pre_delete, sender=EstiloMusical)
+def recordar_bandas_antes_de_borrar(sender, instance, **kwargs):
+    """Guarda las bandas de un estilo antes de borrarlo.
+
+    El borrado en cascada de la tabla intermedia no emite
+    ``m2m_changed``.
+    """
+    instance._bandas_afectadas = _bandas_del_estilo(instance)
+
+
+def _bandas_modificadas(instance, action, reverse, pk_set):
+    """Retorna las bandas afectadas por un ``m2m_changed`` de estilos.
+
+    Returns:
+        Lista de IDs, o ``None`` si la acción no modificó la relación.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return None
+    if not reverse:
+        return [instance.pk]
+    if action == 'post_clear':
+        return getattr(instance, '_bandas_afectadas', [])
+    return list(pk_set or [])
+
+
+# ---------------------------------------------------------------------------
+# Resumen de estilos
+# ---------------------------------------------------------------------------
+
+@receiver(m2m_changed, sender=Banda.estilos_musicales.through)
+def resumir_estilos_banda(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Sincroniza ``estilos_ids``/``estilos_nombres`` con la relación."""
+    bandas = _bandas_modificadas(instance, action, reverse, pk_set)
+    if not bandas:
+        return
+    escritos = sincronizar_estilos(bandas)
+    if not reverse:
+        instance.estilos_ids, instance.estilos_nombres = escritos[instance.pk]
+        instance.refresh_from_db(fields=['version'])
+
+
+@receiver(post_save, sender=EstiloMusical)
+def resumir_estilo_renombrado(sender, instance, created=False, raw=False,
+                              **kwargs):
+    """Actualiza el resumen de las bandas de un estilo renombrado."""
+    if not created and not raw:
+        sincronizar_estilos(_bandas_del_estilo(instance))
+
+
+@receiver(post_delete, sender=EstiloMusical)
+def resumir_estilo_borrado(sender, instance, **kwargs):
+    """Quita el estilo borrado del resumen de sus bandas."""
+    sincronizar_estilos(getattr(instance, '_bandas_afectadas', []))
+
+
+# ---------------------------------------------------------------------------
+# Documento de búsqueda
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Banda)
+def indexar_banda(sender, instance, created=False, raw=False,
+                  update_fields=None, **kwargs):
+    """Actualiza el documento de búsqueda si cambió su texto."""
+    if raw or not _cambiados(
+        instance, created, update_fields, CAMPOS_BUSQUEDA,
+    ):
+        return
+    actualizar_documento(instance)
+
+
+@receiver(m2m_changed, sender=Banda.estilos_musicales.through)
+def indexar_estilos_banda(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Actualiza los documentos al cambiar los estilos de una banda."""
+    bandas = _bandas_modificadas(instance, action, reverse, pk_set)
+    if not bandas:
+        return
+    if not reverse:
+        actualizar_documento(instance)
+    else:
+        actualizar_documentos(bandas)
+
+
+@receiver(post_save, sender=EstiloMusical)
+def indexar_estilo_renombrado(sender, instance, created=False, raw=False,
+                              **kwargs):
+    """Actualiza las bandas de un estilo cuando este cambia de nombre."""
+    if not created and not raw:
+        actualizar_documentos(_bandas_del_estilo(instance))
+
+
+@receiver(post_delete, sender=EstiloMusical)
+def indexar_estilo_borrado(sender, instance, **kwargs):
+    """Quita el estilo borrado de los documentos de sus bandas."""
+    actualizar_documentos(getattr(instance, '_bandas_afectadas', []))
+
+
+@receiver(post_save, sender=Usuario)
+def indexar_localidad_representante(sender, instance, raw=False, **kwargs):
+    """Actualiza la banda del representante (su localidad es buscable)."""
+    if raw or not instance.is_representative:
+        return
+    actualizar_documentos(
+        Banda.objects.filter(representante=instance).values_list('id', flat=True),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Índice de autocompletado
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Banda)
+def autocompletado_banda_guardada(sender, instance, created=False, raw=False,
+                                  update_fields=None, **kwargs):
+    """Actualiza el índice de autocompletado al confirmarse el guardado.
+
+    Solo si cambió algún dato del índice: publicar un cambio hace que
+    los demás procesos actualicen el suyo.
+    """
+    if raw or not _cambiados(
+        instance, created, update_fields, CAMPOS_AUTOCOMPLETADO,
+    ):
+        return
+    transaction.on_commit(lambda: publicar_cambio(banda=instance))
+
+
+@receiver(post_delete, sender=Banda)
+def autocompletado_banda_borrada(sender, instance, **kwargs):
+    """Quita la banda borrada del índice de autocompletado."""
+    banda_id = instance.pk
+    transaction.on_commit(lambda: publicar_cambio(banda_id=banda_id))
+
+
+# ---------------------------------------------------------------------------
+# Conteos de facetas
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Banda)
+def facetas_banda_guardada(sender, instance, created=False, raw=False,
+                           update_fields=None, **kwargs):
+    """Invalida los conteos si la banda cambió de estado o es pública nueva."""
+    if raw:
+        return
+    if created:
+        cambio = instance.estado == ESTADO_PUBLICO
+    else:
+        cambio = bool(_cambiados(
+            instance, created, update_fields, ('estado',),
+        ))
+    if cambio:
+        transaction.on_commit(invalidar_facetas)
+
+
+@receiver(post_delete, sender=Banda)
+def facetas_banda_borrada(sender, instance, **kwargs):
+    """Invalida los conteos al borrar una banda pública."""
+    if instance.__dict__.get('estado', ESTADO_PUBLICO) == ESTADO_PUBLICO:
+        transaction.on_commit(invalidar_facetas)
+
+
+@receiver(m2m_changed, sender=Banda.estilos_musicales.through)
+def facetas_estilos_cambiados(sender, action, **kwargs):
+    """Invalida los conteos al cambiar los estilos de alguna banda."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(invalidar_facetas)
+
+
+@receiver(post_save, sender=EstiloMusical)
+@receiver(post_delete, sender=EstiloMusical)
+def facetas_estilo_modificado(sender, raw=False, **kwargs):
+    """Invalida los conteos al crear, renombrar o borrar un estilo."""
+    if not raw:
+        transaction.on_commit(invalidar_facetas)
+
+
+# ---------------------------------------------------------------------------
+# Ranking de descargas
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Banda)
+def ranking_banda_guardada(sender, instance, created=False, raw=False,
+                           update_fields=None, **kwargs):
+    """Reubica la banda guardada en el ranking de descargas.
+
+    Se actualiza en la misma transacción que el guardado, por lo que un
+    rollback también deshace el cambio en el ranking.
+    """
+    if raw or not _cambiados(
+        instance, created, update_fields, CAMPOS_RANKING,
+    ):
+        return
+    actualizar_ranking([instance.pk])
+
+
+@receiver(pre_delete, sender=Banda)
+def recordar_puesto_antes_de_borrar(sender, instance, **kwargs):
+    """Guarda si la banda figura en el ranking antes de borrarla.
+
+    El borrado en cascada elimina su puesto antes de ``post_delete``.
+    """
+    instance._en_ranking = PuestoRanking.objects.filter(
+        banda_id=instance.pk,
+    ).exists()
+
+
+@receiver(post_delete, sender=Banda)
+def ranking_banda_borrada(sender, instance, **kwargs):
+    """Reconstruye el ranking si la banda borrada figuraba en él.
+
+    Borrar una banda fuera del ranking no toma su lock.
+    """
+    if getattr(instance, '_en_ranking', True):
+        reconstruir_ranking()
+
+
+# ---------------------------------------------------------------------------
+# Sellos de versión de fragmentos cacheados
+# ---------------------------------------------------------------------------
+
+# Sellos que cambian con cada modelo.
+SELLO_BANDA = 'banda'
+
+
+@receiver(post_save, sender=Banda)
+def version_banda(sender, instance, created=False, raw=False,
+                  update_fields=None, **kwargs):
+    """Incrementa ``Banda.version`` para invalidar la tarjeta de la banda."""
+    if created or raw or not _cambiados(instance, created, update_fields):
+        return
+    versiones.incrementar_bandas(instance.pk)
+    instance.refresh_from_db(fields=['version'])
+
+
+@receiver(post_save, sender=Banda)
+def sello_banda_guardada(sender, instance, created=False, raw=False,
+                         update_fields=None, **kwargs):
+    """Incrementa el sello de bandas al confirmarse un cambio."""
+    if raw or not _cambiados(instance, created, update_fields):
+        return
+    transaction.on_commit(lambda: versiones.incrementar(SELLO_BANDA))
+
+
+@receiver(post_delete, sender=Banda)
+def sello_banda_borrada(sender, **kwargs):
+    """Incrementa el sello de bandas al confirmarse el borrado."""
+    transaction.on_commit(lambda: versiones.incrementar(SELLO_BANDA))
+
+
+@receiver(m2m_changed, sender=Banda.estilos_musicales.through)
+def sello_banda_estilos(sender, action, **kwargs):
+    """Incrementa el sello de bandas al cambiar sus estilos."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(lambda: versiones.incrementar(SELLO_BANDA))
+
+
+@receiver(post_save, sender=EstiloMusical)
+@receiver(post_delete, sender=EstiloMusical)
+def sello_estilo(sender, created=False, raw=False, **kwargs):
+    """Incrementa el sello de bandas al renombrar o borrar un estilo."""
+    if not created and not raw:
+        transaction.on_commit(lambda: versiones.incrementar(SELLO_BANDA))
+
+
+@receiver(post_save, sender=Evento)
+@receiver(post_delete, sender=Evento)
+def sello_evento(sender, raw=False, **kwargs):
+    """Incrementa el sello de eventos al confirmarse el cambio."""
+    if not raw:
+        transaction.on_commit(lambda: versiones.incrementar(SELLO_EVENTO))
+
+
+# ---------------------------------------------------------------------------
+# Perfiles de usuario cacheados
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def perfil_usuario(sender, instance, raw=False, **kwargs):
+    """Descarta el perfil cacheado del usuario modificado o borrado."""
+    if not raw:
+        invalidar_perfiles(instance.pk)
+
+
+@receiver(post_save, sender=Banda)
+def perfil_representante(sender, instance, created=False, raw=False,
+                         update_fields=None, **kwargs):
+    """Descarta los perfiles al crear la banda o cambiar su representante."""
+    if raw or not _cambiados(
+        instance, created, update_fields, ('representante_id',),
+    ):
+        return
+    invalidar_perfiles(
+        instance._valores_iniciales.get('representante_id'),
+        instance.representante_id,
+    )
+
+
+@receiver(post_delete, sender=Banda)
+def perfil_representante_borrada(sender, instance, **kwargs):
+    """Descarta el perfil del representante de la banda borrada."""
+    invalidar_perfiles(instance.representante_id)
+
+
+# ---------------------------------------------------------------------------
+# Valores iniciales
+# ---------------------------------------------------------------------------
+
+# Debe ser el último receptor de ``post_save``: los anteriores comparan
+# con los valores que tenía la instancia antes de este guardado.
+@receiver(post_save, sender=Banda)
+@receiver(post_save, sender=ImagenBanda)
+@receiver(post_save, sender=Flyer)
+@receiver(post_save, sender=Integrante)
+def actualizar_valores_iniciales(sender, instance, raw=False, **kwargs):
+    """Toma los valores guardados como base del próximo guardado."""
+    if not raw:
+        instance._valores_iniciales.update(_valores(instance))
@@ -0,0 +1,423 @@
+"""Almacenamiento de archivos direccionado por contenido.
+
+``AlmacenamientoContenido`` guarda cada archivo una sola vez, en una ruta
+derivada del SHA-256 de sus bytes::
+
+    MEDIA_ROOT/blobs/ab/cd/abcd...ef.jpg
+
+Los modelos siguen guardando nombres lógicos (los que arman los
+``upload_to``); la tabla ``ArchivoLogico`` los asocia con su ``Blob``,
+que lleva la cuenta de referencias y se elimina con la última. Así:
+
+* Subir dos veces el mismo archivo (o la imagen por defecto de cada
+  banda nueva) no duplica bytes en disco.
+* Renombrar una banda no deja archivos huérfanos: la ruta física no
+  depende del nombre.
+* Reemplazar o borrar un archivo de un modelo libera su nombre lógico
+  (ver ``apps.bandas.signals``).
+* Las URLs apuntan al blob, que nunca cambia de contenido, por lo que
+  pueden cachearse para siempre (``Cache-Control: immutable``).
+
+Los archivos anteriores a este almacenamiento (sin ``ArchivoLogico``)
+se siguen leyendo desde su ruta original hasta que se migran con el
+comando ``migrar_media_contenido``.
+"""
+
+import hashlib
+import os
+import secrets
+
+from django.core.cache import cache
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+# Directorio (dentro de MEDIA_ROOT) donde se guardan los blobs.
+DIRECTORIO_BLOBS = 'blobs'
+
+# Segundos que se cachea la resolución de un nombre lógico.
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Tamaño de bloque usado al calcular hashes.
+TAMANO_BLOQUE = 64 * 1024
+
+
+def ruta_blob(digest, extension):
+    """Calcula la ruta física de un blob.
+
+    Args:
+        digest: SHA-256 hexadecimal del contenido.
+        extension: Extensión (con punto) a conservar, o cadena vacía.
+
+    Returns:
+        Ruta relativa ``blobs/<xx>/<yy>/<digest><extension>``.
+    """
+    return f'{DIRECTORIO_BLOBS}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def es_blob(nombre):
+    """Indica si un nombre corresponde a la ruta física de un blob."""
+    return nombre.startswith(DIRECTORIO_BLOBS + '/')
+
+
+def hash_contenido(content):
+    """Calcula el SHA-256 de un archivo.
+
+    Reutiliza el hash calculado durante la subida por
+    ``VerificacionUploadHandler`` si está disponible.
+
+    Args:
+        content: Objeto ``File`` de Django.
+
+    Returns:
+        SHA-256 hexadecimal del contenido.
+    """
+    digest = getattr(content, 'sha256', None)
+    if digest:
+        return digest
+    resumen = hashlib.sha256()
+    for bloque in content.chunks(TAMANO_BLOQUE):
+        resumen.update(bloque)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return resumen.hexdigest()
+
+
+def hash_ruta(ruta):
+    """Calcula el SHA-256 de un archivo en disco."""
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE), b''):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+class AlmacenamientoContenido(FileSystemStorage):
+    """``FileSystemStorage`` que deduplica archivos por su contenido.
+
+    Todos los métodos reciben y devuelven nombres lógicos; la traducción
+    a la ruta del blob se hace en ``ruta_fisica``.
+    """
+
+    # ------------------------------------------------------------------
+    # Resolución de nombres
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def clave_cache(nombre):
+        """Retorna la clave de cache de la resolución de ``nombre``."""
+        return 'contenido:' + hashlib.md5(nombre.encode()).hexdigest()
+
+    def ruta_fisica(self, name):
+        """Traduce un nombre lógico a la ruta de su blob.
+
+        La resolución se guarda en el cache compartido (ver
+        ``apps/bandas/checks.py``) por ``CACHE_TIMEOUT`` segundos; como
+        ``_save``, ``delete`` e ``importar`` la borran de ese cache, un
+        nombre liberado o reutilizado deja de resolverse al blob
+        anterior en todos los procesos.
+
+        Args:
+            name: Nombre lógico (o ruta física, para blobs y archivos
+                todavía no migrados).
+
+        Returns:
+            Ruta del blob relativa a MEDIA_ROOT, o ``name`` si no hay un
+            ``ArchivoLogico`` con ese nombre.
+        """
+        from .models import ArchivoLogico
+
+        if es_blob(name):
+            return name
+        clave = self.clave_cache(name)
+        ruta = cache.get(clave)
+        if ruta is None:
+            ruta = (
+                ArchivoLogico.objects.filter(nombre=name)
+                .values_list('blob__ruta', flat=True).first()
+            ) or ''
+            cache.set(clave, ruta, CACHE_TIMEOUT)
+        return ruta or name
+
+    def precargar(self, nombres):
+        """Resuelve varios nombres lógicos con una sola consulta.
+
+        Deja en el cache la ruta física de cada nombre para que las
+        llamadas posteriores a ``url`` o ``path`` no consulten la base.
+
+        Args:
+            nombres: Iterable de nombres lógicos.
+        """
+        claves = self._claves_precarga(nombres)
+        if not claves:
+            return
+        encontradas = cache.get_many(claves)
+        faltantes = [n for clave, n in claves.items() if clave not in encontradas]
+        if not faltantes:
+            return
+        rutas = dict(self._rutas(faltantes))
+        cache.set_many(
+            {self.clave_cache(n): rutas.get(n, '') for n in faltantes},
+            CACHE_TIMEOUT,
+        )
+
+    async def aprecargar(self, nombres):
+        """Versión asíncrona de ``precargar`` (ORM asíncrono)."""
+        claves = self._claves_precarga(nombres)
+        if not claves:
+            return
+        encontradas = await cache.aget_many(claves)
+        faltantes = [n for clave, n in claves.items() if clave not in encontradas]
+        if not faltantes:
+            return
+        rutas = {nombre: ruta async for nombre, ruta in self._rutas(faltantes)}
+        await cache.aset_many(
+            {self.clave_cache(n): rutas.get(n, '') for n in faltantes},
+            CACHE_TIMEOUT,
+        )
+
+    def _claves_precarga(self, nombres):
+        """Retorna ``{clave de cache: nombre}`` de los nombres lógicos."""
+        return {
+            self.clave_cache(nombre): nombre
+            for nombre in nombres if nombre and not es_blob(nombre)
+        }
+
+    @staticmethod
+    def _rutas(nombres):
+        """Retorna ``(nombre, ruta del blob)`` de varios nombres lógicos."""
+        from .models import ArchivoLogico
+
+        return ArchivoLogico.objects.filter(nombre__in=nombres).values_list(
+            'nombre', 'blob__ruta',
+        )
+
+    # ------------------------------------------------------------------
+    # API de Storage
+    # ------------------------------------------------------------------
+
+    def _open(self, name, mode='rb'):
+        """Abre el blob asociado a ``name``."""
+        return super()._open(self.ruta_fisica(name), mode)
+
+    def _save(self, name, content):
+        """Guarda el contenido una sola vez y registra el nombre lógico.
+
+        Si ya existe un blob con el mismo hash solo se suma una
+        referencia; si no, se escribe (o se mueve, para archivos
+        temporales) en su ruta por contenido.
+
+        Args:
+            name: Nombre lógico disponible (ver ``get_available_name``).
+            content: Objeto ``File`` con el contenido.
+
+        Returns:
+            Nombre lógico con el que quedó registrado el archivo.
+        """
+        from .models import ArchivoLogico, Blob
+
+        digest = hash_contenido(content)
+        extension = os.path.splitext(name)[1].lower()
+
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(hash=digest).first()
+            if blob is None or not super().exists(blob.ruta):
+                blob = self._crear_blob(digest, extension, content, blob)
+            Blob.objects.filter(pk=blob.pk).update(
+                referencias=F('referencias') + 1,
+            )
+            while True:
+                try:
+                    with transaction.atomic():
+                        ArchivoLogico.objects.create(nombre=name, blob=blob)
+                    break
+                except IntegrityError:
+                    # Otro proceso registró el mismo nombre entretanto.
+                    name = self.get_available_name(name)
+        cache.delete(self.clave_cache(name))
+        return name
+
+    def _crear_blob(self, digest, extension, content, blob):
+        """Escribe el contenido en su ruta por hash y registra el blob.
+
+        Args:
+            digest: SHA-256 del contenido.
+            extension: Extensión del nombre lógico.
+            content: Objeto ``File`` con el contenido.
+            blob: ``Blob`` existente cuyo archivo falta, o ``None``.
+
+        Returns:
+            El ``Blob`` con su archivo en disco.
+        """
+        from .models import Blob
+
+        ruta = blob.ruta if blob is not None else ruta_blob(digest, extension)
+        self._escribir_atomico(ruta, content)
+
+        if blob is not None:
+            return blob
+        try:
+            with transaction.atomic():
+                return Blob.objects.create(
+                    hash=digest, ruta=ruta, tamano=super().size(ruta),
+                )
+        except IntegrityError:
+            return Blob.objects.select_for_update().get(hash=digest)
+
+    def _escribir_atomico(self, ruta, content):
+        """Escribe el blob en un temporal y lo mueve a su ruta.
+
+        El archivo final aparece completo o no aparece: si ya existe
+        (restos de una escritura interrumpida o una subida concurrente
+        del mismo contenido) se reemplaza sin borrarlo antes, así los
+        lectores nunca encuentran la ruta vacía. El temporal empieza
+        con punto para que ``servir_media`` no lo entregue.
+        """
+        destino = super().path(ruta)
+        directorio = os.path.dirname(destino)
+        os.makedirs(directorio, exist_ok=True)
+        # Como ``FileSystemStorage``, se respeta el umask del proceso
+        # (``mkstemp`` crearía el archivo legible solo por el dueño).
+        temporal = os.path.join(directorio, f'.{secrets.token_hex(8)}.tmp')
+        descriptor = os.open(
+            temporal, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666,
+        )
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                # Los archivos ya escritos en disco se mueven, sin copiar.
+                os.close(descriptor)
+                file_move_safe(
+                    content.temporary_file_path(), temporal,
+                    allow_overwrite=True,
+                )
+            else:
+                with os.fdopen(descriptor, 'wb') as salida:
+                    for bloque in content.chunks():
+                        salida.write(bloque)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporal, self.file_permissions_mode)
+            os.replace(temporal, destino)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+    def delete(self, name):
+        """Elimina el nombre lógico y el blob si era su última referencia.
+
+        Los archivos no migrados se eliminan directamente.
+        """
+        from .models import ArchivoLogico, Blob
+
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        with transaction.atomic():
+            archivo = (
+                ArchivoLogico.objects.select_related('blob')
+                .select_for_update().filter(nombre=name).first()
+            )
+            if archivo is None:
+                if not es_blob(name):
+                    super().delete(name)
+                return
+            blob = Blob.objects.select_for_update().get(pk=archivo.blob_id)
+            archivo.delete()
+            blob.referencias = F('referencias') - 1
+            blob.save(update_fields=['referencias'])
+            blob.refresh_from_db(fields=['referencias'])
+            if blob.referencias <= 0:
+                ruta = blob.ruta
+                blob.delete()
+                transaction.on_commit(lambda: super(
+                    AlmacenamientoContenido, self,
+                ).delete(ruta))
+        cache.delete(self.clave_cache(name))
+
+    def exists(self, name):
+        """Indica si el nombre lógico (o un archivo no migrado) existe."""
+        from .models import ArchivoLogico
+
+        if ArchivoLogico.objects.filter(nombre=name).exists():
+            return True
+        return super().exists(name)
+
+    def path(self, name):
+        """Retorna la ruta absoluta del blob asociado a ``name``."""
+        return super().path(self.ruta_fisica(name))
+
+    def size(self, name):
+        """Retorna el tamaño del contenido de ``name``."""
+        return super().size(self.ruta_fisica(name))
+
+    def url(self, name):
+        """Retorna la URL inmutable del blob asociado a ``name``."""
+        return super().url(self.ruta_fisica(name))
+
+    def get_accessed_time(self, name):
+        """Retorna la fecha de acceso del blob."""
+        return super().get_accessed_time(self.ruta_fisica(name))
+
+    def get_created_time(self, name):
+        """Retorna la fecha de creación del blob."""
+        return super().get_created_time(self.ruta_fisica(name))
+
+    def get_modified_time(self, name):
+        """Retorna la fecha de modificación del blob."""
+        return super().get_modified_time(self.ruta_fisica(name))
+
+    # ------------------------------------------------------------------
+    # Migración de archivos existentes
+    # ------------------------------------------------------------------
+
+    def importar(self, name):
+        """Convierte un archivo guardado por nombre en un blob.
+
+        El archivo se mueve a su ruta por contenido (o se borra si ese
+        contenido ya existe) y queda registrado con el mismo nombre
+        lógico, por lo que los modelos no necesitan cambios.
+
+        Args:
+            name: Nombre del archivo relativo a MEDIA_ROOT.
+
+        Returns:
+            ``True`` si el archivo se importó, ``False`` si ya estaba
+            importado o no existe en disco.
+        """
+        from .models import ArchivoLogico, Blob
+
+        if es_blob(name) or ArchivoLogico.objects.filter(nombre=name).exists():
+            return False
+        origen = super().path(name)
+        if not os.path.isfile(origen):
+            return False
+
+        digest = hash_ruta(origen)
+        movido = None
+        try:
+            with transaction.atomic():
+                blob = (
+                    Blob.objects.select_for_update().filter(hash=digest).first()
+                )
+                if blob is None:
+                    ruta = ruta_blob(digest, os.path.splitext(name)[1].lower())
+                    destino = super().path(ruta)
+                    os.makedirs(os.path.dirname(destino), exist_ok=True)
+                    os.replace(origen, destino)
+                    movido = destino
+                    blob = Blob.objects.create(
+                        hash=digest, ruta=ruta,
+                        tamano=os.path.getsize(destino),
+                    )
+                else:
+                    transaction.on_commit(lambda: os.remove(origen))
+                Blob.objects.filter(pk=blob.pk).update(
+                    referencias=F('referencias') + 1,
+                )
+                ArchivoLogico.objects.create(nombre=name, blob=blob)
+        except Exception:
+            if movido is not None:
+                os.replace(movido, origen)
+            raise
+        cache.delete(self.clave_cache(name))
+        return True
@@ -0,0 +1,400 @@
+"""Utilidades para servir archivos en streaming.
+
+Permite entregar archivos grandes (demos de audio, imágenes) leyendo
+bloques de tamaño fijo, con soporte para peticiones parciales
+``Range``/``If-Range`` (HTTP 206). La memoria usada por cada descarga
+se mantiene constante sin importar el tamaño del archivo.
+
+Con ``MEDIA_SERVIDOR`` en ``'x-accel'`` o ``'x-sendfile'`` la
+transferencia se delega al proxy frontal y el worker no copia datos.
+En todos los casos se envían ETag fuerte y ``Last-Modified`` y se
+responde 304 a las peticiones condicionales.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import (
+    content_disposition_header,
+    http_date,
+    parse_http_date_safe,
+)
+
+# Tamaño de bloque usado al leer archivos para el streaming (64 KiB).
+TAMANO_BLOQUE = 64 * 1024
+
+# Tipos de contenido explícitos para los formatos de demo admitidos.
+# ``mimetypes`` devuelve ``audio/x-wav`` para .wav, que algunos
+# navegadores no reproducen en línea.
+TIPOS_CONTENIDO = {
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+}
+
+RANGO_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangoNoSatisfacible(Exception):
+    """El rango solicitado está fuera de los límites del archivo."""
+
+
+def tipo_contenido(nombre):
+    """Determina el ``Content-Type`` de un archivo a partir de su nombre.
+
+    Args:
+        nombre: Nombre o ruta del archivo.
+
+    Returns:
+        Tipo MIME del archivo, o ``application/octet-stream`` si no
+        se puede determinar.
+    """
+    extension = os.path.splitext(nombre)[1].lower()
+    if extension in TIPOS_CONTENIDO:
+        return TIPOS_CONTENIDO[extension]
+    tipo, _ = mimetypes.guess_type(nombre)
+    return tipo or 'application/octet-stream'
+
+
+def parsear_rango(cabecera, tamano):
+    """Interpreta una cabecera ``Range`` de un único rango de bytes.
+
+    Los rangos múltiples o mal formados se ignoran (se devuelve ``None``)
+    y la respuesta se sirve completa, tal como permite la RFC 9110.
+
+    Args:
+        cabecera: Valor de la cabecera ``Range`` o ``None``.
+        tamano: Tamaño total del archivo en bytes.
+
+    Returns:
+        Tupla ``(inicio, fin)`` con posiciones inclusivas, o ``None``
+        si la petición debe servirse completa.
+
+    Raises:
+        RangoNoSatisfacible: Si el rango no se solapa con el archivo.
+    """
+    if not cabecera:
+        return None
+    coincidencia = RANGO_RE.match(cabecera.strip())
+    if not coincidencia:
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+    if not tamano:
+        raise RangoNoSatisfacible
+
+    if not inicio:
+        # Sufijo: los últimos N bytes del archivo.
+        sufijo = int(fin)
+        if sufijo == 0:
+            raise RangoNoSatisfacible
+        return max(tamano - sufijo, 0), tamano - 1
+
+    inicio = int(inicio)
+    fin = int(fin) if fin else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        raise RangoNoSatisfacible
+    return inicio, min(fin, tamano - 1)
+
+
+def es_descarga_inicial(request):
+    """Indica si la petición corresponde al comienzo de una descarga.
+
+    Las peticiones parciales que retoman o adelantan la reproducción
+    no deben contarse como descargas nuevas, ni las ``HEAD`` (que no
+    reciben el archivo), ni los sondeos como ``bytes=0-1`` con que los
+    reproductores averiguan el tamaño antes de pedir el archivo.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        ``True`` si es un ``GET`` sin cabecera ``Range`` o con el rango
+        abierto ``bytes=0-``.
+    """
+    if request.method != 'GET':
+        return False
+    rango = request.headers.get('Range', '').replace(' ', '')
+    return not rango or rango == 'bytes=0-'
+
+
+def validadores(storage, nombre):
+    """Calcula el tamaño, el ETag y la fecha de modificación de un archivo.
+
+    El ETag es fuerte: combina el tamaño y la fecha de modificación con
+    precisión de microsegundos, que cambian con cada escritura.
+
+    Args:
+        storage: Almacenamiento de Django donde está el archivo.
+        nombre: Nombre del archivo dentro del almacenamiento.
+
+    Returns:
+        Tupla ``(tamano, etag, modificado)`` donde ``modificado`` es un
+        timestamp en segundos, o ``None`` si el almacenamiento no
+        informa la fecha de modificación.
+    """
+    tamano = storage.size(nombre)
+    try:
+        modificado = storage.get_modified_time(nombre)
+    except NotImplementedError:
+        return tamano, f'"{tamano:x}"', None
+    micros = int(modificado.timestamp() * 1_000_000)
+    return tamano, f'"{tamano:x}-{micros:x}"', int(modificado.timestamp())
+
+
+def rango_vigente(request, etag, modificado):
+    """Evalúa ``If-Range`` para decidir si se respeta ``Range``.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        etag: ETag fuerte actual del archivo.
+        modificado: Timestamp de última modificación o ``None``.
+
+    Returns:
+        ``True`` si el cliente tiene la misma versión del archivo
+        (o no envió ``If-Range``) y puede recibir un rango parcial.
+    """
+    condicion = request.headers.get('If-Range')
+    if not condicion:
+        return True
+    condicion = condicion.strip()
+    if condicion.startswith('"'):
+        return condicion == etag
+    fecha = parse_http_date_safe(condicion)
+    return fecha is not None and modificado is not None and fecha == modificado
+
+
+def iterar_archivo(archivo, inicio, fin, tamano_bloque=TAMANO_BLOQUE):
+    """Recorre un archivo abierto en bloques de tamaño fijo.
+
+    Cierra el archivo al terminar o cuando el servidor descarta el
+    iterador (por ejemplo, si el cliente corta la conexión).
+
+    Args:
+        archivo: Objeto de archivo abierto en modo binario.
+        inicio: Posición inicial (inclusiva) en bytes.
+        fin: Posición final (inclusiva) en bytes.
+        tamano_bloque: Tamaño máximo de cada bloque leído.
+
+    Yields:
+        Bloques de bytes del archivo.
+    """
+    try:
+        archivo.seek(inicio)
+        restante = fin - inicio + 1
+        while restante > 0:
+            bloque = archivo.read(min(tamano_bloque, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+    finally:
+        archivo.close()
+
+
+async def aiterar_archivo(archivo, inicio, fin, tamano_bloque=TAMANO_BLOQUE):
+    """Versión asíncrona de ``iterar_archivo`` para servidores ASGI.
+
+    Cada bloque se lee en un hilo del pool general (no en el hilo
+    compartido del ORM), así que la transferencia no ocupa un hilo
+    mientras espera al cliente.
+
+    Args:
+        archivo: Objeto de archivo abierto en modo binario.
+        inicio: Posición inicial (inclusiva) en bytes.
+        fin: Posición final (inclusiva) en bytes.
+        tamano_bloque: Tamaño máximo de cada bloque leído.
+
+    Yields:
+        Bloques de bytes del archivo.
+    """
+    leer = sync_to_async(archivo.read, thread_sensitive=False)
+    try:
+        await sync_to_async(archivo.seek, thread_sensitive=False)(inicio)
+        restante = fin - inicio + 1
+        while restante > 0:
+            bloque = await leer(min(tamano_bloque, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+    finally:
+        archivo.close()
+
+
+def backend_media():
+    """Retorna el backend configurado para entregar archivos.
+
+    Returns:
+        ``'stream'`` (Python lee y envía el archivo), ``'x-accel'``
+        (nginx) o ``'x-sendfile'`` (Apache/lighttpd).
+    """
+    return getattr(settings, 'MEDIA_SERVIDOR', 'stream')
+
+
+def _ruta_delegada(storage, nombre):
+    """Calcula la ruta que se delega al proxy para un archivo.
+
+    Args:
+        storage: Almacenamiento local (con ``path()``) del archivo.
+        nombre: Nombre del archivo dentro del almacenamiento.
+
+    Returns:
+        Tupla ``(cabecera, valor)`` para ``X-Accel-Redirect`` o
+        ``X-Sendfile``, o ``None`` si el almacenamiento no es local.
+    """
+    try:
+        ruta = storage.path(nombre)
+    except NotImplementedError:
+        return None
+    if backend_media() == 'x-sendfile':
+        return 'X-Sendfile', ruta
+    relativa = os.path.relpath(ruta, settings.MEDIA_ROOT)
+    if relativa.startswith(os.pardir):
+        return None
+    prefijo = getattr(settings, 'MEDIA_ACCEL_PREFIJO', '/media-interno/')
+    return 'X-Accel-Redirect', prefijo + quote(relativa.replace(os.sep, '/'))
+
+
+def respuesta_media(request, storage, nombre, nombre_descarga=None,
+                    content_type=None, max_age=None, inmutable=False,
+                    asincrona=False):
+    """Construye la respuesta para servir un archivo almacenado.
+
+    Primero evalúa las cabeceras condicionales (``If-None-Match``,
+    ``If-Modified-Since``) y responde 304 sin leer el archivo si el
+    cliente ya tiene la versión actual. Luego, según ``MEDIA_SERVIDOR``,
+    delega la transferencia al proxy (``X-Accel-Redirect`` o
+    ``X-Sendfile``) o envía el archivo en streaming: 200 completo, 206
+    con el rango pedido o 416 si el rango no es satisfacible. Las
+    peticiones ``HEAD`` solo reciben las cabeceras.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        storage: Almacenamiento de Django donde está el archivo.
+        nombre: Nombre del archivo dentro del almacenamiento.
+        nombre_descarga: Nombre sugerido para guardar el archivo. Si se
+            indica, se envía como adjunto.
+        content_type: Tipo MIME a usar. Por defecto se deduce de la
+            extensión del archivo.
+        max_age: Segundos de ``Cache-Control: max-age``. Si es ``None``
+            no se envía la cabecera.
+        inmutable: Si es verdadero, agrega ``immutable`` a
+            ``Cache-Control`` (para URLs cuyo contenido nunca cambia).
+        asincrona: Si es verdadero, el contenido se envía con un
+            iterador asíncrono (``aiterar_archivo``) para vistas ASGI.
+
+    Returns:
+        ``StreamingHttpResponse`` o ``HttpResponse`` según el caso.
+    """
+    tamano, etag, modificado = validadores(storage, nombre)
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=modificado,
+    )
+    if response is None:
+        response = _respuesta_contenido(
+            request, storage, nombre, tamano, etag, modificado, asincrona,
+        )
+    if response.status_code in (412, 416):
+        return response
+
+    response['ETag'] = etag
+    if modificado is not None:
+        response['Last-Modified'] = http_date(modificado)
+    if max_age is not None:
+        patch_cache_control(response, public=True, max_age=max_age)
+    if inmutable:
+        patch_cache_control(response, immutable=True)
+    if response.status_code == 304:
+        return response
+
+    response['Content-Type'] = content_type or tipo_contenido(nombre)
+    if nombre_descarga:
+        response['Content-Disposition'] = content_disposition_header(
+            True, nombre_descarga,
+        )
+    return response
+
+
+def _respuesta_contenido(request, storage, nombre, tamano, etag, modificado,
+                         asincrona=False):
+    """Construye la respuesta con el contenido (o la delegación) del archivo.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        storage: Almacenamiento de Django donde está el archivo.
+        nombre: Nombre del archivo dentro del almacenamiento.
+        tamano: Tamaño del archivo en bytes.
+        etag: ETag actual del archivo.
+        modificado: Timestamp de última modificación o ``None``.
+        asincrona: Si es verdadero, usa ``aiterar_archivo``.
+
+    Returns:
+        Respuesta sin las cabeceras comunes de ``respuesta_media``.
+    """
+    if backend_media() != 'stream':
+        delegada = _ruta_delegada(storage, nombre)
+        if delegada is not None:
+            # El proxy resuelve Range, Content-Length y el envío.
+            response = HttpResponse()
+            response[delegada[0]] = delegada[1]
+            return response
+
+    rango = None
+    if rango_vigente(request, etag, modificado):
+        try:
+            rango = parsear_rango(request.headers.get('Range'), tamano)
+        except RangoNoSatisfacible:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{tamano}'
+            return response
+
+    inicio, fin = rango if rango is not None else (0, tamano - 1)
+    longitud = fin - inicio + 1 if tamano else 0
+
+    if request.method == 'HEAD' or not tamano:
+        response = HttpResponse()
+    else:
+        contenido = storage.open(nombre, 'rb')
+        response = StreamingHttpResponse(
+            (aiterar_archivo if asincrona else iterar_archivo)(
+                contenido, inicio, fin,
+            ),
+        )
+
+    if rango is not None:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+    response['Content-Length'] = str(longitud)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def respuesta_archivo(request, archivo, nombre_descarga=None,
+                      content_type=None, max_age=None, asincrona=False):
+    """Sirve el archivo de un ``FileField`` con ``respuesta_media``.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        archivo: Instancia de ``FieldFile`` con el archivo a servir.
+        nombre_descarga: Nombre sugerido para guardar el archivo.
+        content_type: Tipo MIME a usar.
+        max_age: Segundos de ``Cache-Control: max-age``.
+        asincrona: Si es verdadero, envía el contenido con un iterador
+            asíncrono.
+
+    Returns:
+        Respuesta generada por ``respuesta_media``.
+    """
+    return respuesta_media(
+        request, archivo.storage, archivo.name,
+        nombre_descarga=nombre_descarga, content_type=content_type,
+        max_age=max_age, asincrona=asincrona,
+    )
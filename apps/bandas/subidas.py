@@ -0,0 +1,321 @@
+"""Subidas reanudables por bloques para demos e imágenes de galería.
+
+El protocolo tiene cuatro pasos:
+
+1. ``iniciar_subida``: crea una ``SesionSubida`` con el tamaño total.
+2. ``escribir_bloque``: recibe un bloque con su desplazamiento. Es
+   idempotente: reenviar un bloque ya recibido no tiene efecto, por lo
+   que el cliente puede reintentar sin riesgo tras un corte.
+3. ``estado_subida``: informa cuántos bytes contiguos se recibieron, para
+   saber desde dónde retomar.
+4. ``finalizar_subida``: mueve el archivo parcial al almacenamiento y lo
+   asocia a la banda, igual que las vistas de subida tradicionales.
+
+Los bloques se escriben en su posición dentro de un único archivo
+parcial, de modo que al finalizar no hay que ensamblar ni releer nada.
+"""
+
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import ImagenBanda, SesionSubida
+from .upload_handlers import LONGITUD_FIRMA, TIPOS_POR_DESTINO, detectar_tipo
+
+# Extensiones admitidas por destino.
+EXTENSIONES = {
+    'demo': ('.mp3', '.wav'),
+    'imagen': ('.jpg', '.jpeg', '.png', '.webp'),
+}
+
+# Tamaño de los bloques leídos del cuerpo de la petición.
+TAMANO_LECTURA = 64 * 1024
+
+
+class ErrorSubida(Exception):
+    """Error del protocolo de subida con el código HTTP a responder.
+
+    Attributes:
+        status: Código de estado HTTP asociado al error.
+        recibido: Bytes recibidos hasta el momento, si corresponde.
+    """
+
+    def __init__(self, mensaje, status=400, recibido=None):
+        """Inicializa el error.
+
+        Args:
+            mensaje: Descripción del error para el cliente.
+            status: Código de estado HTTP.
+            recibido: Bytes recibidos en la sesión, si aplica.
+        """
+        super().__init__(mensaje)
+        self.status = status
+        self.recibido = recibido
+
+
+class ArchivoParcial(File):
+    """Archivo ya escrito en disco que el almacenamiento puede mover.
+
+    ``FileSystemStorage`` mueve (en lugar de copiar) los archivos que
+    exponen ``temporary_file_path()``, igual que con las subidas grandes
+    de Django.
+    """
+
+    def __init__(self, ruta, nombre):
+        """Inicializa el archivo.
+
+        Args:
+            ruta: Ruta absoluta del archivo parcial completo.
+            nombre: Nombre con el que se guardará.
+        """
+        super().__init__(open(ruta, 'rb'), nombre)
+        self._ruta = ruta
+
+    def temporary_file_path(self):
+        """Retorna la ruta del archivo en disco."""
+        return self._ruta
+
+
+def directorio_subidas():
+    """Retorna (y crea si hace falta) el directorio de archivos parciales."""
+    directorio = settings.SUBIDAS_DIR
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def ruta_parcial(sesion):
+    """Retorna la ruta del archivo parcial de una sesión."""
+    return os.path.join(directorio_subidas(), f'{sesion.id}.part')
+
+
+def estado_subida(sesion):
+    """Retorna el estado de una sesión en un formato serializable.
+
+    Args:
+        sesion: Instancia de SesionSubida.
+
+    Returns:
+        Diccionario con el ID, tamaño, bytes recibidos y si finalizó.
+    """
+    return {
+        'id': str(sesion.id),
+        'destino': sesion.destino,
+        'nombre': sesion.nombre_archivo,
+        'tamano': sesion.tamano,
+        'recibido': sesion.recibido,
+        'completada': sesion.completada,
+        'tamano_bloque_maximo': settings.SUBIDAS_TAMANO_BLOQUE,
+    }
+
+
+def iniciar_subida(usuario, banda, destino, nombre, tamano):
+    """Crea una sesión de subida y su archivo parcial vacío.
+
+    Args:
+        usuario: Usuario que sube el archivo.
+        banda: Banda destino.
+        destino: ``'demo'`` o ``'imagen'``.
+        nombre: Nombre original del archivo.
+        tamano: Tamaño total declarado en bytes.
+
+    Returns:
+        La SesionSubida creada.
+
+    Raises:
+        ErrorSubida: Si el destino, la extensión o el tamaño no son válidos.
+    """
+    if destino not in EXTENSIONES:
+        raise ErrorSubida('Destino no válido.')
+    nombre = os.path.basename(nombre or '')
+    if os.path.splitext(nombre)[1].lower() not in EXTENSIONES[destino]:
+        raise ErrorSubida(
+            'Tipo de archivo no admitido. Se aceptan: '
+            + ', '.join(EXTENSIONES[destino])
+        )
+    maximo = settings.SUBIDAS_TAMANO_MAXIMO[destino]
+    if tamano <= 0 or tamano > maximo:
+        raise ErrorSubida(
+            f'El tamaño debe estar entre 1 y {maximo} bytes.', status=413,
+        )
+
+    sesion = SesionSubida.objects.create(
+        usuario=usuario, banda=banda, destino=destino,
+        nombre_archivo=nombre, tamano=tamano,
+    )
+    with open(ruta_parcial(sesion), 'wb'):
+        pass
+    return sesion
+
+
+def escribir_bloque(sesion, desplazamiento, entrada, longitud):
+    """Escribe un bloque de la subida en su posición.
+
+    Solo se aceptan bloques que comienzan en o antes del último byte
+    recibido; los bytes que ya estaban se descartan sin escribir, por lo
+    que reenviar un bloque es inofensivo. El cuerpo se lee en bloques de
+    ``TAMANO_LECTURA`` y nunca se carga entero en memoria.
+
+    Args:
+        sesion: Instancia de SesionSubida.
+        desplazamiento: Posición (en bytes) del bloque en el archivo.
+        entrada: Objeto con ``read(n)`` (por ejemplo, el HttpRequest).
+        longitud: Cantidad de bytes del bloque.
+
+    Returns:
+        Cantidad de bytes contiguos recibidos tras escribir el bloque.
+
+    Raises:
+        ErrorSubida: Si la sesión terminó, el bloque es demasiado grande,
+            excede el tamaño declarado o deja un hueco.
+    """
+    if sesion.completada:
+        raise ErrorSubida('La subida ya fue finalizada.', status=409)
+    if longitud > settings.SUBIDAS_TAMANO_BLOQUE:
+        raise ErrorSubida('Bloque demasiado grande.', status=413)
+    if desplazamiento < 0 or desplazamiento + longitud > sesion.tamano:
+        raise ErrorSubida(
+            'El bloque excede el tamaño declarado.', status=416,
+            recibido=sesion.recibido,
+        )
+    if desplazamiento > sesion.recibido:
+        raise ErrorSubida(
+            'Bloque fuera de orden; retomar desde el byte recibido.',
+            status=409, recibido=sesion.recibido,
+        )
+
+    fin = desplazamiento + longitud
+    if fin <= sesion.recibido:
+        return sesion.recibido
+
+    # Descartar la parte del bloque que ya estaba escrita.
+    descartar = sesion.recibido - desplazamiento
+    while descartar > 0:
+        leido = entrada.read(min(TAMANO_LECTURA, descartar))
+        if not leido:
+            break
+        descartar -= len(leido)
+
+    posicion = sesion.recibido
+    with open(ruta_parcial(sesion), 'r+b') as archivo:
+        archivo.seek(posicion)
+        while posicion < fin:
+            datos = entrada.read(min(TAMANO_LECTURA, fin - posicion))
+            if not datos:
+                break
+            archivo.write(datos)
+            posicion += len(datos)
+
+    # Otro reintento concurrente puede haber avanzado más: nunca retroceder.
+    SesionSubida.objects.filter(pk=sesion.pk).update(
+        recibido=Greatest('recibido', posicion), actualizada=timezone.now(),
+    )
+    sesion.refresh_from_db(fields=['recibido', 'actualizada'])
+    if posicion < fin:
+        raise ErrorSubida(
+            'El bloque llegó incompleto.', status=400,
+            recibido=sesion.recibido,
+        )
+    return sesion.recibido
+
+
+def finalizar_subida(sesion):
+    """Mueve el archivo completo al almacenamiento y lo asocia a la banda.
+
+    Para ``'demo'`` reemplaza ``Banda.demos``; para ``'imagen'`` crea una
+    ``ImagenBanda``. Es idempotente: finalizar dos veces no duplica nada.
+
+    Args:
+        sesion: Instancia de SesionSubida.
+
+    Returns:
+        La SesionSubida actualizada.
+
+    Raises:
+        ErrorSubida: Si todavía faltan bytes por recibir o el contenido
+            no es de un tipo admitido.
+    """
+    with transaction.atomic():
+        sesion = SesionSubida.objects.select_for_update().get(pk=sesion.pk)
+        if sesion.completada:
+            return sesion
+        if sesion.recibido != sesion.tamano:
+            raise ErrorSubida(
+                'La subida está incompleta.', status=409,
+                recibido=sesion.recibido,
+            )
+        with open(ruta_parcial(sesion), 'rb') as parcial:
+            tipo = detectar_tipo(parcial.read(LONGITUD_FIRMA))
+        if tipo not in TIPOS_POR_DESTINO[sesion.destino]:
+            raise ErrorSubida(
+                'El contenido del archivo no es de un tipo admitido.',
+                status=415,
+            )
+
+        archivo = ArchivoParcial(ruta_parcial(sesion), sesion.nombre_archivo)
+        try:
+            if sesion.destino == 'demo':
+                banda = sesion.banda
+                banda.demos = archivo
+                banda.save()
+            else:
+                ImagenBanda.objects.create(banda=sesion.banda, imagen=archivo)
+        finally:
+            archivo.close()
+
+        sesion.completada = True
+        sesion.save(update_fields=['completada', 'actualizada'])
+    return sesion
+
+
+def cancelar_subida(sesion):
+    """Elimina una sesión y su archivo parcial.
+
+    Args:
+        sesion: Instancia de SesionSubida.
+    """
+    _borrar_parcial(sesion)
+    sesion.delete()
+
+
+def limpiar_sesiones(horas):
+    """Elimina las sesiones inactivas y los archivos parciales huérfanos.
+
+    Args:
+        horas: Horas sin actividad tras las cuales una sesión incompleta
+            (o ya finalizada) se considera abandonada.
+
+    Returns:
+        Cantidad de sesiones eliminadas.
+    """
+    corte = timezone.now() - timedelta(hours=horas)
+    vencidas = SesionSubida.objects.filter(actualizada__lt=corte)
+    eliminadas = 0
+    for sesion in vencidas.iterator():
+        cancelar_subida(sesion)
+        eliminadas += 1
+
+    # Archivos parciales sin sesión (por ejemplo, tras un borrado manual).
+    vigentes = {
+        f'{pk}.part'
+        for pk in SesionSubida.objects.values_list('pk', flat=True)
+    }
+    directorio = directorio_subidas()
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if (nombre.endswith('.part') and nombre not in vigentes
+                and os.path.getmtime(ruta) < corte.timestamp()):
+            os.remove(ruta)
+    return eliminadas
+
+
+def _borrar_parcial(sesion):
+    """Borra el archivo parcial de una sesión si todavía existe."""
+    try:
+        os.remove(ruta_parcial(sesion))
+    except FileNotFoundError:
+        pass
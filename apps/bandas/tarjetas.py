@@ -0,0 +1,87 @@
+"""Tarjetas de banda cacheadas por banda y versión.
+
+La tarjeta de una banda (imagen, nombre, estilos, descargas y enlaces)
+se muestra igual en la landing, el listado, la exploración, la búsqueda
+y el dashboard. Se renderiza una sola vez por versión de la banda y se
+guarda en el cache con la clave ``tarjeta_banda:<id>:<version>``.
+
+``Banda.version`` se incrementa al guardar la banda, al volcar sus
+descargas, al cambiar o renombrarse sus estilos y al generarse las
+derivadas de su imagen (ver ``signals``, ``estilos`` y ``contadores``),
+así que cambiar una banda solo invalida su tarjeta.
+Las páginas o fragmentos cacheados que contienen tarjetas se regeneran
+reutilizando las tarjetas de las demás bandas, al estilo de las
+"muñecas rusas".
+"""
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .derivadas import aprecargar_imagenes, precargar_imagenes
+
+# Plantilla de la tarjeta.
+PLANTILLA = 'bandas/_tarjeta_banda.html'
+
+# Segundos que se conserva cada tarjeta. Las versiones viejas no se
+# vuelven a leer y expiran solas.
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Atributo donde ``precargar`` deja la tarjeta leída del cache.
+_ATRIBUTO = '_tarjeta_cacheada'
+
+
+def clave(banda):
+    """Retorna la clave de cache de la tarjeta de una banda."""
+    return f'tarjeta_banda:{banda.pk}:{banda.version}'
+
+
+def precargar(bandas):
+    """Lee del cache las tarjetas de varias bandas con una sola consulta.
+
+    Las bandas cuya tarjeta no está en el cache se preparan para
+    renderizarla sin N+1 (``precargar_imagenes``); las demás no
+    consultan derivadas ni archivos.
+
+    Args:
+        bandas: Iterable de ``Banda`` con ``version`` cargada.
+    """
+    claves = {clave(banda): banda for banda in bandas}
+    faltantes = _asignar(claves, cache.get_many(claves))
+    precargar_imagenes(banda.imagen_principal for banda in faltantes)
+
+
+async def aprecargar(bandas):
+    """Versión asíncrona de ``precargar`` (ORM asíncrono)."""
+    claves = {clave(banda): banda for banda in bandas}
+    faltantes = _asignar(claves, await cache.aget_many(claves))
+    await aprecargar_imagenes(banda.imagen_principal for banda in faltantes)
+
+
+def _asignar(claves, encontradas):
+    """Deja en cada banda su tarjeta cacheada y retorna las faltantes."""
+    faltantes = []
+    for clave_tarjeta, banda in claves.items():
+        setattr(banda, _ATRIBUTO, encontradas.get(clave_tarjeta))
+        if clave_tarjeta not in encontradas:
+            faltantes.append(banda)
+    return faltantes
+
+
+def renderizar(banda):
+    """Retorna el HTML de la tarjeta de una banda, cacheado por versión.
+
+    Args:
+        banda: Instancia de ``Banda``.
+
+    Returns:
+        HTML de la tarjeta.
+    """
+    if hasattr(banda, _ATRIBUTO):
+        html = getattr(banda, _ATRIBUTO)
+    else:
+        html = cache.get(clave(banda))
+    if html is None:
+        html = render_to_string(PLANTILLA, {'banda': banda})
+        cache.set(clave(banda), html, CACHE_TIMEOUT)
+        setattr(banda, _ATRIBUTO, html)
+    return html
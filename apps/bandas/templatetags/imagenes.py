@@ -0,0 +1,117 @@
+"""Etiquetas de plantilla para imágenes responsive.
+
+Uso::
+
+    {% load imagenes %}
+    {% imagen_responsive banda.imagen_principal alt=banda.nombre sizes="300px" %}
+    <img src="..." srcset="{{ banda.imagen_principal|srcset:'webp' }}">
+    <meta property="og:image" content="{{ banda.imagen_principal|redimensionar:'1200x630' }}">
+"""
+
+from django import template
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+
+from apps.bandas.derivadas import derivadas_de
+
+register = template.Library()
+
+# Valor de ``sizes`` por defecto: la imagen ocupa todo el ancho visible.
+SIZES_POR_DEFECTO = '100vw'
+
+
+def _srcset(derivadas):
+    """Arma el valor de ``srcset`` a partir de ``[(ancho, nombre), ...]``."""
+    return ', '.join(
+        f'{default_storage.url(nombre)} {ancho}w' for ancho, nombre in derivadas
+    )
+
+
+@register.filter
+def srcset(archivo, formato='jpeg'):
+    """Retorna el ``srcset`` de las derivadas de una imagen.
+
+    Args:
+        archivo: ``FieldFile`` de la imagen original.
+        formato: Formato de las derivadas (``'webp'`` o ``'jpeg'``).
+
+    Returns:
+        Cadena para el atributo ``srcset``, vacía si no hay derivadas.
+    """
+    if not archivo:
+        return ''
+    return _srcset(derivadas_de(archivo.name).get(formato, []))
+
+
+@register.filter
+def redimensionar(archivo, tamano):
+    """Retorna la URL de una imagen recortada a un tamaño permitido.
+
+    Args:
+        archivo: ``FieldFile`` de la imagen original.
+        tamano: Tamaño ``<ancho>x<alto>`` de ``REDIMENSION_TAMANOS``.
+
+    Returns:
+        URL de ``imagen_redimensionada``, o cadena vacía si no hay imagen.
+    """
+    if not archivo:
+        return ''
+    return reverse('imagen_redimensionada', args=[tamano, archivo.name])
+
+
+@register.simple_tag
+def imagen_responsive(archivo, alt='', sizes=SIZES_POR_DEFECTO, clase='',
+                      lazy=True):
+    """Emite un ``<picture>`` con las derivadas WebP y JPEG de una imagen.
+
+    El navegador elige el ancho según ``sizes``; los que no soportan
+    WebP usan las derivadas JPEG. Si la imagen todavía no tiene
+    derivadas se emite un ``<img>`` con el original.
+
+    Args:
+        archivo: ``FieldFile`` de la imagen original.
+        alt: Texto alternativo.
+        sizes: Valor del atributo ``sizes`` (por ejemplo ``"300px"``).
+        clase: Clases CSS del ``<img>``.
+        lazy: Si es verdadero, agrega ``loading="lazy"``.
+
+    Returns:
+        HTML seguro, o cadena vacía si no hay imagen.
+    """
+    if not archivo:
+        return ''
+    derivadas = derivadas_de(archivo.name)
+    atributos = [('alt', alt)]
+    if clase:
+        atributos.append(('class', clase))
+    if lazy:
+        atributos.append(('loading', 'lazy'))
+    atributos.append(('decoding', 'async'))
+
+    jpeg = derivadas.get('jpeg', [])
+    if not derivadas:
+        return format_html(
+            '<img src="{}"{}>', archivo.url,
+            format_html_join('', ' {}="{}"', atributos),
+        )
+
+    fuentes = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        (
+            (formato, _srcset(lista), sizes)
+            for formato, lista in sorted(derivadas.items())
+            if formato != 'jpeg'
+        ),
+    )
+    respaldo = jpeg or next(iter(derivadas.values()))
+    ancho, nombre = respaldo[-1]
+    atributos = [
+        ('src', default_storage.url(nombre)),
+        ('srcset', _srcset(respaldo)),
+        ('sizes', sizes),
+    ] + atributos
+    return format_html(
+        '<picture>{}<img{}></picture>',
+        fuentes, format_html_join('', ' {}="{}"', atributos),
+    )
@@ -0,0 +1,27 @@
+"""Etiqueta de plantilla para la tarjeta cacheada de una banda.
+
+Uso::
+
+    {% load tarjetas %}
+    {% tarjeta_banda banda %}
+"""
+
+from django import template
+from django.utils.safestring import mark_safe
+
+from apps.bandas.tarjetas import renderizar
+
+register = template.Library()
+
+
+@register.simple_tag
+def tarjeta_banda(banda):
+    """Emite la tarjeta de una banda (ver ``apps.bandas.tarjetas``).
+
+    Args:
+        banda: Instancia de ``Banda`` con ``version`` cargada.
+
+    Returns:
+        HTML seguro de la tarjeta.
+    """
+    return mark_safe(renderizar(banda))
@@ -1,3 +1,2632 @@
 """Tests para la aplicación bandas."""
 
-from django.test import TestCase  # noqa: F401
+import datetime
+import fcntl
+import hashlib
+import io
+import itertools
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages import get_messages
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection
+from django.db.migrations.loader import MigrationLoader
+from django.http import HttpResponse
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image, PngImagePlugin
+
+from apps.accounts.models import Usuario
+from apps.accounts.tests import SESIONES_CACHEADAS, proceso
+from apps.accounts.views import landing_page, landing_page_async
+from apps.dashboards.views import representative_dashboard
+
+from . import redimensiones, tarjetas, versiones
+from .autocompletado import (
+    CLAVE_VERSION,
+    IndiceTrigramas,
+    clave_cambio,
+    publicar_cambio,
+)
+from .busqueda import (
+    PAGINAS_MAXIMAS,
+    RESULTADOS_POR_PAGINA,
+    buscar,
+    reindexar,
+)
+from .asincronia import en_bucle
+from .contadores import (
+    PREFIJO_CACHE,
+    BufferContador,
+    BufferContadorCache,
+    aplicar_descargas,
+    aplicar_eventos,
+)
+from .estadisticas import (
+    MARCA_DESCARGAS,
+    actualizar_resumenes,
+    agregar_descargas,
+    compactar_eventos,
+)
+from .estaticos import optimizar_png
+from .eventos import etag_ical
+from .facetas import bandas_con_estilos, conteos, parsear_estilos
+from .models import (
+    ArchivoLogico,
+    Banda,
+    Blob,
+    DerivadaImagen,
+    DescargaDiaria,
+    DescargaSemanal,
+    DocumentoBusqueda,
+    EstiloMusical,
+    Evento,
+    EventoDescarga,
+    Flyer,
+    ImagenBanda,
+    Integrante,
+    MarcaAgregacion,
+    PuestoRanking,
+    SesionSubida,
+    VisitaHoraria,
+)
+from .ranking import reconstruir
+from .redimensiones import (
+    desalojar,
+    directorio_cache,
+    nombre_variante,
+    obtener_variante,
+)
+from .replicas import (
+    CLAVE_RETRASO,
+    COOKIE_PRINCIPAL,
+    MiddlewareReplicas,
+    RouterReplicas,
+    medir_retraso,
+    replicas_disponibles,
+)
+from .storage import ruta_blob
+from .streaming import (
+    RangoNoSatisfacible,
+    es_descarga_inicial,
+    parsear_rango,
+    respuesta_media,
+)
+from .visitas import (
+    BufferVisitas, aplicar_visitas, buffer_visitas,
+    evento_visita,
+)
+from .views import (
+    banda_detail,
+    banda_detail_async,
+    banda_list,
+    banda_list_async,
+    descargar_demo_async,
+)
+
+# User-Agent de un navegador: sin él, las visitas se toman como de bots.
+NAVEGADOR = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
+)
+
+
+def media_temporal(test):
+    """Usa un MEDIA_ROOT temporal durante un test."""
+    directorio = tempfile.TemporaryDirectory()
+    test.addCleanup(directorio.cleanup)
+    medios = override_settings(MEDIA_ROOT=directorio.name)
+    medios.enable()
+    test.addCleanup(medios.disable)
+
+
+@override_settings(VISITAS_FLUSH_INTERVALO=60)
+class ConsultasFijasTests(TestCase):
+    """Verifica que las páginas principales no tengan consultas N+1.
+
+    Cada test fija la cantidad exacta de consultas con el cache vacío y
+    comprueba que no crece al agregar filas relacionadas. Si una
+    plantilla empieza a acceder a una relación sin precargar, el test
+    falla.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea un catálogo con estilos, integrantes, galería y flyers."""
+        cls.rock = EstiloMusical.objects.create(nombre='Rock')
+        cls.punk = EstiloMusical.objects.create(nombre='Punk')
+        cls.representante = Usuario.objects.create_user(
+            username='representante', password='clave-segura',
+            is_representative=True,
+        )
+        cls.banda = Banda.objects.create(
+            nombre='Los Consultados', representante=cls.representante,
+            biografia='Banda de prueba', estado='aprobado',
+            imagen='bandas/los-consultados/imagen.jpg',
+            imagen_principal='bandas/los-consultados/principal.jpg',
+            demos='bandas/los-consultados/demo.mp3', descargas=50,
+        )
+        cls.banda.estilos_musicales.add(cls.rock, cls.punk)
+        for numero in range(3):
+            cls._agregar_relacionados(cls.banda, numero)
+
+        for numero in range(5):
+            usuario = Usuario.objects.create_user(
+                username=f'otro{numero}', password='clave-segura',
+                is_representative=True,
+            )
+            banda = Banda.objects.create(
+                nombre=f'Banda {numero}', representante=usuario,
+                biografia='Otra banda', estado='aprobado',
+                imagen_principal=f'bandas/banda-{numero}/principal.jpg',
+                demos=f'bandas/banda-{numero}/demo.mp3', descargas=numero,
+            )
+            banda.estilos_musicales.add(cls.rock)
+
+        for numero in range(3):
+            Evento.objects.create(
+                titulo=f'Evento {numero}', descripcion='Recital',
+                fecha=timezone.now() + datetime.timedelta(days=numero),
+                ubicacion='Centro Cultural', organizador=cls.representante,
+            )
+
+    @staticmethod
+    def _agregar_relacionados(banda, numero):
+        """Agrega un integrante, una imagen y un flyer a la banda."""
+        Integrante.objects.create(
+            banda=banda, rol=f'Rol {numero}', instrumentos_favoritos='Bajo',
+            fecha_ingreso=datetime.date(2020, 1, 1) + datetime.timedelta(days=numero),
+            imagen=f'bandas/{banda.pk}/integrante-{numero}.jpg',
+        )
+        ImagenBanda.objects.create(
+            banda=banda, imagen=f'bandas/{banda.pk}/galeria-{numero}.jpg',
+        )
+        Flyer.objects.create(
+            banda=banda, imagen=f'bandas/{banda.pk}/flyer-{numero}.jpg',
+            descripcion=f'Flyer {numero}',
+        )
+
+    def setUp(self):
+        """Parte de un cache vacío para contar también las resoluciones.
+
+        Las visitas quedan en el buffer (no suman consultas) y se vuelcan
+        al terminar cada test.
+        """
+        cache.clear()
+        self.addCleanup(buffer_visitas().flush)
+
+    def test_detalle_consultas_fijas(self):
+        """El detalle usa 6 consultas sin importar las filas relacionadas.
+
+        Banda con representante, integrantes, imágenes, flyers, derivadas
+        y nombres de archivo.
+        """
+        url = reverse('banda_detail', args=[self.banda.pk])
+        with self.assertNumQueries(6):
+            respuesta = self.client.get(url)
+        self.assertContains(respuesta, 'Punk, Rock')
+        self.assertContains(respuesta, 'Rol 2')
+        self.assertContains(respuesta, 'Flyer 2')
+
+        for numero in range(3, 8):
+            self._agregar_relacionados(self.banda, numero)
+        cache.clear()
+        with self.assertNumQueries(6):
+            respuesta = self.client.get(url)
+        self.assertContains(respuesta, 'Rol 7')
+
+    def test_detalle_con_cache(self):
+        """Con el cache caliente solo quedan la banda y sus relaciones."""
+        url = reverse('banda_detail', args=[self.banda.pk])
+        self.client.get(url)
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_listado_consultas_fijas(self):
+        """El listado usa 4 consultas: página, estilos, derivadas y archivos."""
+        with self.assertNumQueries(4):
+            respuesta = self.client.get(reverse('banda_list'))
+        self.assertContains(respuesta, 'Banda 4')
+        self.assertContains(respuesta, '<small>Rock</small>', count=6)
+
+    def test_listado_filtrado_por_estilo(self):
+        """Filtrar por estilo no agrega consultas."""
+        with self.assertNumQueries(4):
+            respuesta = self.client.get(
+                reverse('banda_list'), {'estilo': self.punk.pk},
+            )
+        self.assertContains(respuesta, 'Los Consultados')
+        self.assertNotContains(respuesta, 'Banda 4')
+
+    def test_listado_con_tarjetas_cacheadas(self):
+        """Con las tarjetas en cache no se consultan derivadas ni archivos."""
+        self.client.get(reverse('banda_list'))
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(reverse('banda_list'))
+        self.assertContains(respuesta, 'Banda 4')
+
+    def test_guardar_banda_invalida_solo_su_tarjeta(self):
+        """Una banda modificada cambia de versión; las demás no."""
+        otra = Banda.objects.get(nombre='Banda 0')
+        version_otra = otra.version
+        version = self.banda.version
+        self.banda.nombre = 'Los Renombrados'
+        self.banda.save()
+        self.assertEqual(self.banda.version, version + 1)
+        otra.refresh_from_db()
+        self.assertEqual(otra.version, version_otra)
+
+        aplicar_descargas({otra.pk: 3})
+        otra.refresh_from_db()
+        self.assertEqual(otra.version, version_otra + 1)
+
+    def test_cambiar_estilos_invalida_la_tarjeta(self):
+        """Agregar, quitar o renombrar un estilo cambia la versión."""
+        banda = Banda.objects.get(nombre='Banda 0')
+        self.assertNotIn('Jazz', tarjetas.renderizar(banda))
+        jazz = EstiloMusical.objects.create(nombre='Jazz')
+
+        version = banda.version
+        banda.estilos_musicales.add(jazz)
+        self.assertEqual(banda.version, version + 1)
+        self.assertIn('Jazz', tarjetas.renderizar(
+            Banda.objects.get(pk=banda.pk),
+        ))
+
+        jazz.nombre = 'Free Jazz'
+        jazz.save()
+        banda = Banda.objects.get(pk=banda.pk)
+        self.assertEqual(banda.version, version + 2)
+        self.assertIn('Free Jazz', tarjetas.renderizar(banda))
+
+        jazz.banda_set.remove(banda)
+        banda = Banda.objects.get(pk=banda.pk)
+        self.assertEqual(banda.version, version + 3)
+        self.assertNotIn('Jazz', tarjetas.renderizar(banda))
+        self.assertEqual(
+            Banda.objects.get(pk=self.banda.pk).version, self.banda.version,
+        )
+
+    def test_save_no_pisa_la_version(self):
+        """Guardar una instancia vieja no retrocede ``version``."""
+        vieja = Banda.objects.get(pk=self.banda.pk)
+        aplicar_descargas({self.banda.pk: 1})
+        version = Banda.objects.get(pk=self.banda.pk).version
+        vieja.biografia = 'Otra biografía'
+        vieja.save()
+        self.assertEqual(vieja.version, version + 1)
+
+    def test_landing_consultas_fijas(self):
+        """La landing usa 4 consultas: top, eventos, derivadas y archivos."""
+        with self.assertNumQueries(4):
+            respuesta = self.client.get(reverse('landing_page'))
+        self.assertContains(respuesta, 'Los Consultados')
+        self.assertContains(respuesta, 'Organizado por: representante', count=3)
+
+    def test_landing_cacheada_sin_consultas(self):
+        """Con los fragmentos en cache, la landing anónima no consulta."""
+        self.client.get(reverse('landing_page'))
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(reverse('landing_page'))
+        self.assertContains(respuesta, 'Los Consultados')
+
+    def test_landing_invalidada_por_senales(self):
+        """Guardar una banda o un evento renueva su fragmento."""
+        self.client.get(reverse('landing_page'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.banda.nombre = 'Los Renombrados'
+            self.banda.save()
+            Evento.objects.create(
+                titulo='Evento nuevo', descripcion='Recital',
+                fecha=timezone.now(), ubicacion='Plaza',
+            )
+        respuesta = self.client.get(reverse('landing_page'))
+        self.assertContains(respuesta, 'Los Renombrados')
+        self.assertContains(respuesta, 'Evento nuevo')
+
+    @override_settings(**SESIONES_CACHEADAS)
+    def test_dashboard_consultas_fijas(self):
+        """El dashboard usa 4 consultas, y 1 con el usuario cacheado.
+
+        La sesión sale del cache; la primera vez se cargan el usuario
+        (con el id de su banda), la banda, las derivadas y los archivos.
+        Después solo se carga la banda.
+        """
+        self.client.force_login(self.representante)
+        with self.assertNumQueries(4):
+            respuesta = self.client.get(reverse('representative_dashboard'))
+        self.assertContains(respuesta, 'Punk')
+        self.assertContains(respuesta, 'Rock')
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(reverse('representative_dashboard'))
+        self.assertContains(respuesta, 'Los Consultados')
+
+    @override_settings(**SESIONES_CACHEADAS)
+    def test_perfil_invalidado_por_senales(self):
+        """Los cambios de rol y de banda se ven en la siguiente petición."""
+        self.client.force_login(self.representante)
+        self.client.get(reverse('representative_dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Banda.objects.get(pk=self.banda.pk).delete()
+        respuesta = self.client.get(reverse('representative_dashboard'))
+        self.assertContains(respuesta, 'No asignada')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Banda.objects.create(
+                nombre='Los Nuevos', representante=self.representante,
+                biografia='x',
+            )
+        respuesta = self.client.get(reverse('representative_dashboard'))
+        self.assertContains(respuesta, 'Los Nuevos')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.representante.is_representative = False
+            self.representante.save()
+        respuesta = self.client.get(reverse('representative_dashboard'))
+        self.assertRedirects(respuesta, reverse('landing_page'))
+
+
+class SellosEntreProcesosTests(TestCase):
+    """Verifica que los sellos de versión lleguen a todos los procesos.
+
+    Cada proceso simulado tiene su propia instancia de cache sobre el
+    mismo almacenamiento compartido, como varios workers con Redis.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea una banda del ranking."""
+        cls.banda = Banda.objects.create(
+            nombre='Los Sellados', biografia='x', estado='aprobado',
+            demos='bandas/sellados/demo.mp3', descargas=3,
+        )
+        reconstruir()
+
+    def setUp(self):
+        """Vacía el cache compartido."""
+        with proceso('compartido'):
+            caches['default'].clear()
+
+    def test_sello_leido_del_cache_en_cada_proceso(self):
+        """Un incremento en un proceso se lee en otro."""
+        with proceso('compartido'):
+            anterior = versiones.version('banda')
+            cache_a = caches['default']
+        with proceso('compartido'):
+            self.assertIsNot(caches['default'], cache_a)
+            versiones.incrementar('banda')
+        with proceso('compartido'):
+            self.assertEqual(versiones.version('banda'), anterior + 1)
+
+    def test_landing_renovada_por_otro_proceso(self):
+        """Guardar una banda en un proceso renueva la landing en otro."""
+        with proceso('compartido'):
+            self.client.get(reverse('landing_page'))
+        with proceso('compartido'), \
+                self.captureOnCommitCallbacks(execute=True):
+            banda = Banda.objects.get(pk=self.banda.pk)
+            banda.nombre = 'Los Resellados'
+            banda.save()
+        with proceso('compartido'):
+            respuesta = self.client.get(reverse('landing_page'))
+        self.assertContains(respuesta, 'Los Resellados')
+
+
+@override_settings(VISITAS_FLUSH_INTERVALO=60)
+class PaginacionCursorTests(TestCase):
+    """Verifica la paginación por cursor (keyset) de los listados."""
+
+    # Nombres que empatan si se comparan sin distinguir mayúsculas,
+    # espacios o prefijos: el cursor no debe saltear ni repetir ninguno.
+    NOMBRES = [
+        'Rock', 'rock', 'ROCK', 'Rock ', 'Rock  2', 'Rock 2', 'Rocka',
+        'Róck', 'Rock\xa0', 'A', 'Z', 'zeta',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea bandas aprobadas con nombres casi iguales."""
+        cls.rock = EstiloMusical.objects.create(nombre='Rock')
+        for nombre in cls.NOMBRES:
+            banda = Banda.objects.create(
+                nombre=nombre, biografia='x', estado='aprobado',
+            )
+            banda.estilos_musicales.add(cls.rock)
+
+    def setUp(self):
+        """Parte de un cache vacío."""
+        cache.clear()
+        self.addCleanup(buffer_visitas().flush)
+
+    def recorrer(self, url, datos):
+        """Sigue las URLs ``siguiente`` y retorna los nombres vistos."""
+        nombres = []
+        respuesta = self.client.get(url, datos)
+        while True:
+            pagina = respuesta.json()
+            nombres.extend(banda['nombre'] for banda in pagina['bandas'])
+            if not pagina['siguiente']:
+                return nombres
+            respuesta = self.client.get(pagina['siguiente'])
+
+    def test_empates_en_el_cursor(self):
+        """Cada banda aparece una sola vez y en orden, con cualquier límite."""
+        for limite in (1, 2, 5, len(self.NOMBRES)):
+            with self.subTest(limite=limite):
+                nombres = self.recorrer(
+                    reverse('banda_list'),
+                    {'formato': 'json', 'limite': limite},
+                )
+                self.assertEqual(nombres, sorted(self.NOMBRES))
+
+    def test_alta_durante_la_navegacion(self):
+        """Una banda agregada antes del cursor no corre las páginas."""
+        url = reverse('banda_list')
+        pagina = self.client.get(
+            url, {'formato': 'json', 'limite': 3},
+        ).json()
+        Banda.objects.create(nombre='0 primera', biografia='x')
+        siguiente = self.client.get(pagina['siguiente']).json()
+        vistos = [b['nombre'] for b in pagina['bandas'] + siguiente['bandas']]
+        self.assertEqual(vistos, sorted(self.NOMBRES)[:6])
+
+    def test_consultas_fijas_por_pagina(self):
+        """Una página lejana cuesta lo mismo que la primera."""
+        url = reverse('banda_list')
+        with self.assertNumQueries(1):
+            primera = self.client.get(
+                url, {'formato': 'json', 'limite': 2},
+            ).json()
+        cursor = primera['siguiente']
+        while True:
+            cache.clear()
+            with self.assertNumQueries(1):
+                pagina = self.client.get(cursor).json()
+            if not pagina['siguiente']:
+                break
+            cursor = pagina['siguiente']
+
+    def test_explorar_conserva_los_estilos(self):
+        """La página siguiente de explorar mantiene el filtro de estilos."""
+        esperados = list(self.NOMBRES)
+        for numero in range(20):
+            banda = Banda.objects.create(
+                nombre=f'Rock {numero:02}', biografia='x', estado='aprobado',
+            )
+            banda.estilos_musicales.add(self.rock)
+            esperados.append(banda.nombre)
+        Banda.objects.create(nombre='Rock sin estilo', estado='aprobado')
+
+        respuesta = self.client.get(
+            reverse('explorar_bandas'), {'estilo': self.rock.pk},
+        )
+        siguiente = respuesta.context['siguiente']
+        self.assertIn(f'estilo={self.rock.pk}', siguiente)
+        vistos = [b.nombre for b in respuesta.context['bandas']]
+        while siguiente:
+            respuesta = self.client.get(siguiente)
+            vistos.extend(b.nombre for b in respuesta.context['bandas'])
+            siguiente = respuesta.context['siguiente']
+        self.assertEqual(vistos, sorted(esperados))
+
+    def test_parametros_no_numericos(self):
+        """Un estilo o un límite inválido se ignora en lugar de fallar."""
+        url = reverse('banda_list')
+        for valor in ('²', '-1', '0', 'x', '1e3', '9' * 23):
+            with self.subTest(valor=valor):
+                respuesta = self.client.get(
+                    url, {'formato': 'json', 'estilo': valor, 'limite': valor},
+                )
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(len(respuesta.json()['bandas']), 12)
+        respuesta = self.client.get(url, {'formato': 'json', 'limite': 10**9})
+        self.assertEqual(len(respuesta.json()['bandas']), 12)
+
+    def test_cursor_invalido(self):
+        """Un cursor mal formado responde 400."""
+        for url in (reverse('banda_list'), reverse('explorar_bandas')):
+            respuesta = self.client.get(url, {'cursor': 'no es un cursor'})
+            self.assertEqual(respuesta.status_code, 400)
+
+
+class FacetasTests(TestCase):
+    """Verifica los conteos de facetas y su invalidación por señales."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea tres estilos y tres bandas, una pendiente."""
+        cls.rock = EstiloMusical.objects.create(nombre='Rock')
+        cls.punk = EstiloMusical.objects.create(nombre='Punk')
+        cls.jazz = EstiloMusical.objects.create(nombre='Jazz')
+        cls.ruidosos = Banda.objects.create(
+            nombre='Los Ruidosos', biografia='x', estado='aprobado',
+        )
+        cls.ruidosos.estilos_musicales.add(cls.rock, cls.punk)
+        cls.rockeros = Banda.objects.create(
+            nombre='Los Rockeros', biografia='x', estado='aprobado',
+        )
+        cls.rockeros.estilos_musicales.add(cls.rock)
+        cls.pendientes = Banda.objects.create(
+            nombre='Los Pendientes', biografia='x',
+        )
+        cls.pendientes.estilos_musicales.add(cls.rock, cls.jazz)
+
+    def setUp(self):
+        """Vacía el cache compartido."""
+        with proceso('compartido'):
+            caches['default'].clear()
+
+    def conteos(self, *estilos):
+        """Retorna los conteos como ``(total, {nombre: cantidad})``."""
+        with proceso('compartido'):
+            total, filas = conteos(parsear_estilos(map(str, estilos)))
+        return total, {nombre: cantidad for _, nombre, cantidad in filas}
+
+    def test_filtro_estilo_usa_indice(self):
+        """El filtro por estilo busca en el índice de la tabla intermedia.
+
+        Con ``LIKE '%|id|%'`` sobre ``estilos_ids`` se recorrían todas
+        las bandas; ahora cada estilo es una búsqueda en el índice
+        ``(estilomusical_id, banda_id)`` y la página sigue siendo una
+        sola consulta.
+        """
+        consulta = bandas_con_estilos((self.rock.pk, self.punk.pk))
+        with self.assertNumQueries(1):
+            nombres = [banda.nombre for banda in consulta]
+        self.assertEqual(nombres, ['Los Ruidosos'])
+        self.assertNotIn('LIKE', str(consulta.query))
+        if connection.vendor == 'sqlite':
+            plan = consulta.explain()
+            self.assertEqual(
+                plan.count('COVERING INDEX bandas_estilo_banda_idx'), 2,
+            )
+
+    def test_conteos_por_combinacion(self):
+        """Solo cuentan las bandas aprobadas con todos los estilos."""
+        self.assertEqual(self.conteos(), (2, {'Rock': 2, 'Punk': 1}))
+        self.assertEqual(
+            self.conteos(self.punk.pk, self.rock.pk),
+            (1, {'Rock': 1, 'Punk': 1}),
+        )
+        self.assertEqual(self.conteos(self.jazz.pk), (0, {}))
+        with proceso('compartido'), self.assertNumQueries(0):
+            conteos(())
+
+    def test_senales_invalidan_en_otros_procesos(self):
+        """Cada cambio hecho en otro proceso se ve en los conteos."""
+        self.conteos()
+
+        def en_otro_proceso(cambio):
+            with proceso('compartido'), \
+                    self.captureOnCommitCallbacks(execute=True):
+                cambio()
+
+        en_otro_proceso(
+            lambda: self.rockeros.estilos_musicales.add(self.punk),
+        )
+        self.assertEqual(self.conteos(), (2, {'Rock': 2, 'Punk': 2}))
+
+        def aprobar():
+            self.pendientes.estado = 'aprobado'
+            self.pendientes.save()
+
+        en_otro_proceso(aprobar)
+        self.assertEqual(
+            self.conteos(), (3, {'Rock': 3, 'Punk': 2, 'Jazz': 1}),
+        )
+
+        def renombrar():
+            self.jazz.nombre = 'Free Jazz'
+            self.jazz.save()
+
+        en_otro_proceso(renombrar)
+        self.assertIn('Free Jazz', self.conteos()[1])
+
+        en_otro_proceso(self.ruidosos.delete)
+        self.assertEqual(
+            self.conteos(), (2, {'Rock': 2, 'Punk': 1, 'Free Jazz': 1}),
+        )
+
+    def test_estilos_invalidos_se_descartan(self):
+        """Los IDs que no son enteros de 32 bits positivos se ignoran."""
+        self.assertEqual(
+            parsear_estilos(['²', '-3', '0', 'x', '9' * 23, '2', ' 1', '2']),
+            (1, 2),
+        )
+        respuesta = self.client.get(
+            reverse('explorar_bandas'), {'estilo': ['²', '9' * 23]},
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'Los Rockeros')
+
+    def test_vista_con_estilos_combinados(self):
+        """La vista lista las bandas con todos los estilos elegidos."""
+        respuesta = self.client.get(
+            reverse('explorar_bandas'),
+            {'estilo': [self.rock.pk, self.punk.pk]},
+        )
+        self.assertContains(respuesta, 'Los Ruidosos')
+        self.assertNotContains(respuesta, 'Los Rockeros')
+        self.assertContains(respuesta, 'Punk (1)')
+
+
+class BusquedaTests(TestCase):
+    """Verifica la búsqueda de texto completo y su índice."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea bandas aprobadas con textos buscables y una pendiente."""
+        cls.cumbia = EstiloMusical.objects.create(nombre='Cumbia')
+        cls.representante = Usuario.objects.create_user(
+            username='buscado', password='clave-segura',
+            is_representative=True, localidad='Córdoba',
+        )
+        cls.canciones = Banda.objects.create(
+            nombre='Canciones Rotas', representante=cls.representante,
+            biografia='Rock de garage', estado='aprobado',
+        )
+        cls.bajistas = Banda.objects.create(
+            nombre='Los Bajistas', biografia='Tocan canciones tristes',
+            lugar_ensayo='Galpón Sur', estado='aprobado', descargas=5,
+        )
+        cls.bajistas.estilos_musicales.add(cls.cumbia)
+        cls.pendientes = Banda.objects.create(
+            nombre='Canciones Pendientes', biografia='x',
+        )
+
+    def nombres(self, consulta, pagina=1):
+        """Retorna los nombres encontrados, en orden de relevancia."""
+        bandas, _ = buscar(consulta, pagina)
+        return [banda.nombre for banda in bandas]
+
+    def test_coincidencias(self):
+        """Se busca por prefijo en todo el texto y sin distinguir acentos."""
+        self.assertEqual(self.nombres('garage'), ['Canciones Rotas'])
+        self.assertEqual(self.nombres('cumb'), ['Los Bajistas'])
+        self.assertEqual(self.nombres('galpon'), ['Los Bajistas'])
+        self.assertEqual(self.nombres('cordoba'), ['Canciones Rotas'])
+        self.assertEqual(self.nombres('CÓRDOBA rock'), ['Canciones Rotas'])
+        self.assertEqual(self.nombres('córdoba cumbia'), [])
+        self.assertEqual(self.nombres('pendientes'), [])
+        self.assertEqual(buscar('  ¿? '), ([], 0))
+
+    def test_el_nombre_pesa_mas(self):
+        """Una coincidencia en el nombre supera a una en la biografía."""
+        self.assertEqual(
+            self.nombres('canciones'), ['Canciones Rotas', 'Los Bajistas'],
+        )
+
+    def test_reindexa_al_guardar_y_borrar(self):
+        """Las señales mantienen el índice al día."""
+        self.canciones.biografia = 'Punk de sótano'
+        self.canciones.save()
+        self.assertEqual(self.nombres('garage'), [])
+        self.assertEqual(self.nombres('sotano'), ['Canciones Rotas'])
+
+        self.canciones.estilos_musicales.add(self.cumbia)
+        self.assertCountEqual(
+            self.nombres('cumbia'), ['Los Bajistas', 'Canciones Rotas'],
+        )
+        self.cumbia.nombre = 'Cuarteto'
+        self.cumbia.save()
+        self.assertEqual(self.nombres('cumbia'), [])
+        self.assertEqual(len(self.nombres('cuarteto')), 2)
+
+        self.bajistas.delete()
+        self.assertEqual(self.nombres('cuarteto'), ['Canciones Rotas'])
+        self.assertFalse(
+            DocumentoBusqueda.objects.filter(banda_id=self.bajistas.pk)
+            .exists()
+        )
+        self.assertEqual(reindexar(), 2)
+        self.assertEqual(self.nombres('canciones'), ['Canciones Rotas'])
+
+    def test_paginacion(self):
+        """Las páginas no se solapan y una página inválida es la primera."""
+        for numero in range(RESULTADOS_POR_PAGINA + 5):
+            Banda.objects.create(
+                nombre=f'Eco {numero:02}', biografia='x', estado='aprobado',
+            )
+        primera, total = buscar('eco', 1)
+        segunda, _ = buscar('eco', 2)
+        self.assertEqual(total, RESULTADOS_POR_PAGINA + 5)
+        self.assertEqual(len(primera), RESULTADOS_POR_PAGINA)
+        self.assertEqual(len(segunda), 5)
+        self.assertFalse({b.pk for b in primera} & {b.pk for b in segunda})
+
+        url = reverse('buscar_bandas')
+        for pagina in ('²', '0', '-1', 'x', '9' * 30):
+            with self.subTest(pagina=pagina):
+                respuesta = self.client.get(
+                    url, {'q': 'eco', 'pagina': pagina, 'formato': 'json'},
+                )
+                self.assertEqual(respuesta.status_code, 200)
+                esperada = PAGINAS_MAXIMAS if pagina == '9' * 30 else 1
+                self.assertEqual(respuesta.json()['pagina'], esperada)
+        respuesta = self.client.get(url, {'q': 'eco', 'pagina': 2})
+        self.assertEqual(len(respuesta.context['bandas']), 5)
+        self.assertEqual(respuesta.context['anterior'], 1)
+        self.assertIsNone(respuesta.context['siguiente'])
+
+
+@override_settings(VISITAS_FLUSH_INTERVALO=0)
+class EstadisticasPanelTests(TestCase):
+    """Verifica el panel de estadísticas precalculadas del dashboard."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea una banda con un año de descargas diarias."""
+        cls.representante = Usuario.objects.create_user(
+            username='estadistico', password='clave-segura',
+            is_representative=True,
+        )
+        cls.banda = Banda.objects.create(
+            nombre='Los Medidos', representante=cls.representante,
+            biografia='x', estado='aprobado',
+        )
+        hoy = timezone.localdate()
+        DescargaDiaria.objects.bulk_create(
+            DescargaDiaria(
+                banda=cls.banda, fecha=hoy - datetime.timedelta(days=dias),
+                descargas=dias + 1,
+            )
+            for dias in range(365)
+        )
+
+    def setUp(self):
+        """Parte de un cache vacío."""
+        cache.clear()
+
+    def test_visitas_y_resumen(self):
+        """Las visitas se cuentan por página y llegan al resumen."""
+        detalle = reverse('banda_detail', args=[self.banda.pk])
+        self.client.get(detalle, HTTP_USER_AGENT=NAVEGADOR)
+        self.client.get(detalle, HTTP_USER_AGENT=NAVEGADOR)
+        self.client.get(detalle, HTTP_USER_AGENT='Googlebot/2.1')
+        self.client.get(
+            reverse('galeria_banda', args=[self.banda.pk]),
+            HTTP_USER_AGENT=NAVEGADOR,
+        )
+        self.assertEqual(
+            dict(VisitaHoraria.objects.values_list('pagina', 'visitas')),
+            {'detalle': 2, 'galeria': 1},
+        )
+
+        self.assertEqual(actualizar_resumenes(), 1)
+        estadistica = Banda.objects.get(pk=self.banda.pk).estadistica
+        self.assertEqual(estadistica.descargas_hoy, 1)
+        self.assertEqual(estadistica.descargas_7_dias, sum(range(1, 8)))
+        self.assertEqual(estadistica.descargas_30_dias, sum(range(1, 31)))
+        self.assertEqual(estadistica.visitas_detalle_7_dias, 2)
+        self.assertEqual(estadistica.visitas_galeria_30_dias, 1)
+        self.assertEqual(estadistica.serie['descargas'][-1], 1)
+        self.assertEqual(estadistica.serie['visitas'][-1], 3)
+
+    @override_settings(**SESIONES_CACHEADAS)
+    def test_dashboard_consultas_fijas(self):
+        """El dashboard y su JSON usan una consulta con toda la historia."""
+        actualizar_resumenes()
+        self.client.force_login(self.representante)
+        self.client.get(reverse('representative_dashboard'))
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(reverse('representative_dashboard'))
+        self.assertContains(respuesta, '28 en 7 días')
+        self.assertContains(respuesta, 'data-sparkline="descargas"')
+
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(reverse('estadisticas_representante'))
+        serie = respuesta.json()['serie']
+        self.assertEqual(len(serie['descargas']), 30)
+        self.assertEqual(serie['descargas'][0], 30)
+        self.assertEqual(len(serie['semanas']), 8)
+
+
+class AgregacionDescargasTests(TestCase):
+    """Verifica la agregación incremental de los eventos de descarga."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea una banda sin eventos."""
+        representante = Usuario.objects.create_user(
+            username='agregador', password='clave-segura',
+            is_representative=True,
+        )
+        cls.banda = Banda.objects.create(
+            nombre='Los Sumados', representante=representante,
+            biografia='x', estado='aprobado',
+        )
+
+    def evento(self, fecha):
+        """Registra una descarga de la banda en ``fecha``."""
+        return EventoDescarga.objects.create(
+            banda=self.banda, demo='demos/a.mp3', fecha=fecha,
+            cliente='c',
+        )
+
+    def diarias(self):
+        """Retorna las descargas diarias por fecha."""
+        return dict(
+            DescargaDiaria.objects.filter(banda=self.banda)
+            .values_list('fecha', 'descargas')
+        )
+
+    def semanales(self):
+        """Retorna las descargas semanales por semana."""
+        return dict(
+            DescargaSemanal.objects.filter(banda=self.banda)
+            .values_list('semana', 'descargas')
+        )
+
+    def test_marca_de_agua_no_pierde_ni_repite(self):
+        """Los eventos dentro del margen se agregan en la corrida siguiente."""
+        ahora = timezone.now()
+        margen = datetime.timedelta(minutes=10)
+        self.evento(ahora - datetime.timedelta(hours=1))
+        reciente = self.evento(ahora)
+        self.assertEqual(agregar_descargas(margen), 1)
+        marca = MarcaAgregacion.objects.get(nombre=MARCA_DESCARGAS)
+        self.assertLess(marca.ultimo_id, reciente.pk)
+
+        # Un worker vuelca tarde un evento viejo con un ID mayor.
+        EventoDescarga.objects.filter(pk=reciente.pk).update(
+            fecha=ahora - datetime.timedelta(minutes=30),
+        )
+        self.evento(ahora - datetime.timedelta(minutes=20))
+        self.assertEqual(agregar_descargas(margen), 2)
+        self.assertEqual(sum(self.diarias().values()), 3)
+        self.assertEqual(sum(self.semanales().values()), 3)
+
+    def test_doble_corrida_es_idempotente(self):
+        """Volver a correr sin eventos nuevos no suma nada."""
+        ayer = timezone.now() - datetime.timedelta(days=1)
+        for _ in range(5):
+            self.evento(ayer)
+        with mock.patch('apps.bandas.estadisticas.TAMANO_LOTE', 2):
+            self.assertEqual(agregar_descargas(), 5)
+            diarias, semanales = self.diarias(), self.semanales()
+            self.assertEqual(agregar_descargas(), 0)
+        self.assertEqual(self.diarias(), diarias)
+        self.assertEqual(self.semanales(), semanales)
+        self.assertEqual(diarias, {ayer.date(): 5})
+
+    def test_limite_de_semana_iso(self):
+        """Domingo y lunes caen en semanas distintas, aun entre años."""
+        utc = datetime.timezone.utc
+        domingo = datetime.datetime(2024, 12, 29, 12, tzinfo=utc)
+        lunes = datetime.datetime(2024, 12, 30, 12, tzinfo=utc)
+        self.evento(domingo)
+        self.evento(lunes)
+        self.evento(lunes)
+        self.assertEqual(agregar_descargas(), 3)
+        self.assertEqual(self.diarias(), {
+            datetime.date(2024, 12, 29): 1,
+            datetime.date(2024, 12, 30): 2,
+        })
+        self.assertEqual(self.semanales(), {
+            datetime.date(2024, 12, 23): 1,
+            datetime.date(2024, 12, 30): 2,
+        })
+        self.assertEqual(lunes.isocalendar()[:2], (2025, 1))
+
+    def test_eventos_de_banda_borrada(self):
+        """Borrar una banda antes del volcado no traba los eventos."""
+        otra = Banda.objects.create(nombre='Los Borrados', biografia='x')
+        ahora = timezone.now().replace(microsecond=0)
+        buffer = BufferContador(aplicar_eventos)
+        with mock.patch('apps.bandas.contadores.threading.Thread'), \
+                mock.patch('apps.bandas.contadores.atexit.register'), \
+                override_settings(DESCARGAS_FLUSH_INTERVALO=60):
+            buffer.incrementar((self.banda.pk, 'demos/a.mp3', ahora, 'c'), 2)
+            buffer.incrementar((otra.pk, 'demos/b.mp3', ahora, 'c'))
+        otra.delete()
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(buffer.pendientes(), {})
+        self.assertEqual(
+            list(EventoDescarga.objects.values_list('banda_id', flat=True)),
+            [self.banda.pk, self.banda.pk],
+        )
+
+    def test_compactar_respeta_la_marca(self):
+        """Solo se borran los eventos viejos ya agregados."""
+        viejo = timezone.now() - datetime.timedelta(days=100)
+        for _ in range(3):
+            self.evento(viejo)
+        self.assertEqual(compactar_eventos(90), 0)
+        agregar_descargas()
+        pendiente = self.evento(viejo)
+        self.evento(timezone.now() - datetime.timedelta(days=1))
+        self.assertEqual(compactar_eventos(90, tamano_lote=2), 3)
+        self.assertEqual(compactar_eventos(90), 0)
+        self.assertTrue(
+            EventoDescarga.objects.filter(pk=pendiente.pk).exists(),
+        )
+        self.assertEqual(sum(self.diarias().values()), 3)
+
+
+class MigracionesTests(SimpleTestCase):
+    """Verifica que el historial de migraciones pueda reconstruirse."""
+
+    def test_relaciones_usan_la_etiqueta_de_la_app(self):
+        """Las relaciones apuntan a ``bandas.*``, no al módulo ``apps.bandas``.
+
+        Con ``to='apps.bandas.banda'`` el ``migrate`` desde cero fallaba
+        al reconstruir el estado (``too many values to unpack``).
+        """
+        cargador = MigrationLoader(None, ignore_no_migrations=True)
+        modelos = cargador.project_state(('bandas', '0004_flyer')).apps
+        Banda = modelos.get_model('bandas', 'Banda')
+        for modelo, campo in (
+            (Banda, 'estilos_musicales'),
+            (modelos.get_model('bandas', 'Integrante'), 'banda'),
+            (modelos.get_model('bandas', 'ImagenBanda'), 'banda'),
+            (modelos.get_model('bandas', 'Flyer'), 'banda'),
+        ):
+            with self.subTest(modelo=modelo.__name__, campo=campo):
+                destino = modelo._meta.get_field(campo).related_model
+                self.assertEqual(destino._meta.app_label, 'bandas')
+
+
+class VisitasTests(TestCase):
+    """Verifica el filtrado, el muestreo y el volcado de las visitas."""
+
+    def setUp(self):
+        """Crea una banda y una fábrica de peticiones."""
+        self.banda = Banda.objects.create(nombre='Los Vistos', biografia='x')
+        self.fabrica = RequestFactory()
+
+    def evento(self, **extra):
+        """Retorna el evento de una visita al detalle de la banda."""
+        extra.setdefault('HTTP_USER_AGENT', NAVEGADOR)
+        request = self.fabrica.get('/', **extra)
+        return evento_visita(request, self.banda.pk, 'detalle')
+
+    def test_filtra_bots_y_prefetch(self):
+        """No se cuentan bots, clientes HTTP, prefetch ni otros métodos."""
+        self.assertIsNotNone(self.evento())
+        self.assertIsNone(self.evento(HTTP_USER_AGENT=''))
+        for agente in ('Googlebot/2.1', 'curl/8.5.0', 'python-requests/2.32',
+                       'Mozilla/5.0 (compatible; AhrefsBot/7.0)'):
+            self.assertIsNone(self.evento(HTTP_USER_AGENT=agente), agente)
+        self.assertIsNone(self.evento(HTTP_SEC_PURPOSE='prefetch'))
+        request = self.fabrica.post('/', HTTP_USER_AGENT=NAVEGADOR)
+        self.assertIsNone(evento_visita(request, self.banda.pk, 'detalle'))
+
+    @override_settings(VISITAS_MUESTREO=0.25)
+    def test_muestreo_con_peso(self):
+        """Las visitas muestreadas pesan la inversa de la fracción."""
+        with mock.patch('apps.bandas.visitas.random.random', return_value=0.1):
+            self.assertEqual(self.evento()[3], 4)
+        with mock.patch('apps.bandas.visitas.random.random', return_value=0.5):
+            self.assertIsNone(self.evento())
+
+    def test_buffer_acotado_y_volcado(self):
+        """El buffer conserva los últimos eventos y, si falla, los retiene."""
+        volcados = []
+        buffer = BufferVisitas(volcados.append, 3)
+        with override_settings(VISITAS_FLUSH_INTERVALO=60), \
+                mock.patch.object(BufferVisitas, '_iniciar_hilo'):
+            for peso in range(5):
+                buffer.agregar((self.banda.pk, 'detalle', 1, peso))
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual([evento[3] for evento in volcados[0]], [2, 3, 4])
+
+        def fallar(eventos):
+            buffer._eventos.append((self.banda.pk, 'detalle', 1, 9))
+            raise RuntimeError
+
+        buffer.aplicar = fallar
+        buffer._eventos.extend(
+            (self.banda.pk, 'detalle', 1, peso) for peso in (5, 6)
+        )
+        with self.assertRaises(RuntimeError):
+            buffer.flush()
+        self.assertEqual([evento[3] for evento in buffer._eventos], [5, 6, 9])
+
+    def test_volcado_lento_no_bloquea_el_hilo(self):
+        """Mientras se escribe en la base, el lock del hilo queda libre."""
+        buffer = BufferVisitas(None, 10)
+        libre = []
+
+        def aplicar(eventos):
+            libre.append(buffer._lock.acquire(timeout=1))
+            buffer._lock.release()
+
+        buffer.aplicar = aplicar
+        buffer._eventos.append((self.banda.pk, 'detalle', 1, 1))
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(libre, [True])
+
+    def test_aplicar_suma_y_descarta_borradas(self):
+        """Los eventos se suman por hora; los de bandas borradas no."""
+        hora = 480000
+        borrada = Banda.objects.create(nombre='Borrada', biografia='x')
+        borrada_id = borrada.pk
+        borrada.delete()
+        aplicar_visitas([
+            (self.banda.pk, 'detalle', hora, 1),
+            (self.banda.pk, 'detalle', hora, 1),
+            (self.banda.pk, 'galeria', hora, 0.25),
+            (borrada_id, 'detalle', hora, 1),
+        ])
+        aplicar_visitas([(self.banda.pk, 'detalle', hora, 2)])
+        self.assertEqual(
+            list(VisitaHoraria.objects.values_list(
+                'banda_id', 'pagina', 'hora', 'visitas',
+            )),
+            [(
+                self.banda.pk, 'detalle',
+                datetime.datetime.fromtimestamp(
+                    hora * 3600, tz=datetime.timezone.utc,
+                ),
+                4,
+            )],
+        )
+
+
+@override_settings(DESCARGAS_FLUSH_INTERVALO=60)
+class ContadoresTests(SimpleTestCase):
+    """Verifica los buffers de descargas: volcado, fallas y cache."""
+
+    def setUp(self):
+        """Simula los hilos y ``atexit`` y usa un cache propio."""
+        self.hilo = mock.patch(
+            'apps.bandas.contadores.threading.Thread',
+        ).start()
+        self.atexit = mock.patch(
+            'apps.bandas.contadores.atexit.register',
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        cache_propio = proceso('contadores')
+        cache_propio.enable()
+        self.addCleanup(cache_propio.disable)
+        cache.clear()
+        self.aplicados = []
+
+    def aplicar(self, deltas):
+        """Registra los incrementos volcados."""
+        self.aplicados.append(deltas)
+
+    @staticmethod
+    def claves():
+        """Claves candidatas del buffer compartido."""
+        return [1, 2, 3]
+
+    @staticmethod
+    def fallar(deltas):
+        """Simula una base de datos caída."""
+        raise DatabaseError('caída')
+
+    def test_local_vuelca_y_agrupa(self):
+        """Los incrementos se suman por clave y se vuelcan una vez."""
+        buffer = BufferContador(self.aplicar)
+        buffer.incrementar(1)
+        buffer.incrementar(1)
+        buffer.incrementar(2, 5)
+        self.assertEqual(buffer.pendientes(), {1: 2, 2: 5})
+        self.assertEqual(buffer.flush(), 7)
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(self.aplicados, [{1: 2, 2: 5}])
+
+    def test_local_conserva_lo_pendiente_si_falla(self):
+        """Tras una falla se reintenta con lo viejo más lo nuevo."""
+        buffer = BufferContador(self.fallar)
+        buffer.incrementar(1, 3)
+        with self.assertRaises(DatabaseError):
+            buffer.flush()
+        buffer.incrementar(1)
+        buffer.incrementar(2)
+        self.assertEqual(buffer.pendientes(), {1: 4, 2: 1})
+        buffer.aplicar = self.aplicar
+        self.assertEqual(buffer.flush(), 5)
+        self.assertEqual(self.aplicados, [{1: 4, 2: 1}])
+
+    @override_settings(DESCARGAS_FLUSH_INTERVALO=0)
+    def test_sin_intervalo_escribe_de_inmediato(self):
+        """Con intervalo 0 cada incremento se vuelca al instante."""
+        buffer = BufferContador(self.aplicar)
+        buffer.incrementar(1)
+        buffer.incrementar(1)
+        self.assertEqual(self.aplicados, [{1: 1}, {1: 1}])
+
+    def test_salida_vuelca_y_registra_fallas(self):
+        """Al salir se vuelca lo pendiente; una falla solo se registra."""
+        buffer = BufferContador(self.aplicar)
+        buffer.incrementar(1, 2)
+        buffer.incrementar(2)
+        self.hilo.assert_called_once()
+        self.atexit.assert_called_once_with(buffer.detener)
+
+        buffer.detener()
+        self.assertEqual(self.aplicados, [{1: 2, 2: 1}])
+
+        buffer.aplicar = self.fallar
+        buffer.incrementar(1)
+        with self.assertLogs('apps.bandas.contadores', 'ERROR'):
+            buffer.detener()
+        self.assertEqual(buffer.pendientes(), {1: 1})
+
+    def test_cache_compartido_entre_procesos(self):
+        """Otro proceso vuelca los incrementos acumulados en el cache."""
+        BufferContadorCache(self.aplicar, self.claves).incrementar(1)
+        BufferContadorCache(self.aplicar, self.claves).incrementar(1)
+        otro = BufferContadorCache(self.aplicar, self.claves)
+        otro.incrementar(2, 5)
+        self.assertEqual(otro.pendientes(), {1: 2, 2: 5})
+        self.assertEqual(otro.flush(), 7)
+        self.assertEqual(self.aplicados, [{1: 2, 2: 5}])
+        self.assertEqual(otro.pendientes(), {})
+
+    def test_cache_restaura_si_falla(self):
+        """Si la base falla, los contadores vuelven y el lock se libera."""
+        buffer = BufferContadorCache(self.fallar, self.claves)
+        buffer.incrementar(1, 3)
+        with self.assertRaises(DatabaseError):
+            buffer.flush()
+        self.assertEqual(buffer.pendientes(), {1: 3})
+        buffer.aplicar = self.aplicar
+        self.assertEqual(buffer.flush(), 3)
+
+    def test_falla_de_integridad_no_se_reintenta(self):
+        """Un lote que viola una restricción se descarta, no se reencola."""
+        def violar(deltas):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+
+        for buffer in (
+            BufferContador(violar), BufferContadorCache(violar, self.claves),
+        ):
+            with self.subTest(buffer=type(buffer).__name__):
+                buffer.incrementar(1, 3)
+                with self.assertLogs('apps.bandas.contadores', 'ERROR'):
+                    self.assertEqual(buffer.flush(), 0)
+                self.assertEqual(buffer.pendientes(), {})
+                buffer.aplicar = self.aplicar
+                buffer.incrementar(2)
+                self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(self.aplicados, [{2: 1}, {2: 1}])
+
+    def test_cache_un_volcado_a_la_vez(self):
+        """Mientras otro proceso tiene el lock no se vuelca."""
+        buffer = BufferContadorCache(self.aplicar, self.claves)
+        buffer.incrementar(1)
+        cache.add(f'{PREFIJO_CACHE}:lock', 'otro proceso')
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(self.aplicados, [])
+        self.assertEqual(buffer.pendientes(), {1: 1})
+
+
+@override_settings(RANKING_TAMANO=3)
+class RankingTests(TestCase):
+    """Verifica el mantenimiento incremental del ranking de descargas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea cinco bandas aprobadas con demo y descargas 0 a 4."""
+        cls.bandas = []
+        for numero in range(5):
+            usuario = Usuario.objects.create_user(
+                username=f'ranking{numero}', password='clave-segura',
+                is_representative=True,
+            )
+            cls.bandas.append(Banda.objects.create(
+                nombre=f'Ranking {numero}', representante=usuario,
+                biografia='x', estado='aprobado',
+                demos=f'bandas/ranking-{numero}/demo.mp3', descargas=numero,
+            ))
+
+    def puestos(self):
+        """Retorna los IDs de las bandas del ranking, en orden."""
+        return list(PuestoRanking.objects.values_list('banda_id', flat=True))
+
+    def ids(self, *indices):
+        """Retorna los IDs de las bandas de prueba indicadas."""
+        return [self.bandas[i].pk for i in indices]
+
+    def test_descargas_reubican_bandas(self):
+        """Volcar descargas sube a la banda sin recorrer la tabla."""
+        reconstruir()
+        self.assertEqual(self.puestos(), self.ids(4, 3, 2))
+        aplicar_descargas({self.bandas[0].pk: 10})
+        self.assertEqual(self.puestos(), self.ids(0, 4, 3))
+
+    def test_banda_que_sale_es_reemplazada(self):
+        """Si una banda deja de ser elegible entra la siguiente."""
+        reconstruir()
+        banda = self.bandas[4]
+        banda.estado = 'rechazado'
+        banda.save()
+        self.assertEqual(self.puestos(), self.ids(3, 2, 1))
+        self.bandas[3].delete()
+        self.assertEqual(self.puestos(), self.ids(2, 1, 0))
+
+    def test_borrar_banda_fuera_del_ranking(self):
+        """Borrar una banda que no figura no reconstruye el ranking."""
+        reconstruir()
+        destino = 'apps.bandas.signals.reconstruir_ranking'
+        with mock.patch(destino) as reconstruir_mock:
+            self.bandas[0].delete()
+        reconstruir_mock.assert_not_called()
+        with mock.patch(destino, side_effect=reconstruir) as reconstruir_mock:
+            self.bandas[4].delete()
+        reconstruir_mock.assert_called_once()
+        self.assertEqual(self.puestos(), self.ids(3, 2, 1))
+
+
+# Hilo del autocompletado, simulado en los tests.
+HILO = 'apps.bandas.autocompletado.threading.Thread'
+
+
+class HiloInmediato:
+    """Reemplazo de ``threading.Thread`` que corre el hilo al iniciarlo."""
+
+    def __init__(self, target, **kwargs):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+
+class AutocompletadoTests(TestCase):
+    """Verifica el índice de trigramas del autocompletado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea bandas aprobadas con nombres parecidos."""
+        cls.gusanos = cls.crear('Los Gusanos', 5)
+        cls.gusanitos = cls.crear('Gusanitos', 1)
+        cls.gusanera = cls.crear('Gusanera', 9)
+        cls.trio = cls.crear('Trío Azul', 0)
+
+    @classmethod
+    def crear(cls, nombre, descargas):
+        """Crea una banda aprobada con su representante."""
+        representante = Usuario.objects.create_user(
+            username=f'autocompletado{Banda.objects.count()}',
+            password='clave-segura', is_representative=True,
+        )
+        return Banda.objects.create(
+            nombre=nombre, representante=representante, biografia='x',
+            estado='aprobado', descargas=descargas,
+        )
+
+    def setUp(self):
+        """Construye un índice propio sobre un cache vacío."""
+        cache.delete(CLAVE_VERSION)
+        self.indice = IndiceTrigramas()
+        self.indice.sincronizar()
+
+    def nombres(self, consulta):
+        """Retorna los nombres encontrados para una consulta."""
+        return [nombre for _, nombre, _ in self.indice.buscar(consulta)]
+
+    def test_tolera_errores_de_tipeo(self):
+        """Letras cambiadas o sin acento igual encuentran la banda."""
+        self.assertEqual(self.nombres('los gusnos')[0], 'Los Gusanos')
+        self.assertEqual(self.nombres('trio asul'), ['Trío Azul'])
+        self.assertEqual(self.nombres('xyzzy'), [])
+
+    def test_prefijo_por_delante(self):
+        """Los nombres que empiezan con la consulta van primero.
+
+        Entre ellos desempatan las descargas.
+        """
+        self.assertEqual(
+            self.nombres('gusan'), ['Gusanera', 'Gusanitos', 'Los Gusanos'],
+        )
+
+    def test_actualizacion_incremental(self):
+        """Renombrar, desaprobar y borrar se reflejan sin reconstruir."""
+        self.gusanos.nombre = 'Las Orugas'
+        self.indice.actualizar(self.gusanos)
+        self.assertEqual(self.nombres('orugas'), ['Las Orugas'])
+        self.assertNotIn('Los Gusanos', self.nombres('gusan'))
+
+        self.gusanitos.estado = 'pendiente'
+        self.indice.actualizar(self.gusanitos)
+        self.assertEqual(self.nombres('gusan'), ['Gusanera'])
+
+        self.indice.quitar(self.gusanera.pk)
+        self.assertEqual(self.nombres('gusan'), [])
+        self.assertEqual(len(self.indice), 2)
+
+    def test_publicar_cambio_no_obliga_a_reconstruir(self):
+        """El proceso que publica queda en la versión nueva."""
+        with mock.patch('apps.bandas.autocompletado.indice', self.indice):
+            publicar_cambio(banda_id=self.trio.pk)
+        self.assertEqual(self.indice.version, cache.get(CLAVE_VERSION))
+        self.assertEqual(self.nombres('trio'), [])
+
+    def test_version_se_incrementa_de_forma_atomica(self):
+        """Cada cambio suma uno a la versión y deja la banda cambiada."""
+        cache.set(CLAVE_VERSION, 10, None)
+        with mock.patch('apps.bandas.autocompletado.indice', self.indice):
+            publicar_cambio(banda_id=self.trio.pk)
+            publicar_cambio(banda=self.gusanos)
+        self.assertEqual(cache.get(CLAVE_VERSION), 12)
+        self.assertEqual(cache.get(clave_cambio(11)), self.trio.pk)
+        self.assertEqual(cache.get(clave_cambio(12)), self.gusanos.pk)
+
+    @override_settings(AUTOCOMPLETADO_REFRESCO=0)
+    def test_otro_proceso_aplica_solo_los_cambios(self):
+        """Otro proceso lee solo las bandas cambiadas, sin reconstruir."""
+        otro = IndiceTrigramas()
+        otro.sincronizar()
+        cache.set(CLAVE_VERSION, 10, None)
+        self.indice.version = otro.version = 10
+
+        Banda.objects.filter(pk=self.gusanos.pk).update(nombre='Las Orugas')
+        self.gusanos.refresh_from_db()
+        with mock.patch('apps.bandas.autocompletado.indice', self.indice):
+            publicar_cambio(banda=self.gusanos)
+            publicar_cambio(banda_id=self.trio.pk)
+        Banda.objects.filter(pk=self.trio.pk).delete()
+
+        with mock.patch.object(otro, 'reconstruir') as reconstruir, \
+                mock.patch(HILO, HiloInmediato), \
+                mock.patch('apps.bandas.autocompletado.connection'), \
+                self.assertNumQueries(1):
+            otro.sincronizar()
+        reconstruir.assert_not_called()
+        self.assertEqual(otro.version, 12)
+        self.assertEqual(
+            [nombre for _, nombre, _ in otro.buscar('orugas')],
+            ['Las Orugas'],
+        )
+        self.assertEqual(otro.buscar('trio'), [])
+
+    @override_settings(AUTOCOMPLETADO_REFRESCO=0)
+    def test_cambios_perdidos_reconstruyen(self):
+        """Si falta un cambio en el cache se reconstruye el índice."""
+        cache.set(CLAVE_VERSION, 10, None)
+        self.indice.version = 10
+        cache.set(CLAVE_VERSION, 12, None)
+        cache.set(clave_cambio(12), self.trio.pk)
+        with mock.patch.object(self.indice, 'reconstruir') as reconstruir, \
+                mock.patch(HILO, HiloInmediato), \
+                mock.patch('apps.bandas.autocompletado.connection'):
+            self.indice.sincronizar()
+        reconstruir.assert_called_once_with(12)
+
+    def test_vista_con_limite_invalido(self):
+        """Un límite inválido usa el valor por defecto."""
+        url = reverse('autocompletar_bandas')
+        for limite in ('²', '0', '-2', 'x', '9' * 30):
+            with self.subTest(limite=limite):
+                respuesta = self.client.get(
+                    url, {'q': 'gus', 'limite': limite},
+                )
+                self.assertEqual(respuesta.status_code, 200)
+        respuesta = self.client.get(url, {'q': 'gus', 'limite': 1})
+        self.assertEqual(len(respuesta.json()['resultados']), 1)
+
+    @override_settings(AUTOCOMPLETADO_REFRESCO=0)
+    def test_reconstruye_en_segundo_plano(self):
+        """Otra versión dispara una sola reconstrucción en otro hilo.
+
+        Mientras corre, las consultas usan el índice anterior.
+        """
+        self.crear('Gusanos Nuevos', 0)
+        cache.set(CLAVE_VERSION, 'de-otro-proceso', None)
+        with mock.patch(HILO) as hilo, self.assertNumQueries(0):
+            self.indice.sincronizar()
+            self.indice.sincronizar()
+        hilo.assert_called_once()
+        hilo.return_value.start.assert_called_once()
+        self.assertNotIn('Gusanos Nuevos', self.nombres('gusanos'))
+
+        # El hilo simulado nunca corrió: se libera su lock a mano.
+        self.indice._reconstruccion.release()
+        self.indice.sincronizar(esperar=True)
+        self.assertIn('Gusanos Nuevos', self.nombres('gusanos'))
+        self.assertEqual(self.indice.version, 'de-otro-proceso')
+
+
+class EventosTests(TestCase):
+    """Verifica los próximos eventos, la navegación por mes y el feed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea un evento pasado y dos futuros, desordenados."""
+        ahora = timezone.now()
+        for titulo, dias in (('Lejano', 40), ('Pasado', -3), ('Cercano', 2)):
+            Evento.objects.create(
+                titulo=titulo, descripcion='Recital; con, comas',
+                fecha=ahora + datetime.timedelta(days=dias),
+                ubicacion='Centro Cultural',
+            )
+
+    def setUp(self):
+        """Parte de un cache vacío y vuelca las visitas al terminar."""
+        cache.clear()
+        self.addCleanup(buffer_visitas().flush)
+
+    def test_proximos_en_orden(self):
+        """Solo se listan eventos futuros, del más cercano al más lejano."""
+        respuesta = self.client.get(reverse('eventos_proximos'))
+        titulos = [evento.titulo for evento in respuesta.context['eventos']]
+        self.assertEqual(titulos, ['Cercano', 'Lejano'])
+
+    def test_eventos_del_mes(self):
+        """La vista mensual filtra por mes y rechaza meses inválidos."""
+        fecha = timezone.localtime(Evento.objects.get(titulo='Pasado').fecha)
+        respuesta = self.client.get(
+            reverse('eventos_mes', args=[fecha.year, fecha.month]),
+        )
+        self.assertContains(respuesta, 'Pasado')
+        respuesta = self.client.get(reverse('eventos_mes', args=[2024, 13]))
+        self.assertEqual(respuesta.status_code, 404)
+
+    def test_ical_y_peticion_condicional(self):
+        """El feed responde 304 con una consulta hasta que cambia un evento."""
+        respuesta = self.client.get(reverse('eventos_ical'))
+        contenido = b''.join(respuesta.streaming_content).decode()
+        self.assertTrue(contenido.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(contenido.count('BEGIN:VEVENT'), 2)
+        self.assertIn(r'Recital\; con\, comas', contenido)
+        self.assertNotIn('Pasado', contenido)
+
+        etag = respuesta['ETag']
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(
+                reverse('eventos_ical'), HTTP_IF_NONE_MATCH=etag,
+            )
+        self.assertEqual(respuesta.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Evento.objects.filter(titulo='Lejano').get().delete()
+        respuesta = self.client.get(
+            reverse('eventos_ical'), HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_etag_sale_de_la_base(self):
+        """El ETag cambia sin pasar por el cache de este proceso.
+
+        Los cambios se guardan sin ejecutar los ``on_commit`` (que
+        incrementan los sellos), como si los hiciera otro proceso.
+        """
+        etag = etag_ical()
+        evento = Evento.objects.get(titulo='Cercano')
+        evento.titulo = 'Cercano (cambiado)'
+        evento.save()
+        self.assertNotEqual(etag_ical(), etag)
+
+        etag = etag_ical()
+        Evento.objects.filter(titulo='Pasado').delete()
+        self.assertEqual(etag_ical(), etag)
+        Evento.objects.filter(titulo='Lejano').delete()
+        self.assertNotEqual(etag_ical(), etag)
+
+
+@override_settings(REPLICAS=['replica1'])
+class ReplicasTests(SimpleTestCase):
+    """Verifica qué peticiones leen de una réplica."""
+
+    def setUp(self):
+        """Parte de un cache vacío (sin mediciones de retraso)."""
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = RouterReplicas()
+
+    def procesar(self, request, vista=banda_list, escribir=False):
+        """Procesa una petición y retorna ``(base de lectura, respuesta)``.
+
+        La vista simulada escribe en la base si ``escribir`` es
+        verdadero y luego registra a dónde irían sus lecturas.
+        """
+        lecturas = []
+
+        def vista_simulada(request):
+            middleware.process_view(request, vista, (), {})
+            if escribir:
+                self.router.db_for_write(Banda)
+            lecturas.append(self.router.db_for_read(Banda))
+            return HttpResponse()
+
+        middleware = MiddlewareReplicas(vista_simulada)
+        respuesta = middleware(request)
+        return lecturas[0], respuesta
+
+    def test_lectura_publica_anonima_usa_replica(self):
+        """Un GET anónimo a una vista pública lee de la réplica."""
+        base, respuesta = self.procesar(self.factory.get('/bandas/'))
+        self.assertEqual(base, 'replica1')
+        self.assertNotIn(COOKIE_PRINCIPAL, respuesta.cookies)
+
+    def test_principal_para_sesiones_y_vistas_privadas(self):
+        """Con sesión, en vistas privadas o con POST se usa la principal."""
+        request = self.factory.get('/bandas/')
+        request.COOKIES['sessionid'] = 'abc'
+        self.assertIsNone(self.procesar(request)[0])
+        request = self.factory.get('/dashboard/representative/')
+        self.assertIsNone(self.procesar(request, representative_dashboard)[0])
+        base, respuesta = self.procesar(self.factory.post('/bandas/'))
+        self.assertIsNone(base)
+        self.assertIn(COOKIE_PRINCIPAL, respuesta.cookies)
+
+    def test_lee_lo_propio_escrito(self):
+        """Después de escribir se lee de la principal, también luego."""
+        base, respuesta = self.procesar(
+            self.factory.get('/bandas/'), escribir=True,
+        )
+        self.assertIsNone(base)
+        self.assertEqual(respuesta.cookies[COOKIE_PRINCIPAL]['max-age'], 10)
+        request = self.factory.get('/bandas/')
+        request.COOKIES[COOKIE_PRINCIPAL] = '1'
+        self.assertIsNone(self.procesar(request)[0])
+
+    def test_replica_atrasada_se_excluye(self):
+        """Una réplica con demasiado retraso deja de usarse."""
+        cache.set(CLAVE_RETRASO, {'replica1': 120.0})
+        self.assertIsNone(self.procesar(self.factory.get('/bandas/'))[0])
+        cache.set(CLAVE_RETRASO, {'replica1': 0.5})
+        base, _ = self.procesar(self.factory.get('/bandas/'))
+        self.assertEqual(base, 'replica1')
+
+
+@override_settings(REPLICAS=['replica1'], REPLICAS_RETRASO_MAXIMO=30)
+class RetrasoReplicasTests(TestCase):
+    """Verifica la medición del retraso y su publicación a los procesos."""
+
+    def setUp(self):
+        """Vacía el cache compartido."""
+        with proceso('compartido'):
+            caches['default'].clear()
+
+    def medir(self, llegadas):
+        """Mide en otro proceso con las lecturas del latido dadas."""
+        with proceso('compartido'), \
+                mock.patch('apps.bandas.replicas._retraso_servidor',
+                           return_value=None), \
+                mock.patch('apps.bandas.replicas._latido_llego',
+                           side_effect=llegadas) as leer, \
+                mock.patch('apps.bandas.replicas.time.sleep'):
+            retrasos = medir_retraso(intervalo=0)
+        return retrasos, leer.call_count
+
+    def disponibles(self):
+        """Retorna las réplicas que usa un proceso web."""
+        with proceso('compartido'):
+            return replicas_disponibles()
+
+    def test_espera_el_latido(self):
+        """El retraso es lo que tardó en llegar el latido recién escrito."""
+        retrasos, lecturas = self.medir([False, False, True])
+        self.assertEqual(lecturas, 3)
+        self.assertLess(retrasos['replica1'], 30)
+        self.assertEqual(self.disponibles(), ['replica1'])
+
+    @override_settings(REPLICAS_RETRASO_MAXIMO=0)
+    def test_latido_que_no_llega_excluye(self):
+        """Sin el latido dentro del máximo, la réplica se excluye."""
+        with self.assertLogs('apps.bandas.replicas', 'WARNING'):
+            retrasos, _ = self.medir(itertools.repeat(False))
+        self.assertGreater(retrasos['replica1'], 0)
+        self.assertEqual(self.disponibles(), [])
+
+    def test_replica_que_no_responde(self):
+        """Una réplica que falla queda sin medición y excluida."""
+        with self.assertLogs('apps.bandas.replicas', 'WARNING'):
+            retrasos, _ = self.medir(DatabaseError('caída'))
+        self.assertIsNone(retrasos['replica1'])
+        self.assertEqual(self.disponibles(), [])
+
+
+class EstaticosTests(SimpleTestCase):
+    """Verifica la optimización sin pérdida de los PNG estáticos."""
+
+    def setUp(self):
+        """Prepara un directorio temporal."""
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+
+    def guardar(self, imagen, nombre, **opciones):
+        """Guarda una imagen en el directorio temporal y retorna su ruta."""
+        ruta = os.path.join(self.directorio.name, nombre)
+        imagen.save(ruta, format='PNG', **opciones)
+        return ruta
+
+    def test_optimiza_sin_cambiar_pixeles(self):
+        """Descarta metadatos y alfa opaco conservando los píxeles."""
+        imagen = Image.new('RGBA', (64, 64), (200, 30, 30, 255))
+        imagen.paste((10, 10, 10, 255), (8, 8, 40, 40))
+        metadatos = PngImagePlugin.PngInfo()
+        metadatos.add_text('Description', 'x' * 4000)
+        ruta = self.guardar(
+            imagen, 'textura.png', pnginfo=metadatos, compress_level=0,
+        )
+        tamano = os.path.getsize(ruta)
+
+        ahorro = optimizar_png(ruta)
+
+        self.assertEqual(os.path.getsize(ruta), tamano - ahorro)
+        self.assertGreater(ahorro, 0)
+        with Image.open(ruta) as optimizada:
+            self.assertEqual(optimizada.mode, 'RGB')
+            self.assertEqual(
+                optimizada.convert('RGBA').tobytes(), imagen.tobytes(),
+            )
+
+    def test_no_toca_png_ya_optimizado(self):
+        """Un PNG que no se puede achicar queda intacto."""
+        ruta = self.guardar(
+            Image.new('L', (16, 16), 128), 'gris.png', optimize=True,
+        )
+        with open(ruta, 'rb') as archivo:
+            original = archivo.read()
+        self.assertEqual(optimizar_png(ruta), 0)
+        with open(ruta, 'rb') as archivo:
+            self.assertEqual(archivo.read(), original)
+
+
+class AlmacenamientoContenidoTests(TestCase):
+    """Verifica la deduplicación y las referencias de los blobs."""
+
+    def setUp(self):
+        """Usa un MEDIA_ROOT temporal y un cache vacío."""
+        media_temporal(self)
+        cache.clear()
+
+    def crear(self, nombre, contenido):
+        """Crea una banda con un demo del contenido dado."""
+        banda = Banda.objects.create(nombre=nombre, biografia='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            banda.demos.save('demo.mp3', ContentFile(contenido))
+        return banda
+
+    def referencias(self):
+        """Retorna ``{ruta del blob: referencias}``."""
+        return dict(Blob.objects.values_list('ruta', 'referencias'))
+
+    def test_deduplica_y_libera_con_la_ultima_referencia(self):
+        """El mismo contenido se guarda una vez y se borra con el último."""
+        primera = self.crear('Las Copias', b'ID3 mismo demo')
+        segunda = self.crear('Los Duplicados', b'ID3 mismo demo')
+        self.assertNotEqual(primera.demos.name, segunda.demos.name)
+        self.assertEqual(primera.demos.path, segunda.demos.path)
+        ruta = primera.demos.path
+        self.assertEqual(list(self.referencias().values()), [2])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            primera.delete()
+        self.assertEqual(list(self.referencias().values()), [1])
+        self.assertTrue(os.path.exists(ruta))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            segunda.delete()
+        self.assertEqual(self.referencias(), {})
+        self.assertFalse(ArchivoLogico.objects.exists())
+        self.assertFalse(os.path.exists(ruta))
+
+    def test_reemplazar_libera_el_anterior(self):
+        """Cambiar el demo libera el nombre y el blob que dejó de usarse."""
+        banda = self.crear('Los Reemplazos', b'ID3 demo viejo')
+        anterior, ruta = banda.demos.name, banda.demos.path
+        with self.captureOnCommitCallbacks(execute=True):
+            banda.demos.save('demo.mp3', ContentFile(b'ID3 demo nuevo'))
+        self.assertFalse(ArchivoLogico.objects.filter(nombre=anterior).exists())
+        self.assertFalse(os.path.exists(ruta))
+        self.assertEqual(list(self.referencias().values()), [1])
+
+        # Guardar sin tocar el archivo no libera nada.
+        with self.captureOnCommitCallbacks(execute=True):
+            banda.save()
+        self.assertEqual(list(self.referencias().values()), [1])
+
+    def test_reemplazar_en_instancia_diferida(self):
+        """Sin el nombre cargado, el anterior se lee de la base."""
+        banda = self.crear('Los Diferidos', b'ID3 demo viejo')
+        anterior = banda.demos.name
+        diferida = Banda.objects.only('id', 'nombre').get(pk=banda.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            diferida.demos = ContentFile(b'ID3 demo nuevo', name='otro.mp3')
+            diferida.save()
+        self.assertFalse(ArchivoLogico.objects.filter(nombre=anterior).exists())
+        self.assertEqual(list(self.referencias().values()), [1])
+
+    def test_el_anterior_se_libera_al_confirmar(self):
+        """Hasta que se confirma la transacción el anterior se conserva."""
+        banda = self.crear('Los Pendientes', b'ID3 demo viejo')
+        anterior = banda.demos.name
+        with self.captureOnCommitCallbacks() as pendientes:
+            banda.demos.save('demo.mp3', ContentFile(b'ID3 demo nuevo'))
+        self.assertTrue(ArchivoLogico.objects.filter(nombre=anterior).exists())
+        for callback in pendientes:
+            callback()
+        self.assertFalse(ArchivoLogico.objects.filter(nombre=anterior).exists())
+
+    def test_restos_de_escritura_se_reemplazan_sin_borrar(self):
+        """Un blob a medio escribir se reemplaza de forma atómica."""
+        contenido = b'ID3 demo completo'
+        ruta = os.path.join(settings.MEDIA_ROOT, ruta_blob(
+            hashlib.sha256(contenido).hexdigest(), '.mp3',
+        ))
+        os.makedirs(os.path.dirname(ruta))
+        with open(ruta, 'wb') as archivo:
+            archivo.write(b'ID3 de')
+        with mock.patch('os.remove') as remove, \
+                mock.patch('os.unlink') as unlink:
+            banda = self.crear('Los Interrumpidos', contenido)
+        remove.assert_not_called()
+        unlink.assert_not_called()
+        self.assertEqual(banda.demos.path, ruta)
+        with open(ruta, 'rb') as archivo:
+            self.assertEqual(archivo.read(), contenido)
+        self.assertEqual(os.listdir(os.path.dirname(ruta)), [
+            os.path.basename(ruta),
+        ])
+
+
+class EjecutorInmediato:
+    """Reemplazo del ejecutor de derivadas que corre cada tarea al encolarla."""
+
+    def __init__(self):
+        self.tareas = 0
+
+    def submit(self, funcion, *args):
+        self.tareas += 1
+        funcion(*args)
+
+
+class GuardadoBandaTests(TestCase):
+    """Verifica que las señales solo reaccionen a los campos modificados."""
+
+    def setUp(self):
+        """Usa un MEDIA_ROOT temporal y genera las derivadas al encolarlas."""
+        media_temporal(self)
+        self.ejecutor = EjecutorInmediato()
+        for destino, valor in (
+            ('apps.bandas.derivadas.ejecutor', lambda: self.ejecutor),
+            # El hilo de fondo cierra su conexión; aquí es la del test.
+            ('apps.bandas.derivadas.connection', mock.Mock()),
+        ):
+            parche = mock.patch(destino, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.banda = Banda.objects.create(
+            nombre='Los Quietos', biografia='x', estado='aprobado',
+        )
+
+    @staticmethod
+    def foto(color):
+        """Retorna una imagen JPEG de 400 px de ancho."""
+        datos = io.BytesIO()
+        Image.new('RGB', (400, 300), color).save(datos, format='JPEG')
+        return ContentFile(datos.getvalue(), name='foto.jpg')
+
+    def test_guardar_sin_cambios_no_recalcula(self):
+        """Sin cambios solo se escribe la fila de la banda."""
+        banda = Banda.objects.get(pk=self.banda.pk)
+        with self.captureOnCommitCallbacks() as pendientes, \
+                self.assertNumQueries(1):
+            banda.save()
+        self.assertEqual(pendientes, [])
+        self.assertEqual(
+            Banda.objects.get(pk=banda.pk).version, self.banda.version,
+        )
+
+    def test_renombrar_actualiza_y_vuelve_a_la_calma(self):
+        """Un cambio de nombre reindexa; el guardado siguiente no."""
+        banda = Banda.objects.get(pk=self.banda.pk)
+        banda.nombre = 'Los Ruidosos'
+        with self.captureOnCommitCallbacks() as pendientes:
+            banda.save()
+        self.assertTrue(pendientes)
+        self.assertEqual(
+            DocumentoBusqueda.objects.get(banda_id=banda.pk).nombre,
+            'Los Ruidosos',
+        )
+        self.assertEqual(banda.version, self.banda.version + 1)
+
+        with self.assertNumQueries(1):
+            banda.save()
+
+    def test_reemplazar_imagen_borra_sus_derivadas(self):
+        """Las derivadas WebP y JPEG de la imagen anterior se eliminan."""
+        with self.captureOnCommitCallbacks(execute=True):
+            imagen = ImagenBanda.objects.create(
+                banda=self.banda, imagen=self.foto('red'),
+            )
+        anterior = imagen.imagen.name
+        archivos = list(
+            DerivadaImagen.objects.filter(original=anterior)
+            .values_list('archivo', flat=True)
+        )
+        self.assertEqual(len(archivos), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            imagen.imagen = self.foto('blue')
+            imagen.save()
+        self.assertFalse(
+            DerivadaImagen.objects.filter(original=anterior).exists(),
+        )
+        for archivo in archivos:
+            self.assertFalse(default_storage.exists(archivo), archivo)
+        self.assertEqual(
+            DerivadaImagen.objects.filter(original=imagen.imagen.name).count(),
+            2,
+        )
+
+    def test_derivadas_fuera_de_la_peticion(self):
+        """Guardar solo encola las derivadas; no se generan en el acto."""
+        with mock.patch('apps.bandas.derivadas.generar_derivadas') as generar:
+            with self.captureOnCommitCallbacks() as pendientes:
+                ImagenBanda.objects.create(
+                    banda=self.banda, imagen=self.foto('red'),
+                )
+            generar.assert_not_called()
+            self.assertEqual(self.ejecutor.tareas, 0)
+            for callback in pendientes:
+                callback()
+        self.assertEqual(self.ejecutor.tareas, 1)
+        generar.assert_called_once()
+        self.assertIsNone(generar.call_args.args[0].instance)
+
+    @override_settings(IMAGENES_DERIVADAS='comando')
+    def test_derivadas_con_el_comando(self):
+        """En modo ``comando`` las genera ``generar_derivadas``."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.banda.imagen_principal = self.foto('red')
+            self.banda.save()
+        self.assertEqual(self.ejecutor.tareas, 0)
+        nombre = self.banda.imagen_principal.name
+        self.assertFalse(
+            DerivadaImagen.objects.filter(original=nombre).exists(),
+        )
+        version = Banda.objects.get(pk=self.banda.pk).version
+
+        call_command('generar_derivadas', stdout=io.StringIO())
+        self.assertEqual(
+            DerivadaImagen.objects.filter(original=nombre).count(), 2,
+        )
+        self.assertEqual(
+            Banda.objects.get(pk=self.banda.pk).version, version + 1,
+        )
+
+
+@override_settings(
+    SUBIDAS_TAMANO_MAXIMO={'demo': 1024, 'imagen': 1024},
+)
+class SubidaVerificadaTests(TestCase):
+    """Verifica la validación al vuelo de los demos subidos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea un representante con su banda."""
+        cls.usuario = Usuario.objects.create_user(
+            username='subidor', password='clave-segura',
+            is_representative=True,
+        )
+        cls.banda = Banda.objects.create(
+            nombre='Los Subidos', representante=cls.usuario, biografia='x',
+        )
+
+    def setUp(self):
+        """Inicia sesión y usa un MEDIA_ROOT temporal."""
+        media_temporal(self)
+        self.client.force_login(self.usuario)
+
+    def subir(self, contenido, nombre='demo.mp3'):
+        """Sube un demo y retorna los mensajes y la banda actualizada."""
+        respuesta = self.client.post(
+            reverse('upload_demo', args=[self.banda.pk]),
+            {'demos': SimpleUploadedFile(nombre, contenido)},
+        )
+        self.assertEqual(respuesta.status_code, 302)
+        mensajes = [str(m) for m in get_messages(respuesta.wsgi_request)]
+        return mensajes, Banda.objects.get(pk=self.banda.pk)
+
+    def test_archivo_truncado_se_rechaza(self):
+        """Un archivo más corto que la firma no produce un error 500."""
+        mensajes, banda = self.subir(b'hola!')
+        self.assertIn('no es de un tipo admitido', mensajes[0])
+        self.assertFalse(banda.demos)
+
+    def test_archivo_corto_con_firma_valida(self):
+        """Si los pocos bytes tienen una firma admitida, se acepta."""
+        mensajes, banda = self.subir(b'ID3\x04\x00')
+        self.assertEqual(mensajes, ['Demo subido correctamente.'])
+        self.assertTrue(banda.demos)
+
+    def test_firma_incorrecta(self):
+        """La extensión no importa: cuenta el contenido."""
+        mensajes, banda = self.subir(b'GIF89a' + bytes(100))
+        self.assertIn('no es de un tipo admitido', mensajes[0])
+        self.assertFalse(banda.demos)
+
+    def test_archivo_demasiado_grande(self):
+        """La subida se corta al superar el tamaño máximo."""
+        mensajes, banda = self.subir(b'ID3' + bytes(2048))
+        self.assertIn('supera el tamaño máximo', mensajes[0])
+        self.assertFalse(banda.demos)
+
+    def test_hash_calculado_al_recibir(self):
+        """El blob queda con el SHA-256 calculado durante la subida."""
+        contenido = b'ID3' + bytes(range(256))
+        with mock.patch(
+            'apps.bandas.storage.hashlib', wraps=hashlib,
+        ) as hashes:
+            mensajes, banda = self.subir(contenido)
+        self.assertEqual(mensajes, ['Demo subido correctamente.'])
+        hashes.sha256.assert_not_called()
+        self.assertEqual(
+            Blob.objects.get().hash, hashlib.sha256(contenido).hexdigest(),
+        )
+
+
+class SubidasReanudablesTests(TestCase):
+    """Verifica el protocolo de subidas reanudables por bloques."""
+
+    # Demo MP3 de prueba, subido en bloques de 1000 bytes.
+    DEMO = b'ID3' + bytes(range(256)) * 10
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea un representante con su banda."""
+        cls.usuario = Usuario.objects.create_user(
+            username='reanudador', password='clave-segura',
+            is_representative=True,
+        )
+        cls.banda = Banda.objects.create(
+            nombre='Los Reanudados', representante=cls.usuario,
+            biografia='x',
+        )
+
+    def setUp(self):
+        """Inicia sesión y usa directorios temporales."""
+        media_temporal(self)
+        subidas = override_settings(
+            SUBIDAS_DIR=os.path.join(settings.MEDIA_ROOT, '.subidas'),
+        )
+        subidas.enable()
+        self.addCleanup(subidas.disable)
+        self.client.force_login(self.usuario)
+
+    def iniciar(self, nombre='demo.mp3', tamano=None):
+        """Inicia una subida y retorna la URL de la sesión."""
+        respuesta = self.client.post(
+            reverse('iniciar_subida_reanudable', args=[self.banda.pk]),
+            {
+                'destino': 'demo', 'nombre': nombre,
+                'tamano': len(self.DEMO) if tamano is None else tamano,
+            },
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        return respuesta.json()['url']
+
+    def enviar(self, url, desde, hasta=None, contenido=None):
+        """Envía ``contenido`` (por defecto, un tramo del demo)."""
+        if contenido is None:
+            contenido = self.DEMO[desde:hasta]
+        return self.client.put(
+            f'{url}?offset={desde}', contenido,
+            content_type='application/octet-stream',
+        )
+
+    def finalizar(self, url):
+        """Finaliza la subida de la sesión en ``url``."""
+        return self.client.post(f'{url}finalizar/')
+
+    def test_desplazamiento_incorrecto(self):
+        """Un hueco o un bloque fuera de rango informan desde dónde seguir."""
+        url = self.iniciar()
+        self.assertEqual(self.enviar(url, 0, 1000).json()['recibido'], 1000)
+
+        respuesta = self.enviar(url, 1500, 2000)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['recibido'], 1000)
+
+        respuesta = self.enviar(url, 2000, contenido=bytes(1000))
+        self.assertEqual(respuesta.status_code, 416)
+        self.assertEqual(respuesta.json()['recibido'], 1000)
+
+        respuesta = self.client.put(
+            f'{url}?offset=x', b'', content_type='application/octet-stream',
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self.client.get(url).json()['recibido'], 1000)
+
+    def test_retomar_tras_un_corte(self):
+        """Reenviar bloques ya recibidos no duplica ni corrompe bytes."""
+        url = self.iniciar()
+        self.enviar(url, 0, 1000)
+        respuesta = self.enviar(url, 1000, contenido=self.DEMO[1000:1500])
+        self.assertEqual(respuesta.json()['recibido'], 1500)
+
+        # El cliente perdió la respuesta y retoma desde el estado.
+        recibido = self.client.get(url).json()['recibido']
+        self.assertEqual(recibido, 1500)
+        self.assertEqual(self.enviar(url, 0, 1000).json()['recibido'], 1500)
+        respuesta = self.enviar(url, 1000, len(self.DEMO))
+        self.assertEqual(respuesta.json()['recibido'], len(self.DEMO))
+
+        self.assertEqual(self.finalizar(url).status_code, 200)
+        banda = Banda.objects.get(pk=self.banda.pk)
+        with banda.demos.open('rb') as demo:
+            self.assertEqual(demo.read(), self.DEMO)
+
+    def test_finalizar(self):
+        """Solo se finaliza una subida completa y de un tipo admitido."""
+        url = self.iniciar()
+        self.enviar(url, 0, 1000)
+        respuesta = self.finalizar(url)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['recibido'], 1000)
+
+        self.enviar(url, 1000, len(self.DEMO))
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.finalizar(url)
+        self.assertTrue(respuesta.json()['completada'])
+        demo = Banda.objects.get(pk=self.banda.pk).demos.name
+        self.assertTrue(demo)
+        self.assertEqual(os.listdir(settings.SUBIDAS_DIR), [])
+
+        # Finalizar otra vez no cambia nada y ya no se aceptan bloques.
+        self.assertEqual(self.finalizar(url).status_code, 200)
+        self.assertEqual(Banda.objects.get(pk=self.banda.pk).demos.name, demo)
+        self.assertEqual(self.enviar(url, 0, 1000).status_code, 409)
+
+        url = self.iniciar(tamano=1000)
+        self.enviar(url, 0, contenido=bytes(1000))
+        self.assertEqual(self.finalizar(url).status_code, 415)
+
+    def test_sesion_ajena(self):
+        """Otro usuario no puede consultar ni completar la subida."""
+        url = self.iniciar()
+        self.client.force_login(Usuario.objects.create_user(
+            username='intruso', password='clave-segura',
+        ))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.enviar(url, 0, 1000).status_code, 404)
+        self.assertEqual(self.finalizar(url).status_code, 404)
+
+    def test_limpieza_de_subidas_abandonadas(self):
+        """Se borran las sesiones inactivas y los parciales huérfanos."""
+        abandonada = self.iniciar()
+        self.enviar(abandonada, 0, 1000)
+        activa = self.iniciar()
+        hace_dos_dias = timezone.now() - datetime.timedelta(days=2)
+        SesionSubida.objects.filter(
+            pk=abandonada.rstrip('/').rsplit('/', 1)[1],
+        ).update(actualizada=hace_dos_dias)
+        huerfano = os.path.join(settings.SUBIDAS_DIR, 'huerfano.part')
+        reciente = os.path.join(settings.SUBIDAS_DIR, 'reciente.part')
+        for ruta in (huerfano, reciente):
+            open(ruta, 'wb').close()
+        os.utime(huerfano, (hace_dos_dias.timestamp(),) * 2)
+
+        salida = io.StringIO()
+        call_command('limpiar_subidas', horas=24, stdout=salida)
+        self.assertIn('Sesiones eliminadas: 1', salida.getvalue())
+        self.assertEqual(self.client.get(abandonada).status_code, 404)
+        self.assertEqual(self.client.get(activa).status_code, 200)
+        activa_id = activa.rstrip('/').rsplit('/', 1)[1]
+        self.assertEqual(
+            sorted(os.listdir(settings.SUBIDAS_DIR)),
+            sorted([f'{activa_id}.part', 'reciente.part']),
+        )
+
+
+class RedimensionesTests(TestCase):
+    """Verifica las variantes redimensionadas bajo demanda."""
+
+    def setUp(self):
+        """Usa un MEDIA_ROOT temporal con una imagen y un cache propio."""
+        media_temporal(self)
+        cache_dir = override_settings(
+            REDIMENSION_CACHE_DIR=os.path.join(
+                settings.MEDIA_ROOT, '.redimensiones',
+            ),
+        )
+        cache_dir.enable()
+        self.addCleanup(cache_dir.disable)
+        self.original = self.guardar('bandas/foto.jpg', (400, 300))
+
+    @staticmethod
+    def guardar(ruta, tamano):
+        """Guarda una imagen JPEG en MEDIA_ROOT y retorna su ruta."""
+        absoluta = os.path.join(settings.MEDIA_ROOT, ruta)
+        os.makedirs(os.path.dirname(absoluta), exist_ok=True)
+        Image.new('RGB', tamano, (10, 120, 200)).save(absoluta, 'JPEG')
+        return absoluta
+
+    def url(self, tamano, ruta='bandas/foto.jpg'):
+        """Retorna la URL de una variante."""
+        return reverse('imagen_redimensionada', args=[tamano, ruta])
+
+    def test_solo_tamanos_y_formatos_permitidos(self):
+        """Fuera de la lista de tamaños o de imágenes se responde 404."""
+        respuesta = self.client.get(self.url('300x300'))
+        self.assertEqual(respuesta.status_code, 200)
+        contenido = b''.join(respuesta.streaming_content)
+        with Image.open(io.BytesIO(contenido)) as variante:
+            self.assertEqual(variante.format, 'JPEG')
+            self.assertEqual(variante.size, (300, 300))
+
+        self.guardar('.subidas/oculta.jpg', (400, 300))
+        corrupta = os.path.join(settings.MEDIA_ROOT, 'bandas/x.jpg')
+        with open(corrupta, 'wb') as archivo:
+            archivo.write(b'no es una imagen')
+        for url in (
+            self.url('301x300'), self.url('9' * 30 + 'x300'),
+            self.url('300x300', 'bandas/otra.jpg'),
+            self.url('300x300', 'bandas/demo.mp3'),
+            self.url('300x300', '.subidas/oculta.jpg'),
+            self.url('300x300', 'bandas/../.subidas/oculta.jpg'),
+            self.url('300x300', 'bandas/x.jpg'),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(len(self.variantes()), 1)
+
+    def variantes(self):
+        """Retorna las variantes guardadas en el cache."""
+        return [
+            os.path.join(raiz, nombre)
+            for raiz, _, nombres in os.walk(settings.REDIMENSION_CACHE_DIR)
+            for nombre in nombres if not nombre.endswith('.lock')
+        ]
+
+    def test_pedidos_concurrentes_generan_una_vez(self):
+        """Los pedidos simultáneos de una variante esperan a la primera."""
+        original = redimensiones._redimensionar
+        barrera = threading.Barrier(4)
+
+        def lento(*args):
+            time.sleep(0.1)
+            original(*args)
+
+        def pedir():
+            barrera.wait()
+            nombres.append(obtener_variante(self.original, 150, 150))
+
+        nombres = []
+        with mock.patch.object(
+            redimensiones, '_redimensionar', side_effect=lento,
+        ) as redimensionar:
+            hilos = [threading.Thread(target=pedir) for _ in range(4)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        redimensionar.assert_called_once()
+        self.assertEqual(len(set(nombres)), 1)
+
+    def test_flock_espera_a_otro_proceso(self):
+        """Con el ``flock`` tomado por otro proceso no se genera de nuevo."""
+        nombre = nombre_variante(self.original, 64, 64)
+        ruta = os.path.join(directorio_cache(), nombre)
+        os.makedirs(os.path.dirname(ruta))
+        with open(ruta + '.lock', 'w') as lock, mock.patch.object(
+            redimensiones, '_redimensionar',
+        ) as redimensionar:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            hilo = threading.Thread(
+                target=obtener_variante, args=(self.original, 64, 64),
+            )
+            hilo.start()
+            hilo.join(0.2)
+            self.assertTrue(hilo.is_alive())
+            # El otro proceso termina de escribir la variante.
+            Image.new('RGB', (64, 64)).save(ruta, 'JPEG')
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            hilo.join()
+        redimensionar.assert_not_called()
+
+    def test_desaloja_las_menos_usadas(self):
+        """Se eliminan primero las variantes leídas hace más tiempo."""
+        nombres = [
+            obtener_variante(self.original, *tamano)
+            for tamano in ((64, 64), (150, 150), (300, 300))
+        ]
+        rutas = [os.path.join(directorio_cache(), n) for n in nombres]
+        ahora = time.time()
+        for antiguedad, ruta in zip((10, 30, 20), rutas):
+            os.utime(ruta, (ahora - antiguedad, ahora - antiguedad))
+        # Leer la más vieja la vuelve la más reciente.
+        obtener_variante(self.original, 150, 150)
+
+        tamanos = [os.path.getsize(ruta) for ruta in rutas]
+        maximo = sum(tamanos) - 1
+        self.assertEqual(desalojar(maximo), 1)
+        self.assertEqual(
+            [os.path.exists(ruta) for ruta in rutas], [True, True, False],
+        )
+        self.assertEqual(desalojar(maximo), 0)
+
+    def test_no_recorre_el_cache_en_cada_variante(self):
+        """El desalojo corre por intervalo o por bytes escritos."""
+        with mock.patch.object(redimensiones, 'desalojar') as desalojo:
+            obtener_variante(self.original, 64, 64)
+            self.assertEqual(desalojo.call_count, 1)
+            # Se simula el último desalojo recién hecho.
+            open(os.path.join(
+                directorio_cache(), redimensiones.ARCHIVO_DESALOJO,
+            ), 'w').close()
+            obtener_variante(self.original, 150, 150)
+            obtener_variante(self.original, 64, 64)
+            self.assertEqual(desalojo.call_count, 1)
+            with override_settings(REDIMENSION_CACHE_MAX=1000):
+                obtener_variante(self.original, 300, 300)
+            self.assertEqual(desalojo.call_count, 2)
+
+
+class ServirMediaTests(TestCase):
+    """Verifica la entrega de archivos subidos: delegación y cache HTTP."""
+
+    CONTENIDO = bytes(range(100))
+
+    def setUp(self):
+        """Guarda archivos en un MEDIA_ROOT temporal."""
+        media_temporal(self)
+        for ruta in ('bandas/foto uno.jpg', '.subidas/a.part', 'bandas/.x'):
+            absoluta = os.path.join(settings.MEDIA_ROOT, ruta)
+            os.makedirs(os.path.dirname(absoluta), exist_ok=True)
+            with open(absoluta, 'wb') as archivo:
+                archivo.write(self.CONTENIDO)
+        self.url = reverse('servir_media', args=['bandas/foto uno.jpg'])
+
+    def test_streaming_con_validadores(self):
+        """Se envía el archivo con ETag, Last-Modified y max-age."""
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), self.CONTENIDO)
+        self.assertTrue(respuesta['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', respuesta)
+        self.assertIn(
+            f'max-age={settings.MEDIA_MAX_AGE}', respuesta['Cache-Control'],
+        )
+        self.assertEqual(respuesta['Content-Type'], 'image/jpeg')
+
+    def test_rutas_ocultas_o_fuera_de_media(self):
+        """Los archivos ocultos y las rutas que salen de MEDIA_ROOT son 404."""
+        for ruta in (
+            '.subidas/a.part', 'bandas/.x', 'bandas/../.subidas/a.part',
+            '../settings.py', 'bandas/no-existe.jpg', 'bandas',
+        ):
+            with self.subTest(ruta=ruta):
+                respuesta = self.client.get(
+                    reverse('servir_media', args=[ruta]),
+                )
+                self.assertEqual(respuesta.status_code, 404)
+        respuesta = self.client.post(self.url)
+        self.assertEqual(respuesta.status_code, 405)
+
+    def test_if_none_match_y_if_range(self):
+        """Un ETag vigente da 304; ``If-Range`` viejo envía todo."""
+        etag = self.client.get(self.url)['ETag']
+        respuesta = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta.content, b'')
+        self.assertEqual(respuesta['ETag'], etag)
+
+        respuesta = self.client.get(
+            self.url, headers={'Range': 'bytes=10-19', 'If-Range': etag},
+        )
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(
+            b''.join(respuesta.streaming_content), self.CONTENIDO[10:20],
+        )
+
+        respuesta = self.client.get(
+            self.url, headers={'Range': 'bytes=10-19', 'If-Range': '"viejo"'},
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Length'], '100')
+
+    @override_settings(
+        MEDIA_SERVIDOR='x-accel', MEDIA_ACCEL_PREFIJO='/interno/',
+    )
+    def test_delegacion_x_accel(self):
+        """nginx recibe la ruta interna codificada y ningún byte."""
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            respuesta['X-Accel-Redirect'], '/interno/bandas/foto%20uno.jpg',
+        )
+        self.assertEqual(respuesta.content, b'')
+        self.assertIn('ETag', respuesta)
+
+        respuesta = self.client.get(
+            self.url, headers={'If-None-Match': respuesta['ETag']},
+        )
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertNotIn('X-Accel-Redirect', respuesta)
+
+        respuesta = self.client.get(
+            reverse('servir_media', args=['.subidas/a.part']),
+        )
+        self.assertEqual(respuesta.status_code, 404)
+        self.assertNotIn('X-Accel-Redirect', respuesta)
+
+    @override_settings(MEDIA_SERVIDOR='x-sendfile')
+    def test_delegacion_x_sendfile(self):
+        """Apache recibe la ruta absoluta del archivo."""
+        respuesta = self.client.get(self.url)
+        self.assertEqual(
+            respuesta['X-Sendfile'],
+            default_storage.path('bandas/foto uno.jpg'),
+        )
+        self.assertEqual(respuesta.content, b'')
+
+
+class StreamingTests(SimpleTestCase):
+    """Verifica los rangos y las respuestas condicionales de los archivos."""
+
+    CONTENIDO = bytes(range(100))
+
+    def setUp(self):
+        """Guarda un archivo de 100 bytes en un almacenamiento temporal."""
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.storage = FileSystemStorage(location=directorio.name)
+        self.storage.save('demo.mp3', ContentFile(self.CONTENIDO))
+        self.fabrica = RequestFactory()
+
+    def responder(self, metodo='get', **cabeceras):
+        """Sirve el archivo y retorna la respuesta y su contenido."""
+        request = getattr(self.fabrica, metodo)('/', headers=cabeceras)
+        respuesta = respuesta_media(request, self.storage, 'demo.mp3')
+        if respuesta.streaming:
+            return respuesta, b''.join(respuesta.streaming_content)
+        return respuesta, respuesta.content
+
+    def test_parsear_rango(self):
+        """Rangos simples, abiertos y sufijos; el resto se ignora."""
+        casos = {
+            'bytes=10-19': (10, 19),
+            'bytes=90-': (90, 99),
+            'bytes=-10': (90, 99),
+            'bytes=-500': (0, 99),
+            'bytes=50-500': (50, 99),
+            'bytes=0-9,20-29': None,
+            'items=0-9': None,
+            'bytes=-': None,
+            None: None,
+        }
+        for cabecera, esperado in casos.items():
+            with self.subTest(cabecera=cabecera):
+                self.assertEqual(parsear_rango(cabecera, 100), esperado)
+        for cabecera in ('bytes=100-', 'bytes=-0', 'bytes=20-10'):
+            with self.subTest(cabecera=cabecera):
+                with self.assertRaises(RangoNoSatisfacible):
+                    parsear_rango(cabecera, 100)
+
+    def test_rango_parcial_y_no_satisfacible(self):
+        """Un rango válido responde 206; uno fuera del archivo, 416."""
+        respuesta, contenido = self.responder(Range='bytes=-10')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], 'bytes 90-99/100')
+        self.assertEqual(contenido, self.CONTENIDO[90:])
+
+        respuesta, _ = self.responder(Range='bytes=200-')
+        self.assertEqual(respuesta.status_code, 416)
+        self.assertEqual(respuesta['Content-Range'], 'bytes */100')
+
+    def test_multiples_rangos_sirven_completo(self):
+        """Los rangos múltiples se responden con el archivo entero."""
+        respuesta, contenido = self.responder(Range='bytes=0-9,20-29')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(contenido, self.CONTENIDO)
+
+    def test_if_range(self):
+        """Con otro validador en ``If-Range`` se envía el archivo entero."""
+        etag = self.responder()[0]['ETag']
+        for validador in ('"otro"', http_date(0)):
+            with self.subTest(validador=validador):
+                respuesta, contenido = self.responder(
+                    Range='bytes=10-19', **{'If-Range': validador},
+                )
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(contenido, self.CONTENIDO)
+        respuesta, contenido = self.responder(
+            Range='bytes=10-19', **{'If-Range': etag},
+        )
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(contenido, self.CONTENIDO[10:20])
+
+    def test_condicionales_y_head(self):
+        """Con el ETag vigente se responde 304; ``HEAD`` no envía cuerpo."""
+        etag = self.responder()[0]['ETag']
+        respuesta, contenido = self.responder(**{'If-None-Match': etag})
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+        self.assertEqual(contenido, b'')
+
+        respuesta, contenido = self.responder('head')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Length'], '100')
+        self.assertEqual(contenido, b'')
+
+    def test_descarga_inicial(self):
+        """Solo cuentan los ``GET`` completos o con rango ``bytes=0-``."""
+        casos = [
+            ('get', {}, True),
+            ('get', {'Range': 'bytes=0-'}, True),
+            ('get', {'Range': 'bytes=10-'}, False),
+            ('get', {'Range': 'bytes=0-1'}, False),
+            ('get', {'Range': 'bytes=0-0,-1'}, False),
+            ('head', {}, False),
+        ]
+        for metodo, cabeceras, esperado in casos:
+            with self.subTest(metodo=metodo, cabeceras=cabeceras):
+                request = getattr(self.fabrica, metodo)('/', headers=cabeceras)
+                self.assertEqual(es_descarga_inicial(request), esperado)
+
+
+@override_settings(VISITAS_FLUSH_INTERVALO=60)
+class VistasAsincronasTests(TestCase):
+    """Verifica que las vistas asíncronas respondan como las síncronas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Crea una banda en el ranking y un evento próximo."""
+        usuario = Usuario.objects.create_user(
+            username='asincrono', password='clave-segura',
+            is_representative=True,
+        )
+        cls.banda = Banda.objects.create(
+            nombre='Los Asincrónicos', representante=usuario,
+            biografia='x', estado='aprobado', descargas=7,
+            demos='bandas/asincronicos/demo.mp3',
+        )
+        Evento.objects.create(
+            titulo='Recital asincrónico', descripcion='Recital',
+            fecha=timezone.now() + datetime.timedelta(days=1),
+            ubicacion='Plaza',
+        )
+        reconstruir()
+
+    def setUp(self):
+        """Parte de un cache vacío y vuelca las visitas al terminar."""
+        cache.clear()
+        self.addCleanup(buffer_visitas().flush)
+
+    @staticmethod
+    def peticion(ruta, **cabeceras):
+        """Retorna una petición anónima como la arma el middleware."""
+        request = AsyncRequestFactory().get(
+            ruta, headers={'User-Agent': NAVEGADOR, **cabeceras},
+        )
+
+        async def auser():
+            return AnonymousUser()
+
+        request.auser = auser
+        request.user = AnonymousUser()
+        return request
+
+    async def comparar(self, vista_sync, vista_async, ruta, *args):
+        """Compara el HTML de ambas versiones de una vista."""
+        esperado = await sync_to_async(vista_sync)(self.peticion(ruta), *args)
+        cache.clear()
+        obtenido = await vista_async(self.peticion(ruta), *args)
+        self.assertEqual(obtenido.status_code, 200)
+        self.assertEqual(obtenido.content, esperado.content)
+        return obtenido
+
+    async def test_listado_y_detalle(self):
+        """El listado y el detalle asíncronos generan el mismo HTML."""
+        await self.comparar(banda_list, banda_list_async, '/bandas/')
+        respuesta = await self.comparar(
+            banda_detail, banda_detail_async, '/bandas/1/', self.banda.pk,
+        )
+        self.assertContains(respuesta, 'Los Asincrónicos')
+
+    async def test_landing_cacheada_sin_consultas(self):
+        """La landing asíncrona carga solo los fragmentos ausentes."""
+        respuesta = await self.comparar(landing_page, landing_page_async, '/')
+        self.assertContains(respuesta, 'Recital asincrónico')
+        # Con los fragmentos cacheados no se vuelve a calcular el ranking.
+        with mock.patch(
+            'apps.accounts.views.atop_bandas_ranking',
+            side_effect=AssertionError('ranking recalculado'),
+        ):
+            respuesta = await landing_page_async(self.peticion('/'))
+        self.assertContains(respuesta, 'Los Asincrónicos')
+
+    async def test_render_con_cache_compartido_fuera_del_bucle(self):
+        """Con un cache de red la plantilla se renderiza en otro hilo."""
+        hilos = []
+
+        def renderizar(*args, **kwargs):
+            hilos.append(threading.get_ident())
+            return HttpResponse()
+
+        with mock.patch(
+            'apps.bandas.asincronia.cache_por_proceso', return_value=False,
+        ):
+            await en_bucle(renderizar)
+        await en_bucle(renderizar)
+        self.assertNotEqual(hilos[0], threading.get_ident())
+        self.assertEqual(hilos[1], threading.get_ident())
+
+
+@override_settings(VISITAS_FLUSH_INTERVALO=60, DESCARGAS_FLUSH_INTERVALO=0)
+class DemoAsincronoTests(TestCase):
+    """Verifica la descarga asíncrona del demo, completa y por rangos."""
+
+    CONTENIDO = bytes(range(256)) * 4
+
+    def setUp(self):
+        """Guarda el demo de una banda en un MEDIA_ROOT temporal."""
+        media_temporal(self)
+        usuario = Usuario.objects.create_user(
+            username='demo-asincrono', password='clave-segura',
+            is_representative=True,
+        )
+        self.banda = Banda.objects.create(
+            nombre='Los Transmisores', representante=usuario,
+            biografia='x', estado='aprobado',
+        )
+        self.banda.demos.save('demo.mp3', ContentFile(self.CONTENIDO))
+
+    async def descargar(self, **cabeceras):
+        """Descarga el demo y retorna la respuesta y su contenido."""
+        request = VistasAsincronasTests.peticion('/demo/', **cabeceras)
+        respuesta = await descargar_demo_async(request, self.banda.pk)
+        if not respuesta.streaming:
+            return respuesta, respuesta.content
+        contenido = b''.join([
+            bloque async for bloque in respuesta.streaming_content
+        ])
+        return respuesta, contenido
+
+    async def descargas(self):
+        """Retorna las descargas contadas de la banda."""
+        banda = await Banda.objects.aget(pk=self.banda.pk)
+        return banda.descargas
+
+    async def test_descarga_completa_cuenta(self):
+        """La descarga desde el byte 0 se envía entera y se cuenta."""
+        respuesta, contenido = await self.descargar()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.is_async)
+        self.assertEqual(contenido, self.CONTENIDO)
+        self.assertEqual(await self.descargas(), 1)
+
+    async def test_rango_no_cuenta(self):
+        """Un rango intermedio responde 206 con esos bytes y no cuenta."""
+        respuesta, contenido = await self.descargar(Range='bytes=10-19')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(
+            respuesta['Content-Range'], f'bytes 10-19/{len(self.CONTENIDO)}',
+        )
+        self.assertEqual(contenido, self.CONTENIDO[10:20])
+        self.assertEqual(await self.descargas(), 0)
+
+    async def test_304_y_head_no_cuentan(self):
+        """Ni la respuesta 304 ni un ``HEAD`` cuentan como descarga."""
+        respuesta, _ = await self.descargar()
+        respuesta, contenido = await self.descargar(
+            **{'If-None-Match': respuesta['ETag']},
+        )
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(contenido, b'')
+
+        request = AsyncRequestFactory().head(
+            '/demo/', headers={'User-Agent': NAVEGADOR},
+        )
+        respuesta = await descargar_demo_async(request, self.banda.pk)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(await self.descargas(), 1)
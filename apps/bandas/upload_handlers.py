@@ -0,0 +1,280 @@
+"""Manejador de subidas que valida, mide y calcula el hash en una sola pasada.
+
+``VerificacionUploadHandler`` reemplaza a los manejadores por defecto de
+Django para los campos de archivo conocidos (demos e imágenes):
+
+* Identifica el tipo real del archivo por sus primeros bytes (firma o
+  "magic bytes"), sin confiar en la extensión ni en el Content-Type.
+* Controla el tamaño mientras el archivo llega y corta la subida en
+  cuanto se supera el límite, antes de escribir el resto a disco.
+* Calcula el SHA-256 del contenido en la misma pasada y lo deja en el
+  atributo ``sha256`` del archivo subido, junto con ``tipo_detectado``.
+
+Los errores quedan en ``request.errores_subida`` (``{campo: mensaje}``)
+para que la vista los informe al usuario; los archivos rechazados no
+llegan a ``request.FILES``.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    MemoryFileUploadHandler,
+    SkipFile,
+    StopFutureHandlers,
+    StopUpload,
+    TemporaryFileUploadHandler,
+)
+from django.http import QueryDict
+from django.template.defaultfilters import filesizeformat
+from django.utils.datastructures import MultiValueDict
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+# Tipos admitidos por destino, según la firma detectada.
+TIPOS_POR_DESTINO = {
+    'demo': ('mp3', 'wav'),
+    'imagen': ('jpeg', 'png', 'webp'),
+}
+
+# Destino (y por lo tanto límites) de cada campo de archivo del sitio.
+DESTINO_POR_CAMPO = {
+    'demos': 'demo',
+    'imagenes': 'imagen',
+    'imagen_principal': 'imagen',
+}
+
+# Cantidad máxima de archivos por campo en una misma petición.
+ARCHIVOS_POR_CAMPO = {
+    'imagenes': 5,
+}
+
+# Bytes necesarios para reconocer todas las firmas admitidas.
+LONGITUD_FIRMA = 12
+
+
+def detectar_tipo(cabecera):
+    """Identifica el tipo de un archivo a partir de sus primeros bytes.
+
+    Args:
+        cabecera: Primeros bytes del archivo (al menos 12 si los hay).
+
+    Returns:
+        ``'mp3'``, ``'wav'``, ``'jpeg'``, ``'png'``, ``'webp'`` o ``None``
+        si la firma no corresponde a ningún tipo admitido.
+    """
+    if cabecera.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if cabecera.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if cabecera[:4] == b'RIFF' and cabecera[8:12] == b'WEBP':
+        return 'webp'
+    if cabecera[:4] == b'RIFF' and cabecera[8:12] == b'WAVE':
+        return 'wav'
+    if cabecera.startswith(b'ID3'):
+        return 'mp3'
+    # Sincronismo de trama MPEG sin etiqueta ID3 (capa distinta de 00).
+    if (len(cabecera) >= 2 and cabecera[0] == 0xFF
+            and cabecera[1] & 0xE0 == 0xE0 and cabecera[1] & 0x06):
+        return 'mp3'
+    return None
+
+
+def limite_campo(campo):
+    """Retorna los tipos admitidos y el tamaño máximo de un campo.
+
+    Args:
+        campo: Nombre del campo de archivo en el formulario.
+
+    Returns:
+        Tupla ``(tipos, tamano_maximo)`` o ``None`` si el campo no tiene
+        restricciones configuradas.
+    """
+    destino = DESTINO_POR_CAMPO.get(campo)
+    if destino is None:
+        return None
+    return TIPOS_POR_DESTINO[destino], settings.SUBIDAS_TAMANO_MAXIMO[destino]
+
+
+class VerificacionUploadHandler(FileUploadHandler):
+    """Manejador que valida tipo y tamaño y calcula el SHA-256 al vuelo.
+
+    Delega el almacenamiento en los manejadores estándar de Django
+    (memoria para archivos chicos, archivo temporal para los grandes) y
+    detiene al resto de manejadores para que los datos pasen una sola
+    vez.
+    """
+
+    def __init__(self, request=None):
+        """Inicializa el manejador y sus delegados.
+
+        Args:
+            request: Objeto HttpRequest de Django.
+        """
+        super().__init__(request)
+        self.memoria = MemoryFileUploadHandler(request)
+        self.disco = TemporaryFileUploadHandler(request)
+        self.delegado = None
+        self.errores = request.errores_subida
+        self.archivos_por_campo = {}
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """Rechaza de entrada los cuerpos más grandes que cualquier subida válida.
+
+        Returns:
+            ``(POST, FILES)`` vacíos si el cuerpo es demasiado grande (sin
+            leerlo), o ``None`` para continuar con el procesamiento.
+        """
+        self.memoria.handle_raw_input(
+            input_data, META, content_length, boundary, encoding,
+        )
+        maximo = sum(
+            settings.SUBIDAS_TAMANO_MAXIMO[destino]
+            * ARCHIVOS_POR_CAMPO.get(campo, 1)
+            for campo, destino in DESTINO_POR_CAMPO.items()
+        ) + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        if content_length > maximo:
+            self.errores['__all__'] = 'La subida supera el tamaño máximo permitido.'
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length,
+                 charset=None, content_type_extra=None):
+        """Prepara la verificación de un archivo nuevo y elige el delegado."""
+        super().new_file(
+            field_name, file_name, content_type, content_length,
+            charset, content_type_extra,
+        )
+        self.hash = hashlib.sha256()
+        self.cabecera = b''
+        self.tipo = None
+        self.rechazado = False
+        self.limite = limite_campo(field_name)
+
+        cantidad = self.archivos_por_campo.get(field_name, 0) + 1
+        self.archivos_por_campo[field_name] = cantidad
+        if cantidad > ARCHIVOS_POR_CAMPO.get(field_name, cantidad):
+            self.errores[field_name] = (
+                f'Solo puedes subir un máximo de '
+                f'{ARCHIVOS_POR_CAMPO[field_name]} archivos.'
+            )
+            raise SkipFile
+
+        self.delegado = self.memoria if self.memoria.activated else self.disco
+        try:
+            self.delegado.new_file(
+                field_name, file_name, content_type, content_length,
+                charset, content_type_extra,
+            )
+        except StopFutureHandlers:
+            pass
+        raise StopFutureHandlers
+
+    def receive_data_chunk(self, raw_data, start):
+        """Verifica el bloque, actualiza el hash y lo pasa al delegado.
+
+        Raises:
+            SkipFile: Si el tipo detectado no está permitido en el campo.
+            StopUpload: Si el archivo supera el tamaño máximo del campo.
+        """
+        if self.limite is not None:
+            tipos, maximo = self.limite
+            if start + len(raw_data) > maximo:
+                self.errores[self.field_name] = (
+                    f'El archivo "{self.file_name}" supera el tamaño máximo '
+                    f'de {filesizeformat(maximo)}.'
+                )
+                self._descartar()
+                raise StopUpload(connection_reset=True)
+            if self.tipo is None and len(self.cabecera) < LONGITUD_FIRMA:
+                self.cabecera += raw_data[:LONGITUD_FIRMA - len(self.cabecera)]
+                if (len(self.cabecera) >= LONGITUD_FIRMA
+                        and not self._verificar_tipo(tipos)):
+                    raise SkipFile
+
+        self.hash.update(raw_data)
+        self.delegado.receive_data_chunk(raw_data, start)
+        return None
+
+    def file_complete(self, file_size):
+        """Completa el archivo en el delegado y le agrega hash y tipo.
+
+        Los archivos más cortos que la firma se verifican recién aquí.
+        ``MultiPartParser`` llama a este método fuera del bloque que
+        atrapa ``SkipFile``, así que el rechazo queda anotado en el
+        manejador y no se devuelve ningún archivo.
+
+        Returns:
+            El archivo subido con los atributos ``sha256`` y
+            ``tipo_detectado``, o ``None`` si se rechazó.
+        """
+        if self.limite is not None and self.tipo is None:
+            self._verificar_tipo(self.limite[0])
+        if self.rechazado:
+            return None
+        archivo = self.delegado.file_complete(file_size)
+        archivo.sha256 = self.hash.hexdigest()
+        archivo.tipo_detectado = self.tipo
+        return archivo
+
+    def upload_interrupted(self):
+        """Borra el archivo temporal si la subida se interrumpe."""
+        self.disco.upload_interrupted()
+
+    def _verificar_tipo(self, tipos):
+        """Detecta el tipo por la cabecera y lo compara con los admitidos.
+
+        Si no está permitido, anota el error, marca el archivo como
+        rechazado y descarta lo recibido.
+
+        Returns:
+            ``True`` si el tipo está permitido.
+        """
+        self.tipo = detectar_tipo(self.cabecera)
+        if self.tipo in tipos:
+            return True
+        self.errores[self.field_name] = (
+            f'El archivo "{self.file_name}" no es de un tipo admitido '
+            f'({", ".join(tipos)}).'
+        )
+        self.rechazado = True
+        self._descartar()
+        return False
+
+    def _descartar(self):
+        """Cierra (y así elimina) el archivo parcial del delegado."""
+        archivo = getattr(self.delegado, 'file', None)
+        if archivo is not None:
+            archivo.close()
+
+
+def verificar_subidas(vista):
+    """Decorador que instala ``VerificacionUploadHandler`` en una vista.
+
+    Reemplaza a los manejadores por defecto, a los que delega: si
+    quedaran en la lista, ``MultiPartParser`` les pediría el archivo que
+    este manejador rechazó en ``file_complete``.
+
+    Los manejadores deben instalarse antes de que se lea ``request.POST``,
+    pero ``CsrfViewMiddleware`` lo lee antes de llamar a la vista. Por eso
+    la vista se exime del middleware y se protege con ``csrf_protect``
+    después de instalar el manejador, como indica la documentación de
+    Django.
+
+    Args:
+        vista: Vista que recibe archivos.
+
+    Returns:
+        Vista envuelta con la verificación de subidas.
+    """
+    protegida = csrf_protect(vista)
+
+    @csrf_exempt
+    @wraps(vista)
+    def _wrapped_view(request, *args, **kwargs):
+        request.errores_subida = {}
+        request.upload_handlers = [VerificacionUploadHandler(request)]
+        return protegida(request, *args, **kwargs)
+    return _wrapped_view
@@ -1,17 +1,40 @@
 """Configuración de URLs para la aplicación bandas.
 
-Define las rutas para el listado, creación, edición, eliminación
-de bandas, gestión de imágenes, demos, biografías e integrantes.
+Define las rutas para el listado, exploración por estilos, búsqueda,
+creación, edición, eliminación de bandas, galería, gestión de imágenes,
+demos, biografías, integrantes, estadísticas de descargas y eventos.
 """
 
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
+# Bajo ASGI (VISTAS_ASYNC) las vistas públicas más visitadas se atienden
+# con sus versiones asíncronas.
+if settings.VISTAS_ASYNC:
+    banda_list = views.banda_list_async
+    banda_detail = views.banda_detail_async
+    descargar_demo = views.descargar_demo_async
+else:
+    banda_list = views.banda_list
+    banda_detail = views.banda_detail
+    descargar_demo = views.descargar_demo
+
 urlpatterns = [
-    path('', views.banda_list, name='banda_list'),
+    path('', banda_list, name='banda_list'),
+    path('explorar/', views.explorar_bandas, name='explorar_bandas'),
+    path('buscar/', views.buscar_bandas, name='buscar_bandas'),
+    path(
+        'autocompletar/',
+        views.autocompletar_bandas, name='autocompletar_bandas',
+    ),
     path('crear/', views.create_banda, name='create_banda'),
-    path('<int:banda_id>/', views.banda_detail, name='banda_detail'),
+    path('<int:banda_id>/', banda_detail, name='banda_detail'),
+    path(
+        '<int:banda_id>/galeria/',
+        views.galeria_banda, name='galeria_banda',
+    ),
     path('<int:banda_id>/editar/', views.edit_banda, name='edit_banda'),
     path('<int:banda_id>/eliminar/', views.eliminar_banda, name='eliminar_banda'),
     path(
@@ -41,6 +64,30 @@ urlpatterns = [
     ),
     path(
         '<int:banda_id>/descargar/',
-        views.descargar_demo, name='descargar_demo',
+        descargar_demo, name='descargar_demo',
+    ),
+    path(
+        '<int:banda_id>/subidas/',
+        views.iniciar_subida_reanudable, name='iniciar_subida_reanudable',
+    ),
+    path(
+        'subidas/<uuid:sesion_id>/',
+        views.subida_reanudable, name='subida_reanudable',
+    ),
+    path(
+        'subidas/<uuid:sesion_id>/finalizar/',
+        views.finalizar_subida_reanudable,
+        name='finalizar_subida_reanudable',
+    ),
+    path('tendencias/', views.tendencias, name='tendencias'),
+    path(
+        '<int:banda_id>/descargas/',
+        views.serie_descargas, name='serie_descargas',
+    ),
+    path('eventos/', views.eventos_proximos, name='eventos_proximos'),
+    path(
+        'eventos/<int:anio>/<int:mes>/',
+        views.eventos_mes, name='eventos_mes',
     ),
+    path('eventos.ics', views.eventos_ical, name='eventos_ical'),
 ]
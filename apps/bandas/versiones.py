@@ -0,0 +1,98 @@
+"""Sellos de versión para invalidar caches derivados de los modelos.
+
+Cada sello es un entero guardado en el cache. Las señales lo
+incrementan cuando cambian los datos de los que depende un cache, y las
+claves de ese cache incluyen el sello: al cambiar, las entradas viejas
+dejan de leerse (y expiran solas) sin tener que buscarlas ni borrarlas.
+
+El incremento debe llegar a todos los procesos, por lo que el cache
+tiene que ser compartido (Redis o Memcached, ``CACHE_URL``); sin él el
+servidor no arranca en producción (ver ``apps/bandas/checks.py``). Por
+la misma razón los sellos no se memorizan en el proceso: cada lectura
+va al cache.
+
+Si un sello desaparece del cache (expulsión, reinicio) se recrea a
+partir del reloj en milisegundos, para no reutilizar un valor con el
+que ya se hubieran guardado entradas desactualizadas.
+
+Las bandas tienen además su propio sello en la base de datos
+(``Banda.version``), que viaja con la fila y permite cachear la tarjeta
+de cada banda sin consultar ningún sello adicional.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+
+# Prefijo de las claves de cache de los sellos.
+PREFIJO = 'version'
+
+
+def _clave(nombre):
+    """Retorna la clave de cache del sello ``nombre``."""
+    return f'{PREFIJO}:{nombre}'
+
+
+def _inicial():
+    """Retorna un valor inicial que no repite sellos anteriores."""
+    return int(time.time() * 1000)
+
+
+def version(nombre):
+    """Retorna el valor vigente de un sello, creándolo si falta.
+
+    Args:
+        nombre: Nombre del sello (por ejemplo ``'banda'``).
+
+    Returns:
+        Entero con la versión actual.
+    """
+    return versiones(nombre)[nombre]
+
+
+def versiones(*nombres):
+    """Retorna varios sellos con una sola lectura del cache.
+
+    Args:
+        *nombres: Nombres de los sellos.
+
+    Returns:
+        Diccionario ``{nombre: version}``.
+    """
+    claves = {_clave(nombre): nombre for nombre in nombres}
+    encontradas = cache.get_many(claves)
+    resultado = {claves[clave]: valor for clave, valor in encontradas.items()}
+    for clave, nombre in claves.items():
+        if clave not in encontradas:
+            cache.add(clave, _inicial(), None)
+            resultado[nombre] = cache.get(clave)
+    return resultado
+
+
+def incrementar(*nombres):
+    """Incrementa uno o varios sellos.
+
+    Args:
+        *nombres: Nombres de los sellos a incrementar.
+    """
+    for nombre in nombres:
+        clave = _clave(nombre)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            # El sello no existía: se crea con un valor nuevo.
+            if not cache.add(clave, _inicial(), None):
+                cache.incr(clave)
+
+
+def incrementar_bandas(*banda_ids):
+    """Incrementa ``Banda.version`` de las bandas indicadas.
+
+    Args:
+        *banda_ids: IDs de las bandas modificadas.
+    """
+    from .models import Banda
+
+    if banda_ids:
+        Banda.objects.filter(pk__in=banda_ids).update(version=F('version') + 1)
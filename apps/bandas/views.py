@@ -1,50 +1,410 @@
 """Vistas de la aplicación bandas.
 
 Contiene las vistas para listar, crear, editar, eliminar bandas,
-gestionar imágenes, demos, biografías e integrantes.
+gestionar imágenes, demos, biografías e integrantes, y para consultar
+los eventos.
 """
 
+import datetime
 import os
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
 from django.core.files import File
-from django.http import HttpResponse, Http404
-from django.db.models import F
-from django.shortcuts import get_object_or_404, redirect, render
-
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models import Prefetch
+from django.http import (
+    Http404,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import (
+    aget_object_or_404,
+    get_object_or_404,
+    redirect,
+    render,
+)
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import (
+    condition,
+    require_http_methods,
+    require_POST,
+    require_safe,
+)
+from PIL import Image
+
+from .asincronia import en_bucle, resolver_usuario
+from .autocompletado import RESULTADOS, RESULTADOS_MAXIMOS, autocompletar
+from .busqueda import PAGINAS_MAXIMAS, RESULTADOS_POR_PAGINA, buscar
+from .contadores import registrar_descarga
+from .derivadas import aprecargar_imagenes, precargar_imagenes
+from .estadisticas import serie_diaria, top_bandas_periodo
+from .eventos import PROXIMOS_MAXIMOS, etag_ical, lineas_ical, mes_vecino
+from .eventos import del_mes as eventos_del_mes
+from .eventos import proximos as proximos_eventos
+from .facetas import bandas_con_estilos, conteos, parsear_estilos
 from .forms import (
     BandaForm,
     BiografiaForm,
     ImagenRepresentativaForm,
     IntegranteForm,
 )
-from .models import Banda, ImagenBanda
+from .listados import (
+    ID_MAXIMO,
+    TAMANO_PAGINA,
+    TAMANO_PAGINA_MAXIMO,
+    CursorInvalido,
+    apagina_bandas,
+    bandas_listado,
+    entero_positivo,
+    pagina_bandas,
+)
+from .models import (
+    Banda,
+    EstiloMusical,
+    Flyer,
+    ImagenBanda,
+    Integrante,
+    SesionSubida,
+)
+from .redimensiones import (
+    EXTENSIONES_IMAGEN,
+    directorio_cache,
+    obtener_variante,
+    parsear_tamano,
+)
+from .storage import es_blob
+from .streaming import (
+    es_descarga_inicial,
+    respuesta_archivo,
+    respuesta_media,
+)
+from .subidas import (
+    ErrorSubida,
+    cancelar_subida,
+    escribir_bloque,
+    estado_subida,
+    finalizar_subida,
+    iniciar_subida,
+)
+from .tarjetas import aprecargar as aprecargar_tarjetas
+from .tarjetas import precargar as precargar_tarjetas
+from .upload_handlers import verificar_subidas
+from .visitas import (
+    PAGINA_DETALLE,
+    PAGINA_GALERIA,
+    aregistrar_visita,
+    registrar_visita,
+)
+
+# Segundos de cache para los blobs direccionados por contenido (un año).
+MAX_AGE_INMUTABLE = 60 * 60 * 24 * 365
 
 
 # ---------------------------------------------------------------------------
 # Listado y detalle
 # ---------------------------------------------------------------------------
 
+def _parametros_listado(request):
+    """Interpreta los filtros y el tamaño de página del listado.
+
+    Returns:
+        Tupla ``(estado, estilo, limite)``.
+    """
+    estado = request.GET.get('estado')
+    if estado not in dict(Banda.ESTADOS):
+        estado = None
+    estilo = entero_positivo(request.GET.get('estilo'), ID_MAXIMO)
+    limite = entero_positivo(request.GET.get('limite'))
+    limite = min(limite, TAMANO_PAGINA_MAXIMO) if limite else TAMANO_PAGINA
+    return estado, estilo, limite
+
+
+def _url_siguiente(request, siguiente):
+    """Retorna la URL de la página siguiente, o ``None`` si no hay."""
+    if not siguiente:
+        return None
+    parametros = request.GET.copy()
+    parametros['cursor'] = siguiente
+    return f'{request.path}?{parametros.urlencode()}'
+
+
+def _json_listado(bandas, url_siguiente):
+    """Arma la respuesta JSON del listado para el scroll infinito."""
+    return JsonResponse({
+        'bandas': [
+            {
+                'id': banda.id,
+                'nombre': banda.nombre,
+                'estado': banda.estado,
+                'descargas': banda.descargas,
+                'imagen': (
+                    banda.imagen_principal.url
+                    if banda.imagen_principal else None
+                ),
+                'estilos': [e.nombre for e in banda.estilos],
+                'url': reverse('banda_detail', args=[banda.id]),
+            }
+            for banda in bandas
+        ],
+        'siguiente': url_siguiente,
+    })
+
+
 def banda_list(request):
-    """Lista todas las bandas registradas.
+    """Lista las bandas registradas, paginadas por cursor.
+
+    Acepta los parámetros ``estado``, ``estilo`` (ID de estilo musical),
+    ``cursor`` (devuelto por la página anterior) y ``limite``. Con
+    ``formato=json`` responde JSON para el scroll infinito.
 
     Args:
         request: Objeto HttpRequest de Django.
 
     Returns:
-        HttpResponse con el listado de bandas.
+        HttpResponse con la página del listado, o JsonResponse con las
+        bandas y la URL de la página siguiente.
     """
-    bandas = Banda.objects.all()
-    context = {'bandas': bandas}
+    estado, estilo, limite = _parametros_listado(request)
+    try:
+        bandas, siguiente = pagina_bandas(
+            bandas_listado(estado, estilo), request.GET.get('cursor'), limite,
+        )
+    except CursorInvalido:
+        return HttpResponseBadRequest("Cursor inválido")
+    precargar_tarjetas(bandas)
+
+    url_siguiente = _url_siguiente(request, siguiente)
+    if request.GET.get('formato') == 'json':
+        return _json_listado(bandas, url_siguiente)
+
+    context = {
+        'bandas': bandas,
+        'siguiente': url_siguiente,
+        'estado': estado,
+        'estilo': estilo,
+        'estados': Banda.ESTADOS,
+        'estilos': EstiloMusical.objects.order_by('nombre'),
+    }
     return render(request, 'bandas/banda_list.html', context)
 
 
+async def banda_list_async(request):
+    """Versión asíncrona de ``banda_list`` para despliegues ASGI.
+
+    Consulta la página, los estilos y las tarjetas con el ORM
+    asíncrono y renderiza en el event loop.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        La misma respuesta que ``banda_list``.
+    """
+    await resolver_usuario(request)
+    estado, estilo, limite = _parametros_listado(request)
+    try:
+        bandas, siguiente = await apagina_bandas(
+            bandas_listado(estado, estilo), request.GET.get('cursor'), limite,
+        )
+    except CursorInvalido:
+        return HttpResponseBadRequest("Cursor inválido")
+    await aprecargar_tarjetas(bandas)
+
+    url_siguiente = _url_siguiente(request, siguiente)
+    if request.GET.get('formato') == 'json':
+        return await en_bucle(_json_listado, bandas, url_siguiente)
+
+    context = {
+        'bandas': bandas,
+        'siguiente': url_siguiente,
+        'estado': estado,
+        'estilo': estilo,
+        'estados': Banda.ESTADOS,
+        'estilos': [e async for e in EstiloMusical.objects.order_by('nombre')],
+    }
+    return await en_bucle(render, request, 'bandas/banda_list.html', context)
+
+
+def explorar_bandas(request):
+    """Explora las bandas aprobadas combinando filtros por estilo.
+
+    Acepta ``estilo`` repetido (``?estilo=1&estilo=5``: bandas con todos
+    esos estilos) y ``cursor`` para paginar. Junto a cada estilo se
+    muestra cuántas bandas quedarían al agregarlo; esos conteos salen
+    del cache (ver ``facetas``) y no se recalculan en cada petición.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        HttpResponse con la página de exploración.
+    """
+    estilos = parsear_estilos(request.GET.getlist('estilo'))
+    try:
+        bandas, siguiente = pagina_bandas(
+            bandas_con_estilos(estilos), request.GET.get('cursor'),
+        )
+    except CursorInvalido:
+        return HttpResponseBadRequest("Cursor inválido")
+    precargar_tarjetas(bandas)
+    total, filas = conteos(estilos)
+
+    def url_con(seleccion):
+        parametros = '&'.join(f'estilo={e}' for e in sorted(seleccion))
+        return f'{request.path}?{parametros}' if parametros else request.path
+
+    facetas = [
+        {
+            'id': estilo_id,
+            'nombre': nombre,
+            'cantidad': cantidad,
+            'seleccionado': estilo_id in estilos,
+            'url': url_con(set(estilos) ^ {estilo_id}),
+        }
+        for estilo_id, nombre, cantidad in filas
+    ]
+    context = {
+        'bandas': bandas,
+        'total': total,
+        'facetas': facetas,
+        'seleccionados': [f for f in facetas if f['seleccionado']],
+        'siguiente': _url_siguiente(request, siguiente),
+        'limpiar': request.path if estilos else None,
+    }
+    return render(request, 'bandas/explorar.html', context)
+
+
+def buscar_bandas(request):
+    """Busca bandas aprobadas por nombre, biografía, estilos o ubicación.
+
+    Acepta los parámetros ``q`` (texto a buscar) y ``pagina``. Con
+    ``formato=json`` responde JSON para el autocompletado y los clientes
+    de la API.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        HttpResponse con los resultados ordenados por relevancia, o
+        JsonResponse con las bandas y el total de coincidencias.
+    """
+    consulta = request.GET.get('q', '').strip()
+    pagina = entero_positivo(request.GET.get('pagina'))
+    pagina = min(pagina, PAGINAS_MAXIMAS) if pagina else 1
+    bandas, total = buscar(consulta, pagina)
+    precargar_tarjetas(bandas)
+
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({
+            'consulta': consulta,
+            'total': total,
+            'pagina': pagina,
+            'bandas': [
+                {
+                    'id': banda.id,
+                    'nombre': banda.nombre,
+                    'estilos': [e.nombre for e in banda.estilos],
+                    'url': reverse('banda_detail', args=[banda.id]),
+                }
+                for banda in bandas
+            ],
+        })
+
+    paginas = min(
+        (total + RESULTADOS_POR_PAGINA - 1) // RESULTADOS_POR_PAGINA,
+        PAGINAS_MAXIMAS,
+    )
+    context = {
+        'consulta': consulta,
+        'bandas': bandas,
+        'total': total,
+        'pagina': pagina,
+        'anterior': pagina - 1 if pagina > 1 else None,
+        'siguiente': pagina + 1 if pagina < paginas else None,
+    }
+    return render(request, 'bandas/buscar.html', context)
+
+
+@require_safe
+def autocompletar_bandas(request):
+    """Sugiere nombres de bandas aprobadas mientras el usuario escribe.
+
+    Responde desde el índice de trigramas en memoria del proceso, sin
+    consultar la base de datos. Acepta ``q`` (texto parcial, tolera
+    errores de tipeo) y ``limite``.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        JsonResponse con la lista ``resultados`` de ``id``, ``nombre``,
+        ``url`` y ``similitud``.
+    """
+    limite = entero_positivo(request.GET.get('limite'))
+    limite = min(limite, RESULTADOS_MAXIMOS) if limite else RESULTADOS
+    resultados = autocompletar(request.GET.get('q', '')[:100], limite)
+    return JsonResponse({
+        'resultados': [
+            {
+                'id': banda_id,
+                'nombre': nombre,
+                'url': reverse('banda_detail', args=[banda_id]),
+                'similitud': similitud,
+            }
+            for banda_id, nombre, similitud in resultados
+        ],
+    })
+
+
+def _consulta_detalle():
+    """Retorna el queryset del detalle con sus relaciones precargadas."""
+    return Banda.objects.select_related('representante').prefetch_related(
+        Prefetch(
+            'integrantes',
+            queryset=Integrante.objects.order_by('fecha_ingreso', 'id'),
+        ),
+        Prefetch(
+            'imagenes',
+            queryset=ImagenBanda.objects.order_by('-fecha_subida', '-id'),
+        ),
+        Prefetch('flyers', queryset=Flyer.objects.order_by('-id')),
+    )
+
+
+def _contexto_detalle(banda):
+    """Arma el contexto del detalle con las relaciones ya precargadas."""
+    return {
+        'banda': banda,
+        'integrantes': banda.integrantes.all(),
+        'imagenes': banda.imagenes.all(),
+        'flyers': banda.flyers.all(),
+    }
+
+
+def _imagenes_detalle(context):
+    """Retorna las imágenes que muestra el detalle de una banda."""
+    return (
+        [context['banda'].imagen]
+        + [integrante.imagen for integrante in context['integrantes']]
+        + [imagen.imagen for imagen in context['imagenes']]
+        + [flyer.imagen for flyer in context['flyers']]
+    )
+
+
 def banda_detail(request, banda_id):
     """Muestra el detalle de una banda específica.
 
+    Carga la banda con su representante, integrantes, galería y flyers
+    en un número fijo de consultas, sin importar cuántos tenga. Los
+    estilos salen del resumen desnormalizado de la banda.
+
     Args:
         request: Objeto HttpRequest de Django.
         banda_id: ID de la banda a consultar.
@@ -52,8 +412,52 @@ def banda_detail(request, banda_id):
     Returns:
         HttpResponse con el detalle de la banda, o 404 si no existe.
     """
-    banda = get_object_or_404(Banda, id=banda_id)
-    return render(request, 'bandas/banda_detail.html', {'banda': banda})
+    banda = get_object_or_404(_consulta_detalle(), id=banda_id)
+    registrar_visita(request, banda.id, PAGINA_DETALLE)
+    context = _contexto_detalle(banda)
+    precargar_imagenes(_imagenes_detalle(context))
+    return render(request, 'bandas/banda_detail.html', context)
+
+
+async def banda_detail_async(request, banda_id):
+    """Versión asíncrona de ``banda_detail`` para despliegues ASGI.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        banda_id: ID de la banda a consultar.
+
+    Returns:
+        La misma respuesta que ``banda_detail``.
+    """
+    await resolver_usuario(request)
+    banda = await aget_object_or_404(_consulta_detalle(), id=banda_id)
+    await aregistrar_visita(request, banda.id, PAGINA_DETALLE)
+    context = _contexto_detalle(banda)
+    await aprecargar_imagenes(_imagenes_detalle(context))
+    return await en_bucle(render, request, 'bandas/banda_detail.html', context)
+
+
+def galeria_banda(request, banda_id):
+    """Muestra todas las imágenes de la galería de una banda.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        banda_id: ID de la banda.
+
+    Returns:
+        HttpResponse con la galería, o 404 si la banda no existe.
+    """
+    banda = get_object_or_404(Banda.objects.only('id', 'nombre'), id=banda_id)
+    registrar_visita(request, banda.id, PAGINA_GALERIA)
+    imagenes = list(
+        ImagenBanda.objects.filter(banda=banda)
+        .order_by('-fecha_subida', '-id')
+    )
+    precargar_imagenes([imagen.imagen for imagen in imagenes])
+    return render(
+        request, 'bandas/galeria.html',
+        {'banda': banda, 'imagenes': imagenes},
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -168,7 +572,7 @@ def eliminar_banda(request, banda_id):
     """
     banda = get_object_or_404(Banda, id=banda_id)
 
-    if banda.representante != request.user:
+    if banda.representante_id != request.user.pk:
         raise PermissionDenied("No tienes permiso para eliminar esta banda.")
 
     banda.delete()
@@ -180,10 +584,12 @@ def eliminar_banda(request, banda_id):
 # ---------------------------------------------------------------------------
 
 @login_required
+@verificar_subidas
 def upload_imagen(request, banda_id):
     """Sube imágenes adicionales para una banda (máximo 5).
 
-    Requiere autenticación.
+    Requiere autenticación. Cada archivo se valida por su contenido y
+    tamaño mientras se recibe (ver ``VerificacionUploadHandler``).
 
     Args:
         request: Objeto HttpRequest de Django.
@@ -195,13 +601,20 @@ def upload_imagen(request, banda_id):
     banda = Banda.objects.get(id=banda_id)
 
     if request.method == 'POST':
-        if len(request.FILES.getlist('imagenes')) > 5:
+        imagenes = request.FILES.getlist('imagenes')
+        errores = request.errores_subida
+        if errores:
+            for error in errores.values():
+                messages.error(request, error)
+            return redirect('upload_imagen', banda_id=banda_id)
+
+        if len(imagenes) > 5:
             messages.error(
                 request, "Solo puedes subir un máximo de 5 imágenes.",
             )
             return redirect('upload_imagen', banda_id=banda_id)
 
-        for imagen in request.FILES.getlist('imagenes'):
+        for imagen in imagenes:
             ImagenBanda.objects.create(banda=banda, imagen=imagen)
 
         messages.success(request, "Imágenes subidas exitosamente.")
@@ -235,10 +648,12 @@ def eliminar_imagen(request, imagen_id):
 
 
 @login_required
+@verificar_subidas
 def actualizar_imagen_representativa(request, banda_id):
     """Actualiza la imagen representativa de una banda.
 
-    Requiere autenticación.
+    Requiere autenticación. La imagen se valida por su contenido y
+    tamaño mientras se recibe.
 
     Args:
         request: Objeto HttpRequest de Django.
@@ -252,6 +667,8 @@ def actualizar_imagen_representativa(request, banda_id):
         form = ImagenRepresentativaForm(
             request.POST, request.FILES, instance=banda,
         )
+        for error in request.errores_subida.values():
+            form.add_error('imagen_principal', error)
         if form.is_valid():
             form.save()
             return redirect('representative_dashboard')
@@ -267,11 +684,14 @@ def actualizar_imagen_representativa(request, banda_id):
 # ---------------------------------------------------------------------------
 
 @login_required
+@verificar_subidas
 def upload_demo(request, banda_id):
     """Sube un archivo de demo para una banda.
 
     Solo acepta el método POST. El archivo se asocia a la banda
-    indicada por ``banda_id``.
+    indicada por ``banda_id``. El demo debe ser MP3 o WAV (según su
+    contenido) y no superar el tamaño máximo; si no, la subida se corta
+    en cuanto se detecta el problema.
 
     Args:
         request: Objeto HttpRequest de Django.
@@ -282,7 +702,16 @@ def upload_demo(request, banda_id):
     """
     if request.method == "POST":
         banda = get_object_or_404(Banda, id=banda_id)
-        banda.demos = request.FILES['demos']
+        demo = request.FILES.get('demos')
+        errores = request.errores_subida
+        if errores or demo is None:
+            messages.error(
+                request,
+                errores.get('demos') or errores.get('__all__')
+                or "No se recibió ningún demo.",
+            )
+            return redirect('representative_dashboard')
+        banda.demos = demo
         banda.save()
         messages.success(request, "Demo subido correctamente.")
         return redirect('representative_dashboard')
@@ -291,6 +720,125 @@ def upload_demo(request, banda_id):
         return redirect('representative_dashboard')
 
 
+# ---------------------------------------------------------------------------
+# Subidas reanudables
+# ---------------------------------------------------------------------------
+
+def _respuesta_error_subida(error):
+    """Convierte un ErrorSubida en una respuesta JSON.
+
+    Args:
+        error: Instancia de ErrorSubida.
+
+    Returns:
+        JsonResponse con el mensaje y, si aplica, los bytes recibidos.
+    """
+    datos = {'error': str(error)}
+    if error.recibido is not None:
+        datos['recibido'] = error.recibido
+    return JsonResponse(datos, status=error.status)
+
+
+@login_required
+@require_POST
+def iniciar_subida_reanudable(request, banda_id):
+    """Inicia una subida reanudable de un demo o una imagen de galería.
+
+    Espera los campos ``destino`` (``'demo'`` o ``'imagen'``),
+    ``nombre`` y ``tamano`` (en bytes).
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        banda_id: ID de la banda destino.
+
+    Returns:
+        JsonResponse (201) con el estado inicial de la sesión.
+
+    Raises:
+        PermissionDenied: Si el usuario no es el representante de la banda.
+    """
+    banda = get_object_or_404(Banda, id=banda_id)
+    if banda.representante_id != request.user.pk:
+        raise PermissionDenied("No tienes permiso para subir archivos a esta banda.")
+
+    try:
+        tamano = int(request.POST.get('tamano', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Tamaño no válido.'}, status=400)
+    try:
+        sesion = iniciar_subida(
+            request.user, banda, request.POST.get('destino'),
+            request.POST.get('nombre'), tamano,
+        )
+    except ErrorSubida as error:
+        return _respuesta_error_subida(error)
+
+    datos = estado_subida(sesion)
+    datos['url'] = reverse('subida_reanudable', args=[sesion.id])
+    return JsonResponse(datos, status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'PUT', 'DELETE'])
+def subida_reanudable(request, sesion_id):
+    """Consulta, recibe un bloque o cancela una subida reanudable.
+
+    * ``GET``: retorna el estado (bytes recibidos) para retomar.
+    * ``PUT``: recibe un bloque en el cuerpo; el parámetro ``offset``
+      indica su posición. Reenviar un bloque ya recibido es inofensivo.
+    * ``DELETE``: cancela la subida y borra el archivo parcial.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        sesion_id: UUID de la sesión de subida.
+
+    Returns:
+        JsonResponse con el estado de la sesión o el error.
+    """
+    sesion = get_object_or_404(
+        SesionSubida, id=sesion_id, usuario=request.user,
+    )
+
+    if request.method == 'DELETE':
+        cancelar_subida(sesion)
+        return JsonResponse({'id': str(sesion_id), 'cancelada': True})
+
+    if request.method == 'PUT':
+        try:
+            desplazamiento = int(request.GET.get('offset', ''))
+            longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return JsonResponse({'error': 'Offset no válido.'}, status=400)
+        try:
+            escribir_bloque(sesion, desplazamiento, request, longitud)
+        except ErrorSubida as error:
+            return _respuesta_error_subida(error)
+
+    return JsonResponse(estado_subida(sesion))
+
+
+@login_required
+@require_POST
+def finalizar_subida_reanudable(request, sesion_id):
+    """Finaliza una subida reanudable y asocia el archivo a la banda.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        sesion_id: UUID de la sesión de subida.
+
+    Returns:
+        JsonResponse con el estado final de la sesión o el error.
+    """
+    sesion = get_object_or_404(
+        SesionSubida, id=sesion_id, usuario=request.user,
+    )
+    try:
+        sesion = finalizar_subida(sesion)
+    except ErrorSubida as error:
+        return _respuesta_error_subida(error)
+    return JsonResponse(estado_subida(sesion))
+
+
 # ---------------------------------------------------------------------------
 # Biografía e integrantes
 # ---------------------------------------------------------------------------
@@ -360,25 +908,314 @@ def editar_integrantes(request, banda_id):
 def descargar_demo(request, banda_id):
     """Sirve el archivo de demo de una banda y cuenta la descarga.
 
+    El archivo se envía en streaming por bloques y admite peticiones
+    parciales (``Range``/``If-Range``), por lo que los reproductores
+    pueden adelantar y los clientes retomar descargas cortadas. Solo
+    se cuenta la descarga cuando la petición comienza en el byte 0; el
+    contador se acumula en un buffer y se vuelca en lotes (ver
+    ``apps.bandas.contadores``).
+
     Args:
         request: Objeto HttpRequest de Django.
         banda_id: ID de la banda.
 
     Returns:
-        HttpResponse con el archivo de audio o Http404 si no existe.
+        StreamingHttpResponse con el archivo de audio (200 o 206).
 
     Raises:
         Http404: Si la banda no tiene demo o no existe.
     """
     banda = get_object_or_404(Banda, id=banda_id)
-
     if not banda.demos:
         raise Http404("Demo no disponible")
+    return _respuesta_demo(request, banda)
 
-    # Incrementar contador de descargas
-    Banda.objects.filter(id=banda_id).update(descargas=F('descargas') + 1)
 
-    # Servir el archivo
-    response = HttpResponse(banda.demos.read(), content_type='audio/mpeg')
-    response['Content-Disposition'] = f'attachment; filename="{banda.nombre}_demo.mp3"'
+def _respuesta_demo(request, banda, asincrona=False):
+    """Arma la respuesta con el archivo del demo y cuenta la descarga.
+
+    Solo se cuentan las respuestas que envían el archivo (200 o 206
+    desde el byte 0): no las reanudaciones, los saltos, los ``HEAD`` ni
+    las respuestas 304, 412 o 416.
+    """
+    extension = os.path.splitext(banda.demos.name)[1].lower()
+    response = respuesta_archivo(
+        request, banda.demos,
+        nombre_descarga=f'{banda.nombre}_demo{extension}',
+        asincrona=asincrona,
+    )
+    if response.status_code in (200, 206) and es_descarga_inicial(request):
+        registrar_descarga(request, banda)
     return response
+
+
+async def descargar_demo_async(request, banda_id):
+    """Versión asíncrona de ``descargar_demo`` para despliegues ASGI.
+
+    La banda se lee con el ORM asíncrono y el archivo se envía con un
+    iterador asíncrono, por lo que ningún hilo queda ocupado durante la
+    transferencia. Contar la descarga (el buffer puede volcar a la base)
+    y resolver el archivo en el almacenamiento por contenido sí pasan
+    por el hilo del ORM, en un único salto.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        banda_id: ID de la banda.
+
+    Returns:
+        StreamingHttpResponse con el archivo de audio (200 o 206).
+
+    Raises:
+        Http404: Si la banda no tiene demo o no existe.
+    """
+    banda = await aget_object_or_404(
+        Banda.objects.only('id', 'nombre', 'demos'), id=banda_id,
+    )
+    if not banda.demos:
+        raise Http404("Demo no disponible")
+    return await sync_to_async(_respuesta_demo)(request, banda, asincrona=True)
+
+
+@require_safe
+def servir_media(request, ruta):
+    """Sirve un archivo subido (imágenes, flyers, demos) desde MEDIA_ROOT.
+
+    Según ``MEDIA_SERVIDOR`` envía el archivo en streaming o delega la
+    transferencia al proxy. Responde 304 si el cliente ya tiene la
+    versión actual. Los archivos y directorios ocultos no se sirven.
+
+    Las rutas de blobs (``blobs/...``) se sirven con caché de un año e
+    ``immutable``, porque su contenido está fijado por el hash. Los
+    nombres lógicos se resuelven a su blob.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        ruta: Ruta relativa del archivo dentro de MEDIA_ROOT.
+
+    Returns:
+        Respuesta con el archivo, un rango del archivo o 304.
+
+    Raises:
+        Http404: Si el archivo no existe o la ruta no es válida.
+    """
+    if any(parte.startswith('.') for parte in ruta.split('/')):
+        raise Http404("Archivo no encontrado")
+    try:
+        ruta_absoluta = default_storage.path(ruta)
+    except SuspiciousFileOperation:
+        raise Http404("Archivo no encontrado")
+    if not os.path.isfile(ruta_absoluta):
+        raise Http404("Archivo no encontrado")
+    if es_blob(ruta):
+        return respuesta_media(
+            request, default_storage, ruta,
+            max_age=MAX_AGE_INMUTABLE, inmutable=True,
+        )
+    return respuesta_media(
+        request, default_storage, ruta,
+        max_age=settings.MEDIA_MAX_AGE,
+    )
+
+
+@require_safe
+def imagen_redimensionada(request, tamano, ruta):
+    """Sirve una imagen subida recortada a uno de los tamaños permitidos.
+
+    La variante se genera en la primera petición y luego se sirve desde
+    el cache en disco (ver ``apps.bandas.redimensiones``).
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        tamano: Tamaño pedido con formato ``<ancho>x<alto>``.
+        ruta: Ruta relativa de la imagen original dentro de MEDIA_ROOT.
+
+    Returns:
+        Respuesta con la variante o 304.
+
+    Raises:
+        Http404: Si el tamaño no está permitido o el original no existe
+            o no es una imagen.
+    """
+    dimensiones = parsear_tamano(tamano)
+    if dimensiones is None:
+        raise Http404("Tamaño no permitido")
+    if (any(parte.startswith('.') for parte in ruta.split('/'))
+            or not ruta.lower().endswith(EXTENSIONES_IMAGEN)):
+        raise Http404("Archivo no encontrado")
+    try:
+        ruta_absoluta = default_storage.path(ruta)
+    except SuspiciousFileOperation:
+        raise Http404("Archivo no encontrado")
+    if not os.path.isfile(ruta_absoluta):
+        raise Http404("Archivo no encontrado")
+
+    try:
+        variante = obtener_variante(ruta_absoluta, *dimensiones)
+    except (OSError, Image.DecompressionBombError):
+        raise Http404("Archivo no encontrado")
+    return respuesta_media(
+        request, FileSystemStorage(location=directorio_cache()), variante,
+        max_age=settings.MEDIA_MAX_AGE,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Estadísticas de descargas
+# ---------------------------------------------------------------------------
+
+# Ventanas de tiempo (en días) admitidas por los endpoints de estadísticas.
+PERIODOS_ESTADISTICAS = (7, 30)
+
+# Segundos que los clientes pueden reutilizar el feed de eventos sin
+# volver a validarlo.
+MAX_AGE_ICAL = 5 * 60
+
+
+def _periodo(request):
+    """Obtiene la ventana de días pedida, restringida a las admitidas.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        Cantidad de días (7 por defecto).
+    """
+    try:
+        dias = int(request.GET.get('dias', PERIODOS_ESTADISTICAS[0]))
+    except ValueError:
+        return PERIODOS_ESTADISTICAS[0]
+    return dias if dias in PERIODOS_ESTADISTICAS else PERIODOS_ESTADISTICAS[0]
+
+
+def tendencias(request):
+    """Retorna en JSON las bandas más descargadas de los últimos días.
+
+    Acepta el parámetro ``dias`` (7 o 30). Los datos salen de los
+    resúmenes diarios, por lo que reflejan la última agregación.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        JsonResponse con la ventana consultada y el ranking.
+    """
+    dias = _periodo(request)
+    bandas = [
+        {
+            'id': banda.id,
+            'nombre': banda.nombre,
+            'descargas': banda.descargas_periodo,
+            'url': reverse('banda_detail', args=[banda.id]),
+        }
+        for banda in top_bandas_periodo(dias)
+    ]
+    return JsonResponse({'dias': dias, 'bandas': bandas})
+
+
+def serie_descargas(request, banda_id):
+    """Retorna en JSON las descargas diarias de una banda para gráficos.
+
+    Acepta el parámetro ``dias`` (7 o 30).
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        banda_id: ID de la banda.
+
+    Returns:
+        JsonResponse con la serie diaria, incluidos los días sin descargas.
+
+    Raises:
+        Http404: Si la banda no existe.
+    """
+    banda = get_object_or_404(Banda.objects.only('id'), id=banda_id)
+    dias = _periodo(request)
+    serie = [
+        {'fecha': fecha.isoformat(), 'descargas': descargas}
+        for fecha, descargas in serie_diaria(banda.id, dias)
+    ]
+    return JsonResponse({'dias': dias, 'serie': serie})
+
+
+# ---------------------------------------------------------------------------
+# Eventos
+# ---------------------------------------------------------------------------
+
+def _contexto_eventos(eventos, anio, mes):
+    """Arma el contexto de la página de eventos con la navegación por mes."""
+    anterior = mes_vecino(anio, mes, -1)
+    siguiente = mes_vecino(anio, mes, 1)
+    return {
+        'eventos': eventos,
+        'mes': datetime.date(anio, mes, 1),
+        'url_anterior': reverse('eventos_mes', args=anterior),
+        'url_siguiente': reverse('eventos_mes', args=siguiente),
+    }
+
+
+@require_safe
+def eventos_proximos(request):
+    """Lista los próximos eventos, del más cercano al más lejano.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        HttpResponse con hasta ``PROXIMOS_MAXIMOS`` eventos desde hoy.
+    """
+    hoy = timezone.localdate()
+    context = _contexto_eventos(
+        proximos_eventos()[:PROXIMOS_MAXIMOS], hoy.year, hoy.month,
+    )
+    context['proximos'] = True
+    return render(request, 'bandas/eventos.html', context)
+
+
+@require_safe
+def eventos_mes(request, anio, mes):
+    """Lista los eventos de un mes calendario.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+        anio: Año del mes.
+        mes: Número de mes (1 a 12).
+
+    Returns:
+        HttpResponse con los eventos del mes y enlaces a los vecinos.
+
+    Raises:
+        Http404: Si el mes no es válido.
+    """
+    try:
+        eventos = list(eventos_del_mes(anio, mes))
+    except (ValueError, OverflowError):
+        raise Http404("Mes inválido")
+    return render(
+        request, 'bandas/eventos.html', _contexto_eventos(eventos, anio, mes),
+    )
+
+
+@require_safe
+@condition(etag_func=lambda request: etag_ical())
+def eventos_ical(request):
+    """Entrega los próximos eventos como feed iCalendar en streaming.
+
+    Responde 304 a las peticiones condicionales (``If-None-Match``)
+    mientras no cambie ningún evento ni el día, con una sola consulta
+    agregada y sin leer los eventos.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        StreamingHttpResponse con el calendario ``text/calendar``.
+    """
+    eventos = proximos_eventos().select_related(None).only(
+        'id', 'titulo', 'descripcion', 'fecha', 'ubicacion', 'fecha_creacion',
+    )
+    respuesta = StreamingHttpResponse(
+        lineas_ical(eventos, request.get_host().split(':')[0]),
+        content_type='text/calendar; charset=utf-8',
+    )
+    respuesta['Content-Disposition'] = 'inline; filename="eventos.ics"'
+    patch_cache_control(respuesta, public=True, max_age=MAX_AGE_ICAL)
+    return respuesta
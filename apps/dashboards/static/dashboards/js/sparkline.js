@@ -0,0 +1,42 @@
+// Dibuja los sparklines del panel de estadísticas del representante.
+// Cada <svg data-sparkline="<serie>" data-url="..."> se completa con la
+// serie indicada del JSON de estadísticas (una sola petición por URL).
+(function () {
+    'use strict';
+
+    var SVG = 'http://www.w3.org/2000/svg';
+
+    function dibujar(svg, valores) {
+        if (!valores || valores.length < 2) {
+            return;
+        }
+        var ancho = svg.clientWidth || 240;
+        var alto = svg.clientHeight || 40;
+        var maximo = Math.max.apply(null, valores) || 1;
+        var puntos = valores.map(function (valor, indice) {
+            var x = indice * ancho / (valores.length - 1);
+            var y = alto - 1 - valor * (alto - 2) / maximo;
+            return x.toFixed(1) + ',' + y.toFixed(1);
+        }).join(' ');
+        var linea = document.createElementNS(SVG, 'polyline');
+        linea.setAttribute('points', puntos);
+        linea.setAttribute('fill', 'none');
+        linea.setAttribute('stroke', 'currentColor');
+        linea.setAttribute('stroke-width', '1.5');
+        svg.appendChild(linea);
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        var pedidos = {};
+        document.querySelectorAll('svg[data-sparkline]').forEach(function (svg) {
+            var url = svg.dataset.url;
+            if (!pedidos[url]) {
+                pedidos[url] = fetch(url, {credentials: 'same-origin'})
+                    .then(function (respuesta) { return respuesta.json(); });
+            }
+            pedidos[url].then(function (datos) {
+                dibujar(svg, (datos.serie || {})[svg.dataset.sparkline]);
+            });
+        });
+    });
+})();
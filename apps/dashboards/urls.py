@@ -14,6 +14,11 @@ urlpatterns = [
         views.representative_dashboard,
         name='representative_dashboard',
     ),
+    path(
+        'representative/estadisticas/',
+        views.estadisticas_representante,
+        name='estadisticas_representante',
+    ),
     # path('admin/', views.admin_dashboard, name='admin_dashboard'),
     # path('moderator/', views.moderator_dashboard, name='moderator_dashboard'),
 ]
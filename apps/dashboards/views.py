@@ -4,13 +4,18 @@ Contiene las vistas protegidas para los paneles de control
 de representantes, administradores y moderadores.
 """
 
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.cache import cache_control
 
+from apps.accounts.autenticacion import banda_id
 from apps.accounts.decorators import (
     admin_required,
     moderator_required,
     representative_required,
 )
+from apps.bandas.derivadas import precargar_imagenes
+from apps.bandas.models import Banda, EstadisticaBanda
 
 
 @representative_required
@@ -18,7 +23,11 @@ def representative_dashboard(request):
     """Muestra el dashboard del representante de banda.
 
     Requiere autenticación y rol de representante.
-    Carga la banda asociada al usuario y la pasa al contexto.
+    Carga la banda asociada al usuario, junto con sus estadísticas
+    precalculadas, y la pasa al contexto; el id de la banda viene con
+    el usuario cacheado, por lo que un representante sin banda no
+    genera ninguna consulta. La cantidad de consultas no depende de la
+    historia de la banda.
 
     Args:
         request: Objeto HttpRequest de Django.
@@ -26,11 +35,47 @@ def representative_dashboard(request):
     Returns:
         HttpResponse con el dashboard del representante.
     """
-    banda = getattr(request.user, 'banda', None)
-    context = {'banda': banda}
+    banda = None
+    pk = banda_id(request.user)
+    if pk is not None:
+        banda = (
+            Banda.objects.select_related('estadistica').filter(pk=pk).first()
+        )
+    if banda is not None:
+        precargar_imagenes([banda.imagen_principal])
+    context = {
+        'banda': banda,
+        'estadistica': getattr(banda, 'estadistica', None),
+    }
     return render(request, 'dashboards/representative_dashboard.html', context)
 
 
+@representative_required
+@cache_control(private=True, max_age=60)
+def estadisticas_representante(request):
+    """Retorna en JSON las series de estadísticas de la banda del usuario.
+
+    Las series (descargas y visitas por día, descargas por semana) salen
+    del resumen precalculado en una sola consulta; alimentan los
+    sparklines del dashboard.
+
+    Args:
+        request: Objeto HttpRequest de Django.
+
+    Returns:
+        JsonResponse con la fecha del cálculo y las series, vacías si la
+        banda todavía no tiene estadísticas.
+    """
+    fila = None
+    pk = banda_id(request.user)
+    if pk is not None:
+        fila = (
+            EstadisticaBanda.objects.filter(banda_id=pk)
+            .values('actualizado', 'serie').first()
+        )
+    return JsonResponse(fila or {'actualizado': None, 'serie': {}})
+
+
 @admin_required
 def admin_dashboard(request):
     """Muestra el dashboard del administrador.
@@ -12,5 +12,19 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Bajo ASGI las vistas públicas usan sus versiones asíncronas (ver
+# apps/bandas/asincronia.py); VISTAS_ASYNC=False vuelve a las síncronas.
+os.environ.setdefault("VISTAS_ASYNC", "True")
 
 application = get_asgi_application()
+
+# Sin un cache compartido no se atiende en producción (ver
+# apps/bandas/checks.py).
+from apps.bandas.checks import exigir_cache_compartido  # noqa: E402
+
+exigir_cache_compartido()
+
+# Construir el índice de autocompletado antes de atender peticiones.
+from apps.bandas.autocompletado import precargar  # noqa: E402
+
+precargar()
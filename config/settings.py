@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,6 +21,40 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'  # URL para servir archivos subidos
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Entrega de archivos subidos: 'stream' (Django), 'x-accel' (nginx)
+# o 'x-sendfile' (Apache/lighttpd).
+MEDIA_SERVIDOR = config('MEDIA_SERVIDOR', default='stream')
+MEDIA_ACCEL_PREFIJO = config('MEDIA_ACCEL_PREFIJO', default='/media-interno/')
+MEDIA_MAX_AGE = config('MEDIA_MAX_AGE', default=3600, cast=int)
+
+# Subidas reanudables por bloques. El directorio debe estar en el mismo
+# sistema de archivos que MEDIA_ROOT para poder mover sin copiar.
+SUBIDAS_DIR = config('SUBIDAS_DIR', default=os.path.join(MEDIA_ROOT, '.subidas'))
+SUBIDAS_TAMANO_BLOQUE = 8 * 1024 * 1024
+SUBIDAS_TAMANO_MAXIMO = {
+    'demo': config('SUBIDAS_MAX_DEMO_MB', default=200, cast=int) * 1024 * 1024,
+    'imagen': config('SUBIDAS_MAX_IMAGEN_MB', default=20, cast=int) * 1024 * 1024,
+}
+
+# Derivadas responsive de las imágenes (anchos en píxeles y calidad 1-100).
+IMAGENES_ANCHOS = config(
+    'IMAGENES_ANCHOS', default='320,640,1280',
+    cast=lambda v: tuple(int(a) for a in v.split(',') if a.strip()),
+)
+IMAGENES_FORMATOS = ('webp', 'jpeg')
+IMAGENES_CALIDAD = config('IMAGENES_CALIDAD', default=80, cast=int)
+# Generación de las derivadas al subir: 'hilo' (en segundo plano, en el
+# mismo proceso) o 'comando' (solo con ``manage.py generar_derivadas``).
+IMAGENES_DERIVADAS = config('IMAGENES_DERIVADAS', default='hilo')
+
+# Redimensionado bajo demanda (/media/r/<ancho>x<alto>/<ruta>): solo se
+# aceptan estos tamaños y el cache en disco se limita a REDIMENSION_CACHE_MAX.
+REDIMENSION_TAMANOS = ('64x64', '150x150', '300x300', '600x315', '1200x630')
+REDIMENSION_CACHE_DIR = config(
+    'REDIMENSION_CACHE_DIR', default=os.path.join(MEDIA_ROOT, '.redimensiones'),
+)
+REDIMENSION_CACHE_MAX = config('REDIMENSION_CACHE_MAX_MB', default=512, cast=int) * 1024 * 1024
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = config('SECRET_KEY')
 
@@ -45,6 +80,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Sirve los estáticos (con hash, precomprimidos) antes que todo lo demás.
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Antes de sesiones y autenticación: decide si la petición lee de
+    # una réplica (ver apps/bandas/replicas.py).
+    "apps.bandas.replicas.MiddlewareReplicas",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -88,6 +128,72 @@ DATABASES = {
     }
 }
 
+# Réplicas de solo lectura para las lecturas públicas anónimas (ver
+# apps/bandas/replicas.py). DATABASE_REPLICAS es una lista separada por
+# comas de NOMBRE o NOMBRE@HOST:PUERTO; el resto de la conexión se toma
+# de la base principal. En los tests las réplicas espejan a 'default'.
+REPLICAS = []
+for _numero, _replica in enumerate(
+    filter(None, config('DATABASE_REPLICAS', default='').split(',')), start=1,
+):
+    _nombre, _, _servidor = _replica.strip().partition('@')
+    _host, _, _puerto = _servidor.partition(':')
+    DATABASES[f'replica{_numero}'] = {
+        **DATABASES['default'],
+        'NAME': _nombre,
+        'HOST': _host or DATABASES['default']['HOST'],
+        'PORT': _puerto or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICAS.append(f'replica{_numero}')
+
+DATABASE_ROUTERS = ['apps.bandas.replicas.RouterReplicas']
+
+# Segundos que un cliente lee de la principal después de escribir.
+REPLICAS_VENTANA = config('REPLICAS_VENTANA', default=10, cast=int)
+# Retraso máximo (segundos) de una réplica para seguir usándola, y
+# segundos que vale cada medición de retraso_replicas.
+REPLICAS_RETRASO_MAXIMO = config('REPLICAS_RETRASO_MAXIMO', default=30, cast=float)
+REPLICAS_RETRASO_VIGENCIA = config('REPLICAS_RETRASO_VIGENCIA', default=300, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# En producción el cache debe ser compartido por todos los procesos
+# (Redis o Memcached): en él se guardan las sesiones, los perfiles de
+# usuario, los sellos de versión y el retraso de las réplicas, y sus
+# invalidaciones deben llegar a todos los procesos. Sin CACHE_URL cada
+# proceso usa su propio cache en memoria, válido solo con un único
+# proceso (desarrollo y tests); con DEBUG=False el servidor no arranca
+# así (ver apps/bandas/checks.py).
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        },
+    }
+elif CACHE_URL.startswith('memcached://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': CACHE_URL.removeprefix('memcached://').split(','),
+        },
+    }
+elif CACHE_URL:
+    raise ImproperlyConfigured(
+        'CACHE_URL debe empezar con redis://, rediss:// o memcached://.'
+    )
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+CACHE_COMPARTIDO = bool(CACHE_URL)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -110,6 +216,23 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'accounts.Usuario'
 
+# Con un cache compartido, las sesiones se leen del cache (con la base
+# como respaldo) y los usuarios de sesión se cachean con sus roles y su
+# banda; ver apps/accounts/autenticacion.py. ModelBackend queda para las
+# sesiones iniciadas antes de agregar el backend cacheado (se puede
+# quitar cuando hayan expirado). Con un cache por proceso, un logout,
+# un cambio de contraseña o de roles no llegaría a los demás procesos:
+# se usan las sesiones en la base y ModelBackend.
+if CACHE_COMPARTIDO:
+    AUTHENTICATION_BACKENDS = [
+        'apps.accounts.autenticacion.BackendCacheado',
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+else:
+    AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -137,8 +260,56 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
+# Los archivos subidos se guardan por contenido (deduplicados) y se sirven
+# con URLs inmutables; ver apps/bandas/storage.py.
+STORAGES = {
+    'default': {
+        'BACKEND': 'apps.bandas.storage.AlmacenamientoContenido',
+    },
+    # Nombres con hash, variantes .gz/.br y PNG optimizados al ejecutar
+    # collectstatic; ver apps/bandas/estaticos.py.
+    'staticfiles': {
+        'BACKEND': 'apps.bandas.estaticos.AlmacenamientoEstaticos',
+    },
+}
+
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = config('STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
+
+# Contadores de descargas con escritura diferida
+# 'local': buffer por proceso; 'cache': buffer en el cache compartido.
+
+DESCARGAS_BUFFER = config('DESCARGAS_BUFFER', default='local')
+DESCARGAS_FLUSH_INTERVALO = config(
+    'DESCARGAS_FLUSH_INTERVALO', default=10, cast=int,
+)
+
+# Visitas a las páginas de las bandas (ver apps/bandas/visitas.py): se
+# acumulan en un buffer circular por proceso de VISITAS_BUFFER_TAMANO
+# eventos y se vuelcan cada VISITAS_FLUSH_INTERVALO segundos
+# (0 = escritura inmediata). Con VISITAS_MUESTREO < 1 se registra solo
+# esa fracción de las visitas, con el peso correspondiente.
+VISITAS_FLUSH_INTERVALO = config(
+    'VISITAS_FLUSH_INTERVALO', default=60, cast=int,
+)
+VISITAS_BUFFER_TAMANO = config(
+    'VISITAS_BUFFER_TAMANO', default=100000, cast=int,
+)
+VISITAS_MUESTREO = config('VISITAS_MUESTREO', default=1.0, cast=float)
+
+# Puestos del ranking de descargas materializado que muestra la landing.
+RANKING_TAMANO = 10
+
+# Autocompletado de nombres (índice de trigramas en memoria por proceso).
+# Cada AUTOCOMPLETADO_REFRESCO segundos se verifica si otro proceso cambió
+# bandas; cada AUTOCOMPLETADO_MAX_EDAD se reconstruye igual (descargas).
+AUTOCOMPLETADO_REFRESCO = config('AUTOCOMPLETADO_REFRESCO', default=5, cast=int)
+AUTOCOMPLETADO_MAX_EDAD = config('AUTOCOMPLETADO_MAX_EDAD', default=900, cast=int)
+
+# Versiones asíncronas de las vistas públicas (landing, listado, detalle
+# y descarga de demos). config/asgi.py lo activa por defecto.
+VISTAS_ASYNC = config('VISTAS_ASYNC', default=False, cast=bool)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
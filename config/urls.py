@@ -16,16 +16,24 @@ Including another URLconf
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from apps.bandas.views import imagen_redimensionada, servir_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('', include('apps.accounts.urls')),  # URLs de la app accounts (incluye login, logout, etc.)
     path('dashboard/', include('apps.dashboards.urls')),  # URLs para los dashboards
     path('bandas/', include('apps.bandas.urls')),  # URLs relacionadas con bandas
-]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Imágenes subidas redimensionadas bajo demanda (tamaños permitidos)
+    re_path(
+        r'^%sr/(?P<tamano>\d+x\d+)/(?P<ruta>.+)$' % settings.MEDIA_URL.lstrip('/'),
+        imagen_redimensionada, name='imagen_redimensionada',
+    ),
+    # Archivos subidos: streaming o delegación al proxy según MEDIA_SERVIDOR
+    re_path(
+        r'^%s(?P<ruta>.+)$' % settings.MEDIA_URL.lstrip('/'),
+        servir_media, name='servir_media',
+    ),
+]
\ No newline at end of file
@@ -14,3 +14,14 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# Sin un cache compartido no se atiende en producción (ver
+# apps/bandas/checks.py).
+from apps.bandas.checks import exigir_cache_compartido  # noqa: E402
+
+exigir_cache_compartido()
+
+# Construir el índice de autocompletado antes de atender peticiones.
+from apps.bandas.autocompletado import precargar  # noqa: E402
+
+precargar()